@@ -1,18 +1,6 @@
 # API v1 package
-from . import (
-    routes_wallet,
-    routes_transactions,
-    routes_users,
-    routes_health,
-    routes_payments,
-    routes_gateway,
-    routes_merchant,
-    routes_analytics,
-    routes_recurring,
-    routes_billsplit,
-    routes_budget,
-)
-
+# Route modules are imported on demand by main.py (see ROUTERS there),
+# so optional features that are disabled are never loaded.
 __all__ = [
     "routes_wallet",
     "routes_transactions",
@@ -11,11 +11,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from database import get_db
+from core.responses import rows_response
 from core.security import get_current_user
 from models import User
 from schemas import BillSplitCreate, BillSplitResponse
 from services.bill_split_service import (
     create_bill_split,
+    get_bill_split_data,
     get_user_bill_splits,
     settle_bill_participant
 )
@@ -45,7 +47,7 @@ def create_bill(
     - Person 2: $30
     - Person 3: $30
     """
-    return create_bill_split(
+    bill_split = create_bill_split(
         db,
         current_user.id,
         request.title,
@@ -54,6 +56,7 @@ def create_bill(
         request.participants,
         request.currency
     )
+    return get_bill_split_data(db, bill_split.id)
 
 
 @router.get("/list", response_model=list[BillSplitResponse], summary="Get my bill splits")
@@ -62,9 +65,10 @@ def list_bills(
     db: Session = Depends(get_db)
 ):
     """
-    Get all bill splits where you're creator or participant.
+    Get all bill splits where you're creator or participant
+    (rows, rendered with orjson).
     """
-    return get_user_bill_splits(db, current_user.id)
+    return rows_response(get_user_bill_splits(db, current_user.id), BillSplitResponse)
 
 
 @router.post("/{bill_split_id}/settle/{participant_id}", summary="Settle bill share")
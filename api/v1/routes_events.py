@@ -0,0 +1,152 @@
+"""
+Live update routes - server-sent events.
+
+WHAT THIS FILE DOES:
+- GET /events/stream: one long-lived response that pushes balance
+  changes and new transactions of the logged-in user's wallets
+
+LEARN:
+- Server-sent events (SSE) = a plain HTTP response that never ends;
+  the server writes "event: ...\\ndata: ...\\n\\n" blocks as things happen.
+  Browsers read it with `new EventSource(url)` and reconnect by themselves
+- EventSource can't send an Authorization header, so the token may also
+  be given as ?access_token=...
+- The database session is closed after each step, before streaming
+  starts: an open stream must not hold one of the pool's connections
+  for an hour, and a request waiting for a thread must not hold one
+  either (with a burst of reconnects, that starves the pool)
+- The subscription is ended by the response, not the body generator: a
+  client that disconnects before the first chunk never starts the
+  generator, so its `finally` would never run
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from config import settings
+from core.event_hub import HEARTBEAT, RESYNC, Subscription, hub
+from core.security import get_user_for_token
+from database import get_db
+from services.wallet_events import format_event
+from services.wallet_service import get_cached_wallets
+
+router = APIRouter()
+
+
+def _bearer_token(request: Request, access_token: Optional[str]) -> str:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    if access_token:
+        return access_token
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def _event_stream(subscription: Subscription, wallets: list[dict]):
+    """The SSE body: reconnect delay, current balances, then live events."""
+    loop = subscription.loop
+    deadline = loop.time() + settings.SSE_MAX_STREAM_SECONDS
+    yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+    for wallet in wallets:
+        yield format_event("balance", wallet)
+    while True:
+        item = await subscription.next()
+        if item is HEARTBEAT:
+            if loop.time() >= deadline:
+                return  # the browser reconnects (with a fresh token)
+            yield ": heartbeat\n\n"
+        elif item is RESYNC:
+            yield format_event("resync", {})
+        else:
+            yield item
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    The SSE response; ends its subscription however the response ends.
+
+    A generator's `finally` only runs once the generator has started: a
+    client that disconnects before the first chunk (or a cancelled
+    response) would leave the subscription counting against
+    SSE_MAX_STREAMS_PER_USER until the process restarts.
+    """
+
+    def __init__(self, subscription: Subscription, wallets: list[dict]):
+        super().__init__(
+            _event_stream(subscription, wallets),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            hub.unsubscribe(self.subscription)
+
+
+def _user_id(db: Session, token: str) -> int:
+    try:
+        return get_user_for_token(db, token).id
+    finally:
+        db.close()
+
+
+def _balances(db: Session, user_id: int) -> list[dict]:
+    try:
+        return [
+            {"wallet_id": wallet["id"], "balance": wallet["balance"], "currency": wallet["currency"]}
+            for wallet in get_cached_wallets(db, user_id)
+        ]
+    finally:
+        db.close()
+
+
+@router.get("/stream", summary="Live balance and transaction updates (server-sent events)")
+async def stream_events(
+    request: Request,
+    access_token: Optional[str] = Query(None, description="JWT, for clients that can't send headers (EventSource)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream balance changes and new transactions as they happen.
+
+    WHAT IT DOES:
+    1. Authenticates (Authorization header or ?access_token=)
+    2. Subscribes to your events, then sends every wallet's current balance
+    3. Pushes events as money moves, and a heartbeat comment when idle
+    4. Closes after SSE_MAX_STREAM_SECONDS (the browser reconnects)
+
+    EVENTS:
+    - balance: {"wallet_id": 1, "balance": 250.0, "currency": "USD"}
+    - transaction: {"id": 42, "wallet_id": 1, "amount": 50.0, "transaction_type": "transfer", ...}
+    - resync: you were too slow to read and missed events - refetch balances
+
+    EXAMPLE (browser):
+    new EventSource("/api/v1/events/stream?access_token=...")
+        .addEventListener("balance", e => show(JSON.parse(e.data)))
+    """
+    token = _bearer_token(request, access_token)
+    user_id = await run_in_threadpool(_user_id, db, token)
+    # Subscribe before reading balances, so no change falls in between
+    subscription = hub.subscribe(user_id, limit=settings.SSE_MAX_STREAMS_PER_USER)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {settings.SSE_MAX_STREAMS_PER_USER} open streams per user"
+        )
+    try:
+        wallets = await run_in_threadpool(_balances, db, user_id)
+    except Exception:
+        hub.unsubscribe(subscription)
+        raise
+
+    return EventStreamResponse(subscription, wallets)
@@ -1,18 +1,21 @@
 """
 Payment Gateway routes - Razorpay integration.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from database import get_db
 from schemas import (
     CreateGatewayOrderRequest, GatewayOrderResponse,
-    VerifyPaymentRequest, TransactionResponse, PaymentStatusResponse
+    VerifyPaymentRequest, GatewayPaymentResult, PaymentStatusResponse
 )
 from services.payment_gateway_service import (
-    create_razorpay_order,
-    add_money_via_gateway,
-    get_payment_status
+    create_gateway_order,
+    get_gateway_payment_result,
+    get_payment_status,
+    process_gateway_events_in_background,
+    record_gateway_event
 )
 from core.security import get_current_user
 from models import User
@@ -35,15 +38,17 @@ def create_order(
     2. Returns order_id and key_id
     3. Frontend uses this to process payment
     4. After payment, call /verify endpoint
+    
+    The order is saved with the wallet to top up; the webhook credits
+    that wallet when the payment is captured.
     """
-    # Create order in Razorpay
-    order = create_razorpay_order(
+    order = create_gateway_order(
+        db=db,
+        user_id=current_user.id,
         amount=order_data.amount,
         currency=order_data.currency,
-        notes={
-            "user_id": str(current_user.id),
-            "description": order_data.description or "Wallet top-up"
-        }
+        wallet_id=order_data.wallet_id,
+        description=order_data.description
     )
     
     return GatewayOrderResponse(
@@ -55,45 +60,34 @@ def create_order(
     )
 
 
-@router.post("/verify", response_model=TransactionResponse, summary="Verify and complete payment")
+@router.post("/verify", response_model=GatewayPaymentResult, summary="Check a completed checkout")
 def verify_payment(
     payment_data: VerifyPaymentRequest,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Verify payment and add money to wallet.
+    Check the result of a payment after Razorpay checkout.
     
     WHAT IT DOES:
     1. Verifies payment signature from Razorpay
-    2. Confirms payment was successful
-    3. Adds money to user's wallet
-    4. Creates transaction record
+    2. Returns "completed" with the deposit once the webhook has credited
+       the wallet, "failed" if the payment failed
+    3. Otherwise answers 202 "pending" - poll again in a second or two
     
-    IMPORTANT: Call this after Razorpay payment succeeds!
+    This is a database read only; it never waits for Razorpay.
     """
-    transaction = add_money_via_gateway(
+    result = get_gateway_payment_result(
         db=db,
-        wallet_id=payment_data.wallet_id,
         user_id=current_user.id,
-        amount=payment_data.amount,
         razorpay_order_id=payment_data.razorpay_order_id,
         razorpay_payment_id=payment_data.razorpay_payment_id,
-        razorpay_signature=payment_data.razorpay_signature,
-        description=payment_data.description
-    )
-    
-    return TransactionResponse(
-        id=transaction.id,
-        user_id=transaction.user_id,
-        wallet_id=transaction.wallet_id,
-        amount=transaction.amount,
-        transaction_type=transaction.transaction_type,
-        status=transaction.status,
-        description=transaction.description,
-        recipient_wallet_id=transaction.recipient_wallet_id,
-        created_at=transaction.created_at
+        razorpay_signature=payment_data.razorpay_signature
     )
+    if result["status"] == "pending":
+        response.status_code = status.HTTP_202_ACCEPTED
+    return result
 
 
 @router.get("/status/{payment_id}", response_model=PaymentStatusResponse, summary="Check payment status")
@@ -120,20 +114,32 @@ def check_payment_status(
 
 
 @router.post("/webhook", summary="Razorpay webhook endpoint")
-async def razorpay_webhook(request: dict):
+async def razorpay_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """
     Razorpay webhook endpoint.
     
     WHAT IT DOES:
-    1. Receives payment events from Razorpay
-    2. Updates transaction status
-    3. Handles payment.success, payment.failed, etc.
+    1. Checks the X-Razorpay-Signature header (HMAC of the raw body)
+    2. Stores the event once per X-Razorpay-Event-Id
+    3. Answers right away; the event is applied after the response
+       (payment.captured / order.paid credit the wallet)
     
-    NOTE: Configure this URL in Razorpay dashboard webhooks section.
+    NOTE: Configure this URL in Razorpay dashboard webhooks section,
+    with RAZORPAY_WEBHOOK_SECRET as the secret.
     """
-    # TODO: Implement webhook handler
-    # Verify webhook signature
-    # Handle different event types (payment.success, payment.failed, etc.)
-    # Update transaction status accordingly
+    body = await request.body()
+    result = await run_in_threadpool(
+        record_gateway_event,
+        db,
+        body,
+        request.headers.get("X-Razorpay-Signature"),
+        request.headers.get("X-Razorpay-Event-Id")
+    )
+    if not result["duplicate"]:
+        background_tasks.add_task(process_gateway_events_in_background, db.get_bind())
     
-    return {"status": "received"}
+    return {"status": "received", **result}
@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from core import metrics
+from services.health_service import get_liveness, get_readiness
 
 
 router = APIRouter()
@@ -8,3 +12,40 @@ router = APIRouter()
 def health_check():
     return {"status": "ok"}
 
+
+@router.get("/health/live", summary="Liveness probe")
+def liveness_probe():
+    """
+    Liveness probe - is the process alive?
+
+    Never touches the database, so a database outage does not
+    make the orchestrator restart healthy containers.
+    """
+    return get_liveness()
+
+
+@router.get("/health/ready", summary="Readiness probe")
+def readiness_probe():
+    """
+    Readiness probe - can this instance serve traffic?
+
+    WHAT IT DOES:
+    1. Runs timed dependency checks (database, pool, schema, outbox, scheduler)
+    2. Returns per-check status and latency
+    3. Returns HTTP 503 if a critical check fails
+
+    Results are cached for a few seconds (HEALTH_CACHE_SECONDS).
+    """
+    result = get_readiness()
+    status_code = 503 if result["status"] == "fail" else 200
+    return JSONResponse(status_code=status_code, content=result)
+
+
+@router.get("/metrics", summary="Internal metrics")
+def get_metrics():
+    """
+    Internal metrics (cache hit rates, queue depths, job stats).
+
+    Each service registers its own numbers in core.metrics.
+    """
+    return metrics.snapshot()
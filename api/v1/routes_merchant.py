@@ -5,24 +5,45 @@ WHAT THIS FILE DOES:
 - Handles merchant account creation
 - Merchant statistics
 - Merchant management
+- Webhook endpoints (payments pushed to the merchant's server)
 
 LEARN:
 - Routes = API endpoints (URLs)
 - Each function handles one endpoint
 - Uses FastAPI decorators (@router.post, etc.)
 """
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from database import get_db
 from core.security import get_current_user
 from models import User
-from schemas import MerchantCreate, MerchantResponse, MerchantStatsResponse
+from schemas import (
+    MerchantCreate,
+    MerchantResponse,
+    MerchantSalesResponse,
+    MerchantStatsResponse,
+    WebhookDeliveryResponse,
+    WebhookEndpointCreate,
+    WebhookEndpointCreated,
+    WebhookEndpointResponse
+)
+from services.analytics_service import get_merchant_sales_series
 from services.merchant_service import (
     create_merchant,
     get_user_merchant,
+    get_merchant_revenue,
     get_merchant_stats
 )
+from services.merchant_webhook_service import (
+    create_webhook_endpoint,
+    delete_webhook_endpoint,
+    list_webhook_deliveries,
+    list_webhook_endpoints
+)
 
 router = APIRouter()
 
@@ -58,9 +79,12 @@ def get_my_merchant(
     
     WHAT IT DOES:
     1. Gets merchant account for current user
-    2. Returns merchant details
+    2. Returns merchant details (revenue includes any revenue shards)
     """
-    return get_user_merchant(db, current_user.id)
+    merchant = get_user_merchant(db, current_user.id)
+    return MerchantResponse.model_validate(merchant).model_copy(
+        update={"total_revenue": get_merchant_revenue(db, merchant.id)}
+    )
 
 
 @router.get("/stats", response_model=MerchantStatsResponse, summary="Get merchant statistics")
@@ -85,3 +109,86 @@ def get_stats(
     }
     """
     return get_merchant_stats(db, current_user.id)
+
+
+@router.get("/sales", response_model=MerchantSalesResponse, summary="Get merchant sales chart")
+def get_sales(
+    bucket: str = Query("day", description="hour, day or week"),
+    start: Optional[datetime] = Query(None, description="Range start (default: 48 hours / 30 days / 26 weeks before end)"),
+    end: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get revenue per hour, day or week (for charts).
+    
+    WHAT IT DOES:
+    1. Sums payments into your merchant wallets per bucket
+    2. Returns every bucket in the range, 0 where nothing was sold
+    3. Uses wider buckets if the range would have too many points
+    
+    EXAMPLE OUTPUT:
+    {
+        "bucket": "day",
+        "bucket_seconds": 86400,
+        "points": [{"start": "2024-05-01T00:00:00", "revenue": 120.0, "payments": 4}, ...]
+    }
+    """
+    merchant = get_user_merchant(db, current_user.id)
+    return get_merchant_sales_series(db, merchant, bucket, start, end)
+
+
+@router.post("/webhooks", response_model=WebhookEndpointCreated, summary="Add a webhook endpoint")
+def add_webhook(
+    request: WebhookEndpointCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a POST on your server for every payment you receive.
+    
+    WHAT IT DOES:
+    1. Saves the URL and generates its signing secret
+    2. Returns the secret - store it, it is not shown again
+    
+    Every payment into your wallets (payment link, payment request or
+    transfer) is POSTed as {"id": "evt_...", "type": "payment.received",
+    "data": {...}}. Check the X-RosePay-Signature header
+    ("t=<time>,v1=<HMAC-SHA256 of '<time>.<body>' with the secret>")
+    and ignore event ids you have already seen. Non-2xx answers are retried.
+    """
+    return create_webhook_endpoint(db, current_user.id, request.url, request.max_concurrency)
+
+
+@router.get("/webhooks", response_model=list[WebhookEndpointResponse], summary="List webhook endpoints")
+def get_webhooks(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """List your webhook endpoints (secrets are not shown)."""
+    return list_webhook_endpoints(db, current_user.id)
+
+
+@router.delete("/webhooks/{endpoint_id}", response_model=WebhookEndpointResponse, summary="Remove a webhook endpoint")
+def remove_webhook(
+    endpoint_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stop sending to an endpoint. Deliveries still queued for it are dropped."""
+    return delete_webhook_endpoint(db, current_user.id, endpoint_id)
+
+
+@router.get(
+    "/webhooks/{endpoint_id}/deliveries",
+    response_model=list[WebhookDeliveryResponse],
+    summary="Webhook delivery log"
+)
+def get_webhook_deliveries(
+    endpoint_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recent deliveries to one endpoint, newest first: status, attempts, last error."""
+    return list_webhook_deliveries(db, current_user.id, endpoint_id, limit)
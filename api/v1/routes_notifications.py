@@ -0,0 +1,71 @@
+"""
+Notification routes - preferences and the in-app inbox.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from database import get_db
+from schemas import NotificationPreferences, NotificationResponse
+from services.notification_service import (
+    get_preferences,
+    list_inbox,
+    mark_inbox_read,
+    update_preferences
+)
+from core.security import get_current_user
+from models import User
+
+router = APIRouter()
+
+
+@router.get("/preferences", response_model=NotificationPreferences, summary="Get notification preferences")
+def read_preferences(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get how you are notified about your transactions."""
+    return get_preferences(db, current_user.id)
+
+
+@router.put("/preferences", response_model=NotificationPreferences, summary="Set notification preferences")
+def save_preferences(
+    preferences: NotificationPreferences,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Choose how you are notified about your transactions.
+    
+    WHAT IT DOES:
+    1. Turns email / in-app notifications on or off
+    2. Sets a webhook URL to receive them as JSON (empty = off)
+    3. digest_minutes > 0: one message per window listing every
+       transaction in it, instead of one message per transaction
+    """
+    return update_preferences(db, current_user.id, preferences.model_dump())
+
+
+@router.get("", response_model=List[NotificationResponse], summary="In-app notifications")
+def read_inbox(
+    limit: int = 50,
+    before_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Your in-app notifications, newest first.
+    
+    For the next page, pass the id of the last one as before_id.
+    """
+    return list_inbox(db, current_user.id, limit, before_id)
+
+
+@router.post("/read", summary="Mark notifications read")
+def read_all(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Mark all your in-app notifications read."""
+    return {"marked_read": mark_inbox_read(db, current_user.id)}
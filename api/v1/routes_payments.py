@@ -1,21 +1,31 @@
 """
 Payment routes - payment links, QR codes, payment requests.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import get_db
 from schemas import (
     PaymentLinkCreate, PaymentLinkResponse, PayLinkRequest,
-    PaymentRequestCreate, PaymentRequestResponse, AcceptPaymentRequest,
-    QRCodeResponse, TransactionResponse
+    PaymentLinkBulkCreate, PaymentLinkBulkResponse, PaymentLinkWithQRResponse,
+    PaymentRequestCreate, PaymentRequestResponse, AcceptPaymentRequest, PendingRequestCountResponse,
+    AcceptPaymentRequestsBatch, BatchAcceptResponse,
+    QRCodeResponse, QRBatchRequest, TransactionResponse
+)
+from services.payment_link_service import (
+    create_payment_link, create_payment_links_bulk, get_payment_link_details, pay_via_link
 )
-from services.payment_link_service import create_payment_link, get_payment_link, pay_via_link
 from services.payment_request_service import (
-    create_payment_request, get_payment_requests, accept_payment_request
+    create_payment_request, get_payment_requests, accept_payment_request, accept_payment_requests_batch,
+    decline_payment_request, get_pending_count, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
+from services.qr_service import (
+    generate_payment_qr, generate_wallet_qr, render_qr, qr_content_hash,
+    payment_link_url, wallet_url, normalize_png_size, QR_MEDIA_TYPES
 )
-from services.qr_service import generate_payment_qr, generate_wallet_qr
+from core.http_cache import etag_matches
 from core.security import get_current_user
 from models import User
 from config import settings
@@ -23,6 +33,44 @@ from config import settings
 router = APIRouter()
 
 
+def qr_output_response(
+    request: Request,
+    data: str,
+    output_format: str,
+    size: Optional[int],
+    public: bool
+) -> Response:
+    """
+    Build a raw QR response (PNG/SVG/JSON matrix) with HTTP caching headers.
+    
+    WHAT IT DOES:
+    1. Computes the ETag from the QR content (no rendering needed)
+    2. Returns 304 Not Modified if the client already has it
+    3. Otherwise returns the (cached) output bytes
+    """
+    if output_format not in QR_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unsupported QR format. Use one of: {', '.join(QR_MEDIA_TYPES)}"
+        )
+    
+    size = normalize_png_size(size) if output_format == "png" else None
+    etag = f'"{qr_content_hash(data, output_format, size)}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"{'public' if public else 'private'}, max-age={settings.QR_HTTP_MAX_AGE}",
+    }
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(
+        content=render_qr(data, output_format, size),
+        media_type=QR_MEDIA_TYPES[output_format],
+        headers=headers
+    )
+
+
 # ============ PAYMENT LINKS ============
 
 @router.post("/link/create", response_model=PaymentLinkResponse, summary="Create payment link")
@@ -63,6 +111,57 @@ def create_link(
     return response
 
 
+@router.post("/link/bulk-create", response_model=PaymentLinkBulkResponse, summary="Create many payment links")
+def bulk_create_links(
+    bulk_data: PaymentLinkBulkCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many payment links in one request (e.g. an invoicing run).
+    
+    WHAT IT DOES:
+    1. Creates all links in one transaction (all or nothing)
+    2. Optionally renders a QR code for each (include_qr=true),
+       in parallel worker processes
+    3. Returns the links in the order they were sent
+    """
+    rows = create_payment_links_bulk(
+        db,
+        current_user.id,
+        [link.model_dump() for link in bulk_data.links]
+    )
+    
+    base_url = "http://127.0.0.1:8000"
+    qr_codes = [None] * len(rows)
+    if bulk_data.include_qr:
+        import base64
+        from services.qr_batch_service import render_many
+        
+        rendered = render_many(
+            ((row["link_id"], payment_link_url(row["link_id"], base_url)) for row in rows), "png"
+        )
+        qr_codes = [
+            f"data:image/png;base64,{base64.b64encode(content).decode()}" for _name, content in rendered
+        ]
+    
+    links = [
+        PaymentLinkWithQRResponse(
+            id=row["id"],
+            link_id=row["link_id"],
+            amount=row["amount"],
+            description=row["description"],
+            is_active=True,
+            expires_at=row["expires_at"],
+            created_at=row["created_at"],
+            payment_url=f"{base_url}/api/v1/payments/link/{row['link_id']}",
+            qr_code=qr_code
+        )
+        for row, qr_code in zip(rows, qr_codes)
+    ]
+    return PaymentLinkBulkResponse(count=len(links), links=links)
+
+
 @router.get("/link/{link_id}", response_model=PaymentLinkResponse, summary="Get payment link details")
 def get_link_details(
     link_id: str,
@@ -70,19 +169,22 @@ def get_link_details(
 ):
     """
     Get payment link details (public endpoint - no auth needed).
+    
+    Served from the link cache, so repeated lookups (and lookups of
+    unknown ids) don't query the database.
     """
-    payment_link = get_payment_link(db, link_id)
+    details = get_payment_link_details(db, link_id)
     
     base_url = "http://127.0.0.1:8000"
     return PaymentLinkResponse(
-        id=payment_link.id,
-        link_id=payment_link.link_id,
-        amount=payment_link.amount,
-        description=payment_link.description,
-        is_active=bool(payment_link.is_active),
-        expires_at=payment_link.expires_at,
-        created_at=payment_link.created_at,
-        payment_url=f"{base_url}/api/v1/payments/link/{payment_link.link_id}"
+        id=details["id"],
+        link_id=details["link_id"],
+        amount=details["amount"],
+        description=details["description"],
+        is_active=details["is_active"],
+        expires_at=details["expires_at"],
+        created_at=details["created_at"],
+        payment_url=f"{base_url}/api/v1/payments/link/{details['link_id']}"
     )
 
 
@@ -113,7 +215,7 @@ def get_link_qr(
     """
     Get QR code for payment link.
     """
-    payment_link = get_payment_link(db, link_id)
+    get_payment_link_details(db, link_id)
     qr_code = generate_payment_qr(link_id)
     
     return QRCodeResponse(
@@ -122,6 +224,80 @@ def get_link_qr(
     )
 
 
+QR_SIZE_QUERY = Query(None, description="PNG width/height in pixels (64-2048); ignored for svg/json")
+
+
+@router.get("/link/{link_id}/qr.{output_format}", summary="Get payment link QR code (png/svg/json)")
+def get_link_qr_output(
+    link_id: str,
+    output_format: str,
+    request: Request,
+    size: Optional[int] = QR_SIZE_QUERY,
+    db: Session = Depends(get_db)
+):
+    """
+    Get payment link QR code in a specific format.
+    
+    FORMATS:
+    - qr.png: raster image, optionally ?size=256 for a compact image
+    - qr.svg: vector image (best for printed merchant standees)
+    - qr.json: raw module matrix for drawing on the client
+    
+    Smaller and faster than the base64 JSON version, and cacheable:
+    send back the ETag in If-None-Match to get 304 Not Modified.
+    """
+    get_payment_link_details(db, link_id)
+    return qr_output_response(request, payment_link_url(link_id), output_format, size, public=True)
+
+
+@router.post("/qr/batch", summary="Render many QR codes (ZIP or printable SVG sheet)")
+def get_qr_batch(
+    batch: QRBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Render QR codes for many of your payment links and wallets at once.
+    
+    WHAT IT DOES:
+    1. Checks you own every link/wallet (404 if any is not found)
+    2. Renders the QR codes in parallel worker processes
+    3. Streams the result while rendering:
+       - output="zip": one file per QR (image_format png or svg) + manifest.json
+       - output="sheet": one printable SVG, A4 pages with 12 labelled QRs each
+    
+    Great for merchants setting up hundreds of counters.
+    """
+    from services.qr_batch_service import (
+        resolve_batch_items, stream_svg_sheet, stream_zip, ZIP_IMAGE_FORMATS
+    )
+    
+    if batch.output not in ("zip", "sheet"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="output must be 'zip' or 'sheet'"
+        )
+    if batch.output == "zip" and batch.image_format not in ZIP_IMAGE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"image_format must be one of: {', '.join(ZIP_IMAGE_FORMATS)}"
+        )
+    
+    items = resolve_batch_items(db, current_user.id, batch.link_ids, batch.wallet_ids)
+    
+    if batch.output == "sheet":
+        return StreamingResponse(
+            stream_svg_sheet(items),
+            media_type="image/svg+xml",
+            headers={"Content-Disposition": 'attachment; filename="qr-sheet.svg"'}
+        )
+    return StreamingResponse(
+        stream_zip(items, batch.image_format, batch.size),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="qr-codes.zip"'}
+    )
+
+
 # ============ PAYMENT REQUESTS ============
 
 @router.post("/request", response_model=PaymentRequestResponse, summary="Request money from someone")
@@ -157,15 +333,14 @@ def request_money(
     )
 
 
-@router.get("/request/received", response_model=List[PaymentRequestResponse], summary="Get received payment requests")
-def get_received_requests(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def request_page_response(response: Response, requests: list, limit: int) -> list:
     """
-    Get payment requests you received (people requesting money from you).
+    Convert a page of requests and set the X-Next-Cursor header.
+    
+    The header is the `before_id` for the next page (absent on the last page).
     """
-    requests = get_payment_requests(db, current_user.id, "received")
+    if len(requests) == limit:
+        response.headers["X-Next-Cursor"] = str(requests[-1].id)
     
     return [
         PaymentRequestResponse(
@@ -181,28 +356,56 @@ def get_received_requests(
     ]
 
 
+REQUEST_LIMIT_QUERY = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Requests per page")
+REQUEST_CURSOR_QUERY = Query(None, description="Return requests older than this id (X-Next-Cursor of the previous page)")
+
+
+@router.get("/request/received", response_model=List[PaymentRequestResponse], summary="Get received payment requests")
+def get_received_requests(
+    response: Response,
+    limit: int = REQUEST_LIMIT_QUERY,
+    before_id: Optional[int] = REQUEST_CURSOR_QUERY,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get pending payment requests you received (people requesting money from you).
+    
+    Newest first, `limit` per page. For the next page pass the
+    X-Next-Cursor response header as `before_id`.
+    """
+    requests = get_payment_requests(db, current_user.id, "received", limit, before_id)
+    return request_page_response(response, requests, limit)
+
+
+@router.get("/request/received/count", response_model=PendingRequestCountResponse, summary="Count pending payment requests")
+def get_received_requests_count(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Number of pending requests you received (for the inbox badge).
+    
+    Reads a maintained counter - no counting over the requests table.
+    """
+    return PendingRequestCountResponse(pending=get_pending_count(db, current_user.id))
+
+
 @router.get("/request/sent", response_model=List[PaymentRequestResponse], summary="Get sent payment requests")
 def get_sent_requests(
+    response: Response,
+    limit: int = REQUEST_LIMIT_QUERY,
+    before_id: Optional[int] = REQUEST_CURSOR_QUERY,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get payment requests you sent to others.
-    """
-    requests = get_payment_requests(db, current_user.id, "sent")
     
-    return [
-        PaymentRequestResponse(
-            id=req.id,
-            requester_id=req.requester_id,
-            recipient_id=req.recipient_id,
-            amount=req.amount,
-            description=req.description,
-            status=req.status,
-            created_at=req.created_at
-        )
-        for req in requests
-    ]
+    Newest first, paginated like /request/received.
+    """
+    requests = get_payment_requests(db, current_user.id, "sent", limit, before_id)
+    return request_page_response(response, requests, limit)
 
 
 @router.post("/request/{request_id}/accept", response_model=TransactionResponse, summary="Accept and pay a payment request")
@@ -224,6 +427,48 @@ def accept_request(
     return accept_payment_request(db, request_id, request_data.wallet_id, current_user.id)
 
 
+@router.post("/request/accept-batch", response_model=BatchAcceptResponse, summary="Accept and pay many payment requests")
+def accept_requests_batch(
+    request_data: AcceptPaymentRequestsBatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Accept and pay many payment requests from one wallet (e.g. settling
+    up group expenses).
+    
+    WHAT IT DOES:
+    1. Pays every request that can be paid, all in one transaction
+    2. Returns an outcome per request (accepted, or why not)
+    3. Pays nothing if the wallet can't cover the total
+    """
+    return accept_payment_requests_batch(
+        db, request_data.request_ids, request_data.wallet_id, current_user.id
+    )
+
+
+@router.post("/request/{request_id}/decline", response_model=PaymentRequestResponse, summary="Decline a payment request")
+def decline_request(
+    request_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Decline a payment request you received (no money moves).
+    """
+    payment_request = decline_payment_request(db, request_id, current_user.id)
+    
+    return PaymentRequestResponse(
+        id=payment_request.id,
+        requester_id=payment_request.requester_id,
+        recipient_id=payment_request.recipient_id,
+        amount=payment_request.amount,
+        description=payment_request.description,
+        status=payment_request.status,
+        created_at=payment_request.created_at
+    )
+
+
 # ============ QR CODES ============
 
 @router.get("/wallet/{wallet_id}/qr", response_model=QRCodeResponse, summary="Get QR code for wallet")
@@ -246,3 +491,21 @@ def get_wallet_qr(
         qr_code=qr_code,
         data=f"wallet/{wallet_id}"
     )
+
+
+@router.get("/wallet/{wallet_id}/qr.{output_format}", summary="Get wallet QR code (png/svg/json)")
+def get_wallet_qr_output(
+    wallet_id: int,
+    output_format: str,
+    request: Request,
+    size: Optional[int] = QR_SIZE_QUERY,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get your wallet QR code as qr.png (optionally ?size=), qr.svg or qr.json.
+    """
+    from services.wallet_service import get_wallet
+    
+    get_wallet(db, wallet_id, current_user.id)
+    return qr_output_response(request, wallet_url(wallet_id), output_format, size, public=False)
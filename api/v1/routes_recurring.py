@@ -11,6 +11,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from database import get_db
+from core.responses import rows_response
 from core.security import get_current_user
 from models import User
 from schemas import RecurringPaymentCreate, RecurringPaymentResponse
@@ -57,9 +58,9 @@ def list_recurring(
     WHAT IT DOES:
     1. Gets all recurring payments for current user
     2. Shows active and/or inactive
-    3. Returns list of recurring payments
+    3. Returns list of recurring payments (rows, rendered with orjson)
     """
-    return get_user_recurring_payments(db, current_user.id, active_only)
+    return rows_response(get_user_recurring_payments(db, current_user.id, active_only), RecurringPaymentResponse)
 
 
 @router.post("/{recurring_id}/cancel", response_model=RecurringPaymentResponse, summary="Cancel recurring payment")
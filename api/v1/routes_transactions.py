@@ -8,6 +8,7 @@ from typing import List, Optional
 from database import get_db
 from schemas import TransactionResponse
 from services.transaction_service import get_user_transactions, get_transaction_by_id
+from core.responses import rows_response
 from core.security import get_current_user
 from models import User
 
@@ -27,9 +28,9 @@ def list_transactions(
     WHAT IT DOES:
     1. Gets all transactions for logged-in user
     2. Optionally filters by wallet
-    3. Returns recent transactions
+    3. Returns recent transactions (rows, rendered with orjson)
     """
-    return get_user_transactions(db, current_user.id, wallet_id, limit)
+    return rows_response(get_user_transactions(db, current_user.id, wallet_id, limit), TransactionResponse)
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse, summary="Get transaction details")
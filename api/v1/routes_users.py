@@ -15,7 +15,7 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, summary="Register new user")
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user account.
     
@@ -24,11 +24,11 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     2. Creates user account
     3. Returns user info (without password)
     """
-    return create_user(db, user)
+    return await create_user(db, user)
 
 
 @router.post("/login", response_model=Token, summary="Login user")
-def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
     """
     Login and get authentication token.
     
@@ -37,7 +37,7 @@ def login_user(credentials: UserLogin, db: Session = Depends(get_db)):
     2. Verifies credentials
     3. Returns JWT token for authentication
     """
-    user = authenticate_user(db, credentials.email, credentials.password)
+    user = await authenticate_user(db, credentials.email, credentials.password)
     
     if not user:
         raise HTTPException(
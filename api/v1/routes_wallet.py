@@ -1,7 +1,7 @@
 """
 Wallet routes - wallet management endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -12,12 +12,14 @@ from schemas import (
 )
 from services.wallet_service import (
     create_wallet,
-    get_user_wallets,
-    get_wallet,
+    get_cached_wallets,
+    get_cached_wallet,
     add_money_to_wallet,
     transfer_money,
     get_wallet_balance
 )
+from core.rate_limit import client_address
+from core.responses import rows_response
 from core.security import get_current_user
 from models import User
 
@@ -47,9 +49,9 @@ def list_wallets(
     db: Session = Depends(get_db)
 ):
     """
-    Get all wallets for the current user.
+    Get all wallets for the current user (rendered with orjson).
     """
-    return get_user_wallets(db, current_user.id)
+    return rows_response(get_cached_wallets(db, current_user.id), WalletResponse)
 
 
 @router.get("/{wallet_id}", response_model=WalletResponse, summary="Get wallet details")
@@ -61,7 +63,7 @@ def get_wallet_details(
     """
     Get details of a specific wallet.
     """
-    return get_wallet(db, wallet_id, current_user.id)
+    return get_cached_wallet(db, wallet_id, current_user.id)
 
 
 @router.get("/{wallet_id}/balance", summary="Get wallet balance")
@@ -117,7 +119,7 @@ def transfer(
 
 
 @router.post("/{wallet_id}/set-pin", response_model=WalletResponse, summary="Set wallet PIN")
-def set_pin(
+async def set_pin(
     wallet_id: int,
     request: SetWalletPINRequest,
     current_user: User = Depends(get_current_user),
@@ -137,13 +139,14 @@ def set_pin(
     - Required for transfers/withdrawals
     """
     from services.wallet_pin_service import set_wallet_pin
-    return set_wallet_pin(db, wallet_id, current_user.id, request.pin)
+    return await set_wallet_pin(db, wallet_id, current_user.id, request.pin)
 
 
 @router.post("/{wallet_id}/verify-pin", summary="Verify wallet PIN")
-def verify_pin(
+async def verify_pin(
     wallet_id: int,
     request: VerifyPINRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -153,7 +156,9 @@ def verify_pin(
     WHAT IT DOES:
     1. Checks if PIN is correct
     2. Returns success/failure
+    
+    Too many attempts get 429 with Retry-After (before the PIN is checked).
     """
     from services.wallet_pin_service import verify_wallet_pin
-    is_valid = verify_wallet_pin(db, wallet_id, current_user.id, request.pin)
+    is_valid = await verify_wallet_pin(db, wallet_id, current_user.id, request.pin, client_address(http_request))
     return {"valid": is_valid}
@@ -0,0 +1,55 @@
+"""
+Wallet reads (GET /wallets/{id}/balance and GET /wallets/): database
+every time vs. the balance cache, and the cache's hit rate when the
+dashboard polls between deposits (write-through keeps it high).
+
+USAGE (from the project root):
+    python -m benchmarks.bench_balance_cache
+"""
+from benchmarks.common import auth_headers, make_client, ops_per_second, report
+
+ITERATIONS = 1000
+READS_PER_WRITE = 10
+
+
+def main():
+    client = make_client()
+    from services.wallet_cache import balance_cache
+
+    headers = auth_headers(client, "balance-bench@example.com")
+    wallet_ids = [
+        client.post("/api/v1/wallets/", json={"currency": currency}, headers=headers).json()["id"]
+        for currency in ("USD", "EUR", "GBP")
+    ]
+    balance_url = f"/api/v1/wallets/{wallet_ids[0]}/balance"
+
+    def uncached(path):
+        def run():
+            balance_cache.clear()
+            client.get(path, headers=headers)
+        return run
+
+    print("Wallet reads per second (each request also authenticates)")
+    report("before: balance, query every request", ops_per_second(uncached(balance_url), ITERATIONS))
+    report("before: wallet list, query every request", ops_per_second(uncached("/api/v1/wallets/"), ITERATIONS))
+
+    balance_cache.clear()
+    report("after: balance, cached", ops_per_second(lambda: client.get(balance_url, headers=headers), ITERATIONS))
+    report("after: wallet list, cached",
+           ops_per_second(lambda: client.get("/api/v1/wallets/", headers=headers), ITERATIONS))
+
+    balance_cache.clear()
+    for n in range(ITERATIONS // READS_PER_WRITE):
+        client.post(f"/api/v1/wallets/{wallet_ids[n % 3]}/add-money", json={"amount": 1.0}, headers=headers)
+        for _ in range(READS_PER_WRITE):
+            client.get(balance_url, headers=headers)
+    stats = balance_cache.stats()
+    print(f"{READS_PER_WRITE} balance reads per deposit:")
+    report("hit rate with write-through", stats["hit_rate"] * 100, "%")
+    report("hit rate if writes only invalidated (estimate)",
+           (READS_PER_WRITE - 1) / READS_PER_WRITE * 100, "%")
+    print(f"  cache stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
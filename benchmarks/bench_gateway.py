@@ -0,0 +1,67 @@
+"""
+Gateway client against a local fake Razorpay: throughput with many
+threads, and how long calls take while the gateway hangs.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_gateway
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import report
+
+THREADS = 40
+CALLS = 2000
+HANG_SECONDS = 1.0
+OUTAGE_CALLS = 40
+
+
+def _throughput(fetch) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        list(pool.map(lambda _: fetch("pay_bench"), range(CALLS)))
+    return CALLS / (time.perf_counter() - started)
+
+
+def _outage(fetch) -> float:
+    """Seconds for OUTAGE_CALLS sequential calls while the gateway hangs."""
+    started = time.perf_counter()
+    for _ in range(OUTAGE_CALLS):
+        try:
+            fetch("pay_bench")
+        except Exception:
+            pass
+    return time.perf_counter() - started
+
+
+def main():
+    import razorpay
+    from config import settings
+    from core.gateway_client import CircuitBreaker, GatewayClient
+    from tests.fake_razorpay import FakeRazorpay
+
+    key_id, key_secret = settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET
+    with FakeRazorpay(key_id, key_secret) as fake:
+        fake.add_payment("pay_bench", amount_in_paise=100)
+
+        before = razorpay.Client(auth=(key_id, key_secret), base_url=fake.url)
+        after = GatewayClient(
+            key_id, key_secret, fake.url,
+            pool_size=THREADS, read_timeout=0.2, read_retries=1, retry_backoff=0.05,
+            breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        )
+
+        print(f"Payment fetch, {THREADS} threads, {CALLS} calls")
+        report("before: default razorpay.Client", _throughput(before.payment.fetch), "calls/s")
+        report("after: GatewayClient (pool of 40)", _throughput(after.fetch_payment), "calls/s")
+
+        fake.delay = HANG_SECONDS
+        print(f"Gateway hangs {HANG_SECONDS}s per request, {OUTAGE_CALLS} calls")
+        report("before: no timeout", _outage(before.payment.fetch), "s total")
+        report("after: 0.2s timeout + circuit breaker", _outage(after.fetch_payment), "s total")
+        print(f"  circuit: {after.stats()['circuit']}")
+        after.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Gateway top-up settlement while Razorpay answers slowly: how long a
+/verify call holds an API worker with the old synchronous flow
+(signature check + payment fetch inside the request) vs the webhook
+flow (/verify only reads the result), and webhook throughput.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_gateway_settlement
+"""
+import time
+
+from benchmarks.common import auth_headers, make_client, ops_per_second, report
+
+GATEWAY_LATENCY = 0.3  # seconds Razorpay takes to answer a payment fetch
+VERIFY_CALLS = 200
+EVENTS = 2000
+
+
+def _worker_ms(func, calls: int) -> float:
+    """Average time one call holds a worker thread, in ms."""
+    return 1000 / ops_per_second(func, calls)
+
+
+def main():
+    client = make_client()
+    from config import settings
+    from database import SessionLocal
+    from services import payment_gateway_service
+    from tests.fake_razorpay import FakeRazorpay, sign_payment, sign_webhook, webhook_event
+
+    headers = auth_headers(client, "settlement-bench@example.com")
+    user_id = client.post("/api/v1/wallets", json={"currency": "INR"}, headers=headers).json()["user_id"]
+
+    with FakeRazorpay(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET) as fake:
+        settings.RAZORPAY_BASE_URL = fake.url
+        settings.RAZORPAY_WEBHOOK_SECRET = "bench-webhook-secret"
+        payment_gateway_service.set_gateway_client(None)
+        fake.add_payment("pay_bench", amount_in_paise=100, notes={"user_id": str(user_id)})
+        signature = sign_payment("order_bench", "pay_bench", settings.RAZORPAY_KEY_SECRET)
+        fake.delay = GATEWAY_LATENCY
+
+        def old_verify():
+            # What add_money_via_gateway did before crediting: verify + fetch
+            payment_gateway_service.verify_payment_signature("order_bench", "pay_bench", signature)
+            payment_gateway_service.get_gateway_client().fetch_payment("pay_bench")
+
+        def new_verify():
+            client.post("/api/v1/gateway/verify", headers=headers, json={
+                "razorpay_order_id": "order_bench",
+                "razorpay_payment_id": "pay_bench",
+                "razorpay_signature": signature,
+            })
+
+        print(f"/verify, Razorpay answering in {GATEWAY_LATENCY}s")
+        report("before: verify + payment fetch", _worker_ms(old_verify, 10), "ms per request")
+        report("after: status read only (whole request)", _worker_ms(new_verify, VERIFY_CALLS), "ms per request")
+
+        bodies = []
+        for i in range(EVENTS):
+            entity = fake.add_payment(f"pay_{i}", amount_in_paise=100, notes={"user_id": str(user_id)})
+            body = webhook_event("payment.captured", entity)
+            bodies.append((body, sign_webhook(body, settings.RAZORPAY_WEBHOOK_SECRET), f"evt_{i}"))
+
+        # Intake only: processing is measured separately below
+        original = payment_gateway_service.process_gateway_events_in_background
+        import api.v1.routes_gateway as routes
+        routes.process_gateway_events_in_background = lambda bind: None
+        sent = iter(bodies)
+
+        def deliver():
+            body, sig, event_id = next(sent)
+            client.post("/api/v1/gateway/webhook", content=body, headers={
+                "X-Razorpay-Signature": sig, "X-Razorpay-Event-Id": event_id
+            })
+
+        print(f"Webhooks: {EVENTS} payment.captured events")
+        report("webhook intake (verify HMAC + store)", ops_per_second(deliver, EVENTS), "events/s")
+        routes.process_gateway_events_in_background = original
+
+        # The processor confirms each payment with Razorpay; time our side of it
+        fake.delay = 0.0
+        db = SessionLocal()
+        started = time.perf_counter()
+        processed = 0
+        while True:
+            done = payment_gateway_service.process_gateway_events(db)["processed"]
+            if not done:
+                break
+            processed += done
+        report("processor (confirm + credit, one commit each)", processed / (time.perf_counter() - started), "events/s")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
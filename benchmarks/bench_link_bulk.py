@@ -0,0 +1,37 @@
+"""
+Invoicing run: one request per payment link vs. the bulk create endpoint.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_link_bulk
+"""
+import time
+
+from benchmarks.common import auth_headers, make_client, report
+
+LINKS = 2000
+
+
+def main():
+    client = make_client()
+    headers = auth_headers(client, "bulk-bench@example.com")
+    links = [{"amount": 10.0 + i % 100, "description": f"Invoice {i}"} for i in range(LINKS)]
+
+    print(f"Creating {LINKS} payment links")
+    started = time.perf_counter()
+    for link in links:
+        client.post("/api/v1/payments/link/create", json=link, headers=headers)
+    report("before: one request + commit per link", LINKS / (time.perf_counter() - started), "links/s")
+
+    started = time.perf_counter()
+    response = client.post("/api/v1/payments/link/bulk-create", json={"links": links}, headers=headers)
+    assert response.json()["count"] == LINKS
+    report("after: bulk-create, chunked INSERT ... RETURNING", LINKS / (time.perf_counter() - started), "links/s")
+
+    subset = links[:200]
+    started = time.perf_counter()
+    client.post("/api/v1/payments/link/bulk-create", json={"links": subset, "include_qr": True}, headers=headers)
+    report("after: bulk-create with QR codes (200 links)", len(subset) / (time.perf_counter() - started), "links/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Public payment link lookups: database every time vs. link cache.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_link_cache
+"""
+from benchmarks.common import auth_headers, make_client, ops_per_second, report
+
+ITERATIONS = 1000
+
+
+def main():
+    client = make_client()
+    from services import payment_link_service
+
+    headers = auth_headers(client, "link-bench@example.com")
+    link_id = client.post(
+        "/api/v1/payments/link/create", json={"amount": 10.0}, headers=headers
+    ).json()["link_id"]
+    url = f"/api/v1/payments/link/{link_id}"
+    unknown_url = "/api/v1/payments/link/UNKNOWN00000"
+
+    def uncached(path):
+        def run():
+            payment_link_service.clear_link_cache()
+            client.get(path)
+        return run
+
+    print("Payment link lookups per second")
+    report("before: existing link, query every request", ops_per_second(uncached(url), ITERATIONS))
+    report("before: unknown id, query every request", ops_per_second(uncached(unknown_url), ITERATIONS))
+
+    payment_link_service.clear_link_cache()
+    report("after: existing link, cached", ops_per_second(lambda: client.get(url), ITERATIONS))
+    report("after: unknown id, negatively cached", ops_per_second(lambda: client.get(unknown_url), ITERATIONS))
+    print(f"  cache stats: {payment_link_service._link_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
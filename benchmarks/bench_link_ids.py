@@ -0,0 +1,54 @@
+"""
+Payment link creation: SELECT-probe for collisions vs. insert-and-retry.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_link_ids
+"""
+import secrets
+import string
+
+from benchmarks.common import make_client, ops_per_second, report
+
+ITERATIONS = 1000
+
+
+def _old_link_id() -> str:
+    return ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(12))
+
+
+def main():
+    make_client()
+    from database import SessionLocal
+    from core.ids import new_id
+    from models import PaymentLink, User
+    from services.payment_link_service import create_payment_link
+
+    db = SessionLocal()
+    user = User(email="id-bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    def create_with_probe():
+        # Previous implementation: SELECT until the ID is free, then insert
+        link_id = _old_link_id()
+        while db.query(PaymentLink).filter(PaymentLink.link_id == link_id).first():
+            link_id = _old_link_id()
+        db.add(PaymentLink(user_id=user.id, link_id=link_id, amount=10.0))
+        db.commit()
+
+    print("ID generation per second")
+    report("before: secrets.choice x 12", ops_per_second(_old_link_id, ITERATIONS * 10), "ids/s")
+    report("after: timestamp + one token_bytes call", ops_per_second(new_id, ITERATIONS * 10), "ids/s")
+
+    print("Payment link creation per second")
+    report("before: SELECT probe + INSERT", ops_per_second(create_with_probe, ITERATIONS), "links/s")
+    report(
+        "after: INSERT, retry on IntegrityError",
+        ops_per_second(lambda: create_payment_link(db, user.id, 10.0), ITERATIONS),
+        "links/s"
+    )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
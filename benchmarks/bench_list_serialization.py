@@ -0,0 +1,106 @@
+"""
+List endpoints: cost of turning a 1,000-item page into JSON bytes.
+Before = load ORM objects, validate them into the response model
+(from_attributes) and dump to JSON, as FastAPI did for these routes.
+After = select the model's columns as plain rows and render with orjson
+(core/responses.py). Also the whole GET request, after.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_list_serialization
+"""
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import auth_headers, make_client, ops_per_second, report
+
+ITEMS = 1000
+ITERATIONS = 50
+
+
+def ms_per_call(func) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - started) * 1000 / ITERATIONS
+
+
+def main():
+    client = make_client()
+    from pydantic import TypeAdapter
+
+    from core.responses import rows_response
+    from database import SessionLocal
+    from models import RecurringPayment, Transaction, TransactionStatus, TransactionType, User
+    from schemas import RecurringPaymentResponse, TransactionResponse
+    from services.recurring_payment_service import get_user_recurring_payments
+    from services.transaction_service import get_user_transactions
+
+    headers = auth_headers(client, "list-bench@example.com")
+    wallet_id = client.post("/api/v1/wallets/", json={"currency": "USD"}, headers=headers).json()["id"]
+    db = SessionLocal()
+    user_id = db.query(User).filter(User.email == "list-bench@example.com").one().id
+    now = datetime.utcnow()
+    db.add_all(
+        Transaction(user_id=user_id, wallet_id=wallet_id, amount=n + 0.5, description=f"Deposit {n}",
+                    transaction_type=TransactionType.DEPOSIT, status=TransactionStatus.COMPLETED,
+                    created_at=now - timedelta(minutes=n))
+        for n in range(ITEMS)
+    )
+    db.add_all(
+        RecurringPayment(user_id=user_id, wallet_id=wallet_id, recipient_wallet_id=wallet_id, amount=9.99,
+                         description=f"Plan {n}", frequency="monthly", next_payment_date=now, is_active=1)
+        for n in range(ITEMS)
+    )
+    db.commit()
+    db.close()
+
+    def page(before_query, after_rows, schema):
+        adapter = TypeAdapter(list[schema])
+
+        def before():
+            session = SessionLocal()
+            try:
+                return adapter.dump_json(adapter.validate_python(before_query(session)))
+            finally:
+                session.close()
+
+        def after():
+            session = SessionLocal()
+            try:
+                return rows_response(after_rows(session), schema).body
+            finally:
+                session.close()
+
+        assert before() == after(), "rows must render exactly like the response model"
+        return ms_per_call(before), ms_per_call(after)
+
+    pages = {
+        "/transactions/": page(
+            lambda session: session.query(Transaction).filter(Transaction.user_id == user_id)
+            .order_by(Transaction.created_at.desc()).limit(ITEMS).all(),
+            lambda session: get_user_transactions(session, user_id, None, ITEMS),
+            TransactionResponse,
+        ),
+        "/recurring/list": page(
+            lambda session: session.query(RecurringPayment).filter(RecurringPayment.user_id == user_id).all(),
+            lambda session: get_user_recurring_payments(session, user_id, False),
+            RecurringPaymentResponse,
+        ),
+    }
+
+    print(f"{ITEMS:,}-item page -> JSON bytes (query included)")
+    for path, (before, after) in pages.items():
+        report(f"{path} before: ORM + model + dump", before, "ms")
+        report(f"{path} after: rows + orjson", after, "ms")
+        report(f"{path} speedup", before / after, "x")
+
+    print(f"whole request, {ITEMS:,} items (auth, routing, TestClient)")
+    report("GET /transactions/?limit=1000",
+           ops_per_second(lambda: client.get(f"/api/v1/transactions/?limit={ITEMS}", headers=headers), ITERATIONS))
+    report("GET /recurring/list",
+           ops_per_second(lambda: client.get("/api/v1/recurring/list", headers=headers), ITERATIONS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Login burst: 200 users logging in at once against one uvicorn worker,
+with bcrypt in the request thread pool (before) vs awaited in the
+hashing processes (after). Also times an ordinary request (GET
+/wallets/) made during the burst - what the other users feel.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_login
+
+Uses BCRYPT_ROUNDS=10 (a quarter of the default cost) to keep the run short.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import make_client, report
+
+USERS = 200
+LOGINS_PER_USER = 3
+ROUNDS = "10"
+PASSWORD = "benchpassword123"
+
+
+def serve(port: int, before: bool) -> None:
+    """Run the app; `before` puts hashing back on the request thread pool."""
+    import uvicorn
+    from fastapi.concurrency import run_in_threadpool
+
+    from core import hashing
+    from main import app
+
+    if before:
+        async def in_request_thread(func, *args):
+            result, _seconds = await run_in_threadpool(hashing._timed, func, *args)
+            return result
+
+        hashing._run = in_request_thread
+    uvicorn.run(app, port=port, log_level="warning", backlog=4096, timeout_keep_alive=300)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def burst(base: str, emails: list[str], token: str) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=USERS + 10, max_keepalive_connections=USERS + 10)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=300) as client:
+        done = asyncio.Event()
+        probe_ms = []
+
+        async def user(email):
+            statuses = []
+            for _ in range(LOGINS_PER_USER):
+                response = await client.post("/api/v1/users/login", json={"email": email, "password": PASSWORD})
+                statuses.append(response.status_code)
+            return statuses
+
+        async def probe():
+            headers = {"Authorization": f"Bearer {token}"}
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/v1/wallets/", headers=headers)
+                probe_ms.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.05)
+
+        probing = asyncio.create_task(probe())
+        started = time.perf_counter()
+        statuses = [code for codes in await asyncio.gather(*(user(email) for email in emails)) for code in codes]
+        seconds = time.perf_counter() - started
+        done.set()
+        await probing
+
+    probe_ms.sort()
+    return {
+        "logins_per_second": len(statuses) / seconds,
+        "rejected": statuses.count(503),
+        "probe_median": statistics.median(probe_ms),
+        "probe_p99": probe_ms[int(len(probe_ms) * 0.99)],
+    }
+
+
+def run(before: bool, emails: list[str], token: str) -> dict:
+    import httpx
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-c", f"from benchmarks.bench_login import serve; serve({port}, {before})"],
+        env=os.environ.copy(),
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/health", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+        return asyncio.run(burst(base, emails, token))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    os.environ["BCRYPT_ROUNDS"] = ROUNDS
+    make_client()
+    from core.security import create_access_token, get_password_hash
+    from database import SessionLocal
+    from models import User
+
+    db = SessionLocal()
+    hashed = get_password_hash(PASSWORD)
+    users = [User(email=f"login{i}@bench.example.com", hashed_password=hashed) for i in range(USERS)]
+    db.add_all(users)
+    db.commit()
+    emails = [user.email for user in users]
+    token = create_access_token({"sub": str(users[0].id)})
+    db.close()
+
+    print(f"{USERS} users logging in {LOGINS_PER_USER} times each, all at once, "
+          f"one uvicorn worker, {os.cpu_count()} CPU core(s), BCRYPT_ROUNDS={ROUNDS}")
+    for label, before in (("before: bcrypt in request threads", True), ("after: bcrypt in hashing processes", False)):
+        result = run(before, emails, token)
+        print(label)
+        report("logins", result["logins_per_second"], "/s")
+        report("refused with 503 (of {})".format(USERS * LOGINS_PER_USER), result["rejected"], "")
+        report("GET /wallets/ during the burst, median", result["probe_median"], "ms")
+        report("GET /wallets/ during the burst, p99", result["probe_p99"], "ms")
+
+
+if __name__ == "__main__":
+    main()
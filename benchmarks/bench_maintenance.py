@@ -0,0 +1,83 @@
+"""
+Expired link sweeper throughput, with and without the expiry index.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_maintenance
+"""
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_client, report
+
+LIVE_LINKS = 200_000
+EXPIRED_LINKS = 20_000
+
+
+def _seed(db, user_id: int) -> None:
+    from sqlalchemy import insert
+    from models import PaymentLink
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "link_id": f"L{i:011d}",
+            "amount": 10.0,
+            "is_active": 1,
+            "expires_at": now + (timedelta(hours=-1) if i < EXPIRED_LINKS else timedelta(days=1)),
+            "created_at": now,
+        }
+        for i in range(LIVE_LINKS + EXPIRED_LINKS)
+    ]
+    db.execute(insert(PaymentLink), rows)
+    db.commit()
+
+
+def _run(db, user_id: int, label: str) -> None:
+    from sqlalchemy import delete
+    from models import PaymentLink
+    from services import maintenance_service
+
+    db.execute(delete(PaymentLink))
+    db.commit()
+    _seed(db, user_id)
+
+    started = time.perf_counter()
+    lag = maintenance_service.maintenance_lag(db)
+    report(f"{label}: lag query", (time.perf_counter() - started) * 1000, "ms")
+
+    started = time.perf_counter()
+    result = maintenance_service.deactivate_expired_links(db, max_batches=10_000)
+    elapsed = time.perf_counter() - started
+    assert result["links_deactivated"] == EXPIRED_LINKS, result
+    assert lag["expired_links_lag_seconds"] > 0
+    report(f"{label}: sweep", EXPIRED_LINKS / elapsed, "rows/s")
+
+
+def main():
+    make_client()
+    from sqlalchemy import text
+    from database import SessionLocal
+    from models import User
+
+    db = SessionLocal()
+    user = User(email="sweep-bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+
+    print(f"Expired link sweep: {EXPIRED_LINKS} expired among {LIVE_LINKS} live links")
+    db.execute(text("DROP INDEX ix_payment_links_is_active_expires_at"))
+    db.execute(text("DROP INDEX ix_payment_links_is_active_created_at"))
+    db.commit()
+    _run(db, user.id, "before: no expiry index")
+
+    db.execute(text(
+        "CREATE INDEX ix_payment_links_is_active_expires_at ON payment_links (is_active, expires_at)"
+    ))
+    db.commit()
+    _run(db, user.id, "after: (is_active, expires_at) index")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Merchant revenue under contention: 200 concurrent payers, one merchant.
+
+Compares the old read-add-write in Python, the atomic UPDATE, and the
+atomic UPDATE spread over shard rows. Reports throughput and how much
+revenue went missing.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_merchant_revenue
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import make_client, report
+
+PAYERS = 200
+PAYMENTS_PER_PAYER = 5
+AMOUNT = 1.0
+
+
+def _old_update(db, merchant_id: str, amount: float) -> None:
+    """The previous implementation: read, add in Python, write back."""
+    from services.merchant_service import get_merchant
+
+    merchant = get_merchant(db, merchant_id)
+    merchant.total_revenue += amount
+    db.commit()
+
+
+def _run(label: str, merchant_id: str, merchant_pk: int, update) -> None:
+    from database import SessionLocal
+    from services.merchant_service import get_merchant_revenue
+
+    start = threading.Barrier(PAYERS)
+
+    def payer():
+        db = SessionLocal()
+        try:
+            start.wait()
+            for _ in range(PAYMENTS_PER_PAYER):
+                update(db, merchant_id, AMOUNT)
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=PAYERS) as pool:
+        for future in [pool.submit(payer) for _ in range(PAYERS)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    expected = PAYERS * PAYMENTS_PER_PAYER * AMOUNT
+    lost = expected - get_merchant_revenue(db, merchant_pk)
+    db.close()
+    report(f"{label}: throughput", PAYERS * PAYMENTS_PER_PAYER / elapsed, "payments/s")
+    report(f"{label}: revenue lost", lost, f"of {expected:,.0f}")
+
+
+def main():
+    make_client()
+    from database import SessionLocal
+    from models import User
+    from services import merchant_service
+
+    db = SessionLocal()
+    merchants = []
+    for name in ("old", "atomic", "sharded"):
+        user = User(email=f"revenue-bench-{name}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        merchants.append(merchant_service.create_merchant(db, user.id, f"Bench {name}"))
+    old, atomic, sharded = [(m.merchant_id, m.id) for m in merchants]
+    merchant_service.set_revenue_shards(db, sharded[0], 8)
+    db.close()
+
+    print(f"{PAYERS} concurrent payers x {PAYMENTS_PER_PAYER} payments to one merchant")
+    _run("before: read-add-write", *old, _old_update)
+    _run("after: atomic UPDATE", *atomic, merchant_service.update_merchant_revenue)
+    _run("after: atomic UPDATE, 8 shards", *sharded, merchant_service.update_merchant_revenue)
+
+
+if __name__ == "__main__":
+    main()
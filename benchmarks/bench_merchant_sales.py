@@ -0,0 +1,92 @@
+"""
+Merchant sales chart: loading every payment into Python vs SQL hourly
+sums + NumPy buckets, cold and with the cache's incremental refresh.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_merchant_sales
+"""
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_client, ops_per_second, report
+
+PAYMENTS = 200_000
+DAYS = 365
+
+
+def _seed(db, wallet_id: int, user_id: int) -> None:
+    from sqlalchemy import insert
+    from models import Transaction, TransactionStatus, TransactionType
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "wallet_id": wallet_id,
+            "recipient_wallet_id": wallet_id,
+            "amount": round(random.uniform(1, 50), 2),
+            "transaction_type": TransactionType.PAYMENT,
+            "status": TransactionStatus.COMPLETED,
+            "created_at": now - timedelta(seconds=random.uniform(0, DAYS * 86400)),
+        }
+        for _ in range(PAYMENTS)
+    ]
+    db.execute(insert(Transaction), rows)
+    db.commit()
+
+
+def main():
+    make_client()
+    from database import SessionLocal
+    from models import Transaction, TransactionStatus, User, Wallet
+    from services import analytics_service
+    from services.merchant_service import create_merchant
+
+    db = SessionLocal()
+    user = User(email="sales-bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    wallet = Wallet(user_id=user.id, balance=0.0)
+    db.add(wallet)
+    db.commit()
+    merchant = create_merchant(db, user.id, "Sales Bench")
+    merchant.created_at = datetime.utcnow() - timedelta(days=DAYS + 1)
+    db.commit()
+    _seed(db, wallet.id, user.id)
+
+    start = datetime.utcnow() - timedelta(days=DAYS)
+    print(f"Daily sales chart over {DAYS} days, {PAYMENTS} payments")
+
+    def python_buckets():
+        totals = defaultdict(float)
+        for created_at, amount in db.query(Transaction.created_at, Transaction.amount).filter(
+            Transaction.recipient_wallet_id == wallet.id,
+            Transaction.status == TransactionStatus.COMPLETED,
+            Transaction.created_at >= start
+        ):
+            totals[created_at.date()] += amount
+        return totals
+
+    report("before: load payments, bucket in Python", ops_per_second(python_buckets, 3), "req/s")
+
+    def cold():
+        analytics_service.clear_sales_cache()
+        analytics_service.get_merchant_sales_series(db, merchant, "day", start)
+
+    report("after: SQL hourly sums + NumPy (no cache)", ops_per_second(cold, 5), "req/s")
+
+    analytics_service.clear_sales_cache()
+    fixed_start = start.replace(minute=0, second=0, microsecond=0)
+    analytics_service.get_merchant_sales_series(db, merchant, "day", fixed_start)
+
+    def warm():
+        # Newest bucket is still open, so every call re-reads only today
+        analytics_service.get_merchant_sales_series(db, merchant, "day", fixed_start)
+
+    report("after: cached, newest bucket refreshed", ops_per_second(warm, 50), "req/s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Merchant webhooks: 1,000 payment events to 10 merchants whose servers
+take 20 ms to answer. One blocking POST per event on a fresh connection
+(the simple loop) vs the delivery job with the async sender (keep-alive,
+4 requests in flight per merchant).
+
+USAGE (from the project root):
+    python -m benchmarks.bench_merchant_webhooks
+"""
+import time
+
+from benchmarks.common import make_client, report
+
+MERCHANTS = 10
+EVENTS = 1000
+SERVER_SECONDS = 0.02
+
+
+def main():
+    make_client()
+    import requests
+    from database import SessionLocal
+    from models import Merchant, Transaction, User, Wallet, WebhookDelivery, WebhookEndpoint
+    from services import merchant_service
+    from services.merchant_webhook_service import deliver_merchant_webhooks, queue_payment_webhooks
+    from tests.webhook_receiver import WebhookReceiver
+
+    db = SessionLocal()
+    shops = []
+    for i in range(MERCHANTS):
+        user = User(email=f"shop{i}@bench.example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        merchant_service.create_merchant(db, user.id, f"Shop {i}")
+        wallet = Wallet(user_id=user.id, balance=0.0)
+        db.add(wallet)
+        db.commit()
+        shops.append(wallet)
+
+    with WebhookReceiver() as receiver:
+        receiver.delay = SERVER_SECONDS
+        for i, wallet in enumerate(shops):
+            merchant = db.query(Merchant).filter(Merchant.user_id == wallet.user_id).one()
+            db.add(WebhookEndpoint(merchant_id=merchant.id, url=f"{receiver.url}/shop{i}",
+                                   secret=f"whsec_{i}", max_concurrency=4))
+        db.commit()
+
+        def queue_events():
+            for n in range(EVENTS):
+                wallet = shops[n % MERCHANTS]
+                transaction = Transaction(user_id=wallet.user_id, wallet_id=wallet.id, amount=1.0,
+                                          transaction_type="payment", status="completed")
+                db.add(transaction)
+                db.flush()
+                queue_payment_webhooks(db, "transfer", [(transaction, wallet)])
+            db.commit()
+
+        queue_events()
+        rows = db.query(WebhookDelivery, WebhookEndpoint).join(
+            WebhookEndpoint, WebhookEndpoint.id == WebhookDelivery.endpoint_id
+        ).all()
+        started = time.perf_counter()
+        for delivery, endpoint in rows:
+            requests.post(endpoint.url, data=delivery.payload, timeout=5,
+                          headers={"Content-Type": "application/json"})
+        before = time.perf_counter() - started
+
+        db.query(WebhookDelivery).delete()
+        db.commit()
+        queue_events()
+        receiver.connections.clear()
+        started = time.perf_counter()
+        result = deliver_merchant_webhooks(db, limit=EVENTS)
+        after = time.perf_counter() - started
+        connections = len({client for clients in receiver.connections.values() for client in clients})
+
+    print(f"{EVENTS} webhooks to {MERCHANTS} merchants, server answers in {SERVER_SECONDS * 1000:.0f} ms")
+    report("before: one blocking POST at a time", before, "s")
+    report(f"after: async sender ({result['delivered']} delivered)", after, "s")
+    print(f"  connections opened by the sender: {connections}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Notifications for a busy merchant: 1,000 payments received. One email
+per payment over its own SMTP connection (the old inline sending) vs the
+outbox with one SMTP session per dispatcher run, and vs a digest.
+
+A fake SMTP server takes 20 ms to connect + STARTTLS + login and 1 ms
+per message, roughly what a hosted mail service costs.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_notifications
+"""
+import time
+
+from benchmarks.common import make_client, report
+
+EVENTS = 1000
+CONNECT_SECONDS = 0.02
+SEND_SECONDS = 0.001
+
+
+class SlowSMTP:
+    sessions = 0
+    messages = 0
+
+    def __init__(self, host, port):
+        SlowSMTP.sessions += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def starttls(self):
+        time.sleep(CONNECT_SECONDS)
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, message):
+        SlowSMTP.messages += 1
+        time.sleep(SEND_SECONDS)
+
+
+def _run(label: str, func) -> None:
+    SlowSMTP.sessions = SlowSMTP.messages = 0
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    report(f"{label} ({SlowSMTP.sessions} sessions, {SlowSMTP.messages} emails)", elapsed, "s")
+
+
+def main():
+    make_client()
+    from datetime import datetime
+    from config import settings
+    from database import SessionLocal
+    from models import Notification, User
+    from services import email_service, notification_service
+
+    settings.SMTP_USER, settings.SMTP_PASSWORD = "bench@example.com", "x"
+    email_service.smtplib.SMTP = SlowSMTP
+    settings.NOTIFY_MAX_ROWS_PER_GROUP = EVENTS  # one merchant's whole backlog in one run
+
+    db = SessionLocal()
+    user = User(email="merchant-bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    event = {"amount": 12.5, "description": "Payment received", "balance": 1000.0}
+
+    def inline():
+        for _ in range(EVENTS):
+            email_service.send_transaction_notification(user.email, "deposit", **event)
+
+    def outbox(digest_minutes: int):
+        def run():
+            notification_service.update_preferences(db, user.id, {"in_app": False, "digest_minutes": digest_minutes})
+            for _ in range(EVENTS):
+                notification_service.notify(db, user.id, "deposit", event)
+            db.query(Notification).update({"due_at": datetime.utcnow()})
+            db.commit()
+            notification_service.dispatch_notifications(db, limit=EVENTS)
+        return run
+
+    print(f"{EVENTS} payment notifications to one merchant, including queueing")
+    _run("before: inline, one SMTP connection each", inline)
+    _run("after: outbox, one session per run", outbox(0))
+    _run("after: hourly digest", outbox(60))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
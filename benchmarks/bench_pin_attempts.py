@@ -0,0 +1,85 @@
+"""
+Wallet PIN guessing: 200 wrong PINs sent as fast as possible from one
+client, without limits (before) vs. with the attempt limiter and
+lockouts (after) - how much bcrypt work the guesses cost the server.
+Also times 20 PIN-protected calls in a row by the owner, each checked
+with bcrypt (before) vs. answered from the verified-PIN cache (after).
+
+USAGE (from the project root):
+    python -m benchmarks.bench_pin_attempts
+
+Uses BCRYPT_ROUNDS=10 (a quarter of the default cost) to keep the run short.
+"""
+import os
+import time
+
+from benchmarks.common import auth_headers, make_client, report
+
+GUESSES = 200
+OWNER_CALLS = 20
+
+
+def main():
+    os.environ["BCRYPT_ROUNDS"] = "10"
+    os.environ["HASH_WORKERS"] = "1"
+    client = make_client()
+    from core.cache import LRUCache
+    from core.hashing import hash_stats
+    from services import wallet_pin_service
+
+    headers = auth_headers(client, "pin-bench@example.com")
+    wallet_id = client.post("/api/v1/wallets/", json={"currency": "USD"}, headers=headers).json()["id"]
+    client.post(f"/api/v1/wallets/{wallet_id}/set-pin", json={"pin": "4321"}, headers=headers)
+    url = f"/api/v1/wallets/{wallet_id}/verify-pin"
+    limiter = wallet_pin_service._attempts
+    limits = (limiter.attempts, wallet_pin_service.settings.PIN_LOCKOUT_AFTER_FAILURES)
+
+    def guess_all() -> dict:
+        hashed = hash_stats()["completed"]
+        cpu, started = time.process_time(), time.perf_counter()
+        statuses = [client.post(url, json={"pin": f"{n:04d}"}, headers=headers).status_code for n in range(GUESSES)]
+        return {
+            "seconds": time.perf_counter() - started,
+            "cpu": time.process_time() - cpu,
+            "bcrypt": hash_stats()["completed"] - hashed,
+            "refused": statuses.count(429),
+        }
+
+    def owner_calls() -> float:
+        started = time.perf_counter()
+        for _ in range(OWNER_CALLS):
+            client.post(url, json={"pin": "4321"}, headers=headers).raise_for_status()
+        return (time.perf_counter() - started) * 1000 / OWNER_CALLS
+
+    # Before: no attempt limit, no lockout, no verified-PIN cache
+    wallet_pin_service.clear_pin_state()
+    limiter.attempts = 10 ** 9
+    wallet_pin_service.settings.PIN_LOCKOUT_AFTER_FAILURES = 10 ** 9
+    wallet_pin_service.set_pin_state_backends(LRUCache(), LRUCache(maxsize=0))
+    before = guess_all()
+    before_owner = owner_calls()
+
+    limiter.attempts, wallet_pin_service.settings.PIN_LOCKOUT_AFTER_FAILURES = limits
+    wallet_pin_service.set_pin_state_backends(
+        LRUCache(default_ttl=wallet_pin_service.settings.PIN_LOCKOUT_MAX_SECONDS),
+        LRUCache(default_ttl=wallet_pin_service.settings.PIN_SUCCESS_TTL_SECONDS),
+    )
+    wallet_pin_service.clear_pin_state()
+    after_owner = owner_calls()
+    after = guess_all()
+
+    print(f"{GUESSES} wrong PINs from one client, BCRYPT_ROUNDS=10")
+    for label, result in (("before: no limits", before), ("after: attempt limit + lockout", after)):
+        print(label)
+        report("bcrypt checks run", result["bcrypt"], "")
+        report("refused with 429", result["refused"], "")
+        report("server CPU spent", result["cpu"] * 1000, "ms")
+        report("time to send them all", result["seconds"] * 1000, "ms")
+    print(f"owner verifying the PIN {OWNER_CALLS} times in a row:")
+    report("before: bcrypt every call", before_owner, "ms/call")
+    report("after: verified-PIN cache", after_owner, "ms/call")
+    print(f"  stats: {wallet_pin_service.pin_stats()}")
+
+
+if __name__ == "__main__":
+    main()
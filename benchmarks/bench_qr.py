@@ -0,0 +1,50 @@
+"""
+QR code request throughput: uncached rendering vs. render cache + ETags.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_qr
+"""
+from benchmarks.common import auth_headers, make_client, ops_per_second, report
+
+ITERATIONS = 300
+
+
+def main():
+    client = make_client()
+    from services import qr_service
+
+    headers = auth_headers(client, "qr-bench@example.com")
+    link_id = client.post(
+        "/api/v1/payments/link/create", json={"amount": 10.0}, headers=headers
+    ).json()["link_id"]
+
+    json_url = f"/api/v1/payments/link/{link_id}/qr"
+    png_url = f"/api/v1/payments/link/{link_id}/qr.png"
+    svg_url = f"/api/v1/payments/link/{link_id}/qr.svg"
+
+    def uncached_json():
+        qr_service.clear_qr_cache()
+        client.get(json_url)
+
+    print("QR requests per second")
+    report("before: base64 JSON, rendered every request", ops_per_second(uncached_json, ITERATIONS))
+
+    client.get(json_url)
+    report("after: base64 JSON, render cached", ops_per_second(lambda: client.get(json_url), ITERATIONS))
+
+    client.get(png_url)
+    report("after: raw image/png, render cached", ops_per_second(lambda: client.get(png_url), ITERATIONS))
+
+    client.get(svg_url)
+    report("after: raw image/svg+xml, render cached", ops_per_second(lambda: client.get(svg_url), ITERATIONS))
+
+    etag = client.get(png_url).headers["etag"]
+    conditional = {"If-None-Match": etag}
+    report(
+        "after: If-None-Match -> 304",
+        ops_per_second(lambda: client.get(png_url, headers=conditional), ITERATIONS)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Bulk QR rendering: serial vs. process pool, and throughput per core.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_qr_batch
+"""
+import os
+import time
+
+from benchmarks.common import report
+
+ITEMS = 400
+
+
+def _run(workers: int, offset: int) -> tuple[float, float]:
+    from config import settings
+    from services import qr_batch_service
+
+    settings.QR_BATCH_WORKERS = workers
+    # Unique payloads so nothing comes from the render cache
+    items = [
+        (f"link-{i}", f"http://127.0.0.1:8000/api/v1/payments/link/BENCH{offset + i:07d}")
+        for i in range(ITEMS)
+    ]
+    if workers > 1:
+        # Warm up the pool so process start-up isn't counted
+        list(qr_batch_service.render_many(items[:workers], "png"))
+        items = [(name, data + "x") for name, data in items]
+
+    before = qr_batch_service.batch_stats()
+    started = time.perf_counter()
+    for _ in qr_batch_service.stream_zip(items, "png"):
+        pass
+    elapsed = time.perf_counter() - started
+    after = qr_batch_service.batch_stats()
+    qr_batch_service.shutdown_pool()
+
+    render_seconds = after["render_seconds"] - before["render_seconds"]
+    return ITEMS / elapsed, ITEMS / render_seconds
+
+
+def main():
+    cores = os.cpu_count() or 1
+    print(f"Bulk QR ZIP, {ITEMS} PNGs ({cores} CPU cores)")
+
+    serial, serial_per_core = _run(1, 0)
+    report("before: serial render", serial, "QR/s")
+    report("before: per core", serial_per_core, "QR/s")
+
+    for offset, workers in enumerate(sorted({2, cores} - {1}), start=1):
+        pooled, pooled_per_core = _run(workers, offset * ITEMS)
+        report(f"after: process pool, {workers} workers", pooled, "QR/s")
+        report(f"after: per core ({workers} workers)", pooled_per_core, "QR/s")
+
+
+if __name__ == "__main__":
+    main()
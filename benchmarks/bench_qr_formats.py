@@ -0,0 +1,52 @@
+"""
+QR output formats: response size and uncached render time per format.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_qr_formats
+"""
+import base64
+import time
+
+from benchmarks.common import report
+
+ITERATIONS = 50
+
+PAYLOADS = {
+    "short (wallet URL)": "http://127.0.0.1:8000/api/v1/wallets/42/receive",
+    "medium (payment link URL)": "https://pay.rosepay.example/api/v1/payments/link/" + "a" * 43,
+    "long (URL with query string)": "https://pay.rosepay.example/checkout?" + "&".join(
+        f"field{i}=value{i}" for i in range(12)
+    ),
+}
+
+
+def _render_ms(render, data: str) -> float:
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        render(data)
+    return (time.perf_counter() - started) / ITERATIONS * 1000
+
+
+def main():
+    from services import qr_service
+
+    formats = {
+        "base64 PNG in JSON (/qr endpoint)": lambda data: (
+            f"data:image/png;base64,{base64.b64encode(qr_service._render_png(data)).decode()}"
+        ).encode(),
+        "png (10px modules)": lambda data: qr_service._render_png(data),
+        "png ?size=256": lambda data: qr_service._render_png(data, 256),
+        "svg": lambda data: qr_service._render_svg(data),
+        "json matrix": lambda data: qr_service._render_matrix(data),
+    }
+
+    for payload_name, data in PAYLOADS.items():
+        version, level = qr_service.choose_qr_settings(data)
+        print(f"{payload_name}: {len(data)} chars -> version {version}, error correction {level}")
+        for format_name, render in formats.items():
+            report(f"{format_name} size", len(render(data)), "bytes")
+            report(f"{format_name} render time", _render_ms(render, data), "ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Accepting many payment requests: one call each vs one batch call.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_request_accept
+"""
+import time
+
+from benchmarks.common import auth_headers, make_client, report
+
+REQUESTS = 200
+
+
+def _send_requests(client, requester_headers, recipient_email: str) -> list[int]:
+    return [
+        client.post("/api/v1/payments/request", json={
+            "recipient_email": recipient_email, "amount": 1.0
+        }, headers=requester_headers).json()["id"]
+        for _ in range(REQUESTS)
+    ]
+
+
+def main():
+    client = make_client()
+    requester = auth_headers(client, "accept-bench-requester@example.com")
+    recipient_email = "accept-bench-recipient@example.com"
+    recipient = auth_headers(client, recipient_email)
+
+    client.post("/api/v1/wallets", json={"currency": "USD"}, headers=requester)
+    wallet_id = client.post("/api/v1/wallets", json={"currency": "USD"}, headers=recipient).json()["id"]
+    client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 2 * REQUESTS}, headers=recipient)
+
+    print(f"Accepting {REQUESTS} payment requests from one wallet")
+
+    request_ids = _send_requests(client, requester, recipient_email)
+    started = time.perf_counter()
+    for request_id in request_ids:
+        response = client.post(
+            f"/api/v1/payments/request/{request_id}/accept",
+            json={"wallet_id": wallet_id}, headers=recipient
+        )
+        assert response.status_code == 200, response.text
+    report("before: one accept call per request", REQUESTS / (time.perf_counter() - started), "requests/s")
+
+    request_ids = _send_requests(client, requester, recipient_email)
+    started = time.perf_counter()
+    response = client.post("/api/v1/payments/request/accept-batch", json={
+        "wallet_id": wallet_id, "request_ids": request_ids
+    }, headers=recipient)
+    elapsed = time.perf_counter() - started
+    assert response.json()["accepted"] == REQUESTS, response.text
+    report("after: one accept-batch call", REQUESTS / elapsed, "requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Payment request inbox: loading everything vs keyset pages, and
+COUNT(*) vs the pending_request_counts badge.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_request_inbox
+"""
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_client, ops_per_second, report
+
+PENDING_REQUESTS = 20_000
+OTHER_REQUESTS = 100_000
+PAGE_SIZE = 50
+ITERATIONS = 200
+
+
+def _seed(db, requester_id: int, recipient_id: int, bystander_id: int) -> None:
+    from sqlalchemy import insert
+    from models import PaymentRequest, TransactionStatus
+    from services.payment_request_service import adjust_pending_counts
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "requester_id": requester_id,
+            "recipient_id": recipient_id if i < PENDING_REQUESTS else bystander_id,
+            "amount": 5.0,
+            "status": TransactionStatus.PENDING,
+            "created_at": now - timedelta(seconds=i),
+        }
+        for i in range(PENDING_REQUESTS + OTHER_REQUESTS)
+    ]
+    db.execute(insert(PaymentRequest), rows)
+    adjust_pending_counts(db, {recipient_id: PENDING_REQUESTS, bystander_id: OTHER_REQUESTS})
+    db.commit()
+
+
+def main():
+    make_client()
+    from sqlalchemy import func, select
+    from database import SessionLocal
+    from models import PaymentRequest, TransactionStatus, User
+    from services import payment_request_service
+
+    db = SessionLocal()
+    users = [User(email=f"inbox-bench-{i}@example.com", hashed_password="x") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+    requester, recipient, bystander = users
+    _seed(db, requester.id, recipient.id, bystander.id)
+
+    print(f"Inbox: {PENDING_REQUESTS} pending requests for one user, {OTHER_REQUESTS} for others")
+
+    def load_all():
+        db.query(PaymentRequest).filter(
+            PaymentRequest.recipient_id == recipient.id,
+            PaymentRequest.status == TransactionStatus.PENDING
+        ).all()
+
+    report("before: whole inbox in one response", ops_per_second(load_all, 5), "req/s")
+
+    deep_offset = PENDING_REQUESTS - PAGE_SIZE
+
+    def offset_page():
+        db.query(PaymentRequest).filter(
+            PaymentRequest.recipient_id == recipient.id,
+            PaymentRequest.status == TransactionStatus.PENDING
+        ).order_by(PaymentRequest.id.desc()).offset(deep_offset).limit(PAGE_SIZE).all()
+
+    report("OFFSET page (last page)", ops_per_second(offset_page, ITERATIONS), "req/s")
+
+    last_id = db.execute(
+        select(func.min(PaymentRequest.id)).where(PaymentRequest.recipient_id == recipient.id)
+    ).scalar()
+    cursor = last_id + PAGE_SIZE
+
+    def keyset_page():
+        payment_request_service.get_payment_requests(
+            db, recipient.id, "received", limit=PAGE_SIZE, before_id=cursor
+        )
+
+    report("after: keyset page (last page)", ops_per_second(keyset_page, ITERATIONS), "req/s")
+
+    def count_rows():
+        db.execute(
+            select(func.count()).where(
+                PaymentRequest.recipient_id == recipient.id,
+                PaymentRequest.status == TransactionStatus.PENDING
+            )
+        ).scalar()
+
+    report("before: badge via COUNT(*)", ops_per_second(count_rows, ITERATIONS), "req/s")
+
+    pending = payment_request_service.get_pending_count(db, recipient.id)
+    assert pending == PENDING_REQUESTS, pending
+    report("after: badge via counter row", ops_per_second(
+        lambda: payment_request_service.get_pending_count(db, recipient.id), ITERATIONS * 10
+    ), "req/s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
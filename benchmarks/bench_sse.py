@@ -0,0 +1,164 @@
+"""
+Live updates: 10,000 idle server-sent event streams on one uvicorn
+worker. Measures the worker's memory and idle CPU with the streams open,
+how fast a transfer reaches the streams of both users, and what the same
+10,000 dashboards would cost if they polled every 5 seconds instead.
+
+USAGE (from the project root):
+    python -m benchmarks.bench_sse
+
+Needs about 10,000 free file descriptors in both processes (ulimit -n).
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from benchmarks.common import make_client, report
+
+USERS = 1000
+STREAMS_PER_USER = 10
+POLL_SECONDS = 5
+POLL_REQUESTS = 2000
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def open_stream(port: int, token: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=1 << 20)
+    writer.write(
+        f"GET /api/v1/events/stream HTTP/1.1\r\nHost: bench\r\n"
+        f"Authorization: Bearer {token}\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    if not head.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(head.decode(errors="replace"))
+    await reader.readuntil(b"event: balance")  # the snapshot arrived
+    return reader, writer
+
+
+async def run(port: int, tokens: list[str], server_pid: int, transfer, poll) -> dict:
+    results = {"rss_before": rss_mb(server_pid)}
+    gate = asyncio.Semaphore(200)
+
+    async def connect(token):
+        async with gate:
+            return await open_stream(port, token)
+
+    started = time.perf_counter()
+    streams = await asyncio.gather(*(connect(token) for token in tokens for _ in range(STREAMS_PER_USER)))
+    results["connect_seconds"] = time.perf_counter() - started
+    results["streams"] = len(streams)
+    results["rss_after"] = rss_mb(server_pid)
+
+    cpu = cpu_seconds(server_pid)
+    await asyncio.sleep(5)
+    results["idle_cpu"] = (cpu_seconds(server_pid) - cpu) / 5
+
+    # Both users of a transfer: the first two users' streams
+    watched = streams[:2 * STREAMS_PER_USER]
+    started = time.perf_counter()
+    waits = [asyncio.create_task(reader.readuntil(b"event: transaction")) for reader, _ in watched]
+    await asyncio.to_thread(transfer)
+    await asyncio.gather(*waits)
+    results["fanout_ms"] = (time.perf_counter() - started) * 1000
+
+    # Ordinary requests, served while the streams stay open
+    results["poll_rate"] = await asyncio.to_thread(poll)
+
+    for _, writer in streams:
+        writer.close()
+    return results
+
+
+def main():
+    make_client()
+    import httpx
+    from core.security import create_access_token
+    from database import SessionLocal
+    from models import User, Wallet
+
+    db = SessionLocal()
+    users = [User(email=f"viewer{i}@bench.example.com", hashed_password="x") for i in range(USERS)]
+    db.add_all(users)
+    db.flush()
+    db.add_all(Wallet(user_id=user.id, balance=100.0) for user in users)
+    db.commit()
+    tokens = [create_access_token({"sub": str(user.id)}) for user in users]
+    sender_wallet, recipient_wallet = (db.query(Wallet).filter(Wallet.user_id == users[n].id).one().id
+                                       for n in (0, 1))
+    db.close()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", "1",
+         "--log-level", "warning", "--backlog", "4096"],
+        env={**os.environ, "SSE_MAX_STREAMS_PER_USER": str(STREAMS_PER_USER)},
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base}/health", timeout=1)
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        headers = {"Authorization": f"Bearer {tokens[0]}"}
+
+        def transfer():
+            httpx.post(f"{base}/api/v1/wallets/{sender_wallet}/transfer", headers=headers, timeout=10,
+                       json={"recipient_wallet_id": recipient_wallet, "amount": 1.0}).raise_for_status()
+
+        def poll() -> float:
+            """GET /wallets/ requests per second, one after another (what a polling dashboard sends)."""
+            with httpx.Client(base_url=base, headers=headers) as client:
+                client.get("/api/v1/wallets/")
+                started = time.perf_counter()
+                for _ in range(POLL_REQUESTS):
+                    client.get("/api/v1/wallets/")
+                return POLL_REQUESTS / (time.perf_counter() - started)
+
+        results = asyncio.run(run(port, tokens, server.pid, transfer, poll))
+    finally:
+        server.terminate()
+        server.wait()
+
+    streams = results["streams"]
+    needed = streams / POLL_SECONDS
+    print(f"{streams:,} idle streams ({USERS:,} users x {STREAMS_PER_USER}) on one uvicorn worker")
+    report("time to open them all", results["connect_seconds"], "s")
+    report("worker memory before", results["rss_before"], "MB")
+    report("worker memory with the streams open", results["rss_after"], "MB")
+    report("memory per stream", (results["rss_after"] - results["rss_before"]) * 1024 / streams, "KB")
+    report("worker CPU while idle", results["idle_cpu"] * 100, "%")
+    report(f"transfer -> event on {2 * STREAMS_PER_USER} streams", results["fanout_ms"], "ms")
+    print(f"polling instead, every {POLL_SECONDS} s:")
+    report("requests the worker would have to serve", needed)
+    report("requests one worker serves (GET /wallets/)", results["poll_rate"])
+    report("workers needed just for polling", needed / results["poll_rate"], "")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Shared setup for benchmark scripts.
+
+WHAT THIS FILE DOES:
+- Points the app at a throwaway SQLite database
+- Creates users and logs them in
+- Measures how many operations per second a function manages
+
+USAGE (from the project root):
+    python -m benchmarks.bench_qr
+"""
+import os
+import tempfile
+import time
+from typing import Callable
+
+
+def make_client():
+    """
+    Create a TestClient for the app backed by a fresh temporary database.
+
+    Must be called before anything imports `database` or `main`.
+    """
+    db_dir = tempfile.mkdtemp(prefix="rosepay-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+    from fastapi.testclient import TestClient
+    from database import engine
+    from migrations.runner import migrate
+    from main import app
+
+    migrate(engine, log=lambda message: None)
+    return TestClient(app)
+
+
+def auth_headers(client, email: str, password: str = "benchpassword123") -> dict:
+    """Register (if needed) and log in a user, returning auth headers."""
+    client.post("/api/v1/users/register", json={"email": email, "password": password})
+    response = client.post("/api/v1/users/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def ops_per_second(func: Callable[[], object], iterations: int) -> float:
+    """Run `func` `iterations` times and return operations per second."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    return iterations / elapsed
+
+
+def report(label: str, value: float, unit: str = "req/s") -> None:
+    """Print one benchmark result line."""
+    print(f"  {label:<48} {value:>12,.1f} {unit}")
@@ -9,12 +9,37 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./wallet_app.db"
+    DB_AUTO_CREATE: bool = False  # Run migrations on startup (dev only; use `python manage.py migrate`)
+    
+    # Optional feature routers to skip at startup, comma separated
+    # Example: "merchant,analytics,budget"
+    DISABLED_FEATURES: str = ""
     
     # Security - JWT token settings
     SECRET_KEY: str = "your-secret-key-change-this-in-production-use-random-string"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Password and PIN hashing (bcrypt, in worker processes)
+    BCRYPT_ROUNDS: int = 12  # Cost factor, each +1 doubles the work (12 = ~250 ms); other costs are rehashed at login
+    HASH_WORKERS: int = 0  # Hashing processes (0 = one per CPU core, 1 = hash in a thread instead)
+    HASH_MAX_PENDING: int = 256  # Hashes queued or running in this worker; more get 503 + Retry-After
+    
+    # Wallet PIN guessing limits (checked before bcrypt runs)
+    PIN_ATTEMPTS_PER_WINDOW: int = 5  # PIN checks one client may make on one wallet per window (then 429)...
+    PIN_ATTEMPT_WINDOW_SECONDS: float = 300.0  # ...refilled gradually over this many seconds
+    PIN_LOCKOUT_AFTER_FAILURES: int = 5  # Wrong PINs in a row (from any client) before the wallet's PIN is locked
+    PIN_LOCKOUT_SECONDS: float = 60.0  # First lockout; each further one is twice as long
+    PIN_LOCKOUT_MAX_SECONDS: float = 86400.0  # Longest lockout; wrong PINs are remembered this long
+    PIN_SUCCESS_TTL_SECONDS: float = 300.0  # A PIN verified from a client is accepted again without bcrypt this long (0 = off)
+    PIN_TRACKING_MAX_ITEMS: int = 100000  # Wallets / clients whose PIN state is kept in memory per worker
+    
+    # Request rate limits per user (or client address) and route group (/api/v1/<group>/...)
+    RATE_LIMIT_ENABLED: bool = True  # Off = no limits and no RateLimit-* headers
+    RATE_LIMITS: str = "wallets=120/60,payments=300/60,analytics=30/60,gateway=60/60"  # group=requests/seconds, comma separated
+    RATE_LIMIT_DEFAULT: str = ""  # Quota for groups not listed, e.g. "600/60" (empty = no limit)
+    RATE_LIMIT_EXEMPT_PATHS: str = "/api/v1/gateway/webhook"  # Path prefixes never limited (Razorpay retries would pile up)
+    
     # App info
     APP_NAME: str = "RosePay - Wallet Payment API"
     APP_VERSION: str = "1.0.0"
@@ -22,6 +47,22 @@ class Settings(BaseSettings):
     # Payment Gateway - Razorpay
     RAZORPAY_KEY_ID: str = "rzp_test_S3EO5kK0GT1iZS"  # Get from Razorpay dashboard
     RAZORPAY_KEY_SECRET: str = "2e7iELlEzuxVUo06Kay8U11b"  # Get from Razorpay dashboard
+    RAZORPAY_BASE_URL: str = "https://api.razorpay.com"  # Point at a fake server in tests
+    GATEWAY_POOL_SIZE: int = 20  # Open connections kept to Razorpay per worker
+    GATEWAY_CONNECT_TIMEOUT: float = 3.05  # Seconds to open a connection
+    GATEWAY_READ_TIMEOUT: float = 10.0  # Seconds to wait for a response
+    GATEWAY_READ_RETRIES: int = 2  # Extra attempts for reads (payment fetch); writes are never retried
+    GATEWAY_RETRY_BACKOFF_SECONDS: float = 0.2  # Base wait before a retry (doubles, with jitter)
+    GATEWAY_BREAKER_FAILURES: int = 5  # Consecutive failures that open the circuit breaker
+    GATEWAY_BREAKER_RESET_SECONDS: float = 30.0  # How long the circuit stays open before a trial call
+    RAZORPAY_WEBHOOK_SECRET: str = "change-this-webhook-secret"  # Set the same secret in the Razorpay dashboard webhook (webhooks get 503 until changed)
+    GATEWAY_EVENT_INTERVAL_SECONDS: float = 5.0  # How often the processor picks up events the webhook didn't finish
+    GATEWAY_EVENT_BATCH_SIZE: int = 100  # Events applied per processor run
+    GATEWAY_EVENT_MAX_ATTEMPTS: int = 5  # Give up on an event (status "failed") after this many errors
+    GATEWAY_RECONCILE_INTERVAL_SECONDS: float = 900.0  # How often payments at Razorpay are checked against our deposits
+    GATEWAY_RECONCILE_LOOKBACK_HOURS: float = 48.0  # Payments captured this far back are checked each run
+    GATEWAY_RECONCILE_PAGE_SIZE: int = 100  # Payments per page (Razorpay allows at most 100)
+    GATEWAY_RECONCILE_CONCURRENCY: int = 4  # Pages fetched at the same time
     
     # Email Settings (for notifications)
     SMTP_HOST: str = "smtp.gmail.com"  # Gmail SMTP server
@@ -30,11 +71,91 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""  # Your email password (leave empty for now)
     EMAIL_FROM: str = "noreply@rosepay.com"  # Sender email
     
+    # Outgoing webhook URLs (core/outbound_url.py)
+    OUTBOUND_URL_CHECK_ADDRESSES: bool = True  # Refuse webhook URLs resolving to loopback/private/link-local addresses (off only for local development)
+    
+    # Notifications (services/notification_service.py)
+    NOTIFY_DISPATCH_INTERVAL_SECONDS: float = 5.0  # How often queued notifications are sent
+    NOTIFY_BATCH_SIZE: int = 500  # Most users (per channel) sent to in one dispatcher run
+    NOTIFY_MAX_ROWS_PER_GROUP: int = 100  # Most queued notifications of one user and channel sent in one run (the rest waits for the next)
+    NOTIFY_MAX_ATTEMPTS: int = 5  # Give up on a notification (status "failed") after this many failed sends
+    NOTIFY_RETRY_SECONDS: float = 60.0  # Wait before sending a failed notification again
+    NOTIFY_DIGEST_MAX_MINUTES: int = 1440  # Longest digest window a user may choose
+    NOTIFY_WEBHOOK_TIMEOUT_SECONDS: float = 5.0  # Timeout for POSTs to a user's notification webhook
+    
+    # Merchant webhooks (services/merchant_webhook_service.py)
+    WEBHOOK_DELIVERY_INTERVAL_SECONDS: float = 2.0  # How often queued merchant webhooks are sent
+    WEBHOOK_BATCH_SIZE: int = 500  # Deliveries sent per run
+    WEBHOOK_CONCURRENCY: int = 50  # Requests in flight at once, all endpoints together
+    WEBHOOK_ENDPOINT_CONCURRENCY: int = 4  # Default requests in flight to one merchant URL
+    WEBHOOK_TIMEOUT_SECONDS: float = 5.0  # Timeout for one POST to a merchant
+    WEBHOOK_MAX_ATTEMPTS: int = 8  # Give up on a delivery (status "failed") after this many failed POSTs
+    WEBHOOK_BACKOFF_BASE_SECONDS: float = 30.0  # Wait before the first retry (doubles every attempt, with jitter)
+    WEBHOOK_BACKOFF_MAX_SECONDS: float = 21600.0  # Longest wait between two attempts
+    WEBHOOK_SKIPPED_RETRY_SECONDS: float = 15.0  # Wait before sending a delivery skipped because its endpoint was unreachable that run (not counted as an attempt)
+    WEBHOOK_MAX_ENDPOINTS: int = 5  # Webhook URLs one merchant may register
+    
+    # Live updates (GET /api/v1/events/stream, core/event_hub.py)
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # Idle streams get a heartbeat this often (keeps proxies from closing them)
+    SSE_QUEUE_SIZE: int = 100  # Unread events kept per stream; more = client is told to resync
+    SSE_MAX_STREAMS_PER_USER: int = 10  # Open streams one user may have (browser tabs)
+    SSE_MAX_STREAM_SECONDS: float = 3600.0  # Streams are closed after this; the browser reconnects (and re-authenticates)
+    SSE_RETRY_MS: int = 3000  # Reconnect delay the browser is told to use
+    
+    # QR codes
+    QR_CACHE_MAX_ITEMS: int = 1024  # Rendered images kept in memory per worker
+    QR_CACHE_DIR: str = ""  # Shared on-disk cache folder (empty = disabled)
+    QR_HTTP_MAX_AGE: int = 86400  # Cache-Control max-age for QR images (seconds)
+    QR_MAX_TUNED_VERSION: int = 5  # Strongest error correction that keeps the QR at or below this version
+    QR_BATCH_MAX_ITEMS: int = 2000  # Most QR codes in one bulk request
+    QR_BATCH_WORKERS: int = 0  # Render processes for bulk requests (0 = one per CPU core)
+    QR_BATCH_WINDOW_PER_WORKER: int = 4  # Renders in flight per worker (bounds memory)
+    
+    # Payment link lookup cache (public GET /payments/link/{id})
+    LINK_CACHE_MAX_ITEMS: int = 10000  # Links kept in memory per worker
+    LINK_CACHE_TTL_SECONDS: float = 30.0  # Max staleness in other workers after a link is paid
+    LINK_CACHE_NEGATIVE_TTL_SECONDS: float = 60.0  # How long unknown ids are remembered as "not found"
+    LINK_BULK_MAX_ITEMS: int = 5000  # Most links in one bulk create request
+    LINK_BULK_CHUNK_SIZE: int = 500  # Rows per INSERT statement in bulk create
+    
+    # Wallet balance cache (GET /wallets/, /wallets/{id}, /wallets/{id}/balance)
+    BALANCE_CACHE_MAX_ITEMS: int = 50000  # Users whose wallets are kept in memory per worker
+    BALANCE_CACHE_TTL_SECONDS: float = 10.0  # Max staleness in other workers when the notify channel is off
+    BALANCE_CACHE_NOTIFY_CHANNEL: str = ""  # PostgreSQL LISTEN/NOTIFY channel to invalidate other workers (empty = off)
+    
+    # Merchant sales charts (GET /merchant/sales)
+    SALES_SERIES_MAX_DAYS: int = 731  # Longest range one chart may cover
+    SALES_SERIES_MAX_POINTS: int = 500  # More buckets than this are merged into wider ones
+    SALES_SERIES_SETTLE_SECONDS: float = 60.0  # Hours older than this (plus the hour) never change again
+    SALES_SERIES_CACHE_MAX_ITEMS: int = 2048  # Charts kept in memory per worker
+    SALES_SERIES_CACHE_TTL_SECONDS: float = 3600.0  # How long a cached chart is kept
+    
     # Transaction Limits
     MAX_TRANSACTION_AMOUNT: float = 10000.0  # Maximum single transaction
     MIN_TRANSACTION_AMOUNT: float = 0.01  # Minimum single transaction
     DAILY_TRANSACTION_LIMIT: float = 50000.0  # Maximum per day
-    
+
+    # Background jobs (core/scheduler.py)
+    SCHEDULER_ENABLED: bool = True  # Run jobs inside the web process (false = run `python manage.py run-scheduler`)
+    SCHEDULER_TICK_SECONDS: float = 5.0  # How often the scheduler looks for due jobs
+    LINK_SWEEP_INTERVAL_SECONDS: float = 60.0  # Deactivate expired payment links this often
+    REQUEST_SWEEP_INTERVAL_SECONDS: float = 300.0  # Cancel stale payment requests this often
+    REQUEST_RECOUNT_INTERVAL_SECONDS: float = 3600.0  # Rebuild pending request counts (inbox badges) this often
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0  # Move old links/requests to archive tables this often
+    MERCHANT_RECONCILE_INTERVAL_SECONDS: float = 3600.0  # Check merchant revenue against the ledger this often
+    PAYMENT_REQUEST_TTL_DAYS: int = 30  # Pending payment requests are cancelled after this
+    REQUEST_BATCH_MAX_ITEMS: int = 200  # Most payment requests accepted in one batch
+    ARCHIVE_AFTER_DAYS: int = 90  # Finished links/requests older than this are archived
+    MAINTENANCE_BATCH_SIZE: int = 500  # Rows changed per commit by cleanup jobs
+    MAINTENANCE_MAX_BATCHES: int = 20  # Batches per job run (the rest waits for the next run)
+
+    # Health checks (load balancer probes)
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0  # Max time for one dependency check
+    HEALTH_CACHE_SECONDS: float = 5.0  # Reuse probe results for this long
+    HEALTH_MIN_POOL_HEADROOM: float = 0.1  # Fail if less than 10% of DB connections are free
+    HEALTH_MAX_SCHEDULER_LAG_SECONDS: float = 120.0  # Scheduler must beat at least this often
+    HEALTH_MAX_OUTBOX_LAG_SECONDS: float = 300.0  # Oldest unsent email must be younger than this
+
     class Config:
         env_file = ".env"
         case_sensitive = True
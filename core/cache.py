@@ -0,0 +1,140 @@
+"""
+In-process caches.
+
+WHAT THIS FILE DOES:
+- CacheBackend: the interface every cache implements, so services can
+  swap the in-process cache for a shared one (e.g. Redis) later
+- LRUCache: keeps the N most recently used items in memory, optionally
+  with a time-to-live (TTL) per item
+- Counts hits and misses so we can see if a cache is worth it
+
+LEARN:
+- LRU = "Least Recently Used" - when full, throw away the item
+  nobody asked for in the longest time
+- TTL = how long an item may be served before it must be re-read
+- Hit rate = hits / (hits + misses); close to 1.0 means the cache works
+- Each worker process has its own copy of these caches
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class CacheBackend(ABC):
+    """
+    What a cache must support.
+
+    Values must be plain data (dicts of strings, numbers, datetimes,
+    bytes...) never ORM objects, so that a shared backend can serialize them.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value (None if missing or expired)."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, for at most `ttl` seconds if given."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a value if present."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove everything and reset counters."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Size and hit-rate numbers (for the /metrics endpoint)."""
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe LRU cache with optional TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, default_ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        # key -> (value, expires at (time.monotonic) or None)
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value (None if missing or expired) and mark it as recently used."""
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used item if full."""
+        if self.maxsize <= 0:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl is not None and ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def update(self, key: str, func: Callable[[Any], Optional[Any]]) -> None:
+        """
+        Replace a cached value with func(value), atomically.
+
+        Does nothing if the key isn't cached (or has expired), keeps the
+        expiry time, and counts as neither a hit nor a miss. func returning
+        None removes the key.
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return
+            value = func(value)
+            if value is None:
+                del self._data[key]
+            else:
+                self._data[key] = (value, expires_at)
+
+    def delete(self, key: str) -> None:
+        """Remove a value if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove everything and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Size and hit-rate numbers (for the /metrics endpoint)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -16,6 +16,7 @@ from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -73,6 +74,23 @@ async def integrity_error_handler(request: Request, exc: IntegrityError):
     )
 
 
+async def stale_data_handler(request: Request, exc: StaleDataError):
+    """
+    Handle a write that lost a race (a wallet changed since it was read).
+    
+    WHAT IT DOES:
+    1. Catches the versioned UPDATE that matched no row
+    2. Returns 409: nothing was changed, the request can be sent again
+    """
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={
+            "detail": "Conflict",
+            "message": "The wallet changed while this request was processed. Please try again."
+        }
+    )
+
+
 async def general_exception_handler(request: Request, exc: Exception):
     """
     Handle all other errors.
@@ -0,0 +1,147 @@
+"""
+In-process publish/subscribe hub for live updates (server-sent events).
+
+WHAT THIS FILE DOES:
+- Streams subscribe to a key (a user id) and get a bounded queue
+- publish() can be called from any thread (sync routes run in a thread
+  pool); messages are handed to the event loop that owns each stream
+- Backpressure: a stream whose client doesn't read fast enough fills
+  its queue; everything unread is then dropped and replaced by one
+  "resync" message telling the client to refetch
+- One heartbeat task per event loop puts a heartbeat into every idle
+  stream, instead of one timer per connection
+
+LEARN:
+- A message is formatted once and the same string goes to every
+  subscriber - fan-out costs a queue put per stream, not a json.dumps
+- The hub only sees events published in its own process: with several
+  web workers, put a broker (Redis pub/sub, PostgreSQL LISTEN/NOTIFY)
+  between publish() and the hubs
+"""
+import asyncio
+import threading
+from typing import Hashable, Optional
+
+from config import settings
+from core import metrics
+
+# Queue items that aren't messages
+HEARTBEAT = object()
+RESYNC = object()
+
+
+class Subscription:
+    """One stream's queue. Read it with `await subscription.next()`."""
+
+    __slots__ = ("key", "loop", "queue", "dropped")
+
+    def __init__(self, key: Hashable, loop: asyncio.AbstractEventLoop, max_queue: int):
+        self.key = key
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0  # messages thrown away because the client was too slow
+
+    async def next(self):
+        """The next message (a str), HEARTBEAT or RESYNC."""
+        return await self.queue.get()
+
+    def _offer(self, item) -> bool:
+        """Queue an item (on the owning loop). False = the queue overflowed."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+            return False
+
+
+class EventHub:
+    """Subscriptions by key, shared by all streams of the process."""
+
+    def __init__(self, heartbeat_seconds: float = 15.0, max_queue: int = 100):
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_queue = max_queue
+        self._subscriptions: dict[Hashable, set[Subscription]] = {}
+        self._beats: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "delivered": 0, "resyncs": 0}
+
+    def subscribe(self, key: Hashable, limit: int = None) -> Optional[Subscription]:
+        """
+        Start receiving messages for `key`. Call it on the event loop that
+        will read them. Returns None if `key` already has `limit` streams.
+        """
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(key, loop, self.max_queue)
+        with self._lock:
+            streams = self._subscriptions.setdefault(key, set())
+            if limit is not None and len(streams) >= limit:
+                return None
+            streams.add(subscription)
+            if loop not in self._beats:
+                self._beats[loop] = loop.create_task(self._heartbeat(loop))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            streams = self._subscriptions.get(subscription.key)
+            if streams is not None:
+                streams.discard(subscription)
+                if not streams:
+                    del self._subscriptions[subscription.key]
+
+    def publish(self, key: Hashable, message: str) -> int:
+        """Send a formatted message to every stream of `key`. Returns how many."""
+        with self._lock:
+            streams = list(self._subscriptions.get(key, ()))
+            self._stats["published"] += 1
+        if not streams:
+            return 0
+        by_loop: dict[asyncio.AbstractEventLoop, list[Subscription]] = {}
+        for subscription in streams:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(self._deliver, subscriptions, message)
+            except RuntimeError:
+                pass  # loop closed; its streams are gone
+        return len(streams)
+
+    def _deliver(self, subscriptions: list[Subscription], message: str) -> None:
+        resyncs = sum(1 for subscription in subscriptions if not subscription._offer(message))
+        with self._lock:
+            self._stats["delivered"] += len(subscriptions) - resyncs
+            self._stats["resyncs"] += resyncs
+
+    async def _heartbeat(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Wake idle streams every heartbeat_seconds; ends when the loop has no streams."""
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            with self._lock:
+                mine = [
+                    subscription
+                    for streams in self._subscriptions.values()
+                    for subscription in streams
+                    if subscription.loop is loop
+                ]
+                if not mine:
+                    del self._beats[loop]
+                    return
+            for subscription in mine:
+                if subscription.queue.empty():
+                    subscription._offer(HEARTBEAT)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": len(self._subscriptions),
+                "streams": sum(len(streams) for streams in self._subscriptions.values()),
+                **self._stats,
+            }
+
+
+hub = EventHub(settings.SSE_HEARTBEAT_SECONDS, settings.SSE_QUEUE_SIZE)
+metrics.register("event_hub", hub.stats)
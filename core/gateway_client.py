@@ -0,0 +1,264 @@
+"""
+HTTP client layer for the Razorpay API.
+
+WHAT THIS FILE DOES:
+- Keeps a pool of open HTTPS connections to Razorpay (no new TLS
+  handshake per call)
+- Gives every call a connect and read timeout
+- Retries reads (safe to repeat) with exponential backoff and jitter
+- Stops calling Razorpay for a while when it keeps failing (circuit breaker)
+- Records latency and errors per operation (shown in /metrics)
+
+LEARN:
+- Without a timeout, a hung gateway holds a worker thread forever
+- Only idempotent calls are retried: retrying "create order" after a
+  timeout could create two orders
+- Jitter = a random part of the wait, so many workers don't retry at
+  the same moment and hit the gateway again all together
+- Circuit breaker states:
+    closed    - calls go through, failures are counted
+    open      - too many failures in a row: fail fast, don't call
+    half-open - after a pause, one trial call decides open or closed
+"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+# Recent latencies kept per operation for percentiles
+LATENCY_SAMPLES = 512
+
+
+class GatewayUnavailable(Exception):
+    """The gateway can't be reached right now (circuit open, timeouts, 5xx)."""
+
+
+class CircuitBreaker:
+    """Counts consecutive failures and opens after `failure_threshold`."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """May a call go through now? In half-open state only one trial call may."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_running:
+                self.rejected += 1
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+            }
+
+
+class _OperationStats:
+    """Call count, errors and latency for one operation."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies_ms: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.latencies_ms)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 2)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(samples[-1], 2) if samples else None,
+        }
+
+
+class GatewayClient:
+    """
+    Razorpay client with pooled connections, timeouts, retries and a
+    circuit breaker. Thread-safe; create one per process.
+    """
+
+    def __init__(
+        self,
+        key_id: str,
+        key_secret: str,
+        base_url: str,
+        pool_size: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        read_retries: int = 2,
+        retry_backoff: float = 0.2,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        # Imported here: razorpay pulls in `requests`, which slows down
+        # cold starts of workers that never touch the gateway
+        import razorpay
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        # Retries are done by call() (reads only), not by urllib3
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.razorpay = razorpay.Client(session=self.session, auth=(key_id, key_secret), base_url=base_url)
+        self.timeout = (connect_timeout, read_timeout)
+        self.read_retries = read_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._stats: dict[str, _OperationStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def call(
+        self,
+        operation: str,
+        func: Callable[..., Any],
+        *args,
+        idempotent: bool = False,
+        timeout: Optional[tuple[float, float]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Call a razorpay-python method, e.g.
+        call("fetch_payment", client.razorpay.payment.fetch, "pay_123", idempotent=True).
+
+        WHAT IT DOES:
+        1. Fails fast with GatewayUnavailable if the circuit is open
+        2. Passes the timeout through to `requests`
+        3. On timeouts, connection errors and 5xx: retries if idempotent,
+           otherwise (or when out of retries) raises GatewayUnavailable
+        4. Razorpay's 4xx errors (bad request) are raised as they are -
+           the gateway is healthy, the request was wrong
+        """
+        import requests
+        from razorpay.errors import GatewayError, ServerError
+
+        attempts = 1 + (self.read_retries if idempotent else 0)
+        stats = self._operation_stats(operation)
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                with self._stats_lock:
+                    stats.errors += 1
+                raise GatewayUnavailable(f"{operation}: circuit open, gateway calls paused")
+
+            started = time.perf_counter()
+            try:
+                result = func(*args, timeout=timeout or self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    ServerError, GatewayError) as e:
+                self._record(stats, started, error=True)
+                self.breaker.record_failure()
+                if attempt == attempts - 1:
+                    raise GatewayUnavailable(f"{operation}: {type(e).__name__}: {e}") from e
+                with self._stats_lock:
+                    stats.retries += 1
+                time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                self._record(stats, started, error=True)
+                self.breaker.record_success()  # a 4xx answer means the gateway is up
+                raise
+            self._record(stats, started)
+            self.breaker.record_success()
+            return result
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter: random(0, base * 2^attempt)."""
+        return random.uniform(0, self.retry_backoff * (2 ** attempt))
+
+    def _operation_stats(self, operation: str) -> _OperationStats:
+        with self._stats_lock:
+            return self._stats.setdefault(operation, _OperationStats())
+
+    def _record(self, stats: _OperationStats, started: float, error: bool = False) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.latencies_ms.append(elapsed_ms)
+
+    # ============ RAZORPAY OPERATIONS ============
+
+    def create_order(self, data: dict) -> dict:
+        """Create an order (not retried: a retry could create a second order)."""
+        return self.call("create_order", self.razorpay.order.create, data=data)
+
+    def fetch_payment(self, payment_id: str) -> dict:
+        """Fetch a payment (retried on failure)."""
+        return self.call("fetch_payment", self.razorpay.payment.fetch, payment_id, idempotent=True)
+
+    def list_payments(self, params: dict) -> dict:
+        """One page of payments, e.g. {"from": ts, "to": ts, "count": 100, "skip": 0} (retried)."""
+        return self.call("list_payments", self.razorpay.payment.all, params, idempotent=True)
+
+    def capture_payment(self, payment_id: str, amount_in_paise: int) -> dict:
+        """Capture an authorized payment (not retried)."""
+        return self.call("capture_payment", self.razorpay.payment.capture, payment_id, amount_in_paise)
+
+    def verify_payment_signature(self, params: dict) -> None:
+        """Check the checkout signature locally (HMAC, no network call)."""
+        self.razorpay.utility.verify_payment_signature(params)
+
+    def stats(self) -> dict:
+        """Circuit breaker state and per-operation latency (for /metrics)."""
+        with self._stats_lock:
+            operations = {name: stats.snapshot() for name, stats in self._stats.items()}
+        return {"circuit": self.breaker.stats(), "operations": operations}
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
@@ -0,0 +1,165 @@
+"""
+Password and PIN hashing in a process pool.
+
+WHAT THIS FILE DOES:
+- hash_secret() / verify_secret(): bcrypt, run in a pool of worker
+  processes and awaited, so a burst of logins doesn't tie up the
+  request threads
+- Bounded: at most HASH_MAX_PENDING hashes waiting or running; more get
+  503 (try again shortly) instead of a queue that grows while clients
+  time out
+- needs_rehash(): True when a stored hash has another cost than
+  BCRYPT_ROUNDS, so login can upgrade it
+- hash_stats(): queue depth, rejections and timings for /metrics
+
+LEARN:
+- bcrypt is slow on purpose (12 rounds = ~250 ms of CPU) so stolen
+  hashes are slow to crack - which makes it the most expensive thing a
+  login does
+- Sync routes run in a pool of 40 threads: 40 logins at once used to
+  leave no thread for any other request. Awaiting a process frees it
+- More hashing processes than CPU cores adds waiting, not throughput
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from config import settings
+from core import metrics
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"pending": 0, "peak_pending": 0, "completed": 0, "rejected": 0, "rehashed": 0,
+          "wait_seconds": 0.0, "hash_seconds": 0.0}
+
+
+def bcrypt_hash(secret: str, rounds: int) -> str:
+    """Hash a password or PIN (runs in a worker process)."""
+    return bcrypt.hashpw(secret.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def bcrypt_verify(secret: str, hashed: str) -> bool:
+    """Check a password or PIN against its hash (runs in a worker process)."""
+    try:
+        return bcrypt.checkpw(secret.encode("utf-8"), hashed.encode("utf-8"))
+    except ValueError:
+        return False  # not a bcrypt hash
+
+
+def _timed(func, *args) -> tuple[object, float]:
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+
+def worker_count() -> int:
+    """Number of hashing processes (HASH_WORKERS, 0 = one per CPU core)."""
+    return settings.HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> Executor:
+    """Create the process pool on first use ("spawn": see qr_batch_service)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=worker_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes (they are recreated on next use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+async def _run(func, *args):
+    """Run func(*args) in the pool (or a thread, with one worker) and await it."""
+    with _stats_lock:
+        if _stats["pending"] >= settings.HASH_MAX_PENDING:
+            _stats["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins at once, please try again",
+                headers={"Retry-After": "1"},
+            )
+        _stats["pending"] += 1
+        _stats["peak_pending"] = max(_stats["peak_pending"], _stats["pending"])
+    started = time.perf_counter()
+    seconds = 0.0
+    try:
+        if worker_count() == 1:
+            # One worker: a thread is enough (and starts instantly)
+            result, seconds = await asyncio.get_running_loop().run_in_executor(None, _timed, func, *args)
+        else:
+            result, seconds = await asyncio.wrap_future(_get_pool().submit(_timed, func, *args))
+        return result
+    finally:
+        with _stats_lock:
+            _stats["pending"] -= 1
+            _stats["completed"] += 1
+            _stats["hash_seconds"] += seconds
+            _stats["wait_seconds"] += time.perf_counter() - started - seconds
+
+
+async def hash_secret(secret: str) -> str:
+    """bcrypt hash of a password or PIN, with BCRYPT_ROUNDS."""
+    return await _run(bcrypt_hash, secret, settings.BCRYPT_ROUNDS)
+
+
+async def verify_secret(secret: str, hashed: str) -> bool:
+    """True if `secret` matches the bcrypt hash."""
+    return await _run(bcrypt_verify, secret, hashed)
+
+
+async def rehash_if_needed(secret: str, hashed: str) -> Optional[str]:
+    """
+    A new hash with BCRYPT_ROUNDS if `hashed` used another cost, else None.
+
+    Call after a successful verify. Skipped (None) while hashes are
+    queued: an upgrade can wait for the next login, a login can't.
+    """
+    if not needs_rehash(hashed):
+        return None
+    with _stats_lock:
+        if _stats["pending"] >= worker_count():
+            return None
+        _stats["rehashed"] += 1
+    return await hash_secret(secret)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True if a bcrypt hash ("$2b$<cost>$...") wasn't made with BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+def hash_stats() -> dict:
+    """Queue depth and timings since startup."""
+    with _stats_lock:
+        stats = dict(_stats)
+    done = stats["completed"]
+    stats["workers"] = worker_count()
+    stats["rounds"] = settings.BCRYPT_ROUNDS
+    stats["avg_hash_ms"] = round(stats.pop("hash_seconds") * 1000 / done, 1) if done else 0.0
+    stats["avg_wait_ms"] = round(stats.pop("wait_seconds") * 1000 / done, 1) if done else 0.0
+    return stats
+
+
+metrics.register("password_hashing", hash_stats)
@@ -0,0 +1,43 @@
+"""
+Heartbeat registry for background components.
+
+WHAT THIS FILE DOES:
+- Lets background workers say "I'm still alive" (beat)
+- Lets health checks ask "when did this worker last beat?"
+
+LEARN:
+- A heartbeat = a timestamp a worker refreshes on every loop
+- If the timestamp gets too old, the worker is stuck or dead
+- Health checks compare the age against a maximum lag
+"""
+import threading
+import time
+from typing import Optional
+
+_lock = threading.Lock()
+_beats: dict[str, float] = {}
+
+
+def beat(name: str) -> None:
+    """Record that the component called `name` is alive right now."""
+    with _lock:
+        _beats[name] = time.monotonic()
+
+
+def last_beat_age(name: str) -> Optional[float]:
+    """
+    Get seconds since the last heartbeat of a component.
+
+    Returns None if the component never reported (not running).
+    """
+    with _lock:
+        last = _beats.get(name)
+    if last is None:
+        return None
+    return time.monotonic() - last
+
+
+def clear(name: str) -> None:
+    """Forget a component (used when it shuts down cleanly)."""
+    with _lock:
+        _beats.pop(name, None)
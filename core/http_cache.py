@@ -0,0 +1,33 @@
+"""
+HTTP caching helpers (ETag / If-None-Match).
+
+WHAT THIS FILE DOES:
+- Checks if the browser already has the current version of a resource
+- Lets routes answer "304 Not Modified" without building the response
+
+LEARN:
+- ETag = a fingerprint of a response, sent in the ETag header
+- The browser sends it back in If-None-Match on the next request
+- If it still matches, the server replies 304 with an empty body
+"""
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against our ETag.
+
+    Handles "*", comma separated lists and weak validators (W/"...").
+    """
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -0,0 +1,38 @@
+"""
+Metrics registry.
+
+WHAT THIS FILE DOES:
+- Services register a function that returns their numbers
+  (cache hit rates, queue depths, job throughput, ...)
+- GET /api/v1/metrics calls all of them and returns one JSON document
+
+LEARN:
+- Metrics = numbers that tell you how the app behaves in production
+- Registering a function (instead of pushing numbers) means nothing is
+  computed until someone actually asks
+"""
+import threading
+from typing import Callable
+
+_lock = threading.Lock()
+_providers: dict[str, Callable[[], dict]] = {}
+
+
+def register(name: str, provider: Callable[[], dict]) -> None:
+    """Register (or replace) a metrics provider under `name`."""
+    with _lock:
+        _providers[name] = provider
+
+
+def snapshot() -> dict:
+    """Collect numbers from every registered provider."""
+    with _lock:
+        providers = dict(_providers)
+
+    result = {}
+    for name, provider in sorted(providers.items()):
+        try:
+            result[name] = provider()
+        except Exception as e:
+            result[name] = {"error": f"{type(e).__name__}: {e}"}
+    return result
@@ -0,0 +1,68 @@
+"""
+Checks for URLs the server sends requests to (user and merchant webhooks).
+
+WHAT THIS FILE DOES:
+- validate_outbound_url(): refuses URLs that aren't http(s), and URLs
+  whose host resolves to an address inside our network (loopback,
+  private ranges, link-local - which includes the cloud metadata service
+  at 169.254.169.254 - and other non-public ranges)
+- Called when a URL is saved and again right before sending to it
+
+LEARN:
+- SSRF (server-side request forgery) = getting the server to make a
+  request for you. A webhook URL of http://169.254.169.254/... would have
+  our server read its own cloud credentials, or reach internal services
+  no outsider can
+- The host is resolved, not just compared as text: any DNS name can
+  point at 127.0.0.1, and its answer can change after the URL was saved
+  (so it is checked again before each send)
+- Webhook clients don't follow redirects: a public URL answering
+  "302 -> http://10.0.0.5/" would get around the check
+"""
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from config import settings
+
+
+class UnsafeURLError(ValueError):
+    """The URL may not be sent to."""
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop an IPv6 zone ("fe80::1%eth0")
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped  # ::ffff:127.0.0.1 is 127.0.0.1
+    return ip.is_global and not ip.is_multicast
+
+
+def validate_outbound_url(url: str) -> str:
+    """
+    Check a URL before saving it or sending to it. Returns it unchanged.
+
+    Raises UnsafeURLError if it isn't http(s) with a host, the host
+    doesn't resolve, or any address it resolves to isn't public.
+    OUTBOUND_URL_CHECK_ADDRESSES = False skips the address check (local
+    development, tests).
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        raise UnsafeURLError("URL is malformed")
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError("URL must start with http:// or https:// and name a host")
+    if not settings.OUTBOUND_URL_CHECK_ADDRESSES:
+        return url
+
+    try:
+        addresses = {
+            info[4][0]
+            for info in socket.getaddrinfo(parts.hostname, port or 443, type=socket.SOCK_STREAM)
+        }
+    except (socket.gaierror, UnicodeError):
+        raise UnsafeURLError(f"Host {parts.hostname} can't be resolved")
+    if not all(_is_public(address) for address in addresses):
+        raise UnsafeURLError(f"Host {parts.hostname} is not a public address")
+    return url
@@ -0,0 +1,159 @@
+"""
+Attempt limits (token buckets).
+
+WHAT THIS FILE DOES:
+- RateLimiter: "at most N attempts per window" for each key (a wallet,
+  a client address...), checked before the expensive work is done
+- RateLimitBackend: where the buckets live. MemoryRateLimitBackend keeps
+  them in this process; set_rate_limit_backend() swaps in a shared one
+  (e.g. Redis) so all workers count together
+- Counts allowed and refused attempts for /metrics
+
+LEARN:
+- Token bucket = each key has a bucket of N tokens; an attempt takes
+  one, and tokens drip back at N per window. A burst of N is allowed,
+  after that one attempt per window/N - a sliding window without
+  keeping a timestamp per attempt
+- A refused attempt is told when the next token arrives (Retry-After)
+- Each worker process has its own buckets unless the backend is shared
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from starlette.requests import HTTPConnection
+
+from core import metrics
+
+
+def client_address(request: HTTPConnection) -> str:
+    """The caller's address, the key for per-client limits."""
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimitBackend(ABC):
+    """Where token buckets are kept."""
+
+    @abstractmethod
+    def take(self, key: str, capacity: float, refill_per_second: float) -> tuple[float, float]:
+        """
+        Take a token from key's bucket (created full).
+
+        Returns (wait, remaining): wait is 0.0 if a token was taken, else
+        the seconds until one is available (nothing is taken then);
+        remaining is how many tokens are left.
+        """
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Refill key's bucket."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every bucket."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Size numbers (for the /metrics endpoint)."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in a dict, the `maxsize` most recently used kept.
+
+    Each bucket is one float: the time it will be full again (0 tokens
+    used = now or earlier). Taking a token moves it 1/refill_per_second
+    later; a bucket more than capacity/refill_per_second ahead is empty.
+    Same answers as counting tokens, in under 200 bytes a key (key included).
+
+    A dropped bucket comes back full, so maxsize should be well above the
+    number of keys active within one window.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict = OrderedDict()  # key -> full at (time.monotonic)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_per_second: float) -> tuple[float, float]:
+        interval = 1 / refill_per_second
+        burst = capacity * interval
+        now = time.monotonic()
+        with self._lock:
+            full_at = max(self._buckets.pop(key, now), now)
+            wait = full_at + interval - now - burst
+            if wait <= 1e-9:
+                full_at += interval
+                wait = 0.0
+            self._buckets[key] = full_at
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait, (burst - (full_at - now)) / interval
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"buckets": len(self._buckets), "maxsize": self.maxsize}
+
+
+_backend: RateLimitBackend = MemoryRateLimitBackend()
+_limiters: dict[str, "RateLimiter"] = {}
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    """Use another bucket store (e.g. a shared one) for every limiter."""
+    global _backend
+    _backend = backend
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    return _backend
+
+
+class RateLimiter:
+    """At most `attempts` per `window_seconds` for each key, refilled gradually."""
+
+    def __init__(self, name: str, attempts: int, window_seconds: float):
+        self.name = name
+        self.attempts = attempts
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._stats = {"allowed": 0, "limited": 0}
+        _limiters[name] = self
+
+    def hit(self, key: str) -> float:
+        """Count an attempt: 0.0 if allowed, else seconds to wait (nothing was counted)."""
+        return self.take(key)[0]
+
+    def take(self, key: str) -> tuple[float, float]:
+        """Like hit(), also returning the attempts left: (wait, remaining)."""
+        wait, remaining = _backend.take(f"{self.name}:{key}", self.attempts, self.attempts / self.window_seconds)
+        with self._lock:
+            self._stats["limited" if wait else "allowed"] += 1
+        return wait, remaining
+
+    def reset(self, key: str) -> None:
+        """Give key its full allowance back."""
+        _backend.reset(f"{self.name}:{key}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"attempts": self.attempts, "window_seconds": self.window_seconds, **self._stats}
+
+
+def rate_limit_stats() -> dict:
+    """Every limiter's counters, plus the backend's size."""
+    stats = {name: limiter.stats() for name, limiter in _limiters.items()}
+    stats["backend"] = _backend.stats()
+    return stats
+
+
+metrics.register("rate_limits", rate_limit_stats)
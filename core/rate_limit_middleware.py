@@ -0,0 +1,136 @@
+"""
+Request rate limits per user (or address) and route group.
+
+WHAT THIS FILE DOES:
+- RateLimitMiddleware: before a request reaches its route, takes a token
+  from the bucket of (who is asking, route group). The group is the part
+  of the path after /api/v1/ (wallets, payments, analytics, gateway...)
+- Quotas per group come from RATE_LIMITS ("analytics=30/60" = 30
+  requests per 60 seconds), RATE_LIMIT_DEFAULT for the other groups
+- "Who is asking" = the user id of a valid Bearer token, else the
+  client address
+- Every limited response carries RateLimit-Limit / -Remaining / -Reset /
+  -Policy headers; over the quota it is 429 with Retry-After, without
+  running the route
+- Buckets live in core/rate_limit's backend (in-process by default,
+  shared if one is set)
+
+LEARN:
+- A plain ASGI middleware (not BaseHTTPMiddleware) only wraps `send`, so
+  it adds microseconds, not a task per request
+- Keying by user, not only by address, keeps users behind one office
+  NAT or mobile carrier from sharing one quota
+- A forged token fails the signature check and is limited by address,
+  so it can't be used to spend someone else's quota or get a fresh one
+"""
+import math
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import settings
+from core.rate_limit import RateLimiter
+from core.security import token_subject
+
+
+def parse_quota(quota: str) -> Optional[tuple[int, float]]:
+    """"30/60" -> (30, 60.0) requests per seconds; "" -> None (no limit)."""
+    quota = quota.strip()
+    if not quota:
+        return None
+    requests, _, seconds = quota.partition("/")
+    return int(requests), float(seconds or 60)
+
+
+def parse_quotas(quotas: str) -> dict[str, tuple[int, float]]:
+    """"wallets=120/60,analytics=30/60" -> {"wallets": (120, 60.0), ...}"""
+    parsed = {}
+    for item in quotas.split(","):
+        group, _, quota = item.partition("=")
+        limit = parse_quota(quota)
+        if group.strip() and limit:
+            parsed[group.strip()] = limit
+    return parsed
+
+
+class RateLimitMiddleware:
+    """
+    Token-bucket rate limit for every request under `prefix`.
+
+    Reads RATE_LIMIT_* settings on each request (they are cheap to check
+    and tests change them); limiters are rebuilt when the quotas change.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/api/v1/"):
+        self.app = app
+        self.prefix = prefix
+        self._config: Optional[tuple[str, str, str]] = None
+        self._limiters: dict[str, RateLimiter] = {}
+        self._default: Optional[RateLimiter] = None
+        self._exempt: tuple[str, ...] = ()
+
+    def _limiter(self, path: str) -> Optional[RateLimiter]:
+        """The limiter for a path under the prefix (None = not limited)."""
+        config = (settings.RATE_LIMITS, settings.RATE_LIMIT_DEFAULT, settings.RATE_LIMIT_EXEMPT_PATHS)
+        if config != self._config:
+            self._limiters = {
+                name: RateLimiter(f"http_{name}", requests, seconds)
+                for name, (requests, seconds) in parse_quotas(config[0]).items()
+            }
+            default = parse_quota(config[1])
+            self._default = RateLimiter("http_default", *default) if default else None
+            self._exempt = tuple(exempt.strip() for exempt in config[2].split(",") if exempt.strip())
+            self._config = config
+        if path.startswith(self._exempt):
+            return None
+        return self._limiters.get(path[len(self.prefix):].split("/", 1)[0], self._default)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self._limiter(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait, remaining = limiter.take(_principal(scope))
+        reset = (limiter.attempts - remaining) * limiter.window_seconds / limiter.attempts
+        headers = [
+            (b"ratelimit-limit", str(limiter.attempts).encode()),
+            (b"ratelimit-remaining", str(max(0, int(remaining))).encode()),
+            (b"ratelimit-reset", str(math.ceil(reset)).encode()),
+            (b"ratelimit-policy", f"{limiter.attempts};w={limiter.window_seconds:g}".encode()),
+        ]
+
+        if wait:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests, please slow down"},
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            response.raw_headers.extend(headers)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def _principal(scope: Scope) -> str:
+    """"user:<id>" for a valid Bearer token, else "ip:<client address>"."""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            if value[:7].lower() == b"bearer ":
+                subject = token_subject(value[7:].decode("latin-1").strip())
+                if subject is not None:
+                    return f"user:{subject}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
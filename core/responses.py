@@ -0,0 +1,52 @@
+"""
+Fast JSON responses for list endpoints.
+
+WHAT THIS FILE DOES:
+- FastJSONResponse: a JSONResponse that renders with orjson
+- response_columns(): the table columns a response schema shows, to
+  SELECT plain rows instead of loading ORM objects
+- rows_response(): rows (column-query mappings or cached dicts) ->
+  FastJSONResponse with exactly the schema's fields, in its order
+
+LEARN:
+- Loading 1,000 ORM objects costs more than the query itself (identity
+  map, attribute instrumentation); selecting columns returns plain rows
+- A route that returns a Response skips response_model validation. The
+  model still documents the endpoint, so the rows must match it:
+  response_columns() takes its field list from the schema
+- Routes that return ORM objects or models should keep doing so: FastAPI
+  already serializes a response_model straight to JSON bytes in
+  pydantic-core, faster than dumping to dicts for orjson
+"""
+from typing import Any, Iterable, Mapping
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON via orjson (datetimes as ISO 8601, enums as their value)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def response_columns(model, schema: type[BaseModel], exclude: Iterable[str] = (), **columns) -> list:
+    """
+    Columns of `model` named like `schema`'s fields, in its order.
+
+    Pass an expression for fields that aren't plain columns or need
+    converting, e.g. is_active=type_coerce(Model.is_active, Boolean), and
+    `exclude` the fields filled in separately.
+    """
+    return [
+        columns[name].label(name) if name in columns else getattr(model, name)
+        for name in schema.model_fields if name not in exclude
+    ]
+
+
+def rows_response(rows: Iterable[Mapping], schema: type[BaseModel]) -> FastJSONResponse:
+    """A JSON list of rows, keeping only (and all of) `schema`'s fields."""
+    fields = list(schema.model_fields)
+    return FastJSONResponse([{name: row[name] for name in fields} for row in rows])
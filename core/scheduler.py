@@ -0,0 +1,186 @@
+"""
+Background job scheduler.
+
+WHAT THIS FILE DOES:
+- Runs registered jobs every N seconds in one background thread
+- Beats the "scheduler" heartbeat (checked by /health/ready)
+- Records runs, failures and duration per job (shown in /metrics)
+- On PostgreSQL, lets only one process run a given job at a time
+
+LEARN:
+- Every web worker starts its own scheduler; the advisory lock makes
+  the others skip a job while one process is running it
+- Jobs must be safe to run twice (e.g. "deactivate links that expired"
+  does nothing the second time)
+- Set SCHEDULER_ENABLED=false to run jobs elsewhere
+  (`python manage.py run-scheduler`) or not at all (tests)
+"""
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Callable, Optional
+
+from config import settings
+from core import heartbeats, metrics
+
+
+class Job:
+    """A function run every `interval` seconds."""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], dict]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = 0.0  # time.monotonic(); 0 = run on first tick
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_result: Optional[dict] = None
+        self.last_error: Optional[str] = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped_locked": self.skipped,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_duration_ms": self.last_duration_ms,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
+
+
+_jobs: dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def register_job(name: str, interval: float, func: Callable[[], dict]) -> None:
+    """Register (or replace) a job. `func` returns a dict of numbers for /metrics."""
+    with _jobs_lock:
+        _jobs[name] = Job(name, interval, func)
+
+
+def job_stats() -> dict:
+    """Per-job run statistics."""
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return {
+        "running": is_running(),
+        "jobs": {job.name: job.stats() for job in jobs},
+    }
+
+
+metrics.register("scheduler", job_stats)
+
+
+def _lock_id(name: str) -> int:
+    return zlib.crc32(f"rosepay-job:{name}".encode("utf-8"))
+
+
+def _run_exclusive(job: Job) -> Optional[dict]:
+    """
+    Run a job, holding a PostgreSQL advisory lock while it runs.
+
+    Returns None (job skipped) if another process holds the lock.
+    SQLite has no such lock; there is only one machine anyway.
+    """
+    from sqlalchemy import text
+    from database import engine
+
+    if engine.dialect.name != "postgresql":
+        return job.func()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": _lock_id(job.name)}
+        ).scalar()
+        if not locked:
+            return None
+        try:
+            return job.func()
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _lock_id(job.name)})
+
+
+def _run(job: Job) -> None:
+    started = time.perf_counter()
+    job.last_run_at = datetime.utcnow()
+    try:
+        result = _run_exclusive(job)
+    except Exception as e:
+        job.failures += 1
+        job.last_error = f"{type(e).__name__}: {e}"
+        print(f"⚠️ Scheduled job {job.name} failed: {job.last_error}")
+    else:
+        if result is None:
+            job.skipped += 1
+        else:
+            job.runs += 1
+            job.last_result = result
+            job.last_error = None
+    job.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    job.next_run = time.monotonic() + job.interval
+
+
+def run_job(name: str) -> Optional[dict]:
+    """Run one job right now (manage.py, tests). Returns its result."""
+    with _jobs_lock:
+        job = _jobs[name]
+    _run(job)
+    return job.last_result
+
+
+def run_pending() -> None:
+    """Run every job that is due, then beat the heartbeat."""
+    now = time.monotonic()
+    with _jobs_lock:
+        due = [job for job in _jobs.values() if job.next_run <= now]
+    for job in due:
+        _run(job)
+    heartbeats.beat("scheduler")
+
+
+def _loop() -> None:
+    while not _stop.is_set():
+        run_pending()
+        _stop.wait(settings.SCHEDULER_TICK_SECONDS)
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def start() -> None:
+    """Start the scheduler thread (does nothing if already running)."""
+    global _thread
+    if is_running():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="scheduler", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 10.0) -> None:
+    """Ask the scheduler to stop and wait for the current job to finish."""
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
+    heartbeats.clear("scheduler")
+
+
+def run_forever() -> None:
+    """Run the scheduler in the foreground (dedicated process)."""
+    try:
+        _loop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        heartbeats.clear("scheduler")
@@ -1,36 +1,40 @@
 """
 Security utilities for password hashing and JWT tokens.
 """
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from config import settings
+from core.cache import LRUCache
+from core.hashing import bcrypt_hash, bcrypt_verify
 from database import get_db
 from models import User
 
 # HTTP Bearer scheme for JWT token authentication
 security = HTTPBearer()
 
+# Access token -> user id, for token_subject() (not used to authenticate)
+_token_subjects = LRUCache(maxsize=10000, default_ttl=300)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
+    """
+    Verify a password against its hash.
+    
+    Blocks for the whole hash: routes await core.hashing.verify_secret
+    instead, this is for scripts and the CLI.
+    """
+    return bcrypt_verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    # Generate salt and hash password
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    """Hash a password (blocking, see verify_password; routes use hash_secret)."""
+    return bcrypt_hash(password, settings.BCRYPT_ROUNDS)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -46,19 +50,44 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def token_subject(token: str) -> Optional[str]:
+    """
+    The user id ("sub") of a valid access token, None if it isn't valid.
+
+    Only checks the signature and expiry (no database), and remembers
+    the answer until the token expires (at most 5 minutes) - cheap enough
+    to run on every request, e.g. to rate-limit per user.
+    """
+    subject = _token_subjects.get(token)
+    if subject is not None:
+        return subject
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("sub") is None:
+        return None
+    subject = str(payload["sub"])
+    _token_subjects.set(token, subject, min(payload.get("exp", 0) - time.time(), 300))
+    return subject
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from JWT token."""
+    return get_user_for_token(db, credentials.credentials)
+
+
+def get_user_for_token(db: Session, token: str) -> User:
+    """The active user a JWT access token belongs to (401 if it is invalid)."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
-    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: int = payload.get("sub")
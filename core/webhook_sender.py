@@ -0,0 +1,206 @@
+"""
+Async HTTP sender for outgoing webhooks.
+
+WHAT THIS FILE DOES:
+- Sends a batch of webhook POSTs concurrently from one event loop that
+  runs in its own thread (callers stay plain synchronous code)
+- Keeps connections to every receiver open between batches (keep-alive),
+  in a small connection pool per endpoint
+- Caps requests in flight: overall, and per endpoint so one merchant's
+  server isn't flooded
+- Stops sending to an endpoint for the rest of a batch once it times
+  out or refuses connections (the rest is "skipped", retried later)
+- Signs bodies with HMAC-SHA256 (sign_payload / verify_signature)
+
+LEARN:
+- One thread per request would need hundreds of threads for a big
+  batch; one event loop waits on all the sockets at once
+- A per-endpoint semaphore is taken before the global one, so requests
+  queued behind a slow merchant don't hold global slots
+- One pool per endpoint (sized to its cap) instead of one shared pool:
+  httpx scans every pooled connection for each request, which gets slow
+  with hundreds of connections in one pool
+- Signature header: "t=<unix time>,v1=<hex HMAC of '<t>.<body>'>".
+  The time is signed too, so an old captured request can't be replayed
+"""
+import asyncio
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+SIGNATURE_HEADER = "X-RosePay-Signature"
+
+# Endpoint connection pools kept open (least recently used are closed)
+MAX_POOLS = 512
+
+
+def sign_payload(secret: str, body: bytes, timestamp: int = None) -> str:
+    """Signature header value for a webhook body."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    message = str(timestamp).encode("ascii") + b"." + body
+    digest = hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(secret: str, body: bytes, header: str, tolerance_seconds: float = 300) -> bool:
+    """Check a signature header (what a merchant's server should do)."""
+    try:
+        parts = dict(item.split("=", 1) for item in header.split(","))
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance_seconds:
+        return False
+    expected = sign_payload(secret, body, timestamp)
+    return hmac.compare_digest(expected, header)
+
+
+class WebhookRequest:
+    """One POST to send. Requests with the same endpoint_key share its concurrency cap."""
+
+    def __init__(self, url: str, body: bytes, secret: str, endpoint_key,
+                 max_concurrency: int = 4, headers: dict = None):
+        self.url = url
+        self.body = body
+        self.secret = secret
+        self.endpoint_key = endpoint_key
+        self.max_concurrency = max_concurrency
+        self.headers = headers or {}
+
+
+class WebhookResult:
+    """What happened to one request. status_code None = no response (timeout, refused, skipped)."""
+
+    def __init__(self, status_code: Optional[int] = None, error: Optional[str] = None,
+                 elapsed_ms: float = 0.0):
+        self.status_code = status_code
+        self.error = error
+        self.elapsed_ms = elapsed_ms
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+
+class WebhookSender:
+    """
+    Sends WebhookRequests concurrently. Thread-safe; send() blocks until
+    the whole batch is done.
+    """
+
+    def __init__(self, concurrency: int = 50, timeout: float = 5.0):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pools: OrderedDict = OrderedDict()  # endpoint_key -> (max_concurrency, httpx.AsyncClient)
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "requests": 0, "ok": 0, "errors": 0, "skipped": 0}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="webhook-sender", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def send(self, requests: list[WebhookRequest]) -> list[WebhookResult]:
+        """Send all requests; results are in the same order."""
+        if not requests:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self._send_all(requests), self._ensure_loop())
+        results = future.result()
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(results)
+            self._stats["ok"] += sum(1 for r in results if r.ok)
+            self._stats["skipped"] += sum(1 for r in results if r.error == "skipped")
+            self._stats["errors"] += sum(1 for r in results if not r.ok and r.error != "skipped")
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        """Close open connections and stop the loop thread."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_pools(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        loop.close()
+
+    async def _pool(self, request: WebhookRequest):
+        """The endpoint's open connection pool (created on first use)."""
+        import httpx
+
+        key = request.endpoint_key
+        entry = self._pools.get(key)
+        if entry is not None and entry[0] == request.max_concurrency:
+            self._pools.move_to_end(key)
+            return entry[1]
+        if entry is not None:
+            await entry[1].aclose()  # cap changed
+        size = max(1, request.max_concurrency)
+        client = httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=False,  # a redirect could point past validate_outbound_url
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+        )
+        self._pools[key] = (request.max_concurrency, client)
+        while len(self._pools) > MAX_POOLS:
+            _, (_, oldest) = self._pools.popitem(last=False)
+            await oldest.aclose()
+        return client
+
+    async def _close_pools(self) -> None:
+        while self._pools:
+            _, (_, client) = self._pools.popitem()
+            await client.aclose()
+
+    async def _send_all(self, requests: list[WebhookRequest]) -> list[WebhookResult]:
+        overall = asyncio.Semaphore(self.concurrency)
+        endpoints: dict[object, asyncio.Semaphore] = {}
+        for request in requests:
+            endpoints.setdefault(request.endpoint_key, asyncio.Semaphore(max(1, request.max_concurrency)))
+        unreachable: defaultdict[object, bool] = defaultdict(bool)
+
+        async def send_one(request: WebhookRequest) -> WebhookResult:
+            async with endpoints[request.endpoint_key]:
+                if unreachable[request.endpoint_key]:
+                    return WebhookResult(error="skipped")
+                async with overall:
+                    return await self._post(request, unreachable)
+
+        return await asyncio.gather(*(send_one(request) for request in requests))
+
+    async def _post(self, request: WebhookRequest, unreachable: dict) -> WebhookResult:
+        import httpx
+
+        headers = {
+            "Content-Type": "application/json",
+            **request.headers,
+            SIGNATURE_HEADER: sign_payload(request.secret, request.body),
+        }
+        client = await self._pool(request)
+        started = time.perf_counter()
+        try:
+            response = await client.post(request.url, content=request.body, headers=headers)
+            return WebhookResult(status_code=response.status_code,
+                                 elapsed_ms=(time.perf_counter() - started) * 1000)
+        except (httpx.TimeoutException, httpx.ConnectError) as e:
+            unreachable[request.endpoint_key] = True
+            return WebhookResult(error=f"{type(e).__name__}: {e}"[:200],
+                                 elapsed_ms=(time.perf_counter() - started) * 1000)
+        except httpx.HTTPError as e:
+            return WebhookResult(error=f"{type(e).__name__}: {e}"[:200],
+                                 elapsed_ms=(time.perf_counter() - started) * 1000)
@@ -40,5 +40,12 @@ def get_db():
 
 
 def init_db():
-    """Create all database tables."""
-    Base.metadata.create_all(bind=engine)
+    """
+    Bring the database schema up to date.
+    
+    Runs the migrations in migrations/versions (the first one creates
+    all the original tables), so existing databases also get new
+    indexes and tables - create_all() alone can't do that.
+    """
+    from migrations.runner import migrate
+    migrate(engine)
@@ -1,22 +1,28 @@
+import importlib
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
-from api.v1 import (
-    routes_wallet, routes_transactions, routes_users, routes_health, 
-    routes_payments, routes_gateway, routes_merchant, routes_analytics,
-    routes_recurring, routes_billsplit, routes_budget
-)
-from database import init_db
+from config import settings
+from database import engine, init_db
+from migrations.runner import check_schema_version
+from core.rate_limit_middleware import RateLimitMiddleware
 from core.error_handlers import (
     validation_exception_handler,
     integrity_error_handler,
+    stale_data_handler,
     general_exception_handler
 )
 
 app = FastAPI(title="RosePay - Wallet Payment API", version="1.0.0")
 
+# Rate limits per user and route group (RATE_LIMIT_* settings).
+# Added before CORS so CORS wraps it: 429 answers get CORS headers too.
+app.add_middleware(RateLimitMiddleware)
+
 # Add CORS middleware (allows frontend to make API calls)
 import os
 
@@ -35,22 +41,38 @@ app.add_middleware(
 # Register error handlers (NEW FEATURE!)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(IntegrityError, integrity_error_handler)
+app.add_exception_handler(StaleDataError, stale_data_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 # Register routers
-app.include_router(routes_wallet.router, prefix="/api/v1/wallets", tags=["wallets"])
-app.include_router(
-    routes_transactions.router, prefix="/api/v1/transactions", tags=["transactions"]
-)
-app.include_router(routes_users.router, prefix="/api/v1/users", tags=["users"])
-app.include_router(routes_payments.router, prefix="/api/v1/payments", tags=["payments"])
-app.include_router(routes_gateway.router, prefix="/api/v1/gateway", tags=["payment-gateway"])
-app.include_router(routes_merchant.router, prefix="/api/v1/merchant", tags=["merchant"])
-app.include_router(routes_analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
-app.include_router(routes_recurring.router, prefix="/api/v1/recurring", tags=["recurring-payments"])
-app.include_router(routes_billsplit.router, prefix="/api/v1/billsplit", tags=["bill-split"])
-app.include_router(routes_budget.router, prefix="/api/v1/budget", tags=["budget"])
-app.include_router(routes_health.router, prefix="/api/v1", tags=["health"])
+# (module in api.v1, URL prefix, tags, feature name)
+# Routers with a feature name are optional: list the feature in
+# DISABLED_FEATURES and its module is never imported at all.
+ROUTERS = [
+    ("routes_wallet", "/api/v1/wallets", ["wallets"], None),
+    ("routes_transactions", "/api/v1/transactions", ["transactions"], None),
+    ("routes_users", "/api/v1/users", ["users"], None),
+    ("routes_payments", "/api/v1/payments", ["payments"], None),
+    ("routes_gateway", "/api/v1/gateway", ["payment-gateway"], "gateway"),
+    ("routes_merchant", "/api/v1/merchant", ["merchant"], "merchant"),
+    ("routes_analytics", "/api/v1/analytics", ["analytics"], "analytics"),
+    ("routes_recurring", "/api/v1/recurring", ["recurring-payments"], "recurring"),
+    ("routes_billsplit", "/api/v1/billsplit", ["bill-split"], "billsplit"),
+    ("routes_budget", "/api/v1/budget", ["budget"], "budget"),
+    ("routes_notifications", "/api/v1/notifications", ["notifications"], "notifications"),
+    ("routes_events", "/api/v1/events", ["live-updates"], "events"),
+    ("routes_health", "/api/v1", ["health"], None),
+]
+
+disabled_features = {
+    feature.strip() for feature in settings.DISABLED_FEATURES.split(",") if feature.strip()
+}
+
+for module_name, prefix, tags, feature in ROUTERS:
+    if feature in disabled_features:
+        continue
+    module = importlib.import_module(f"api.v1.{module_name}")
+    app.include_router(module.router, prefix=prefix, tags=tags)
 
 
 @app.get("/")
@@ -64,12 +86,47 @@ def read_root():
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database when app starts."""
+    """
+    App startup.
+    
+    Creating tables is NOT done here anymore (it slowed down every cold
+    start). Run `python manage.py migrate` once per deploy instead; startup
+    only checks that the schema version matches the code.
+    Set DB_AUTO_CREATE=true to migrate on startup in local development.
+    """
     try:
-        init_db()
-        print("✅ Database initialized!")
-        print("✅ RosePay API is ready!")
+        if settings.DB_AUTO_CREATE:
+            init_db()
+            print("✅ Database initialized!")
+        version = check_schema_version(engine)
+        if not version["up_to_date"]:
+            print(
+                f"⚠️ Database schema is at version {version['current']}, "
+                f"code expects {version['latest']}. Run: python manage.py migrate"
+            )
     except Exception as e:
-        print(f"⚠️ Database initialization warning: {e}")
-        print("✅ API is ready (database will initialize on first use)")
+        print(f"⚠️ Database schema check warning: {e}")
+    
+    if settings.SCHEDULER_ENABLED:
+        from core import scheduler
+        from services.maintenance_service import register_jobs
+        
+        register_jobs()
+        scheduler.start()
+        print("✅ Background scheduler started")
+    
+    from services.wallet_cache import start_invalidation_listener
+    if start_invalidation_listener(engine):
+        print("✅ Balance cache listening for other workers' writes")
+    print("✅ RosePay API is ready!")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work cleanly."""
+    from core import scheduler
+    from services.wallet_cache import stop_invalidation_listener
+    
+    scheduler.stop()
+    stop_invalidation_listener()
 
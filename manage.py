@@ -0,0 +1,114 @@
+"""
+Management commands for RosePay.
+
+WHAT THIS FILE DOES:
+- Runs one-off admin tasks outside the web server
+- Keeps slow work (like creating tables) out of app startup
+
+USAGE:
+    python manage.py migrate      # Apply pending schema migrations
+    python manage.py db-version   # Show schema version (current / latest)
+    python manage.py init-db      # Same as migrate (kept for old scripts)
+    python manage.py run-scheduler  # Run background jobs in this process
+    python manage.py run-job NAME   # Run one background job once
+    python manage.py merchant-shards MERCHANT_ID N  # Spread a busy merchant's revenue over N rows
+"""
+import argparse
+import sys
+
+
+def migrate_command(args) -> int:
+    """Apply all pending migrations."""
+    from database import engine
+    from migrations.runner import migrate
+    
+    applied = migrate(engine)
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s): {applied}")
+    else:
+        print("✅ Database schema is up to date")
+    return 0
+
+
+def db_version_command(args) -> int:
+    """Print current and latest schema versions."""
+    from database import engine
+    from migrations.runner import check_schema_version
+    
+    version = check_schema_version(engine)
+    print(f"Schema version: {version['current']} (latest: {version['latest']})")
+    return 0 if version["up_to_date"] else 1
+
+
+def run_scheduler_command(args) -> int:
+    """Run background jobs in the foreground (use with SCHEDULER_ENABLED=false on web workers)."""
+    from core import scheduler
+    from services.maintenance_service import register_jobs
+    
+    register_jobs()
+    print("✅ Scheduler running (Ctrl+C to stop)")
+    scheduler.run_forever()
+    return 0
+
+
+def run_job_command(args) -> int:
+    """Run one background job once and print its result."""
+    from core import scheduler
+    from services.maintenance_service import register_jobs
+    
+    register_jobs()
+    result = scheduler.run_job(args.name)
+    stats = scheduler.job_stats()["jobs"][args.name]
+    if stats["last_error"]:
+        print(f"❌ {args.name} failed: {stats['last_error']}")
+        return 1
+    print(f"✅ {args.name}: {result}")
+    return 0
+
+
+def merchant_shards_command(args) -> int:
+    """Set the number of revenue shard rows for one merchant (0 = off)."""
+    from fastapi import HTTPException
+    from database import SessionLocal
+    from services.merchant_service import set_revenue_shards
+    
+    db = SessionLocal()
+    try:
+        result = set_revenue_shards(db, args.merchant_id, args.shards)
+    except HTTPException as e:
+        print(f"❌ {e.detail}")
+        return 1
+    finally:
+        db.close()
+    print(f"✅ {result}")
+    return 0
+
+
+COMMANDS = {
+    "migrate": (migrate_command, "Apply pending schema migrations"),
+    "db-version": (db_version_command, "Show schema version"),
+    "init-db": (migrate_command, "Same as migrate"),
+    "run-scheduler": (run_scheduler_command, "Run background jobs in this process"),
+    "run-job": (run_job_command, "Run one background job once"),
+    "merchant-shards": (merchant_shards_command, "Set revenue shard rows for a busy merchant"),
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="RosePay management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (_func, help_text) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text)
+        if name == "run-job":
+            subparser.add_argument("name", help="Job name, e.g. expired_link_sweeper")
+        if name == "merchant-shards":
+            subparser.add_argument("merchant_id", help="Merchant ID, e.g. MRCH_...")
+            subparser.add_argument("shards", type=int, help="Number of shard rows (0 = off)")
+    
+    args = parser.parse_args(argv)
+    func, _help = COMMANDS[args.command]
+    return func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Database schema migrations.
+
+WHAT THIS PACKAGE DOES:
+- Keeps a version number for the database schema (schema_migrations table)
+- Applies numbered migration files in versions/ in order
+- Builds indexes online (CREATE INDEX CONCURRENTLY) on PostgreSQL
+
+LEARN:
+- create_all() only creates missing tables; it never changes existing ones
+- Migrations = small, ordered steps that move a schema from version N to N+1
+- Run them with: python manage.py migrate
+"""
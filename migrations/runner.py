@@ -0,0 +1,227 @@
+"""
+Migration runner.
+
+WHAT THIS FILE DOES:
+- Finds migration files in migrations/versions (0001_baseline.py, ...)
+- Remembers which ones ran in the schema_migrations table
+- Runs the missing ones in order
+- Provides helpers migrations use (create_index, add_column, transaction)
+
+LEARN:
+- Normal migrations run inside a transaction (all or nothing)
+- CREATE INDEX CONCURRENTLY cannot run inside a transaction on PostgreSQL,
+  so those migrations set TRANSACTIONAL = False and run in autocommit mode
+- Building an index CONCURRENTLY doesn't lock the table against writes,
+  so the app keeps working while a big index is built
+"""
+import importlib
+import os
+import pkgutil
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+VERSIONS_PACKAGE = "migrations.versions"
+
+# Arbitrary constant so concurrent `migrate` runs on PostgreSQL queue up
+# behind each other instead of applying the same migration twice.
+ADVISORY_LOCK_ID = 7_261_001
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def discover_migrations() -> list[tuple[int, str, object]]:
+    """
+    Find all migration modules.
+
+    Returns a sorted list of (version, name, module).
+    """
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules([os.path.dirname(package.__file__)]):
+        prefix, _, name = info.name.partition("_")
+        if not prefix.isdigit():
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        migrations.append((int(prefix), name, module))
+
+    migrations.sort(key=lambda m: m[0])
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+
+def latest_version() -> int:
+    """Version number of the newest migration file."""
+    migrations = discover_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(engine: Engine) -> int:
+    """Version the database is at (0 if never migrated)."""
+    if not inspect(engine).has_table("schema_migrations"):
+        return 0
+    with engine.connect() as conn:
+        version = conn.execute(text("SELECT MAX(version) FROM schema_migrations")).scalar()
+    return version or 0
+
+
+def check_schema_version(engine: Engine) -> dict:
+    """
+    Compare database schema version with the code.
+
+    This is cheap (one query), so it is what app startup calls
+    instead of creating tables.
+    """
+    current = current_version(engine)
+    latest = latest_version()
+    return {"current": current, "latest": latest, "up_to_date": current >= latest}
+
+
+def migrate(engine: Engine, target: int = None, log=print) -> list[int]:
+    """
+    Apply all pending migrations (up to `target` if given).
+
+    WHAT IT DOES:
+    1. Creates schema_migrations table if missing
+    2. Takes a lock on PostgreSQL so two deploys don't migrate at once
+    3. Runs each pending migration and records its version
+    4. Returns the versions that were applied
+    """
+    _metadata.create_all(bind=engine, tables=[schema_migrations])
+
+    lock_conn = None
+    if engine.dialect.name == "postgresql":
+        lock_conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+    applied = []
+    try:
+        done = _applied_versions(engine)
+        for version, name, module in discover_migrations():
+            if version in done or (target is not None and version > target):
+                continue
+
+            log(f"⏳ Applying migration {version:04d}_{name}...")
+            if getattr(module, "TRANSACTIONAL", True):
+                with engine.begin() as conn:
+                    module.upgrade(conn)
+                    _record(conn, version, name)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    module.upgrade(conn)
+                    _record(conn, version, name)
+            applied.append(version)
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock_conn.close()
+
+    return applied
+
+
+def _applied_versions(engine: Engine) -> set[int]:
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _record(conn: Connection, version: int, name: str) -> None:
+    conn.execute(
+        schema_migrations.insert().values(
+            version=version, name=name, applied_at=datetime.utcnow()
+        )
+    )
+
+
+# ============ HELPERS FOR MIGRATION FILES ============
+
+def create_index(
+    conn: Connection,
+    name: str,
+    table: str,
+    columns: list[str],
+    unique: bool = False,
+) -> None:
+    """
+    Create an index if it doesn't exist.
+
+    On PostgreSQL the index is built CONCURRENTLY (no write lock on the
+    table). The calling migration must set TRANSACTIONAL = False for that.
+    A half-built (INVALID) index left by a failed earlier attempt is
+    dropped and rebuilt.
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    column_sql = ", ".join(columns)
+
+    if conn.dialect.name == "postgresql":
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+        autocommit = conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT"
+        concurrently = "CONCURRENTLY " if autocommit else ""
+        conn.execute(text(
+            f"CREATE {unique_sql}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({column_sql})"
+        ))
+    else:
+        conn.execute(text(
+            f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({column_sql})"
+        ))
+
+
+@contextmanager
+def transaction(conn: Connection) -> Iterator[Connection]:
+    """
+    A transaction inside a TRANSACTIONAL = False migration.
+
+    Use it for the data changes (e.g. a backfill) next to CONCURRENTLY
+    index builds: they run on a second connection and commit together,
+    instead of statement by statement. In a transactional migration
+    this just yields `conn`.
+    """
+    if conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+        yield conn
+        return
+    with conn.engine.begin() as tx:
+        yield tx
+
+
+def add_column(conn: Connection, table: str, column: Column) -> None:
+    """
+    Add a column to an existing table if it isn't there yet.
+
+    Fresh databases already get the column from the baseline
+    (which creates tables from models.py), so this must be idempotent.
+    """
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+
+    column_type = column.type.compile(dialect=conn.dialect)
+    sql = f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}"
+    if column.server_default is not None:
+        sql += f" DEFAULT {column.server_default.arg}"
+    conn.execute(text(sql))
+
+
+def create_tables(conn: Connection, table_names: list[str]) -> None:
+    """Create tables from models.py (skips tables that already exist)."""
+    import models  # noqa: F401 - registers all tables on Base.metadata
+    from database import Base
+
+    tables = [Base.metadata.tables[name] for name in table_names]
+    Base.metadata.create_all(bind=conn, tables=tables, checkfirst=True)
@@ -0,0 +1,22 @@
+"""
+Baseline schema: the tables that existed before migrations were introduced.
+
+Databases created earlier by create_all() already have these tables;
+for them this migration only records version 1.
+"""
+from migrations.runner import create_tables
+
+
+def upgrade(conn):
+    create_tables(conn, [
+        "users",
+        "wallets",
+        "transactions",
+        "payment_links",
+        "payment_requests",
+        "merchants",
+        "recurring_payments",
+        "bill_splits",
+        "bill_split_participants",
+        "budgets",
+    ])
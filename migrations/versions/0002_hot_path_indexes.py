@@ -0,0 +1,30 @@
+"""
+Indexes for the hottest queries.
+
+- transactions: history by user / wallet / recipient, newest first
+- wallets.user_id: "my wallets" and recipient wallet lookups
+- payment_requests.recipient_id: payment request inbox
+- recurring_payments.next_payment_date: finding due payments
+- budgets.user_id: budget checks
+
+Built CONCURRENTLY on PostgreSQL so existing tables stay writable.
+"""
+from migrations.runner import create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(conn, "ix_transactions_user_id_created_at", "transactions", ["user_id", "created_at"])
+    create_index(conn, "ix_transactions_wallet_id_created_at", "transactions", ["wallet_id", "created_at"])
+    create_index(
+        conn, "ix_transactions_recipient_wallet_id_created_at",
+        "transactions", ["recipient_wallet_id", "created_at"]
+    )
+    create_index(conn, "ix_wallets_user_id", "wallets", ["user_id"])
+    create_index(conn, "ix_payment_requests_recipient_id", "payment_requests", ["recipient_id"])
+    create_index(
+        conn, "ix_recurring_payments_next_payment_date",
+        "recurring_payments", ["next_payment_date"]
+    )
+    create_index(conn, "ix_budgets_user_id", "budgets", ["user_id"])
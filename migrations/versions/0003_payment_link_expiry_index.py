@@ -0,0 +1,18 @@
+"""
+Index for the expired payment link sweeper.
+
+payment_links (is_active, expires_at): find active links whose
+expiry has passed without scanning the table.
+
+Built CONCURRENTLY on PostgreSQL so links can still be created and paid.
+"""
+from migrations.runner import create_index
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_index(
+        conn, "ix_payment_links_is_active_expires_at",
+        "payment_links", ["is_active", "expires_at"]
+    )
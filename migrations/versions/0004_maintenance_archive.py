@@ -0,0 +1,25 @@
+"""
+Archive tables and indexes for the maintenance jobs.
+
+- payment_links_archive / payment_requests_archive: old rows moved out
+  of the live tables
+- payment_links (is_active, created_at): archiver finds old inactive links
+- payment_requests (status, created_at): stale request sweeper and archiver
+
+Indexes are built CONCURRENTLY on PostgreSQL so the live tables stay writable.
+"""
+from migrations.runner import create_index, create_tables
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_tables(conn, ["payment_links_archive", "payment_requests_archive"])
+    create_index(
+        conn, "ix_payment_links_is_active_created_at",
+        "payment_links", ["is_active", "created_at"]
+    )
+    create_index(
+        conn, "ix_payment_requests_status_created_at",
+        "payment_requests", ["status", "created_at"]
+    )
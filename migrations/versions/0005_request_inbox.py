@@ -0,0 +1,39 @@
+"""
+Payment request inbox: keyset pagination indexes and pending counters.
+
+- payment_requests (recipient_id, status, id): received requests page
+- payment_requests (requester_id, id): sent requests page
+- pending_request_counts: per-user pending count, backfilled from
+  the current pending requests
+
+Indexes are built CONCURRENTLY on PostgreSQL so requests stay writable.
+The backfill is one transaction of its own: readers never see an empty
+counter table. Requests changed by old app instances after it ran are
+fixed by the pending_request_recount job.
+"""
+from sqlalchemy import text
+
+from migrations.runner import create_index, create_tables, transaction
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_tables(conn, ["pending_request_counts"])
+    create_index(
+        conn, "ix_payment_requests_recipient_id_status_id",
+        "payment_requests", ["recipient_id", "status", "id"]
+    )
+    create_index(
+        conn, "ix_payment_requests_requester_id_id",
+        "payment_requests", ["requester_id", "id"]
+    )
+
+    # Backfill (re-runnable: start from an empty counter table)
+    with transaction(conn) as tx:
+        tx.execute(text("DELETE FROM pending_request_counts"))
+        tx.execute(text(
+            "INSERT INTO pending_request_counts (user_id, pending) "
+            "SELECT recipient_id, COUNT(*) FROM payment_requests "
+            "WHERE status = 'PENDING' GROUP BY recipient_id"
+        ))
@@ -0,0 +1,14 @@
+"""
+Merchant revenue shards.
+
+- merchants.revenue_shards: number of shard rows (0 = update merchants row)
+- merchant_revenue_shards: extra revenue counter rows for busy merchants
+"""
+from sqlalchemy import Column, Integer
+
+from migrations.runner import add_column, create_tables
+
+
+def upgrade(conn):
+    add_column(conn, "merchants", Column("revenue_shards", Integer, nullable=False, server_default="0"))
+    create_tables(conn, ["merchant_revenue_shards"])
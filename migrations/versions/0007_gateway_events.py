@@ -0,0 +1,23 @@
+"""
+Webhook-driven gateway settlement.
+
+- gateway_events: Razorpay webhook events, deduplicated by event id
+- transactions.gateway_payment_id: Razorpay payment id of a top-up, with
+  a unique index so a payment can only be credited once
+
+The index is built CONCURRENTLY on PostgreSQL so transactions stay writable.
+"""
+from sqlalchemy import Column, String
+
+from migrations.runner import add_column, create_index, create_tables
+
+TRANSACTIONAL = False
+
+
+def upgrade(conn):
+    create_tables(conn, ["gateway_events"])
+    add_column(conn, "transactions", Column("gateway_payment_id", String, nullable=True))
+    create_index(
+        conn, "ix_transactions_gateway_payment_id",
+        "transactions", ["gateway_payment_id"], unique=True
+    )
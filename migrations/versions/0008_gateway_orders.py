@@ -0,0 +1,8 @@
+"""
+Gateway orders: Razorpay orders saved with the user and wallet they top up.
+"""
+from migrations.runner import create_tables
+
+
+def upgrade(conn):
+    create_tables(conn, ["gateway_orders"])
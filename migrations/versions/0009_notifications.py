@@ -0,0 +1,8 @@
+"""
+Notifications: per-user preferences and the notification outbox / in-app inbox.
+"""
+from migrations.runner import create_tables
+
+
+def upgrade(conn):
+    create_tables(conn, ["notification_preferences", "notifications"])
@@ -0,0 +1,8 @@
+"""
+Merchant webhooks: endpoints and the delivery queue.
+"""
+from migrations.runner import create_tables
+
+
+def upgrade(conn):
+    create_tables(conn, ["webhook_endpoints", "webhook_deliveries"])
@@ -0,0 +1,13 @@
+"""
+Wallet version.
+
+- wallets.version: bumped by every balance change, so the balance cache
+  keeps the newest balance when two writes race
+"""
+from sqlalchemy import Column, Integer
+
+from migrations.runner import add_column
+
+
+def upgrade(conn):
+    add_column(conn, "wallets", Column("version", Integer, nullable=False, server_default="0"))
@@ -0,0 +1,2 @@
+# Migration files: NNNN_description.py, each with an upgrade(conn) function.
+# Set TRANSACTIONAL = False in a migration that builds indexes concurrently.
@@ -1,7 +1,7 @@
 """
 Database models (tables).
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -46,20 +46,33 @@ class Wallet(Base):
     __tablename__ = "wallets"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     balance = Column(Float, default=0.0, nullable=False)
     currency = Column(String, default="USD", nullable=False)
     wallet_pin = Column(String, nullable=True)  # Encrypted PIN for security
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped by every update (see services/wallet_cache.py)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     owner = relationship("User", back_populates="wallets")
     transactions = relationship("Transaction", foreign_keys="Transaction.wallet_id", back_populates="wallet", overlaps="recipient_wallet")
+    
+    # SQLAlchemy writes "version = :old + 1 ... WHERE version = :old": an update
+    # based on a stale read fails (StaleDataError) instead of overwriting
+    __mapper_args__ = {"version_id_col": version}
 
 
 class Transaction(Base):
     """Transaction model - stores all payment history."""
     __tablename__ = "transactions"
+    __table_args__ = (
+        # History queries filter by user/wallet and sort by newest first
+        Index("ix_transactions_user_id_created_at", "user_id", "created_at"),
+        Index("ix_transactions_wallet_id_created_at", "wallet_id", "created_at"),
+        Index("ix_transactions_recipient_wallet_id_created_at", "recipient_wallet_id", "created_at"),
+        # One deposit per gateway payment, however often its webhook arrives
+        Index("ix_transactions_gateway_payment_id", "gateway_payment_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -69,6 +82,7 @@ class Transaction(Base):
     status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.PENDING)
     description = Column(String, nullable=True)
     recipient_wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=True)
+    gateway_payment_id = Column(String, nullable=True)  # Razorpay payment id for gateway top-ups
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -80,6 +94,12 @@ class Transaction(Base):
 class PaymentLink(Base):
     """Payment link model - like PayTM payment links."""
     __tablename__ = "payment_links"
+    __table_args__ = (
+        # Expired-link sweeper: active links ordered by expiry
+        Index("ix_payment_links_is_active_expires_at", "is_active", "expires_at"),
+        # Archiver: old inactive links
+        Index("ix_payment_links_is_active_created_at", "is_active", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -100,10 +120,18 @@ class PaymentLink(Base):
 class PaymentRequest(Base):
     """Payment request model - request money from someone."""
     __tablename__ = "payment_requests"
+    __table_args__ = (
+        # Stale request sweeper and archiver: requests by status, oldest first
+        Index("ix_payment_requests_status_created_at", "status", "created_at"),
+        # Inbox pages: my pending requests, newest first (keyset on id)
+        Index("ix_payment_requests_recipient_id_status_id", "recipient_id", "status", "id"),
+        # Sent pages: requests I made, newest first (keyset on id)
+        Index("ix_payment_requests_requester_id_id", "requester_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Who requested
-    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Who should pay
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # Who should pay
     amount = Column(Float, nullable=False)
     description = Column(String, nullable=True)
     status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.PENDING)
@@ -117,6 +145,57 @@ class PaymentRequest(Base):
     transaction = relationship("Transaction")
 
 
+class PendingRequestCount(Base):
+    """
+    Number of pending payment requests per recipient (inbox badge).
+    
+    Kept up to date in the same transaction as every change to a
+    request's status, so the badge never needs a COUNT(*).
+    """
+    __tablename__ = "pending_request_counts"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    pending = Column(Integer, nullable=False, default=0)
+
+
+class PaymentLinkArchive(Base):
+    """
+    Old payment links moved out of payment_links by the archiver.
+    
+    Same columns as PaymentLink (no foreign keys) plus archived_at,
+    so the live table stays small and fast.
+    """
+    __tablename__ = "payment_links_archive"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    link_id = Column(String, nullable=False, index=True)
+    amount = Column(Float, nullable=False)
+    description = Column(String, nullable=True)
+    is_active = Column(Integer, default=0)
+    expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime)
+    paid_at = Column(DateTime, nullable=True)
+    transaction_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
+
+
+class PaymentRequestArchive(Base):
+    """Old payment requests moved out of payment_requests by the archiver."""
+    __tablename__ = "payment_requests_archive"
+    
+    id = Column(Integer, primary_key=True)
+    requester_id = Column(Integer, nullable=False, index=True)
+    recipient_id = Column(Integer, nullable=False, index=True)
+    amount = Column(Float, nullable=False)
+    description = Column(String, nullable=True)
+    status = Column(SQLEnum(TransactionStatus))
+    created_at = Column(DateTime)
+    paid_at = Column(DateTime, nullable=True)
+    transaction_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
+
+
 class Merchant(Base):
     """Merchant model - for businesses/vendors."""
     __tablename__ = "merchants"
@@ -127,13 +206,172 @@ class Merchant(Base):
     business_type = Column(String, nullable=True)  # e.g., "Restaurant", "Retail", etc.
     merchant_id = Column(String, unique=True, index=True, nullable=False)  # Unique merchant ID
     is_active = Column(Integer, default=1)
-    total_revenue = Column(Float, default=0.0)  # Total money received
+    total_revenue = Column(Float, default=0.0)  # Total money received (plus revenue shards, if any)
+    revenue_shards = Column(Integer, nullable=False, default=0, server_default="0")  # >0 = spread revenue updates over N rows
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     user = relationship("User")
 
 
+class MerchantRevenueShard(Base):
+    """
+    Extra revenue counter rows for busy merchants.
+    
+    Every payment to a merchant updates its revenue. With many payments
+    at once they all wait for the lock on the one merchants row; spread
+    over N shard rows they mostly don't. Revenue = merchants.total_revenue
+    + SUM(shards).
+    """
+    __tablename__ = "merchant_revenue_shards"
+    
+    merchant_id = Column(Integer, ForeignKey("merchants.id"), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+
+class GatewayOrder(Base):
+    """
+    Razorpay order created for a wallet top-up.
+    
+    Saved when the order is created, so the webhook and the reconciler
+    know (from our own records, not the client) which wallet to credit
+    and how much was asked for.
+    """
+    __tablename__ = "gateway_orders"
+    __table_args__ = (
+        # Reconciler: orders created in a time window
+        Index("ix_gateway_orders_created_at", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    order_id = Column(String, unique=True, nullable=False)  # Razorpay order id
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    currency = Column(String, nullable=False, default="INR")
+    status = Column(String, nullable=False, default="created")  # created / paid / flagged
+    payment_id = Column(String, nullable=True)  # Razorpay payment that paid it
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)  # Deposit it created
+    note = Column(String, nullable=True)  # Why the reconciler flagged it
+    created_at = Column(DateTime, default=datetime.utcnow)
+    paid_at = Column(DateTime, nullable=True)
+
+
+class GatewayEvent(Base):
+    """
+    Webhook event received from Razorpay.
+    
+    Stored as soon as it arrives (deduplicated by Razorpay's event id)
+    and applied later by the gateway event processor, so the webhook
+    answers fast and a crash never loses an event.
+    """
+    __tablename__ = "gateway_events"
+    __table_args__ = (
+        # Processor: pending events, oldest first
+        Index("ix_gateway_events_status_id", "status", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    event_id = Column(String, unique=True, nullable=False)  # X-Razorpay-Event-Id
+    event_type = Column(String, nullable=False)  # e.g. "payment.captured"
+    payment_id = Column(String, nullable=True, index=True)
+    payload = Column(String, nullable=False)  # Raw JSON body
+    status = Column(String, nullable=False, default="pending")  # pending / processed / ignored / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)  # Deposit it created
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+
+class NotificationPreference(Base):
+    """
+    How a user wants to be told about their transactions.
+    
+    No row = defaults (email and in-app on, webhook off, no digest).
+    """
+    __tablename__ = "notification_preferences"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    email = Column(Integer, nullable=False, default=1)  # 1 = send emails
+    in_app = Column(Integer, nullable=False, default=1)  # 1 = keep in the in-app inbox
+    webhook_url = Column(String, nullable=True)  # POST notifications here (None = off)
+    digest_minutes = Column(Integer, nullable=False, default=0)  # 0 = send each event, N = one message per N minutes
+
+
+class Notification(Base):
+    """
+    One notification for one user on one channel.
+    
+    Email and webhook rows are an outbox: the dispatcher sends them
+    (merged into one digest message when the user asked for digests)
+    and marks them sent. In-app rows are the user's inbox.
+    """
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # Dispatcher: pending rows that are due, oldest first
+        Index("ix_notifications_status_due_at", "status", "due_at"),
+        # Inbox pages and the dispatcher: a user's rows per channel, by id
+        Index("ix_notifications_user_id_channel_id", "user_id", "channel", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    channel = Column(String, nullable=False)  # "email", "webhook", "in_app"
+    event_type = Column(String, nullable=False)  # e.g. "deposit", "transfer"
+    payload = Column(String, nullable=False)  # JSON: amount, description, balance, ...
+    status = Column(String, nullable=False, default="pending")  # pending / sent / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    due_at = Column(DateTime, nullable=False)  # Send at (created_at + digest window, or retry time)
+    sent_at = Column(DateTime, nullable=True)
+    read_at = Column(DateTime, nullable=True)  # In-app only
+
+
+class WebhookEndpoint(Base):
+    """A merchant's URL that gets a POST for every payment they receive."""
+    __tablename__ = "webhook_endpoints"
+    
+    id = Column(Integer, primary_key=True)
+    merchant_id = Column(Integer, ForeignKey("merchants.id"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    secret = Column(String, nullable=False)  # HMAC key for the X-RosePay-Signature header
+    max_concurrency = Column(Integer, nullable=False, default=4)  # Requests in flight to this URL at once
+    is_active = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class WebhookDelivery(Base):
+    """
+    One event to POST to one merchant endpoint.
+    
+    Added in the same database transaction as the payment, so an event
+    is never lost (or sent for a payment that was rolled back). The
+    sender job POSTs due rows and retries failures with backoff.
+    """
+    __tablename__ = "webhook_deliveries"
+    __table_args__ = (
+        # Sender: pending rows that are due, oldest first
+        Index("ix_webhook_deliveries_status_next_attempt_at", "status", "next_attempt_at"),
+        # Delivery log of one endpoint, newest first
+        Index("ix_webhook_deliveries_endpoint_id_id", "endpoint_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    endpoint_id = Column(Integer, ForeignKey("webhook_endpoints.id"), nullable=False)
+    event_id = Column(String, nullable=False)  # Same for every endpoint of one event (receivers dedupe on it)
+    event_type = Column(String, nullable=False)  # e.g. "payment.received"
+    payload = Column(String, nullable=False)  # JSON body, exactly as sent and signed
+    status = Column(String, nullable=False, default="pending")  # pending / delivered / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    response_status = Column(Integer, nullable=True)  # HTTP status of the last attempt
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+
 class RecurringPayment(Base):
     """Recurring payment model - for subscriptions and automatic payments."""
     __tablename__ = "recurring_payments"
@@ -146,7 +384,7 @@ class RecurringPayment(Base):
     amount = Column(Float, nullable=False)
     description = Column(String, nullable=True)
     frequency = Column(String, nullable=False)  # "daily", "weekly", "monthly", "yearly"
-    next_payment_date = Column(DateTime, nullable=False)
+    next_payment_date = Column(DateTime, nullable=False, index=True)
     end_date = Column(DateTime, nullable=True)  # Optional end date
     is_active = Column(Integer, default=1)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -202,7 +440,7 @@ class Budget(Base):
     __tablename__ = "budgets"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     wallet_id = Column(Integer, ForeignKey("wallets.id"), nullable=True)  # null = all wallets
     category = Column(String, nullable=True)  # e.g., "Food", "Transport", "Entertainment"
     amount = Column(Float, nullable=False)  # Budget limit
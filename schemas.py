@@ -146,6 +146,23 @@ class PaymentLinkResponse(BaseModel):
         from_attributes = True
 
 
+class PaymentLinkBulkCreate(BaseModel):
+    """Schema for creating many payment links at once."""
+    links: List[PaymentLinkCreate]
+    include_qr: bool = False  # Also return a base64 PNG QR code per link
+
+
+class PaymentLinkWithQRResponse(PaymentLinkResponse):
+    """Payment link plus its QR code (bulk create)."""
+    qr_code: Optional[str] = None  # Base64 encoded image
+
+
+class PaymentLinkBulkResponse(BaseModel):
+    """Schema for bulk payment link creation response."""
+    count: int
+    links: List[PaymentLinkWithQRResponse]
+
+
 class PayLinkRequest(BaseModel):
     """Schema for paying via link."""
     wallet_id: int
@@ -174,11 +191,39 @@ class PaymentRequestResponse(BaseModel):
         from_attributes = True
 
 
+class PendingRequestCountResponse(BaseModel):
+    """Schema for the inbox badge."""
+    pending: int
+
+
 class AcceptPaymentRequest(BaseModel):
     """Schema for accepting a payment request."""
     wallet_id: int
 
 
+class AcceptPaymentRequestsBatch(BaseModel):
+    """Schema for accepting many payment requests from one wallet."""
+    wallet_id: int
+    request_ids: List[int]
+
+
+class BatchAcceptItemResult(BaseModel):
+    """Outcome for one request in a batch accept."""
+    request_id: int
+    accepted: bool
+    transaction_id: Optional[int] = None
+    detail: Optional[str] = None  # Why it wasn't accepted
+
+
+class BatchAcceptResponse(BaseModel):
+    """Schema for batch accept response."""
+    accepted: int
+    failed: int
+    total_paid: float
+    balance: float  # Payer wallet balance afterwards
+    results: List[BatchAcceptItemResult]
+
+
 # ============ QR CODE SCHEMAS ============
 
 class QRCodeResponse(BaseModel):
@@ -187,6 +232,15 @@ class QRCodeResponse(BaseModel):
     data: str  # What the QR code contains
 
 
+class QRBatchRequest(BaseModel):
+    """Schema for rendering many QR codes in one request."""
+    link_ids: List[str] = []
+    wallet_ids: List[int] = []
+    output: str = "zip"  # "zip" (one file per QR) or "sheet" (printable SVG)
+    image_format: str = "png"  # File format inside the ZIP: "png" or "svg"
+    size: Optional[int] = None  # PNG size in pixels
+
+
 # ============ PAYMENT GATEWAY SCHEMAS ============
 
 class CreateGatewayOrderRequest(BaseModel):
@@ -194,6 +248,7 @@ class CreateGatewayOrderRequest(BaseModel):
     amount: float
     currency: str = "INR"
     description: Optional[str] = None
+    wallet_id: Optional[int] = None  # Wallet to top up (default: your first wallet)
 
 
 class GatewayOrderResponse(BaseModel):
@@ -210,11 +265,19 @@ class VerifyPaymentRequest(BaseModel):
     razorpay_order_id: str
     razorpay_payment_id: str
     razorpay_signature: str
-    wallet_id: int
-    amount: float
+    # Not used any more: the wallet comes from the order, the amount from Razorpay
+    wallet_id: Optional[int] = None
+    amount: Optional[float] = None
     description: Optional[str] = None
 
 
+class GatewayPaymentResult(BaseModel):
+    """Schema for the result of a gateway top-up."""
+    payment_id: str
+    status: str  # "pending", "completed" or "failed"
+    transaction: Optional[TransactionResponse] = None
+
+
 class PaymentStatusResponse(BaseModel):
     """Schema for payment status response."""
     payment_id: str
@@ -257,6 +320,64 @@ class MerchantStatsResponse(BaseModel):
     is_active: bool
 
 
+class WebhookEndpointCreate(BaseModel):
+    """Schema for registering a merchant webhook URL."""
+    url: str
+    max_concurrency: Optional[int] = None  # Requests in flight to this URL (default WEBHOOK_ENDPOINT_CONCURRENCY)
+
+
+class WebhookEndpointResponse(BaseModel):
+    """Schema for a merchant webhook endpoint."""
+    id: int
+    url: str
+    max_concurrency: int
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class WebhookEndpointCreated(WebhookEndpointResponse):
+    """Schema for a new webhook endpoint - the only time the secret is shown."""
+    secret: str
+
+
+class WebhookDeliveryResponse(BaseModel):
+    """Schema for one webhook delivery attempt log entry."""
+    id: int
+    event_id: str
+    event_type: str
+    status: str
+    attempts: int
+    response_status: Optional[int]
+    last_error: Optional[str]
+    created_at: datetime
+    next_attempt_at: datetime
+    delivered_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+class SalesPoint(BaseModel):
+    """Revenue in one chart bucket."""
+    start: datetime  # Bucket start (UTC)
+    revenue: float
+    payments: int
+
+
+class MerchantSalesResponse(BaseModel):
+    """Schema for merchant sales chart."""
+    merchant_id: str
+    bucket: str  # Requested bucket: "hour", "day" or "week"
+    bucket_seconds: int  # Actual bucket width (wider than requested for long ranges)
+    start: datetime
+    end: datetime
+    total_revenue: float
+    total_payments: int
+    points: List[SalesPoint]
+
+
 # ============ ANALYTICS SCHEMAS ============
 
 class TransactionStatsResponse(BaseModel):
@@ -371,3 +492,22 @@ class BudgetResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+# ============ NOTIFICATION SCHEMAS ============
+
+class NotificationPreferences(BaseModel):
+    """Schema for notification preferences."""
+    email: bool = True
+    in_app: bool = True
+    webhook_url: Optional[str] = None  # POST each notification (or digest) here
+    digest_minutes: int = 0  # 0 = one message per event, N = one message per N minutes
+
+
+class NotificationResponse(BaseModel):
+    """Schema for an in-app notification."""
+    id: int
+    event_type: str
+    data: dict
+    created_at: datetime
+    read_at: Optional[datetime] = None
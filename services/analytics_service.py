@@ -6,17 +6,45 @@ WHAT THIS FILE DOES:
 - Generate reports (daily, weekly, monthly)
 - Track spending patterns
 - Revenue analytics
+- Merchant sales charts (revenue per hour / day / week)
 
 LEARN:
 - Analytics = analyzing data to understand patterns
 - Helps users see spending habits
 - Helps merchants see revenue trends
+- Charts are summed per hour in SQL, then grouped into wider buckets
+  (and empty hours filled with 0) with NumPy
 """
+import math
+
+from fastapi import HTTPException, status
+from sqlalchemy import Integer, cast, func, select
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from models import Transaction, TransactionStatus, TransactionType
+from config import settings
+from core import metrics
+from core.cache import CacheBackend, LRUCache
+from models import Merchant, Transaction, TransactionStatus, TransactionType, Wallet
+
+# Bucket sizes for sales charts, in hours
+SALES_BUCKET_HOURS = {"hour": 1, "day": 24, "week": 168}
+
+# Default chart range per bucket when no start is given
+SALES_DEFAULT_RANGE = {"hour": timedelta(hours=48), "day": timedelta(days=30), "week": timedelta(weeks=26)}
+
+EPOCH = datetime(1970, 1, 1)
+# Week buckets start on Monday: 1970-01-05 was the first Monday (hour 96)
+WEEK_OFFSET_HOURS = 96
+
+# Cached charts by (merchant, range, bucket size): per-bucket totals plus
+# the hour up to which they can no longer change
+_sales_cache: CacheBackend = LRUCache(
+    maxsize=settings.SALES_SERIES_CACHE_MAX_ITEMS,
+    default_ttl=settings.SALES_SERIES_CACHE_TTL_SECONDS
+)
+metrics.register("merchant_sales_cache", lambda: _sales_cache.stats())
 
 
 def get_user_transaction_stats(
@@ -176,3 +204,175 @@ def get_spending_by_category(
             breakdown[transaction_type] += amount
     
     return breakdown
+
+
+# ============ MERCHANT SALES CHARTS ============
+
+def clear_sales_cache() -> None:
+    """Empty the sales chart cache."""
+    _sales_cache.clear()
+
+
+def _epoch_hour(moment: datetime, round_up: bool = False) -> int:
+    """Whole hours since 1970-01-01 (UTC): the hour `moment` falls in, or the next hour boundary."""
+    hours = (moment - EPOCH).total_seconds() / 3600
+    return math.ceil(hours) if round_up else math.floor(hours)
+
+
+def _hour_start(hour: int) -> datetime:
+    return EPOCH + timedelta(hours=hour)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """Naive UTC datetime (the database stores created_at that way)."""
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _hour_column(dialect: str):
+    """SQL expression: the epoch hour of Transaction.created_at."""
+    if dialect == "postgresql":
+        return func.floor(func.extract("epoch", Transaction.created_at) / 3600)
+    return cast(func.strftime("%s", Transaction.created_at), Integer) // 3600
+
+
+def _sales_buckets(
+    db: Session,
+    merchant: Merchant,
+    first_hour: int,
+    bucket_hours: int,
+    bucket_count: int
+) -> tuple:
+    """
+    Revenue and payment count per bucket (two NumPy arrays), for
+    `bucket_count` buckets of `bucket_hours` starting at `first_hour`.
+    
+    WHAT IT DOES:
+    1. Sums completed payments into the merchant's wallets per hour (SQL,
+       one range scan on the (recipient_wallet_id, created_at) index)
+    2. Adds the hours up into buckets with np.bincount, which also
+       leaves 0 in every bucket without payments
+    """
+    import numpy as np
+    
+    hour = _hour_column(db.get_bind().dialect.name).label("hour")
+    since = max(_hour_start(first_hour), merchant.created_at)
+    rows = db.execute(
+        select(hour, func.sum(Transaction.amount), func.count(Transaction.id))
+        .where(
+            Transaction.recipient_wallet_id.in_(select(Wallet.id).where(Wallet.user_id == merchant.user_id)),
+            Transaction.status == TransactionStatus.COMPLETED,
+            Transaction.created_at >= since,
+            Transaction.created_at < _hour_start(first_hour + bucket_hours * bucket_count)
+        )
+        .group_by(hour)
+    ).all()
+    
+    if not rows:
+        return np.zeros(bucket_count), np.zeros(bucket_count, dtype=np.int64)
+    
+    hours, revenue, payments = (np.asarray(column) for column in zip(*rows))
+    index = (hours.astype(np.int64) - first_hour) // bucket_hours
+    return (
+        np.bincount(index, weights=revenue.astype(float), minlength=bucket_count),
+        np.bincount(index, weights=payments.astype(float), minlength=bucket_count).astype(np.int64),
+    )
+
+
+def get_merchant_sales_series(
+    db: Session,
+    merchant: Merchant,
+    bucket: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> dict:
+    """
+    Revenue chart for a merchant: one point per hour, day or week.
+    
+    WHAT IT DOES:
+    1. Aligns the range to whole buckets (weeks start on Monday, UTC)
+    2. If that gives more than SALES_SERIES_MAX_POINTS buckets, merges
+       them into wider ones (e.g. 3-hour buckets for 60 days of "hour")
+    3. Serves buckets that can't change anymore from the cache and only
+       re-reads the newest ones (incremental refresh)
+    
+    Buckets are "final" once their last hour ended SALES_SERIES_SETTLE_SECONDS
+    ago; the cache stores up to which hour that is.
+    """
+    # Imported here: NumPy adds ~90 ms to every worker's startup and only
+    # the sales charts use it
+    import numpy as np
+    
+    if bucket not in SALES_BUCKET_HOURS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bucket must be one of: {', '.join(SALES_BUCKET_HOURS)}"
+        )
+    now = datetime.utcnow()
+    end = _as_utc(end) if end else now
+    start = _as_utc(start) if start else end - SALES_DEFAULT_RANGE[bucket]
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if end - start > timedelta(days=settings.SALES_SERIES_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range can be at most {settings.SALES_SERIES_MAX_DAYS} days"
+        )
+    
+    # Bucket size, widened (downsampled) if there would be too many points
+    bucket_hours = SALES_BUCKET_HOURS[bucket]
+    start_hour = _epoch_hour(start)
+    end_hour = _epoch_hour(end, round_up=True)
+    wanted = math.ceil((end_hour - start_hour) / bucket_hours)
+    if wanted > settings.SALES_SERIES_MAX_POINTS:
+        bucket_hours *= math.ceil(wanted / settings.SALES_SERIES_MAX_POINTS)
+    
+    offset = WEEK_OFFSET_HOURS if bucket_hours % SALES_BUCKET_HOURS["week"] == 0 else 0
+    first_hour = (start_hour - offset) // bucket_hours * bucket_hours + offset
+    last_hour = -((offset - end_hour) // bucket_hours) * bucket_hours + offset
+    bucket_count = (last_hour - first_hour) // bucket_hours
+    
+    settled_hour = min(_epoch_hour(now - timedelta(seconds=settings.SALES_SERIES_SETTLE_SECONDS)), last_hour)
+    cache_key = f"{merchant.id}:{first_hour}:{last_hour}:{bucket_hours}"
+    cached = _sales_cache.get(cache_key)
+    
+    if cached is not None and cached["settled_hour"] >= last_hour:
+        revenue = np.asarray(cached["revenue"])
+        payments = np.asarray(cached["payments"])
+    else:
+        # Re-read from the bucket holding the first unsettled hour
+        reuse = 0
+        if cached is not None:
+            reuse = max(0, (cached["settled_hour"] - first_hour) // bucket_hours)
+        tail_revenue, tail_payments = _sales_buckets(
+            db, merchant, first_hour + reuse * bucket_hours, bucket_hours, bucket_count - reuse
+        )
+        if reuse:
+            revenue = np.concatenate([np.asarray(cached["revenue"][:reuse]), tail_revenue])
+            payments = np.concatenate([np.asarray(cached["payments"][:reuse], dtype=np.int64), tail_payments])
+        else:
+            revenue, payments = tail_revenue, tail_payments
+        _sales_cache.set(cache_key, {
+            "revenue": revenue.tolist(),
+            "payments": payments.tolist(),
+            "settled_hour": settled_hour,
+        })
+    
+    bucket_starts = [_hour_start(first_hour + i * bucket_hours) for i in range(bucket_count)]
+    return {
+        "merchant_id": merchant.merchant_id,
+        "bucket": bucket,
+        "bucket_seconds": bucket_hours * 3600,
+        "start": _hour_start(first_hour),
+        "end": _hour_start(last_hour),
+        "total_revenue": round(float(revenue.sum()), 2),
+        "total_payments": int(payments.sum()),
+        "points": [
+            {"start": bucket_start, "revenue": round(float(amount), 2), "payments": int(count)}
+            for bucket_start, amount, count in zip(bucket_starts, revenue, payments)
+        ]
+    }
@@ -12,11 +12,24 @@ LEARN:
 - Each person pays their share
 """
 
+from sqlalchemy import Boolean, or_, select, type_coerce
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime
 
+from core.responses import response_columns
 from models import BillSplit, BillSplitParticipant, User, Wallet, Transaction, TransactionType, TransactionStatus
+from schemas import BillSplitResponse
+
+# What each entry of BillSplitResponse.participants shows
+PARTICIPANT_COLUMNS = (
+    BillSplitParticipant.id,
+    BillSplitParticipant.user_id,
+    BillSplitParticipant.amount_owed,
+    BillSplitParticipant.amount_paid,
+    type_coerce(BillSplitParticipant.is_settled, Boolean).label("is_settled"),  # stored as 0/1
+    BillSplitParticipant.settled_at,
+)
 
 
 def create_bill_split(
@@ -96,27 +109,46 @@ def create_bill_split(
     return bill_split
 
 
+def _bill_split_rows(db: Session, condition) -> list[dict]:
+    """
+    Bill splits matching `condition`, as dicts with the fields of
+    BillSplitResponse (participants included).
+    
+    Two column queries instead of loading ORM objects - see
+    core/responses.py.
+    """
+    bills = db.execute(
+        select(*response_columns(BillSplit, BillSplitResponse, exclude=["participants"]))
+        .where(condition)
+        .order_by(BillSplit.id)
+    ).mappings()
+    splits = {bill["id"]: {**bill, "participants": []} for bill in bills}
+    
+    if splits:
+        participants = db.execute(
+            select(BillSplitParticipant.bill_split_id, *PARTICIPANT_COLUMNS)
+            .where(BillSplitParticipant.bill_split_id.in_(list(splits)))
+            .order_by(BillSplitParticipant.id)
+        ).mappings()
+        for participant in participants:
+            participant = dict(participant)
+            splits[participant.pop("bill_split_id")]["participants"].append(participant)
+    
+    return list(splits.values())
+
+
+def get_bill_split_data(db: Session, bill_split_id: int) -> dict:
+    """A bill split with its participants, as a BillSplitResponse dict."""
+    return _bill_split_rows(db, BillSplit.id == bill_split_id)[0]
+
+
 def get_user_bill_splits(
     db: Session,
     user_id: int
-) -> list[BillSplit]:
-    """Get all bill splits where user is creator or participant."""
-    # As creator
-    created = db.query(BillSplit).filter(BillSplit.creator_id == user_id).all()
-    
-    # As participant
-    participant_ids = db.query(BillSplitParticipant.bill_split_id).filter(
-        BillSplitParticipant.user_id == user_id
-    ).all()
-    participant_ids = [p[0] for p in participant_ids]
-    
-    participated = db.query(BillSplit).filter(
-        BillSplit.id.in_(participant_ids)
-    ).all() if participant_ids else []
-    
-    # Combine and remove duplicates
-    all_splits = {split.id: split for split in created + participated}
-    return list(all_splits.values())
+) -> list[dict]:
+    """Get all bill splits where user is creator or participant (BillSplitResponse dicts)."""
+    joined = select(BillSplitParticipant.bill_split_id).where(BillSplitParticipant.user_id == user_id)
+    return _bill_split_rows(db, or_(BillSplit.creator_id == user_id, BillSplit.id.in_(joined)))
 
 
 def settle_bill_participant(
@@ -5,6 +5,7 @@ WHAT THIS FILE DOES:
 - Sends email notifications for transactions
 - Can send emails when money is added, transferred, etc.
 - Uses SMTP (Simple Mail Transfer Protocol) to send emails
+- Sends batches of emails over one SMTP connection (send_emails)
 
 LEARN:
 - SMTP = protocol for sending emails
@@ -19,6 +20,22 @@ from typing import Optional
 from config import settings
 
 
+def _build_message(to_email: str, subject: str, body: str, html_body: Optional[str]) -> MIMEMultipart:
+    """Create the email (plain text, plus HTML if given)."""
+    msg = MIMEMultipart('alternative')
+    msg['From'] = settings.EMAIL_FROM
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    
+    # Add plain text version
+    msg.attach(MIMEText(body, 'plain'))
+    
+    # Add HTML version if provided
+    if html_body:
+        msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+
 def send_email(
     to_email: str,
     subject: str,
@@ -40,39 +57,51 @@ def send_email(
     - body: Plain text email body
     - html_body: Optional HTML version (prettier)
     """
+    return send_emails([{"to": to_email, "subject": subject, "text": body, "html": html_body}])[0]
+
+
+def send_emails(messages: list[dict]) -> list[bool]:
+    """
+    Send many emails over one SMTP connection.
+    
+    WHAT IT DOES:
+    1. Connects and logs in once (TLS handshake + login are the slow part)
+    2. Sends every message ({"to", "subject", "text", "html"}) on that connection
+    3. Returns True/False per message
+    
+    LEARN:
+    - One connection per email means a TLS handshake and a login per
+      email; a batch of 100 digests this way needs just one
+    """
+    if not messages:
+        return []
+    
     # If email settings not configured, just print (for development)
     if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
-        print(f"📧 [EMAIL] Would send to {to_email}: {subject}")
-        print(f"   Body: {body}")
-        return True  # Return True so app doesn't break
+        for message in messages:
+            print(f"📧 [EMAIL] Would send to {message['to']}: {message['subject']}")
+        return [True] * len(messages)  # Return True so app doesn't break
     
+    results = []
     try:
-        # Create email message
-        msg = MIMEMultipart('alternative')
-        msg['From'] = settings.EMAIL_FROM
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Add plain text version
-        text_part = MIMEText(body, 'plain')
-        msg.attach(text_part)
-        
-        # Add HTML version if provided
-        if html_body:
-            html_part = MIMEText(html_body, 'html')
-            msg.attach(html_part)
-        
-        # Connect to SMTP server and send
+        # Connect to SMTP server once for the whole batch
         with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
             server.starttls()  # Enable encryption
             server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
-        
-        return True
-        
+            for message in messages:
+                try:
+                    server.send_message(_build_message(
+                        message["to"], message["subject"], message["text"], message.get("html")
+                    ))
+                    results.append(True)
+                except smtplib.SMTPRecipientsRefused as e:
+                    print(f"❌ Failed to send email to {message['to']}: {str(e)}")
+                    results.append(False)
     except Exception as e:
         print(f"❌ Failed to send email: {str(e)}")
-        return False
+    
+    # Messages not reached before a connection error count as failed
+    return results + [False] * (len(messages) - len(results))
 
 
 def send_transaction_notification(
@@ -83,69 +112,26 @@ def send_transaction_notification(
     balance: float
 ) -> bool:
     """
-    Send transaction notification email.
+    Send transaction notification email right away.
     
     WHAT IT DOES:
-    1. Creates a nice email message
-    2. Includes transaction details
-    3. Shows new balance
-    4. Sends to user
+    1. Renders the precompiled templates (services/notification_templates.py)
+    2. Includes transaction details and the new balance
+    3. Sends to user
+    
+    Transactions go through services/notification_service.py instead,
+    which honours user preferences and digests.
     
     EXAMPLE:
     When you add $50, user gets email:
     "You received $50.00. New balance: $150.00"
     """
-    # Create email subject
-    if transaction_type == "deposit":
-        subject = f"💰 Money Added to Your Wallet - ${amount:.2f}"
-    elif transaction_type == "transfer":
-        subject = f"💸 Money Transferred - ${amount:.2f}"
-    elif transaction_type == "payment":
-        subject = f"💳 Payment Processed - ${amount:.2f}"
-    else:
-        subject = f"📊 Transaction Update - ${amount:.2f}"
-    
-    # Create email body (plain text)
-    body = f"""
-Hello!
-
-Your transaction has been completed:
-
-Type: {transaction_type.title()}
-Amount: ${amount:.2f}
-Description: {description}
-New Balance: ${balance:.2f}
-
-Thank you for using RosePay!
-    """.strip()
-    
-    # Create HTML version (prettier)
-    html_body = f"""
-    <html>
-      <body style="font-family: Arial, sans-serif;">
-        <h2 style="color: #4CAF50;">Transaction Completed</h2>
-        <p>Your transaction has been processed successfully.</p>
-        <table style="border-collapse: collapse; width: 100%;">
-          <tr>
-            <td style="padding: 8px; border: 1px solid #ddd;"><strong>Type:</strong></td>
-            <td style="padding: 8px; border: 1px solid #ddd;">{transaction_type.title()}</td>
-          </tr>
-          <tr>
-            <td style="padding: 8px; border: 1px solid #ddd;"><strong>Amount:</strong></td>
-            <td style="padding: 8px; border: 1px solid #ddd;">${amount:.2f}</td>
-          </tr>
-          <tr>
-            <td style="padding: 8px; border: 1px solid #ddd;"><strong>Description:</strong></td>
-            <td style="padding: 8px; border: 1px solid #ddd;">{description}</td>
-          </tr>
-          <tr>
-            <td style="padding: 8px; border: 1px solid #ddd;"><strong>New Balance:</strong></td>
-            <td style="padding: 8px; border: 1px solid #ddd; color: #4CAF50; font-weight: bold;">${balance:.2f}</td>
-          </tr>
-        </table>
-        <p>Thank you for using RosePay!</p>
-      </body>
-    </html>
-    """
+    from services.notification_templates import render_event
     
-    return send_email(user_email, subject, body, html_body)
+    message = render_event({
+        "type": transaction_type,
+        "amount": amount,
+        "description": description,
+        "balance": balance,
+    })
+    return send_email(user_email, message["subject"], message["text"], message["html"])
@@ -0,0 +1,251 @@
+"""
+Health check service - readiness and liveness probes.
+
+WHAT THIS FILE DOES:
+- Liveness: "is the process running?" (no dependencies touched)
+- Readiness: "can this instance serve traffic?" (checks database, pool, workers)
+- Times every check and enforces a timeout
+- Caches readiness results so load balancers polling every second
+  don't hammer the database
+
+LEARN:
+- Load balancers call /health/ready to decide where to send traffic
+- Kubernetes calls /health/live to decide when to restart a container
+- A check that hangs is as bad as a check that fails, hence the timeouts.
+  A thread can't be stopped from outside, so each check also bounds its
+  own work (connect and statement timeouts), and a check still running
+  from an earlier probe is reported as failed instead of queued again
+"""
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from config import settings
+from core import heartbeats
+from database import engine
+
+# Small dedicated pool so slow checks never block request threads
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="health-check")
+
+_started_at = time.monotonic()
+
+_cache_lock = threading.Lock()
+_cache = {"at": 0.0, "result": None}
+
+# check name -> future of its last run (a check still running isn't run again)
+_in_flight: dict[str, Future] = {}
+
+_check_engine: Optional[Engine] = None
+
+
+def get_check_engine() -> Engine:
+    """
+    Engine for the database checks.
+
+    No pool (a full pool can't make a check wait for a connection) and
+    the check timeout as connect and statement timeout, so a hung
+    database frees the check thread instead of keeping it forever.
+    """
+    global _check_engine
+    if _check_engine is None:
+        timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+        connect_args = {}
+        if engine.dialect.name == "postgresql":
+            connect_args = {
+                "connect_timeout": max(1, math.ceil(timeout)),
+                "options": f"-c statement_timeout={int(timeout * 1000)}",
+            }
+        elif engine.dialect.name == "sqlite":
+            connect_args = {"timeout": timeout, "check_same_thread": False}
+        _check_engine = create_engine(engine.url, poolclass=NullPool, connect_args=connect_args)
+    return _check_engine
+
+
+def check_database() -> dict:
+    """Run a trivial query to prove the database answers."""
+    with get_check_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {"status": "ok"}
+
+
+def check_pool() -> dict:
+    """
+    Check how many database connections are still free.
+
+    WHAT IT DOES:
+    1. Reads pool size, overflow and checked-out connections
+    2. Calculates headroom (free share of capacity)
+    3. Fails if headroom is below HEALTH_MIN_POOL_HEADROOM
+    """
+    pool = engine.pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        # NullPool/StaticPool have no fixed capacity to measure
+        return {"status": "skipped", "detail": f"{type(pool).__name__} has no capacity"}
+
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    in_use = pool.checkedout()
+    headroom = 1.0 - (in_use / capacity) if capacity else 0.0
+
+    result = {
+        "status": "ok",
+        "in_use": in_use,
+        "capacity": capacity,
+        "headroom": round(headroom, 3),
+    }
+    if headroom < settings.HEALTH_MIN_POOL_HEADROOM:
+        result["status"] = "fail"
+        result["detail"] = "Database connection pool nearly exhausted"
+    return result
+
+
+def check_schema() -> dict:
+    """Check the database schema version matches the code."""
+    from migrations.runner import check_schema_version
+
+    version = check_schema_version(get_check_engine())
+    result = {"status": "ok", "current": version["current"], "latest": version["latest"]}
+    if not version["up_to_date"]:
+        result["status"] = "fail"
+        result["detail"] = "Pending migrations - run: python manage.py migrate"
+    return result
+
+
+def check_email_outbox() -> dict:
+    """
+    Check that queued emails are being sent.
+
+    Lag = how long the oldest email that is due has been waiting
+    (emails held back for a digest are not due yet).
+    """
+    from sqlalchemy.orm import Session
+    from services.notification_service import outbox_lag_seconds
+
+    with Session(bind=get_check_engine()) as db:
+        lag = outbox_lag_seconds(db)
+    if lag is None:
+        return {"status": "ok", "lag_seconds": 0.0}
+
+    result = {"status": "ok", "lag_seconds": round(lag, 1)}
+    if lag > settings.HEALTH_MAX_OUTBOX_LAG_SECONDS:
+        result["status"] = "fail"
+        result["detail"] = "Emails are not being sent (is the notification_dispatcher job running?)"
+    return result
+
+
+def check_scheduler() -> dict:
+    """Check that the background scheduler is still beating."""
+    age = heartbeats.last_beat_age("scheduler")
+    if age is None:
+        return {"status": "skipped", "detail": "scheduler not running"}
+
+    result = {"status": "ok", "last_beat_seconds_ago": round(age, 1)}
+    if age > settings.HEALTH_MAX_SCHEDULER_LAG_SECONDS:
+        result["status"] = "fail"
+        result["detail"] = "Scheduler heartbeat is stale"
+    return result
+
+
+# (name, check function, critical?)
+# Critical checks make the instance "not ready" (HTTP 503).
+# Non-critical failures only mark it "degraded".
+READINESS_CHECKS: list[tuple[str, Callable[[], dict], bool]] = [
+    ("database", check_database, True),
+    ("pool", check_pool, True),
+    ("schema", check_schema, False),
+    ("email_outbox", check_email_outbox, False),
+    ("scheduler", check_scheduler, False),
+]
+
+
+def _run_checks() -> dict:
+    """
+    Run all readiness checks in parallel, each with its own timeout.
+
+    A check whose previous run hasn't finished is not started again (it
+    would only wait behind the hung one for a free thread); it fails.
+    """
+    timeout = settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    started = {}
+    futures = {}
+    for name, check, _critical in READINESS_CHECKS:
+        started[name] = time.perf_counter()
+        previous = _in_flight.get(name)
+        if previous is not None and not previous.done():
+            continue
+        futures[name] = _in_flight[name] = _executor.submit(check)
+
+    deadline = time.perf_counter() + timeout
+    checks = {}
+    status = "ok"
+    for name, _check, critical in READINESS_CHECKS:
+        try:
+            if name not in futures:
+                result = {"status": "fail", "detail": "Previous run is still in progress"}
+            else:
+                result = futures[name].result(timeout=max(deadline - time.perf_counter(), 0))
+        except FutureTimeoutError:
+            result = {"status": "fail", "detail": f"Timed out after {timeout}s"}
+        except Exception as e:
+            result = {"status": "fail", "detail": f"{type(e).__name__}: {e}"}
+
+        result["latency_ms"] = round((time.perf_counter() - started[name]) * 1000, 2)
+        result["critical"] = critical
+        checks[name] = result
+
+        if result["status"] == "fail":
+            if critical:
+                status = "fail"
+            elif status == "ok":
+                status = "degraded"
+
+    return {
+        "status": status,
+        "checked_at": datetime.utcnow().isoformat(),
+        "checks": checks,
+    }
+
+
+def get_readiness(use_cache: bool = True) -> dict:
+    """
+    Get readiness of this instance.
+
+    WHAT IT DOES:
+    1. Returns the cached result if it is younger than HEALTH_CACHE_SECONDS
+    2. Otherwise runs all checks (only one caller at a time does this;
+       concurrent pollers wait and reuse the fresh result)
+    3. Adds "cached" and "age_seconds" so callers can tell
+    """
+    with _cache_lock:
+        now = time.monotonic()
+        age = now - _cache["at"]
+        if not use_cache or _cache["result"] is None or age >= settings.HEALTH_CACHE_SECONDS:
+            _cache["result"] = _run_checks()
+            _cache["at"] = time.monotonic()
+            age = 0.0
+            cached = False
+        else:
+            cached = True
+
+        return {**_cache["result"], "cached": cached, "age_seconds": round(age, 2)}
+
+
+def clear_readiness_cache() -> None:
+    """Forget cached readiness (next probe runs all checks)."""
+    with _cache_lock:
+        _cache["at"] = 0.0
+        _cache["result"] = None
+
+
+def get_liveness() -> dict:
+    """Liveness never touches dependencies - it only proves the process responds."""
+    return {
+        "status": "ok",
+        "uptime_seconds": round(time.monotonic() - _started_at, 1),
+    }
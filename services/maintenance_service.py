@@ -0,0 +1,357 @@
+"""
+Maintenance service - background cleanup jobs.
+
+WHAT THIS FILE DOES:
+- Deactivates payment links whose expiry time has passed
+- Cancels payment requests nobody acted on for PAYMENT_REQUEST_TTL_DAYS
+- Recounts pending payment requests and repairs inbox badges that drifted
+- Moves old finished links/requests into archive tables
+- Reports lag (how far behind the jobs are) and throughput in /metrics
+- Registers these jobs (and the merchant revenue reconciler, gateway
+  event processor, gateway reconciler, notification dispatcher and
+  merchant webhook sender) with the scheduler (core/scheduler.py)
+
+LEARN:
+- Work is done in small batches (MAINTENANCE_BATCH_SIZE rows, one commit
+  each) so a big backlog never holds long locks on busy tables
+- Every batch query is a range scan on an index that starts with the
+  filtered column ((is_active, expires_at), (status, created_at), ...),
+  so the database jumps straight to the rows to change
+- Lag = age of the oldest row the job should already have handled;
+  if it keeps growing, the job can't keep up
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import delete, func, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from core import metrics, scheduler
+from database import SessionLocal
+from models import (
+    PaymentLink, PaymentLinkArchive, PaymentRequest, PaymentRequestArchive, PendingRequestCount,
+    TransactionStatus
+)
+from services.merchant_service import reconcile_merchant_revenue
+from services.merchant_webhook_service import deliver_merchant_webhooks
+from services.notification_service import dispatch_notifications
+from services.payment_gateway_service import process_gateway_events, reconcile_gateway_payments
+from services.payment_request_service import adjust_pending_counts
+
+FINISHED_REQUEST_STATUSES = (
+    TransactionStatus.COMPLETED, TransactionStatus.CANCELLED, TransactionStatus.FAILED
+)
+
+_stats_lock = threading.Lock()
+_totals: dict[str, dict] = {}
+
+
+def _record(task: str, rows: int, seconds: float) -> None:
+    with _stats_lock:
+        totals = _totals.setdefault(task, {"rows": 0, "seconds": 0.0})
+        totals["rows"] += rows
+        totals["seconds"] += seconds
+
+
+def _in_batches(
+    db: Session,
+    task: str,
+    select_ids,
+    apply: Callable[[list[int]], None],
+    batch_size: int = None,
+    max_batches: int = None,
+) -> int:
+    """
+    Run `apply(ids)` on batches of ids from `select_ids` (a SELECT of ids
+    with no LIMIT), committing after each batch. Returns rows handled.
+
+    Stops when a batch comes back short or after `max_batches`;
+    the rest is picked up by the next run.
+    """
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+    max_batches = max_batches or settings.MAINTENANCE_MAX_BATCHES
+
+    started = time.perf_counter()
+    handled = 0
+    for _ in range(max_batches):
+        ids = db.execute(select_ids.limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        apply(ids)
+        db.commit()
+        handled += len(ids)
+        if len(ids) < batch_size:
+            break
+
+    _record(task, handled, time.perf_counter() - started)
+    return handled
+
+
+# ============ PAYMENT LINKS ============
+
+def deactivate_expired_links(
+    db: Session,
+    batch_size: int = None,
+    max_batches: int = None,
+) -> dict:
+    """
+    Mark expired payment links inactive.
+
+    WHAT IT DOES:
+    1. Finds active links with expires_at in the past, oldest expiry first
+    2. Sets is_active = 0, one batch per commit
+    """
+    now = datetime.utcnow()
+    select_ids = (
+        select(PaymentLink.id)
+        .where(PaymentLink.is_active == 1, PaymentLink.expires_at < now)
+        .order_by(PaymentLink.expires_at)
+    )
+
+    def apply(ids):
+        db.execute(
+            update(PaymentLink)
+            .where(PaymentLink.id.in_(ids), PaymentLink.is_active == 1)
+            .values(is_active=0)
+        )
+
+    count = _in_batches(db, "expire_links", select_ids, apply, batch_size, max_batches)
+    return {"links_deactivated": count}
+
+
+def archive_old_links(
+    db: Session,
+    batch_size: int = None,
+    max_batches: int = None,
+) -> dict:
+    """Move inactive links older than ARCHIVE_AFTER_DAYS to payment_links_archive."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    select_ids = (
+        select(PaymentLink.id)
+        .where(PaymentLink.is_active == 0, PaymentLink.created_at < cutoff)
+        .order_by(PaymentLink.created_at)
+    )
+    columns = [
+        "id", "user_id", "link_id", "amount", "description", "is_active",
+        "expires_at", "created_at", "paid_at", "transaction_id",
+    ]
+
+    def apply(ids):
+        _move_rows(db, PaymentLink, PaymentLinkArchive, columns, ids, now)
+
+    count = _in_batches(db, "archive_links", select_ids, apply, batch_size, max_batches)
+    return {"links_archived": count}
+
+
+# ============ PAYMENT REQUESTS ============
+
+def expire_stale_requests(
+    db: Session,
+    batch_size: int = None,
+    max_batches: int = None,
+) -> dict:
+    """Cancel pending payment requests older than PAYMENT_REQUEST_TTL_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=settings.PAYMENT_REQUEST_TTL_DAYS)
+    select_ids = (
+        select(PaymentRequest.id)
+        .where(PaymentRequest.status == TransactionStatus.PENDING, PaymentRequest.created_at < cutoff)
+        .order_by(PaymentRequest.created_at)
+    )
+
+    def apply(ids):
+        # Lower each recipient's pending count in the same transaction
+        per_recipient = db.execute(
+            select(PaymentRequest.recipient_id, func.count())
+            .where(PaymentRequest.id.in_(ids), PaymentRequest.status == TransactionStatus.PENDING)
+            .group_by(PaymentRequest.recipient_id)
+        ).all()
+        db.execute(
+            update(PaymentRequest)
+            .where(PaymentRequest.id.in_(ids), PaymentRequest.status == TransactionStatus.PENDING)
+            .values(status=TransactionStatus.CANCELLED)
+        )
+        adjust_pending_counts(db, {recipient_id: -count for recipient_id, count in per_recipient})
+
+    count = _in_batches(db, "expire_requests", select_ids, apply, batch_size, max_batches)
+    return {"requests_expired": count}
+
+
+def recount_pending_requests(db: Session) -> dict:
+    """
+    Rebuild the inbox badges (pending_request_counts) from payment_requests.
+
+    WHAT IT DOES:
+    1. Compares every user's counter with their pending requests in ONE
+       statement (same snapshot, so a request changing meanwhile is in
+       both or in neither)
+    2. Adds the difference to each counter that is off (an increment, so
+       changes committed after the read aren't overwritten)
+
+    Drift comes from requests changed without adjust_pending_counts, e.g.
+    by an older app version during the deploy that added the counters.
+    """
+    started = time.perf_counter()
+    counts = union_all(
+        select(PendingRequestCount.user_id.label("user_id"), PendingRequestCount.pending.label("counted"),
+               literal(0).label("actual")),
+        select(PaymentRequest.recipient_id, literal(0), literal(1))
+        .where(PaymentRequest.status == TransactionStatus.PENDING),
+    ).subquery()
+    drifted = db.execute(
+        select(counts.c.user_id, func.sum(counts.c.actual) - func.sum(counts.c.counted))
+        .group_by(counts.c.user_id)
+        .having(func.sum(counts.c.actual) != func.sum(counts.c.counted))
+    ).all()
+    adjust_pending_counts(db, dict(drifted))
+    db.commit()
+
+    _record("recount_requests", len(drifted), time.perf_counter() - started)
+    return {"counts_corrected": len(drifted), "count_drift": sum(abs(drift) for _, drift in drifted)}
+
+
+def archive_old_requests(
+    db: Session,
+    batch_size: int = None,
+    max_batches: int = None,
+) -> dict:
+    """Move finished requests older than ARCHIVE_AFTER_DAYS to payment_requests_archive."""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    columns = [
+        "id", "requester_id", "recipient_id", "amount", "description", "status",
+        "created_at", "paid_at", "transaction_id",
+    ]
+
+    archived = 0
+    # One range scan per status keeps each query on the (status, created_at) index
+    for request_status in FINISHED_REQUEST_STATUSES:
+        select_ids = (
+            select(PaymentRequest.id)
+            .where(PaymentRequest.status == request_status, PaymentRequest.created_at < cutoff)
+            .order_by(PaymentRequest.created_at)
+        )
+
+        def apply(ids):
+            _move_rows(db, PaymentRequest, PaymentRequestArchive, columns, ids, now)
+
+        archived += _in_batches(db, "archive_requests", select_ids, apply, batch_size, max_batches)
+    return {"requests_archived": archived}
+
+
+def _move_rows(db: Session, model, archive_model, columns: list[str], ids: list[int], now: datetime) -> None:
+    """Copy rows into the archive table, then delete them (same transaction)."""
+    source = select(
+        *[getattr(model, name) for name in columns], literal(now).label("archived_at")
+    ).where(model.id.in_(ids))
+    db.execute(insert(archive_model).from_select(columns + ["archived_at"], source))
+    db.execute(delete(model).where(model.id.in_(ids)))
+
+
+# ============ METRICS ============
+
+def maintenance_lag(db: Session) -> dict:
+    """
+    Seconds since the oldest row that a job should already have handled
+    (0 = nothing waiting). Each is one MIN() over an index range.
+    """
+    now = datetime.utcnow()
+    oldest_expiry = db.execute(
+        select(func.min(PaymentLink.expires_at))
+        .where(PaymentLink.is_active == 1, PaymentLink.expires_at < now)
+    ).scalar()
+    request_cutoff = now - timedelta(days=settings.PAYMENT_REQUEST_TTL_DAYS)
+    oldest_stale_request = db.execute(
+        select(func.min(PaymentRequest.created_at))
+        .where(PaymentRequest.status == TransactionStatus.PENDING, PaymentRequest.created_at < request_cutoff)
+    ).scalar()
+
+    return {
+        "expired_links_lag_seconds": _age(oldest_expiry, now),
+        "stale_requests_lag_seconds": _age(oldest_stale_request, request_cutoff),
+    }
+
+
+def _age(oldest, reference: datetime) -> float:
+    return round((reference - oldest).total_seconds(), 1) if oldest else 0.0
+
+
+def maintenance_stats() -> dict:
+    """Lag plus rows handled and rows per second, per task."""
+    with _stats_lock:
+        totals = {task: dict(values) for task, values in _totals.items()}
+    for values in totals.values():
+        values["rows_per_second"] = (
+            round(values["rows"] / values["seconds"], 1) if values["seconds"] else 0.0
+        )
+        values["seconds"] = round(values["seconds"], 3)
+
+    db = SessionLocal()
+    try:
+        lag = maintenance_lag(db)
+    finally:
+        db.close()
+    return {**lag, "tasks": totals}
+
+
+metrics.register("maintenance", maintenance_stats)
+
+
+# ============ SCHEDULED JOBS ============
+
+def _with_session(job: Callable[[Session], dict]) -> Callable[[], dict]:
+    """Wrap a job so the scheduler runs it with its own session."""
+    def run() -> dict:
+        db = SessionLocal()
+        try:
+            return job(db)
+        finally:
+            db.close()
+    return run
+
+
+def _archive(db: Session) -> dict:
+    return {**archive_old_links(db), **archive_old_requests(db)}
+
+
+def register_jobs() -> None:
+    """Register maintenance jobs with the scheduler."""
+    scheduler.register_job(
+        "expired_link_sweeper", settings.LINK_SWEEP_INTERVAL_SECONDS,
+        _with_session(deactivate_expired_links)
+    )
+    scheduler.register_job(
+        "stale_request_sweeper", settings.REQUEST_SWEEP_INTERVAL_SECONDS,
+        _with_session(expire_stale_requests)
+    )
+    scheduler.register_job(
+        "pending_request_recount", settings.REQUEST_RECOUNT_INTERVAL_SECONDS,
+        _with_session(recount_pending_requests)
+    )
+    scheduler.register_job(
+        "archiver", settings.ARCHIVE_INTERVAL_SECONDS,
+        _with_session(_archive)
+    )
+    scheduler.register_job(
+        "merchant_revenue_reconciler", settings.MERCHANT_RECONCILE_INTERVAL_SECONDS,
+        _with_session(reconcile_merchant_revenue)
+    )
+    scheduler.register_job(
+        "gateway_event_processor", settings.GATEWAY_EVENT_INTERVAL_SECONDS,
+        _with_session(process_gateway_events)
+    )
+    scheduler.register_job(
+        "gateway_reconciler", settings.GATEWAY_RECONCILE_INTERVAL_SECONDS,
+        _with_session(reconcile_gateway_payments)
+    )
+    scheduler.register_job(
+        "notification_dispatcher", settings.NOTIFY_DISPATCH_INTERVAL_SECONDS,
+        _with_session(dispatch_notifications)
+    )
+    scheduler.register_job(
+        "merchant_webhook_sender", settings.WEBHOOK_DELIVERY_INTERVAL_SECONDS,
+        _with_session(deliver_merchant_webhooks)
+    )
@@ -6,18 +6,29 @@ WHAT THIS FILE DOES:
 - Merchants can receive payments
 - Track merchant revenue
 - Generate merchant reports
+- Reconciles revenue counters against the ledger (scheduled job)
 
 LEARN:
 - Merchants = businesses that accept payments
 - Like Google Pay merchants, PhonePe merchants
 - Merchants have unique IDs for payments
+- Revenue is added by the database (total = total + amount), never
+  read-add-write in Python, so concurrent payments can't lose an update
 """
+import random
+
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-import secrets
-import string
 
-from models import Merchant, User
+from config import settings
+from core.ids import add_with_unique_id, new_id
+from models import (
+    Merchant, MerchantRevenueShard, Transaction, TransactionStatus, User, Wallet
+)
+
+# Most revenue shard rows one merchant can have
+MAX_REVENUE_SHARDS = 64
 
 
 def generate_merchant_id() -> str:
@@ -25,17 +36,13 @@ def generate_merchant_id() -> str:
     Generate unique merchant ID.
     
     WHAT IT DOES:
-    1. Creates random string (like "MRCH_ABC123")
-    2. Ensures uniqueness
-    3. Returns merchant ID
+    1. Creates time-ordered random string (see core/ids.py)
+    2. Returns merchant ID (uniqueness is enforced by the unique index)
     
     EXAMPLE:
-    "MRCH_X7K9M2P"
+    "MRCH_06GNA0VB344EQQ9XSBTDTDZ7"
     """
-    # Generate random 8-character ID
-    chars = string.ascii_uppercase + string.digits
-    random_id = ''.join(secrets.choice(chars) for _ in range(8))
-    return f"MRCH_{random_id}"
+    return new_id("MRCH_")
 
 
 def create_merchant(
@@ -64,25 +71,17 @@ def create_merchant(
             detail="User already has a merchant account"
         )
     
-    # Generate unique merchant ID
-    merchant_id = generate_merchant_id()
-    
-    # Ensure uniqueness
-    while db.query(Merchant).filter(Merchant.merchant_id == merchant_id).first():
-        merchant_id = generate_merchant_id()
-    
-    # Create merchant
+    # Create merchant with a unique merchant ID
+    # (retried with a new ID if the unique index reports a duplicate)
     merchant = Merchant(
         user_id=user_id,
         business_name=business_name,
         business_type=business_type,
-        merchant_id=merchant_id,
         is_active=1,
         total_revenue=0.0
     )
     
-    db.add(merchant)
-    db.commit()
+    add_with_unique_id(db, merchant, "merchant_id", generate_merchant_id)
     db.refresh(merchant)
     
     return merchant
@@ -123,48 +122,192 @@ def update_merchant_revenue(
     amount: float
 ) -> None:
     """
-    Update merchant total revenue.
+    Add a payment to merchant total revenue.
     
     WHAT IT DOES:
     1. Gets merchant
-    2. Adds amount to total_revenue
+    2. Adds amount in one atomic UPDATE
     3. Saves to database
     
     USAGE:
     Call this when merchant receives payment
     """
     merchant = get_merchant(db, merchant_id)
-    merchant.total_revenue += amount
+    add_merchant_revenue(db, merchant.id, merchant.revenue_shards, amount)
     db.commit()
 
 
+def add_merchant_revenue(db: Session, merchant_pk: int, shards: int, amount: float) -> None:
+    """
+    Add `amount` to a merchant's revenue. Does NOT commit (call it in the
+    transaction that records the payment).
+    
+    WHAT IT DOES:
+    - Normal merchants: UPDATE merchants SET total_revenue = total_revenue + :amount
+    - Busy merchants (revenue_shards > 0): the same UPDATE on one random
+      shard row, so concurrent payments mostly lock different rows
+    """
+    if shards > 0:
+        result = db.execute(
+            update(MerchantRevenueShard)
+            .where(
+                MerchantRevenueShard.merchant_id == merchant_pk,
+                MerchantRevenueShard.shard == random.randrange(shards)
+            )
+            .values(revenue=MerchantRevenueShard.revenue + amount)
+        )
+        if result.rowcount:
+            return
+        # Shards were just changed (see set_revenue_shards): use the main row
+    
+    db.execute(
+        update(Merchant)
+        .where(Merchant.id == merchant_pk)
+        .values(total_revenue=Merchant.total_revenue + amount)
+    )
+
+
+def _revenue_column():
+    """SQL expression: merchants.total_revenue + the merchant's shard rows."""
+    shard_total = (
+        select(func.coalesce(func.sum(MerchantRevenueShard.revenue), 0.0))
+        .where(MerchantRevenueShard.merchant_id == Merchant.id)
+        .scalar_subquery()
+    )
+    return func.coalesce(Merchant.total_revenue, 0.0) + shard_total
+
+
+def _ledger_filter():
+    """Completed payments into any of the merchant's wallets since it became a merchant."""
+    return (
+        Transaction.recipient_wallet_id.in_(select(Wallet.id).where(Wallet.user_id == Merchant.user_id)),
+        Transaction.status == TransactionStatus.COMPLETED,
+        Transaction.created_at >= Merchant.created_at,
+    )
+
+
+def get_merchant_revenue(db: Session, merchant_pk: int) -> float:
+    """Merchant revenue (main counter plus shards)."""
+    return db.execute(select(_revenue_column()).where(Merchant.id == merchant_pk)).scalar() or 0.0
+
+
+def set_revenue_shards(db: Session, merchant_id: str, shards: int) -> dict:
+    """
+    Spread a busy merchant's revenue updates over `shards` rows (0 = off).
+    
+    WHAT IT DOES:
+    1. Locks and folds the current shard rows into total_revenue
+    2. Creates `shards` fresh rows at 0
+    3. Saves the new shard count (one commit, revenue unchanged)
+    """
+    if not 0 <= shards <= MAX_REVENUE_SHARDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Shards must be between 0 and {MAX_REVENUE_SHARDS}"
+        )
+    merchant = get_merchant(db, merchant_id)
+    
+    existing = db.execute(
+        select(MerchantRevenueShard)
+        .where(MerchantRevenueShard.merchant_id == merchant.id)
+        .with_for_update()
+    ).scalars().all()
+    folded = sum(row.revenue for row in existing)
+    for row in existing:
+        db.delete(row)
+    db.flush()
+    
+    db.execute(
+        update(Merchant)
+        .where(Merchant.id == merchant.id)
+        .values(total_revenue=Merchant.total_revenue + folded, revenue_shards=shards)
+    )
+    db.add_all([
+        MerchantRevenueShard(merchant_id=merchant.id, shard=shard, revenue=0.0)
+        for shard in range(shards)
+    ])
+    db.commit()
+    
+    return {"merchant_id": merchant_id, "revenue_shards": shards, "revenue": get_merchant_revenue(db, merchant.id)}
+
+
 def get_merchant_stats(db: Session, user_id: int) -> dict:
     """
     Get merchant statistics.
     
     WHAT IT DOES:
     1. Gets merchant account
-    2. Returns stats (revenue, etc.)
+    2. Reads revenue from the counter (plus shards)
+    3. Counts completed payments into all of the merchant's wallets
     """
     merchant = get_user_merchant(db, user_id)
     
-    # Get transaction count
-    from models import Transaction, TransactionStatus, Wallet
-    # Get merchant's wallet
-    merchant_wallet = db.query(Wallet).filter(Wallet.user_id == user_id).first()
-    if merchant_wallet:
-        transaction_count = db.query(Transaction).filter(
-            Transaction.recipient_wallet_id == merchant_wallet.id,
-            Transaction.status == TransactionStatus.COMPLETED
-        ).count()
-    else:
-        transaction_count = 0
+    transaction_count = db.execute(
+        select(func.count(Transaction.id))
+        .where(Merchant.id == merchant.id, *_ledger_filter())
+    ).scalar()
     
     return {
         "merchant_id": merchant.merchant_id,
         "business_name": merchant.business_name,
         "business_type": merchant.business_type,
-        "total_revenue": merchant.total_revenue,
+        "total_revenue": get_merchant_revenue(db, merchant.id),
         "transaction_count": transaction_count,
         "is_active": bool(merchant.is_active)
     }
+
+
+def reconcile_merchant_revenue(db: Session, batch_size: int = None) -> dict:
+    """
+    Recompute every merchant's revenue from the ledger and fix drift.
+    
+    WHAT IT DOES:
+    1. Walks merchants in id order, batch_size at a time
+    2. Reads counter and ledger total in ONE statement (same snapshot,
+       so a payment committing meanwhile is in both or in neither)
+    3. Adds the difference to total_revenue (an increment, so payments
+       arriving after the read aren't overwritten)
+    
+    Drift comes from payments that reached a merchant wallet without
+    update_merchant_revenue, or from counters changed by hand.
+    """
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+    ledger_total = (
+        select(func.coalesce(func.sum(Transaction.amount), 0.0))
+        .where(*_ledger_filter())
+        .scalar_subquery()
+    )
+    
+    checked = corrected = 0
+    drift_total = 0.0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Merchant.id, _revenue_column(), ledger_total)
+            .where(Merchant.id > last_id)
+            .order_by(Merchant.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        for merchant_pk, counted, ledger in rows:
+            drift = round(ledger - counted, 2)
+            if drift:
+                db.execute(
+                    update(Merchant)
+                    .where(Merchant.id == merchant_pk)
+                    .values(total_revenue=Merchant.total_revenue + drift)
+                )
+                corrected += 1
+                drift_total += drift
+        db.commit()
+        
+        checked += len(rows)
+        last_id = rows[-1][0]
+    
+    return {
+        "merchants_checked": checked,
+        "merchants_corrected": corrected,
+        "revenue_drift": round(drift_total, 2)
+    }
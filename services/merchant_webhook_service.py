@@ -0,0 +1,348 @@
+"""
+Merchant webhook service - tells merchants about payments as they land.
+
+WHAT THIS FILE DOES:
+- Merchants register webhook URLs (each gets its own signing secret)
+- queue_payment_webhooks(): called by pay_via_link, accept_payment_request
+  and transfer_money in the payment's own transaction - adds one
+  delivery row per endpoint of the receiving merchant
+- deliver_merchant_webhooks(): scheduler job that POSTs due deliveries
+  through core/webhook_sender.py and retries failures with backoff
+- Delivery log per endpoint
+
+LEARN:
+- Merchants used to poll /merchant/stats and their transaction list to
+  notice payments; a webhook pushes each payment once instead
+- The queue is a table written with the payment (outbox pattern): if
+  the payment commits the event exists, if it rolls back it doesn't
+- Backoff: retry after 30s, 60s, 120s, ... (with jitter, capped at
+  WEBHOOK_BACKOFF_MAX_SECONDS), so a merchant whose server is down
+  isn't hammered, and comes back to a full replay
+- Deliveries the sender skipped (their endpoint timed out earlier in the
+  same run) were never sent: they keep their attempt count and are
+  tried again after a short fixed wait
+- Receivers must dedupe on the event id: a delivery whose response was
+  lost is sent again
+"""
+import json
+import random
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import settings
+from core import metrics
+from core.ids import new_id
+from core.outbound_url import UnsafeURLError, validate_outbound_url
+from core.webhook_sender import WebhookRequest, WebhookResult, WebhookSender
+from models import Merchant, Transaction, Wallet, WebhookDelivery, WebhookEndpoint
+from services.merchant_service import get_user_merchant
+
+PAYMENT_RECEIVED = "payment.received"
+
+_sender: Optional[WebhookSender] = None
+_sender_lock = threading.Lock()
+
+
+def get_webhook_sender() -> WebhookSender:
+    """The process-wide sender (one event loop, one connection pool)."""
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = WebhookSender(
+                concurrency=settings.WEBHOOK_CONCURRENCY,
+                timeout=settings.WEBHOOK_TIMEOUT_SECONDS
+            )
+        return _sender
+
+
+# ============ STATS ============
+
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "delivered": 0, "retried": 0, "skipped": 0, "failed": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def webhook_stats() -> dict:
+    """Deliveries queued and sent by this process, plus sender counters."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["sender"] = _sender.stats() if _sender is not None else None
+    return stats
+
+
+metrics.register("merchant_webhooks", webhook_stats)
+
+
+# ============ ENDPOINTS ============
+
+def create_webhook_endpoint(db: Session, user_id: int, url: str,
+                            max_concurrency: int = None) -> WebhookEndpoint:
+    """
+    Register a webhook URL for the user's merchant account.
+
+    WHAT IT DOES:
+    1. Checks the URL (http/https, public address) and the per-merchant limit
+    2. Generates a signing secret ("whsec_...") - only shown in this response
+    3. Saves the endpoint
+    """
+    merchant = get_user_merchant(db, user_id)
+    try:
+        validate_outbound_url(url)
+    except UnsafeURLError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"url: {e}"
+        )
+    max_concurrency = max_concurrency or settings.WEBHOOK_ENDPOINT_CONCURRENCY
+    if not 1 <= max_concurrency <= settings.WEBHOOK_CONCURRENCY:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"max_concurrency must be between 1 and {settings.WEBHOOK_CONCURRENCY}"
+        )
+    active = db.query(WebhookEndpoint).filter(
+        WebhookEndpoint.merchant_id == merchant.id,
+        WebhookEndpoint.is_active == 1
+    ).count()
+    if active >= settings.WEBHOOK_MAX_ENDPOINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.WEBHOOK_MAX_ENDPOINTS} webhook endpoints per merchant"
+        )
+
+    endpoint = WebhookEndpoint(
+        merchant_id=merchant.id,
+        url=url,
+        secret="whsec_" + secrets.token_hex(24),
+        max_concurrency=max_concurrency,
+    )
+    db.add(endpoint)
+    db.commit()
+    db.refresh(endpoint)
+    return endpoint
+
+
+def list_webhook_endpoints(db: Session, user_id: int) -> list[WebhookEndpoint]:
+    """Active webhook endpoints of the user's merchant account."""
+    merchant = get_user_merchant(db, user_id)
+    return db.query(WebhookEndpoint).filter(
+        WebhookEndpoint.merchant_id == merchant.id,
+        WebhookEndpoint.is_active == 1
+    ).order_by(WebhookEndpoint.id).all()
+
+
+def _get_endpoint(db: Session, user_id: int, endpoint_id: int) -> WebhookEndpoint:
+    merchant = get_user_merchant(db, user_id)
+    endpoint = db.query(WebhookEndpoint).filter(
+        WebhookEndpoint.id == endpoint_id,
+        WebhookEndpoint.merchant_id == merchant.id,
+        WebhookEndpoint.is_active == 1
+    ).first()
+    if not endpoint:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Webhook endpoint not found"
+        )
+    return endpoint
+
+
+def delete_webhook_endpoint(db: Session, user_id: int, endpoint_id: int) -> WebhookEndpoint:
+    """Stop sending to an endpoint (its delivery log is kept)."""
+    endpoint = _get_endpoint(db, user_id, endpoint_id)
+    endpoint.is_active = 0
+    db.commit()
+    return endpoint
+
+
+def list_webhook_deliveries(db: Session, user_id: int, endpoint_id: int,
+                            limit: int = 50) -> list[WebhookDelivery]:
+    """Recent deliveries to one endpoint, newest first."""
+    endpoint = _get_endpoint(db, user_id, endpoint_id)
+    return db.execute(
+        select(WebhookDelivery)
+        .where(WebhookDelivery.endpoint_id == endpoint.id)
+        .order_by(WebhookDelivery.id.desc())
+        .limit(min(limit, 200))
+    ).scalars().all()
+
+
+# ============ QUEUEING ============
+
+def queue_payment_webhooks(db: Session, source: str,
+                           payments: list[tuple[Transaction, Wallet]]) -> int:
+    """
+    Queue "payment.received" events for payments into merchant wallets.
+    Does NOT commit (call it in the transaction that records the payments,
+    after a flush so the transactions have ids).
+
+    WHAT IT DOES:
+    1. Finds the active endpoints of the merchants owning the receiving
+       wallets (one query; nothing happens for non-merchants)
+    2. Adds one delivery row per (payment, endpoint); all endpoints of a
+       payment get the same event id and body
+
+    `source` says how the money came: "payment_link", "payment_request"
+    or "transfer". Returns the number of deliveries added.
+    """
+    if not payments:
+        return 0
+    owner_ids = {wallet.user_id for _, wallet in payments}
+    endpoints: dict[int, list[tuple[WebhookEndpoint, str]]] = {}
+    for endpoint, user_id, merchant_id in db.execute(
+        select(WebhookEndpoint, Merchant.user_id, Merchant.merchant_id)
+        .join(Merchant, Merchant.id == WebhookEndpoint.merchant_id)
+        .where(Merchant.user_id.in_(owner_ids), WebhookEndpoint.is_active == 1)
+    ):
+        endpoints.setdefault(user_id, []).append((endpoint, merchant_id))
+    if not endpoints:
+        return 0
+
+    now = datetime.utcnow()
+    added = 0
+    for transaction, wallet in payments:
+        targets = endpoints.get(wallet.user_id)
+        if not targets:
+            continue
+        event_id = new_id("evt_")
+        body = json.dumps({
+            "id": event_id,
+            "type": PAYMENT_RECEIVED,
+            "created_at": now.isoformat(),
+            "data": {
+                "merchant_id": targets[0][1],
+                "transaction_id": transaction.id,
+                "amount": transaction.amount,
+                "currency": wallet.currency,
+                "description": transaction.description,
+                "wallet_id": wallet.id,
+                "payer_wallet_id": transaction.wallet_id,
+                "source": source,
+            },
+        })
+        for endpoint, _ in targets:
+            db.add(WebhookDelivery(
+                endpoint_id=endpoint.id,
+                event_id=event_id,
+                event_type=PAYMENT_RECEIVED,
+                payload=body,
+                created_at=now,
+                next_attempt_at=now,
+            ))
+            added += 1
+    _count("queued", added)
+    return added
+
+
+# ============ DELIVERY ============
+
+def _backoff_seconds(attempts: int) -> float:
+    """Wait before attempt number attempts + 1: doubles each time, jittered, capped."""
+    wait = settings.WEBHOOK_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1))
+    return min(wait, settings.WEBHOOK_BACKOFF_MAX_SECONDS) * random.uniform(0.75, 1.0)
+
+
+def deliver_merchant_webhooks(db: Session, limit: int = None) -> dict:
+    """
+    POST queued merchant webhooks that are due.
+
+    WHAT IT DOES:
+    1. Takes up to `limit` due deliveries, oldest first (with their endpoints)
+    2. Sends them all at once through the webhook sender - each endpoint
+       gets at most its max_concurrency requests in flight
+    3. 2xx = delivered; anything else is retried after _backoff_seconds,
+       and marked failed after WEBHOOK_MAX_ATTEMPTS
+    4. Skipped deliveries (endpoint unreachable this run) aren't counted
+       as attempts and wait WEBHOOK_SKIPPED_RETRY_SECONDS
+    5. Deliveries to removed endpoints are marked failed without sending;
+       an endpoint whose URL now resolves to an internal address is
+       not sent to (a failed attempt)
+
+    The scheduler runs this in one process at a time (advisory lock),
+    so a delivery isn't picked up by two senders.
+    """
+    limit = limit or settings.WEBHOOK_BATCH_SIZE
+    now = datetime.utcnow()
+    rows = db.execute(
+        select(WebhookDelivery, WebhookEndpoint)
+        .join(WebhookEndpoint, WebhookEndpoint.id == WebhookDelivery.endpoint_id)
+        .where(WebhookDelivery.status == "pending", WebhookDelivery.next_attempt_at <= now)
+        .order_by(WebhookDelivery.id)
+        .limit(limit)
+    ).all()
+    result = {"delivered": 0, "retried": 0, "skipped": 0, "failed": 0}
+    if not rows:
+        return result
+
+    sending = []
+    refused: dict[int, Optional[str]] = {}  # endpoint id -> why its URL can't be sent to (None = it can)
+    for delivery, endpoint in rows:
+        if not endpoint.is_active:
+            delivery.status = "failed"
+            delivery.last_error = "Endpoint removed"
+            result["failed"] += 1
+            continue
+        if endpoint.id not in refused:
+            # Checked again: the host may resolve elsewhere than when it was registered
+            try:
+                validate_outbound_url(endpoint.url)
+                refused[endpoint.id] = None
+            except UnsafeURLError as e:
+                refused[endpoint.id] = str(e)
+        sending.append((delivery, endpoint))
+
+    sent = iter(get_webhook_sender().send([
+        WebhookRequest(
+            url=endpoint.url,
+            body=delivery.payload.encode("utf-8"),
+            secret=endpoint.secret,
+            endpoint_key=endpoint.id,
+            max_concurrency=endpoint.max_concurrency,
+            headers={
+                "X-RosePay-Event": delivery.event_type,
+                "X-RosePay-Event-Id": delivery.event_id,
+                "X-RosePay-Delivery": str(delivery.id),
+            },
+        )
+        for delivery, endpoint in sending if refused[endpoint.id] is None
+    ]))
+    outcomes = [
+        WebhookResult(error=refused[endpoint.id]) if refused[endpoint.id] else next(sent)
+        for _, endpoint in sending
+    ]
+
+    finished = datetime.utcnow()
+    for (delivery, _), outcome in zip(sending, outcomes):
+        if outcome.error == "skipped":
+            delivery.next_attempt_at = finished + timedelta(seconds=settings.WEBHOOK_SKIPPED_RETRY_SECONDS)
+            result["skipped"] += 1
+            continue
+        delivery.attempts += 1
+        delivery.response_status = outcome.status_code
+        if outcome.ok:
+            delivery.status = "delivered"
+            delivery.delivered_at = finished
+            delivery.last_error = None
+            result["delivered"] += 1
+            continue
+        delivery.last_error = outcome.error or f"HTTP {outcome.status_code}"
+        if delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+            delivery.status = "failed"
+            result["failed"] += 1
+        else:
+            delivery.next_attempt_at = finished + timedelta(seconds=_backoff_seconds(delivery.attempts))
+            result["retried"] += 1
+    db.commit()
+
+    for name, n in result.items():
+        if n:
+            _count(name, n)
+    return result
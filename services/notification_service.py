@@ -0,0 +1,409 @@
+"""
+Notification service - tells users about their transactions.
+
+WHAT THIS FILE DOES:
+- notify(): queues a notification on every channel the user turned on
+- Channels are plugins (email, webhook, in-app) kept in CHANNELS;
+  register_channel() adds one
+- dispatch_notifications(): scheduler job that sends what is queued -
+  one message per event, or one digest per user per window - and hands
+  each channel its whole batch at once (one SMTP session for all emails)
+- Notification preferences and the in-app inbox
+
+LEARN:
+- Sending happens outside the request, so a slow mail server never
+  slows down a transfer
+- Outbox pattern: the notification is a database row first; if sending
+  fails it is still there and is retried later
+- Digest: with digest_minutes = 60 a busy merchant gets one email an
+  hour listing every payment, instead of one email per payment
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from core import metrics
+from core.outbound_url import UnsafeURLError, validate_outbound_url
+from models import Notification, NotificationPreference, User
+from services.notification_templates import render_digest, render_event
+
+DEFAULT_PREFERENCES = {"email": True, "in_app": True, "webhook_url": None, "digest_minutes": 0}
+
+
+# ============ CHANNELS ============
+
+class Channel:
+    """
+    A way to reach a user. Subclass it and register_channel() an instance.
+
+    queued = True: rows wait in the outbox until dispatch_notifications()
+    calls send(). queued = False: the row itself is the delivery (in-app).
+    """
+
+    name = ""
+    queued = True
+
+    def enabled(self, preferences: dict) -> bool:
+        return bool(preferences.get(self.name))
+
+    def send(self, deliveries: list[dict]) -> list[bool]:
+        """
+        Send a batch. Each delivery has "email", "webhook_url", "message"
+        (rendered subject/text/html) and "events". Returns True/False per delivery.
+        """
+        raise NotImplementedError
+
+
+class EmailChannel(Channel):
+    name = "email"
+
+    def send(self, deliveries: list[dict]) -> list[bool]:
+        from services.email_service import send_emails
+
+        _count("smtp_sessions")
+        return send_emails([
+            {"to": d["email"], "subject": d["message"]["subject"],
+             "text": d["message"]["text"], "html": d["message"]["html"]}
+            for d in deliveries
+        ])
+
+
+class WebhookChannel(Channel):
+    """POSTs JSON to the user's own URL, over one keep-alive HTTP client."""
+
+    name = "webhook"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def enabled(self, preferences: dict) -> bool:
+        return bool(preferences.get("webhook_url"))
+
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    import httpx
+                    self._client = httpx.Client(
+                        timeout=settings.NOTIFY_WEBHOOK_TIMEOUT_SECONDS, follow_redirects=False
+                    )
+        return self._client
+
+    def send(self, deliveries: list[dict]) -> list[bool]:
+        results = []
+        for delivery in deliveries:
+            try:
+                # Checked again: the host may resolve elsewhere than when it was saved
+                validate_outbound_url(delivery["webhook_url"])
+                response = self.client().post(delivery["webhook_url"], json={
+                    "subject": delivery["message"]["subject"],
+                    "events": delivery["events"],
+                })
+                results.append(response.is_success)
+            except Exception:
+                results.append(False)
+        return results
+
+
+class InAppChannel(Channel):
+    """The notifications table is the inbox: nothing to send."""
+
+    name = "in_app"
+    queued = False
+
+    def send(self, deliveries: list[dict]) -> list[bool]:
+        return [True] * len(deliveries)
+
+
+CHANNELS: dict[str, Channel] = {}
+
+
+def register_channel(channel: Channel) -> None:
+    """Add (or replace) a notification channel."""
+    CHANNELS[channel.name] = channel
+
+
+for _channel in (EmailChannel(), WebhookChannel(), InAppChannel()):
+    register_channel(_channel)
+
+
+# ============ STATS ============
+
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "sent": 0, "messages": 0, "digests": 0, "failed_sends": 0, "smtp_sessions": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+def notification_stats() -> dict:
+    """Notifications queued and sent by this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+metrics.register("notifications", notification_stats)
+
+
+# ============ PREFERENCES ============
+
+def _preferences_for(db: Session, user_ids) -> dict[int, dict]:
+    """Preferences per user id (defaults for users without a row)."""
+    rows = db.execute(
+        select(NotificationPreference).where(NotificationPreference.user_id.in_(list(user_ids)))
+    ).scalars()
+    found = {
+        row.user_id: {
+            "email": bool(row.email),
+            "in_app": bool(row.in_app),
+            "webhook_url": row.webhook_url,
+            "digest_minutes": row.digest_minutes,
+        }
+        for row in rows
+    }
+    return {user_id: found.get(user_id, dict(DEFAULT_PREFERENCES)) for user_id in user_ids}
+
+
+def get_preferences(db: Session, user_id: int) -> dict:
+    """A user's notification preferences."""
+    return _preferences_for(db, [user_id])[user_id]
+
+
+def update_preferences(db: Session, user_id: int, preferences: dict) -> dict:
+    """
+    Save a user's notification preferences.
+
+    WHAT IT DOES:
+    1. Checks the webhook URL (http/https, public address) and digest window
+    2. Creates or updates the preferences row
+    """
+    webhook_url = preferences.get("webhook_url") or None
+    if webhook_url:
+        try:
+            validate_outbound_url(webhook_url)
+        except UnsafeURLError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"webhook_url: {e}"
+            )
+    digest_minutes = preferences.get("digest_minutes", 0)
+    if not 0 <= digest_minutes <= settings.NOTIFY_DIGEST_MAX_MINUTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"digest_minutes must be between 0 and {settings.NOTIFY_DIGEST_MAX_MINUTES}"
+        )
+
+    row = db.get(NotificationPreference, user_id)
+    if row is None:
+        row = NotificationPreference(user_id=user_id)
+        db.add(row)
+    row.email = int(bool(preferences.get("email", True)))
+    row.in_app = int(bool(preferences.get("in_app", True)))
+    row.webhook_url = webhook_url
+    row.digest_minutes = digest_minutes
+    db.commit()
+    return get_preferences(db, user_id)
+
+
+# ============ QUEUEING ============
+
+def notify(db: Session, user_id: int, event_type: str, data: dict) -> int:
+    """
+    Queue a notification about an event on the user's channels.
+
+    WHAT IT DOES:
+    1. Reads the user's preferences
+    2. Adds one row per enabled channel; queued channels get
+       due_at = now + digest window (now, without a digest)
+    3. Commits, and returns the number of rows added
+
+    Call it after the transaction itself is committed.
+    """
+    preferences = get_preferences(db, user_id)
+    now = datetime.utcnow()
+    due_at = now + timedelta(minutes=preferences["digest_minutes"])
+    payload = json.dumps({"type": event_type, **data, "at": now.isoformat()})
+
+    added = 0
+    for channel in CHANNELS.values():
+        if not channel.enabled(preferences):
+            continue
+        db.add(Notification(
+            user_id=user_id,
+            channel=channel.name,
+            event_type=event_type,
+            payload=payload,
+            status="pending" if channel.queued else "sent",
+            created_at=now,
+            due_at=due_at if channel.queued else now,
+            sent_at=None if channel.queued else now,
+        ))
+        added += 1
+    db.commit()
+    _count("queued", added)
+    return added
+
+
+# ============ DISPATCH ============
+
+def dispatch_notifications(db: Session, limit: int = None) -> dict:
+    """
+    Send queued notifications whose time has come.
+
+    WHAT IT DOES:
+    1. Finds (user, channel) pairs with a due notification
+    2. Takes their due rows, at most NOTIFY_MAX_ROWS_PER_GROUP per pair
+       (the rest waits for the next run) - for digest users also the
+       rows queued in the window but not due yet, so everything becomes
+       one message (digest template); the others get one message per event
+    3. Gives each channel its whole batch (email: one SMTP session)
+    4. Marks rows sent; failed ones are retried after NOTIFY_RETRY_SECONDS,
+       and marked failed after NOTIFY_MAX_ATTEMPTS
+    """
+    limit = limit or settings.NOTIFY_BATCH_SIZE
+    now = datetime.utcnow()
+    due = set(db.execute(
+        select(Notification.user_id, Notification.channel)
+        .where(Notification.status == "pending", Notification.due_at <= now)
+        .group_by(Notification.user_id, Notification.channel)
+        .limit(limit)
+    ).tuples())
+    result = {"sent": 0, "messages": 0, "digests": 0, "failed": 0}
+    if not due:
+        return result
+
+    user_ids = {user_id for user_id, _ in due}
+    preferences = _preferences_for(db, user_ids)
+    digest_users = [user_id for user_id in user_ids if preferences[user_id]["digest_minutes"]]
+    # A failed row (attempts > 0) waits out its retry delay even if a
+    # newer row of the same pair is due
+    ready = or_(
+        Notification.due_at <= now,
+        and_(Notification.user_id.in_(digest_users), Notification.attempts == 0),
+    )
+    numbered = (
+        select(
+            Notification.id,
+            func.row_number().over(
+                partition_by=(Notification.user_id, Notification.channel), order_by=Notification.id
+            ).label("n"),
+        )
+        .where(Notification.status == "pending", Notification.user_id.in_(user_ids), ready)
+        .subquery()
+    )
+    groups: dict[tuple[int, str], list[Notification]] = {}
+    for row in db.execute(
+        select(Notification)
+        .join(numbered, numbered.c.id == Notification.id)
+        .where(numbered.c.n <= settings.NOTIFY_MAX_ROWS_PER_GROUP)
+        .order_by(Notification.id)
+    ).scalars():
+        if (row.user_id, row.channel) in due:
+            groups.setdefault((row.user_id, row.channel), []).append(row)
+
+    emails = dict(db.execute(select(User.id, User.email).where(User.id.in_(user_ids))).tuples().all())
+
+    by_channel: dict[str, list[tuple[dict, list[Notification]]]] = {}
+    for (user_id, channel_name), rows in groups.items():
+        # Digest users get one message for the group, others one per event
+        parts = [rows] if preferences[user_id]["digest_minutes"] else [[row] for row in rows]
+        for part in parts:
+            events = [json.loads(row.payload) for row in part]
+            delivery = {
+                "email": emails.get(user_id),
+                "webhook_url": preferences[user_id]["webhook_url"],
+                "events": events,
+                "message": render_event(events[0]) if len(events) == 1 else render_digest(events),
+            }
+            by_channel.setdefault(channel_name, []).append((delivery, part))
+            result["digests"] += int(len(events) > 1)
+
+    sent_ids, failed_ids = [], []
+    for channel_name, batch in by_channel.items():
+        channel = CHANNELS.get(channel_name)
+        if channel is None:
+            outcomes = [False] * len(batch)  # channel was removed
+        else:
+            outcomes = channel.send([delivery for delivery, _ in batch])
+        for (_, rows), ok in zip(batch, outcomes):
+            (sent_ids if ok else failed_ids).extend(row.id for row in rows)
+            result["messages"] += int(ok)
+
+    if sent_ids:
+        db.execute(
+            update(Notification).where(Notification.id.in_(sent_ids))
+            .values(status="sent", sent_at=now, attempts=Notification.attempts + 1)
+        )
+    if failed_ids:
+        db.execute(
+            update(Notification).where(Notification.id.in_(failed_ids))
+            .values(attempts=Notification.attempts + 1,
+                    due_at=now + timedelta(seconds=settings.NOTIFY_RETRY_SECONDS))
+        )
+        db.execute(
+            update(Notification)
+            .where(Notification.id.in_(failed_ids), Notification.attempts >= settings.NOTIFY_MAX_ATTEMPTS)
+            .values(status="failed")
+        )
+    db.commit()
+
+    result["sent"], result["failed"] = len(sent_ids), len(failed_ids)
+    _count("sent", len(sent_ids))
+    _count("messages", result["messages"])
+    _count("digests", result["digests"])
+    _count("failed_sends", len(failed_ids))
+    return result
+
+
+def outbox_lag_seconds(db: Session) -> Optional[float]:
+    """How long the oldest due email has been waiting (None if none are due)."""
+    oldest = db.execute(
+        select(func.min(Notification.due_at))
+        .where(Notification.status == "pending", Notification.channel == "email")
+    ).scalar()
+    if oldest is None:
+        return None
+    return max(0.0, (datetime.utcnow() - oldest).total_seconds())
+
+
+# ============ IN-APP INBOX ============
+
+def list_inbox(db: Session, user_id: int, limit: int = 50, before_id: int = None) -> list[dict]:
+    """In-app notifications, newest first (keyset paging on id)."""
+    query = select(Notification).where(
+        Notification.user_id == user_id, Notification.channel == "in_app"
+    )
+    if before_id is not None:
+        query = query.where(Notification.id < before_id)
+    rows = db.execute(query.order_by(Notification.id.desc()).limit(min(limit, 200))).scalars()
+    return [
+        {
+            "id": row.id,
+            "event_type": row.event_type,
+            "data": json.loads(row.payload),
+            "created_at": row.created_at,
+            "read_at": row.read_at,
+        }
+        for row in rows
+    ]
+
+
+def mark_inbox_read(db: Session, user_id: int) -> int:
+    """Mark all unread in-app notifications read. Returns how many."""
+    count = db.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.channel == "in_app",
+               Notification.read_at.is_(None))
+        .values(read_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return count
@@ -0,0 +1,188 @@
+"""
+Notification message templates.
+
+WHAT THIS FILE DOES:
+- Holds the text of every notification (subject, plain text, HTML)
+- Compiles each template once and keeps it (render() never re-parses)
+- Renders a single event or a digest of many events
+
+LEARN:
+- Templates use string.Template syntax: $name or ${name}; $$ is a
+  literal dollar sign. Each one is split into text and placeholders
+  once (CompiledTemplate), so rendering is just joining strings
+- Values going into HTML templates are escaped, so a description like
+  "<b>rent</b>" can't change the email's markup
+- A digest is one header + one row per event + one footer; the row
+  template is rendered per event and the rows are joined
+"""
+import html
+from functools import lru_cache
+from string import Template
+
+TEMPLATES = {
+    # ---- One event ----
+    "event.subject.deposit": "💰 Money Added to Your Wallet - $$${amount}",
+    "event.subject.transfer": "💸 Money Transferred - $$${amount}",
+    "event.subject.payment": "💳 Payment Processed - $$${amount}",
+    "event.subject.other": "📊 Transaction Update - $$${amount}",
+    "event.text": (
+        "Hello!\n"
+        "\n"
+        "Your transaction has been completed:\n"
+        "\n"
+        "Type: ${type}\n"
+        "Amount: $$${amount}\n"
+        "Description: ${description}\n"
+        "New Balance: $$${balance}\n"
+        "\n"
+        "Thank you for using RosePay!"
+    ),
+    "event.html": """
+    <html>
+      <body style="font-family: Arial, sans-serif;">
+        <h2 style="color: #4CAF50;">Transaction Completed</h2>
+        <p>Your transaction has been processed successfully.</p>
+        <table style="border-collapse: collapse; width: 100%;">
+          <tr>
+            <td style="padding: 8px; border: 1px solid #ddd;"><strong>Type:</strong></td>
+            <td style="padding: 8px; border: 1px solid #ddd;">${type}</td>
+          </tr>
+          <tr>
+            <td style="padding: 8px; border: 1px solid #ddd;"><strong>Amount:</strong></td>
+            <td style="padding: 8px; border: 1px solid #ddd;">$$${amount}</td>
+          </tr>
+          <tr>
+            <td style="padding: 8px; border: 1px solid #ddd;"><strong>Description:</strong></td>
+            <td style="padding: 8px; border: 1px solid #ddd;">${description}</td>
+          </tr>
+          <tr>
+            <td style="padding: 8px; border: 1px solid #ddd;"><strong>New Balance:</strong></td>
+            <td style="padding: 8px; border: 1px solid #ddd; color: #4CAF50; font-weight: bold;">$$${balance}</td>
+          </tr>
+        </table>
+        <p>Thank you for using RosePay!</p>
+      </body>
+    </html>
+    """,
+
+    # ---- Digest of many events ----
+    "digest.subject": "📊 Your RosePay activity - ${count} transactions",
+    "digest.text": (
+        "Hello!\n"
+        "\n"
+        "${count} transactions since ${since}:\n"
+        "\n"
+        "${rows}\n"
+        "\n"
+        "Money in: $$${total_in}   Money out: $$${total_out}\n"
+        "\n"
+        "Thank you for using RosePay!"
+    ),
+    "digest.text_row": "${time}  ${type}  $$${amount}  ${description}",
+    "digest.html": """
+    <html>
+      <body style="font-family: Arial, sans-serif;">
+        <h2 style="color: #4CAF50;">${count} transactions since ${since}</h2>
+        <table style="border-collapse: collapse; width: 100%;">
+${rows}
+        </table>
+        <p>Money in: <strong>$$${total_in}</strong> &nbsp; Money out: <strong>$$${total_out}</strong></p>
+        <p>Thank you for using RosePay!</p>
+      </body>
+    </html>
+    """,
+    "digest.html_row": (
+        '          <tr><td style="padding: 4px 8px;">${time}</td>'
+        '<td style="padding: 4px 8px;">${type}</td>'
+        '<td style="padding: 4px 8px;">$$${amount}</td>'
+        '<td style="padding: 4px 8px;">${description}</td></tr>'
+    ),
+}
+
+# Event types that take money out of the wallet (for digest totals)
+OUTGOING_TYPES = {"transfer", "payment", "withdrawal"}
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal text and placeholders.
+    
+    Rendering is a join over the pieces - no regex scan of the
+    template text on every message, as Template.substitute does.
+    """
+
+    def __init__(self, source: str):
+        self.parts: list[tuple[str, bool]] = []  # (text, is_placeholder)
+        position = 0
+        for match in Template.pattern.finditer(source):
+            self.parts.append((source[position:match.start()], False))
+            if match.group("escaped") is not None:
+                self.parts.append(("$", False))
+            elif match.group("named") or match.group("braced"):
+                self.parts.append((match.group("named") or match.group("braced"), True))
+            else:
+                raise ValueError(f"Invalid placeholder in template at {match.start()}")
+            position = match.end()
+        self.parts.append((source[position:], False))
+        self.parts = [(text, is_key) for text, is_key in self.parts if text]
+
+    def substitute(self, values: dict) -> str:
+        return "".join(str(values[text]) if is_key else text for text, is_key in self.parts)
+
+
+@lru_cache(maxsize=None)
+def compiled(name: str) -> CompiledTemplate:
+    """The compiled template (built on first use, then reused)."""
+    return CompiledTemplate(TEMPLATES[name])
+
+
+def render(name: str, values: dict) -> str:
+    """Fill in a template. Templates ending in "html" get escaped values."""
+    if name.endswith("html") or name.endswith("html_row"):
+        values = {key: html.escape(str(value)) for key, value in values.items()}
+    return compiled(name).substitute(values)
+
+
+def _event_values(event: dict) -> dict:
+    return {
+        "type": event["type"].title(),
+        "amount": f"{event['amount']:.2f}",
+        "description": event.get("description") or "",
+        "balance": f"{event['balance']:.2f}" if event.get("balance") is not None else "-",
+        "time": event.get("at", "")[:16].replace("T", " "),
+    }
+
+
+def render_event(event: dict) -> dict:
+    """Subject, text and HTML for one event."""
+    values = _event_values(event)
+    subject_name = f"event.subject.{event['type']}"
+    if subject_name not in TEMPLATES:
+        subject_name = "event.subject.other"
+    return {
+        "subject": render(subject_name, values),
+        "text": render("event.text", values),
+        "html": render("event.html", values),
+    }
+
+
+def render_digest(events: list[dict]) -> dict:
+    """Subject, text and HTML for many events in one message."""
+    rows = [_event_values(event) for event in events]
+    total_out = sum(e["amount"] for e in events if e["type"] in OUTGOING_TYPES)
+    total_in = sum(e["amount"] for e in events) - total_out
+    values = {
+        "count": len(events),
+        "since": rows[0]["time"] if rows else "",
+        "total_in": f"{total_in:.2f}",
+        "total_out": f"{total_out:.2f}",
+    }
+    return {
+        "subject": render("digest.subject", values),
+        "text": render("digest.text", {**values, "rows": "\n".join(render("digest.text_row", r) for r in rows)}),
+        # rows are already escaped HTML: substitute directly, not through render()
+        "html": compiled("digest.html").substitute({
+            **{key: html.escape(str(value)) for key, value in values.items()},
+            "rows": "\n".join(render("digest.html_row", r) for r in rows),
+        }),
+    }
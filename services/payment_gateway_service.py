@@ -1,17 +1,96 @@
 """
 Payment Gateway Service - Razorpay integration.
+
+All calls to Razorpay go through core/gateway_client.py (connection
+pool, timeouts, retries for reads, circuit breaker). When the gateway is
+down, endpoints answer 503 right away instead of tying up workers.
+
+Top-ups are settled by webhook: Razorpay POSTs payment events to
+/gateway/webhook, they are stored in gateway_events and applied by
+process_gateway_events (right after the webhook, and by a scheduler job
+for anything left over), which confirms each payment with Razorpay before
+crediting it. The client's /verify call only reads the result.
+A reconciler compares Razorpay's payment list with our deposits and
+credits anything a lost webhook missed.
 """
-import razorpay
+import hashlib
+import hmac
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException, status
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
 
 from config import settings
-from models import Transaction, Wallet, TransactionType, TransactionStatus
+from core import metrics
+from core.gateway_client import CircuitBreaker, GatewayClient, GatewayUnavailable
+from models import GatewayEvent, GatewayOrder, Transaction, Wallet, TransactionType, TransactionStatus
+from services.wallet_events import record_wallet_change
+
+
+# Gateway client is created on first use, not at import time.
+# Importing razorpay pulls in `requests` and friends, which slows down
+# cold starts for every worker even if it never touches the gateway.
+_client: Optional[GatewayClient] = None
+_client_lock = threading.Lock()
+
+
+def get_gateway_client() -> GatewayClient:
+    """
+    Get the shared gateway client (created lazily on first call).
+    
+    WHAT IT DOES:
+    1. Returns the existing client if already created
+    2. Otherwise creates it once, configured from settings
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GatewayClient(
+                    key_id=settings.RAZORPAY_KEY_ID,
+                    key_secret=settings.RAZORPAY_KEY_SECRET,
+                    base_url=settings.RAZORPAY_BASE_URL,
+                    pool_size=settings.GATEWAY_POOL_SIZE,
+                    connect_timeout=settings.GATEWAY_CONNECT_TIMEOUT,
+                    read_timeout=settings.GATEWAY_READ_TIMEOUT,
+                    read_retries=settings.GATEWAY_READ_RETRIES,
+                    retry_backoff=settings.GATEWAY_RETRY_BACKOFF_SECONDS,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.GATEWAY_BREAKER_FAILURES,
+                        reset_timeout=settings.GATEWAY_BREAKER_RESET_SECONDS
+                    )
+                )
+    return _client
+
+
+def set_gateway_client(client: Optional[GatewayClient]) -> None:
+    """Replace the shared client (tests; None = recreate from settings on next use)."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
 
 
-# Initialize Razorpay client
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+def gateway_stats() -> dict:
+    """Gateway latency and circuit state (nothing until the first call)."""
+    return _client.stats() if _client is not None else {"circuit": None, "operations": {}}
+
+
+metrics.register("gateway", gateway_stats)
+
+
+def _gateway_unavailable(e: GatewayUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"Payment gateway unavailable, please try again later ({e})"
+    )
 
 
 def create_razorpay_order(
@@ -39,9 +118,11 @@ def create_razorpay_order(
             "notes": notes or {}
         }
         
-        order = client.order.create(data=order_data)
+        order = get_gateway_client().create_order(order_data)
         return order
         
+    except GatewayUnavailable as e:
+        raise _gateway_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,6 +130,59 @@ def create_razorpay_order(
         )
 
 
+def create_gateway_order(
+    db: Session,
+    user_id: int,
+    amount: float,
+    currency: str = "INR",
+    wallet_id: int = None,
+    description: str = None
+) -> dict:
+    """
+    Create a top-up order at Razorpay and save it. Returns Razorpay's order.
+    
+    WHAT IT DOES:
+    1. Picks the wallet (the one given, or the user's first wallet)
+    2. Creates the order in Razorpay (user and wallet in its notes)
+    3. Saves it in gateway_orders - the webhook and the reconciler credit
+       the wallet saved here, never one the client names later
+    """
+    from services.wallet_service import get_wallet
+    
+    if wallet_id is not None:
+        wallet = get_wallet(db, wallet_id, user_id)  # 404 if not yours
+    else:
+        wallet = db.execute(
+            select(Wallet).where(Wallet.user_id == user_id).order_by(Wallet.id).limit(1)
+        ).scalar_one_or_none()
+        if wallet is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Create a wallet before adding money"
+            )
+    
+    order = create_razorpay_order(
+        amount=amount,
+        currency=currency,
+        notes={
+            "user_id": str(user_id),
+            "wallet_id": str(wallet.id),
+            "description": description or "Wallet top-up"
+        }
+    )
+    
+    gateway_order = GatewayOrder(
+        order_id=order["id"],
+        user_id=user_id,
+        wallet_id=wallet.id,
+        amount=amount,
+        currency=currency
+    )
+    db.add(gateway_order)
+    db.commit()
+    return order
+
+
 def verify_payment_signature(
     razorpay_order_id: str,
     razorpay_payment_id: str,
@@ -62,6 +196,9 @@ def verify_payment_signature(
     2. Prevents payment fraud
     3. Returns True if signature is valid
     """
+    client = get_gateway_client()
+    from razorpay.errors import SignatureVerificationError
+    
     try:
         params_dict = {
             "razorpay_order_id": razorpay_order_id,
@@ -69,10 +206,10 @@ def verify_payment_signature(
             "razorpay_signature": razorpay_signature
         }
         
-        client.utility.verify_payment_signature(params_dict)
+        client.verify_payment_signature(params_dict)
         return True
         
-    except razorpay.errors.SignatureVerificationError:
+    except SignatureVerificationError:
         return False
     except Exception as e:
         raise HTTPException(
@@ -93,9 +230,11 @@ def capture_payment(
     try:
         amount_in_paise = int(amount * 100)
         
-        payment = client.payment.capture(razorpay_payment_id, amount_in_paise)
+        payment = get_gateway_client().capture_payment(razorpay_payment_id, amount_in_paise)
         return payment
         
+    except GatewayUnavailable as e:
+        raise _gateway_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -103,79 +242,55 @@ def capture_payment(
         )
 
 
-def add_money_via_gateway(
+def get_gateway_payment_result(
     db: Session,
-    wallet_id: int,
     user_id: int,
-    amount: float,
     razorpay_order_id: str,
     razorpay_payment_id: str,
-    razorpay_signature: str,
-    description: str = None
-) -> Transaction:
+    razorpay_signature: str
+) -> dict:
     """
-    Add money to wallet via Razorpay gateway.
+    Result of a gateway top-up, for the checkout page (no gateway call).
     
     WHAT IT DOES:
-    1. Verify payment signature
-    2. Verify payment succeeded
-    3. Add money to wallet
-    4. Create transaction record
-    """
-    from services.wallet_service import get_wallet
+    1. Verifies the checkout signature (local HMAC check)
+    2. Returns "completed" with the deposit if the webhook already credited it
+    3. Returns "failed" if Razorpay reported the payment failed
+    4. Otherwise "pending" - the client polls again shortly
     
-    # Verify payment signature
+    LEARN:
+    - The money is credited by the webhook processor, not here, so a slow
+      gateway never holds an API worker, and the amount credited is the
+      one Razorpay reports, not the one the client sends
+    """
     if not verify_payment_signature(razorpay_order_id, razorpay_payment_id, razorpay_signature):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid payment signature"
         )
     
-    # Get wallet
-    wallet = get_wallet(db, wallet_id, user_id)
-    
-    # Get payment details from Razorpay
-    try:
-        payment = client.payment.fetch(razorpay_payment_id)
-        
-        if payment["status"] != "captured" and payment["status"] != "authorized":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Payment not successful. Status: {payment['status']}"
-            )
-        
-        # Verify amount matches
-        amount_paid = payment["amount"] / 100  # Convert from paise to rupees
-        if abs(amount_paid - amount) > 0.01:  # Allow small rounding differences
+    transaction = db.execute(
+        select(Transaction).where(Transaction.gateway_payment_id == razorpay_payment_id)
+    ).scalar_one_or_none()
+    if transaction is not None:
+        if transaction.user_id != user_id:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Payment amount mismatch"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Payment not found"
             )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to verify payment: {str(e)}"
-        )
-    
-    # Add money to wallet
-    wallet.balance += amount
-    
-    # Create transaction record
-    transaction = Transaction(
-        user_id=user_id,
-        wallet_id=wallet_id,
-        amount=amount,
-        transaction_type=TransactionType.DEPOSIT,
-        status=TransactionStatus.COMPLETED,
-        description=description or f"Razorpay payment - Order: {razorpay_order_id}"
-    )
-    
-    db.add(transaction)
-    db.commit()
-    db.refresh(transaction)
+        return {"payment_id": razorpay_payment_id, "status": "completed", "transaction": transaction}
     
-    return transaction
+    failed = db.execute(
+        select(GatewayEvent.id).where(
+            GatewayEvent.payment_id == razorpay_payment_id,
+            or_(GatewayEvent.event_type == "payment.failed", GatewayEvent.status == "failed")
+        ).limit(1)
+    ).first()
+    return {
+        "payment_id": razorpay_payment_id,
+        "status": "failed" if failed else "pending",
+        "transaction": None
+    }
 
 
 def get_payment_status(razorpay_payment_id: str) -> dict:
@@ -183,7 +298,7 @@ def get_payment_status(razorpay_payment_id: str) -> dict:
     Get payment status from Razorpay.
     """
     try:
-        payment = client.payment.fetch(razorpay_payment_id)
+        payment = get_gateway_client().fetch_payment(razorpay_payment_id)
         return {
             "payment_id": payment["id"],
             "status": payment["status"],
@@ -191,8 +306,405 @@ def get_payment_status(razorpay_payment_id: str) -> dict:
             "currency": payment["currency"],
             "method": payment.get("method", "unknown")
         }
+    except GatewayUnavailable as e:
+        raise _gateway_unavailable(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to fetch payment: {str(e)}"
         )
+
+
+# ============ WEBHOOKS ============
+
+# Events that mean "money arrived": credit the wallet
+CREDIT_EVENTS = ("payment.captured", "order.paid")
+# Events we keep (for the status read) but don't act on
+RECORD_ONLY_EVENTS = ("payment.failed", "payment.authorized")
+
+_event_stats_lock = threading.Lock()
+_event_stats = {"received": 0, "duplicates": 0, "processed": 0, "ignored": 0, "errors": 0, "failed": 0}
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _event_stats_lock:
+        _event_stats[name] += n
+
+
+def gateway_event_stats() -> dict:
+    """Webhook events received and applied by this process."""
+    with _event_stats_lock:
+        return dict(_event_stats)
+
+
+metrics.register("gateway_events", gateway_event_stats)
+
+
+# The placeholder in config.py: anyone reading the source could sign webhooks with it
+DEFAULT_WEBHOOK_SECRET = "change-this-webhook-secret"
+
+
+def webhook_secret_configured() -> bool:
+    """True once RAZORPAY_WEBHOOK_SECRET is set to a real secret."""
+    return settings.RAZORPAY_WEBHOOK_SECRET not in ("", DEFAULT_WEBHOOK_SECRET)
+
+
+def verify_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Razorpay signs the raw body: hex HMAC-SHA256 with the webhook secret."""
+    if not signature:
+        return False
+    expected = hmac.new(
+        settings.RAZORPAY_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def record_gateway_event(
+    db: Session,
+    body: bytes,
+    signature: Optional[str],
+    event_id: Optional[str] = None
+) -> dict:
+    """
+    Store a webhook event (nothing else - it is applied by process_gateway_events).
+    
+    WHAT IT DOES:
+    1. Refuses webhooks (503, Razorpay retries later) while the webhook
+       secret is empty or still the placeholder
+    2. Checks the X-Razorpay-Signature HMAC over the raw body
+    3. Stores the event once per event id (Razorpay retries deliveries,
+       a repeated id is acknowledged and skipped)
+    4. Returns {"event_id", "duplicate"}
+    """
+    if not webhook_secret_configured():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhooks are not configured (set RAZORPAY_WEBHOOK_SECRET)"
+        )
+    if not verify_webhook_signature(body, signature):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
+    
+    try:
+        event = json.loads(body)
+        event_type = event["event"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed webhook body"
+        )
+    
+    # Older webhooks have no event id header; the body identifies the event then
+    event_id = event_id or hashlib.sha256(body).hexdigest()
+    payment = _entity(event, "payment")
+    
+    db.add(GatewayEvent(
+        event_id=event_id,
+        event_type=event_type,
+        payment_id=payment.get("id"),
+        payload=body.decode("utf-8")
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        _count("duplicates")
+        return {"event_id": event_id, "duplicate": True}
+    
+    _count("received")
+    return {"event_id": event_id, "duplicate": False}
+
+
+def process_gateway_events(db: Session, limit: int = None) -> dict:
+    """
+    Apply pending webhook events, oldest first, one commit per event.
+    
+    WHAT IT DOES:
+    1. Picks up to `limit` pending events
+    2. Locks each one (other workers skip it) and applies it:
+       credit events deposit the payment into the wallet, others are kept
+    3. On an error the event stays pending and is retried next run,
+       until GATEWAY_EVENT_MAX_ATTEMPTS - then it is marked failed
+    
+    LEARN:
+    - Crediting is idempotent: transactions.gateway_payment_id is unique,
+      so payment.captured and order.paid for the same payment (or two
+      workers racing) deposit the money once
+    """
+    limit = limit or settings.GATEWAY_EVENT_BATCH_SIZE
+    ids = db.execute(
+        select(GatewayEvent.id)
+        .where(GatewayEvent.status == "pending")
+        .order_by(GatewayEvent.id)
+        .limit(limit)
+    ).scalars().all()
+    
+    result = {"processed": 0, "ignored": 0, "errors": 0, "failed": 0}
+    for event_id in ids:
+        event = db.execute(
+            select(GatewayEvent)
+            .where(GatewayEvent.id == event_id, GatewayEvent.status == "pending")
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if event is None:
+            db.rollback()
+            continue  # done or being done by another worker
+        
+        try:
+            outcome = _apply_event(db, event)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            outcome = _record_event_error(db, event_id, e)
+        result[outcome] += 1
+    
+    for name, n in result.items():
+        if n:
+            _count(name, n)
+    return result
+
+
+def _apply_event(db: Session, event: GatewayEvent) -> str:
+    """
+    Apply one locked event (no commit). Returns "processed" or "ignored".
+    
+    Credit events are confirmed with Razorpay first: the deposit uses the
+    payment as Razorpay reports it, not the webhook body, and must be
+    captured for the amount the body claims.
+    """
+    event.attempts += 1
+    event.processed_at = datetime.utcnow()
+    if event.event_type not in CREDIT_EVENTS:
+        event.status = "processed" if event.event_type in RECORD_ONLY_EVENTS else "ignored"
+        return event.status
+    
+    payload = json.loads(event.payload)
+    claimed = _entity(payload, "payment")
+    payment = get_gateway_client().fetch_payment(claimed["id"])
+    if payment.get("status") != "captured":
+        raise ValueError(f"Payment {claimed['id']} is {payment.get('status')} at Razorpay, not captured")
+    if payment.get("amount") != claimed.get("amount"):
+        raise ValueError(
+            f"Payment {claimed['id']}: webhook says {claimed.get('amount')}, Razorpay says {payment.get('amount')}"
+        )
+    transaction = _credit_payment(db, payment, _entity(payload, "order"))
+    event.transaction_id = transaction.id
+    event.status = "processed"
+    return "processed"
+
+
+def _credit_payment(db: Session, payment: dict, order: dict) -> Transaction:
+    """
+    Deposit a captured payment into its order's wallet (no commit).
+    
+    The wallet comes from gateway_orders. Orders created before that
+    table existed fall back to the notes on the payment or order
+    (create_razorpay_order puts user_id and wallet_id there).
+    """
+    existing = db.execute(
+        select(Transaction).where(Transaction.gateway_payment_id == payment["id"])
+    ).scalar_one_or_none()
+    if existing is not None:
+        return existing
+    
+    amount = payment["amount"] / 100  # Convert from paise to rupees
+    gateway_order = None
+    if payment.get("order_id"):
+        gateway_order = db.execute(
+            select(GatewayOrder).where(GatewayOrder.order_id == payment["order_id"]).with_for_update()
+        ).scalar_one_or_none()
+    
+    if gateway_order is not None:
+        user_id, wallet_id = gateway_order.user_id, gateway_order.wallet_id
+    else:
+        notes = payment.get("notes") or order.get("notes") or {}
+        if not isinstance(notes, dict) or not notes.get("user_id"):
+            raise ValueError(f"Payment {payment['id']} has no gateway order and no user_id note")
+        user_id = int(notes["user_id"])
+        wallet_id = int(notes["wallet_id"]) if notes.get("wallet_id") else None
+    
+    query = select(Wallet).where(Wallet.user_id == user_id)
+    if wallet_id is not None:
+        query = query.where(Wallet.id == wallet_id)
+    wallet = db.execute(query.order_by(Wallet.id).limit(1).with_for_update()).scalar_one_or_none()
+    if wallet is None:
+        raise ValueError(f"Payment {payment['id']}: no wallet for user {user_id}")
+    
+    wallet.balance += amount
+    transaction = Transaction(
+        user_id=user_id,
+        wallet_id=wallet.id,
+        amount=amount,
+        transaction_type=TransactionType.DEPOSIT,
+        status=TransactionStatus.COMPLETED,
+        description=f"Razorpay payment - Order: {payment.get('order_id') or order.get('id')}",
+        gateway_payment_id=payment["id"]
+    )
+    db.add(transaction)
+    db.flush()  # a duplicate payment id fails here (IntegrityError), before anything is committed
+    record_wallet_change(db, transaction, wallet)
+    
+    if gateway_order is not None:
+        _mark_order_paid(gateway_order, payment, transaction, amount)
+    return transaction
+
+
+def _mark_order_paid(gateway_order: GatewayOrder, payment: dict, transaction: Transaction, amount: float) -> None:
+    """Link the deposit to its order; flag it if something doesn't add up."""
+    if gateway_order.transaction_id is not None:
+        gateway_order.status = "flagged"
+        gateway_order.note = f"Paid again by {payment['id']} (first: {gateway_order.payment_id})"
+        return
+    
+    gateway_order.payment_id = payment["id"]
+    gateway_order.transaction_id = transaction.id
+    gateway_order.paid_at = datetime.utcnow()
+    if abs(amount - gateway_order.amount) > 0.01:
+        gateway_order.status = "flagged"
+        gateway_order.note = f"Amount mismatch: ordered {gateway_order.amount:.2f}, paid {amount:.2f}"
+    else:
+        gateway_order.status = "paid"
+
+
+def _record_event_error(db: Session, event_id: int, error: Exception) -> str:
+    """Count a failed attempt; mark the event failed once attempts run out."""
+    event = db.get(GatewayEvent, event_id)
+    event.attempts += 1
+    event.last_error = f"{type(error).__name__}: {error}"[:500]
+    if event.attempts >= settings.GATEWAY_EVENT_MAX_ATTEMPTS:
+        event.status = "failed"
+    db.commit()
+    return "failed" if event.status == "failed" else "errors"
+
+
+def process_gateway_events_in_background(bind) -> None:
+    """Run the processor right after a webhook is stored (own session)."""
+    db = Session(bind=bind)
+    try:
+        process_gateway_events(db)
+    finally:
+        db.close()
+
+
+def _entity(event: dict, name: str) -> dict:
+    """event["payload"][name]["entity"], or {} if the event has none."""
+    return ((event.get("payload") or {}).get(name) or {}).get("entity") or {}
+
+
+# ============ RECONCILIATION ============
+
+def reconcile_gateway_payments(db: Session, lookback_hours: float = None) -> dict:
+    """
+    Check captured payments at Razorpay against our deposits.
+    
+    WHAT IT DOES:
+    1. Pages through Razorpay's payments for the last `lookback_hours`
+       (GATEWAY_RECONCILE_CONCURRENCY pages fetched at a time)
+    2. Matches them to gateway_orders with a hash join: orders of the
+       window are loaded once into a dict keyed by order id, each
+       payment is one dict lookup (orders older than the window are
+       looked up in one query per page)
+    3. Credits captured payments that have no deposit yet (a lost or
+       failed webhook), one commit each
+    4. Counts payments for orders we don't know, and flags orders paid
+       with the wrong amount or paid twice
+    
+    LEARN:
+    - The window has a fixed end time, so payments arriving while we
+      page don't shift the pages (offset paging stays stable)
+    """
+    lookback_hours = lookback_hours or settings.GATEWAY_RECONCILE_LOOKBACK_HOURS
+    end = datetime.utcnow()
+    start = end - timedelta(hours=lookback_hours)
+    
+    orders = {
+        order.order_id: order
+        for order in db.execute(
+            select(GatewayOrder).where(GatewayOrder.created_at >= start)
+        ).scalars()
+    }
+    
+    result = {"payments": 0, "matched": 0, "credited": 0, "unknown_order": 0, "flagged": 0, "errors": 0}
+    for page in _payment_pages(start, end):
+        captured = [p for p in page if p.get("status") == "captured"]
+        result["payments"] += len(captured)
+        if not captured:
+            continue
+        
+        missing = {p["order_id"] for p in captured if p.get("order_id") and p["order_id"] not in orders}
+        if missing:
+            for order in db.execute(select(GatewayOrder).where(GatewayOrder.order_id.in_(missing))).scalars():
+                orders[order.order_id] = order
+        
+        credited = set(db.execute(
+            select(Transaction.gateway_payment_id)
+            .where(Transaction.gateway_payment_id.in_([p["id"] for p in captured]))
+        ).scalars())
+        
+        for payment in captured:
+            order = orders.get(payment.get("order_id"))
+            if order is None:
+                result["unknown_order"] += 1
+                continue
+            if payment["id"] in credited:
+                result["matched"] += 1
+                continue
+            try:
+                _credit_payment(db, payment, {})
+                flagged = order.status == "flagged"
+                db.commit()
+            except Exception:
+                db.rollback()
+                result["errors"] += 1
+                continue
+            result["credited"] += 1
+            result["flagged"] += int(flagged)
+    
+    return result
+
+
+def _payment_pages(start: datetime, end: datetime) -> Iterator[list[dict]]:
+    """
+    Razorpay payments created in [start, end], page by page, a few pages at a time.
+    
+    Pages are requested in a sliding window that starts at one page and
+    grows by one per full page, up to GATEWAY_RECONCILE_CONCURRENCY. No
+    new page is requested once one comes back short (the end of the
+    window): a run with one page of payments makes one call, and every
+    call counts against Razorpay's rate limit.
+    """
+    client = get_gateway_client()
+    page_size = settings.GATEWAY_RECONCILE_PAGE_SIZE
+    concurrency = max(1, settings.GATEWAY_RECONCILE_CONCURRENCY)
+    window = {"from": _unix(start), "to": _unix(end), "count": page_size}
+    ended = threading.Event()
+    
+    def fetch(skip: int) -> list[dict]:
+        items = client.list_payments({**window, "skip": skip})["items"]
+        if len(items) < page_size:
+            ended.set()
+        return items
+    
+    in_flight: deque = deque()
+    next_skip = 0
+    width = 1
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            while len(in_flight) < width and not ended.is_set():
+                in_flight.append(pool.submit(fetch, next_skip))
+                next_skip += page_size
+            if not in_flight:
+                return
+            page = in_flight.popleft().result()
+            yield page
+            if len(page) < page_size:
+                for future in in_flight:
+                    future.cancel()  # past the end
+                return
+            width = min(width + 1, concurrency)
+
+
+def _unix(moment: datetime) -> int:
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
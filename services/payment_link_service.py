@@ -1,19 +1,33 @@
 """
 Payment link service - create and manage payment links (like PayTM links).
+
+The public link lookup is cached (see get_payment_link_details): links
+are shared widely and scraped, so most lookups never reach the database.
 """
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
-import secrets
-import string
+from typing import Optional
 
+from config import settings
+from core import metrics
+from core.cache import CacheBackend, LRUCache
+from core.ids import MAX_INSERT_ATTEMPTS, add_with_unique_id, new_id
 from models import PaymentLink, Transaction, TransactionType, TransactionStatus, Wallet
 from schemas import AddMoneyRequest
+from services.wallet_events import record_wallet_change
+
+# Cached link details by link_id. {"found": False} marks an unknown id
+# (negative caching), so enumeration traffic doesn't hit the database.
+_link_cache: CacheBackend = LRUCache(maxsize=settings.LINK_CACHE_MAX_ITEMS)
+metrics.register("payment_link_cache", lambda: _link_cache.stats())
 
 
 def generate_link_id() -> str:
-    """Generate a unique payment link ID."""
-    return ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(12))
+    """Generate a unique payment link ID (time-ordered, 24 characters)."""
+    return new_id()
 
 
 def create_payment_link(
@@ -28,32 +42,95 @@ def create_payment_link(
     
     WHAT IT DOES:
     1. Generates unique link ID
-    2. Creates payment link record
+    2. Creates payment link record (a new ID is tried if the
+       unique index reports a duplicate - no SELECT before insert)
     3. Returns link that can be shared
     """
-    link_id = generate_link_id()
-    
-    # Check if link_id already exists (very rare, but check anyway)
-    while db.query(PaymentLink).filter(PaymentLink.link_id == link_id).first():
-        link_id = generate_link_id()
-    
     expires_at = datetime.utcnow() + timedelta(hours=expires_hours) if expires_hours else None
     
     payment_link = PaymentLink(
         user_id=user_id,
-        link_id=link_id,
         amount=amount,
         description=description,
         expires_at=expires_at
     )
     
-    db.add(payment_link)
-    db.commit()
+    add_with_unique_id(db, payment_link, "link_id", generate_link_id)
     db.refresh(payment_link)
     
+    # Forget a "not found" remembered for this id (someone guessed it early)
+    invalidate_link_cache(payment_link.link_id)
+    
     return payment_link
 
 
+def create_payment_links_bulk(
+    db: Session,
+    user_id: int,
+    links: list[dict],
+    chunk_size: int = None
+) -> list[dict]:
+    """
+    Create many payment links in one transaction (invoicing runs).
+    
+    WHAT IT DOES:
+    1. Builds every row in memory, IDs included (no per-link round-trips)
+    2. Inserts them in chunks of LINK_BULK_CHUNK_SIZE rows per statement,
+       getting the new primary keys back with RETURNING
+    3. Commits once: either all links are created or none
+    4. If the unique index reports a duplicate link_id (practically
+       impossible), rolls back and retries the batch with fresh IDs
+    
+    `links` items have amount, description and expires_hours.
+    Returns one dict per link, in the same order.
+    """
+    if len(links) > settings.LINK_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.LINK_BULK_MAX_ITEMS} links per request"
+        )
+    chunk_size = chunk_size or settings.LINK_BULK_CHUNK_SIZE
+    
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "amount": link["amount"],
+            "description": link.get("description"),
+            "is_active": 1,
+            "expires_at": (
+                now + timedelta(hours=link["expires_hours"]) if link.get("expires_hours") else None
+            ),
+            "created_at": now,
+        }
+        for link in links
+    ]
+    
+    for attempt in range(MAX_INSERT_ATTEMPTS):
+        # Fresh dicts each attempt: ids from a rolled-back try must not be reused
+        inserted = [{**row, "link_id": generate_link_id()} for row in rows]
+        try:
+            for start in range(0, len(inserted), chunk_size):
+                chunk = inserted[start:start + chunk_size]
+                new_ids = db.execute(
+                    insert(PaymentLink).returning(PaymentLink.id, sort_by_parameter_order=True),
+                    chunk
+                ).scalars().all()
+                for row, new_id in zip(chunk, new_ids):
+                    row["id"] = new_id
+            db.commit()
+            rows = inserted
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == MAX_INSERT_ATTEMPTS - 1:
+                raise
+    
+    for row in rows:
+        invalidate_link_cache(row["link_id"])
+    return rows
+
+
 def get_payment_link(db: Session, link_id: str) -> PaymentLink:
     """Get payment link by link_id."""
     payment_link = db.query(PaymentLink).filter(PaymentLink.link_id == link_id).first()
@@ -64,19 +141,118 @@ def get_payment_link(db: Session, link_id: str) -> PaymentLink:
             detail="Payment link not found"
         )
     
-    if not payment_link.is_active:
+    _check_link_usable(
+        bool(payment_link.is_active), payment_link.paid_at, payment_link.expires_at, datetime.utcnow()
+    )
+    
+    return payment_link
+
+
+def _check_link_usable(
+    is_active: bool,
+    paid_at: Optional[datetime],
+    expires_at: Optional[datetime],
+    now: datetime
+) -> None:
+    """
+    Raise if a link can't be paid anymore.
+    
+    Inactive links were either paid (paid_at is set) or deactivated
+    by the expired-link sweeper.
+    """
+    if not is_active and paid_at:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Payment link has already been used"
         )
     
-    if payment_link.expires_at and payment_link.expires_at < datetime.utcnow():
+    if not is_active or (expires_at and expires_at < now):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Payment link has expired"
         )
+
+
+# ============ CACHED LOOKUP ============
+
+def set_link_cache_backend(backend: CacheBackend) -> None:
+    """Swap the link cache (e.g. for a shared cache used by all workers)."""
+    global _link_cache
+    _link_cache = backend
+
+
+def invalidate_link_cache(link_id: str) -> None:
+    """Drop a link from the cache (call whenever a link changes)."""
+    _link_cache.delete(link_id)
+
+
+def clear_link_cache() -> None:
+    """Empty the link cache."""
+    _link_cache.clear()
+
+
+def _link_details(payment_link: PaymentLink) -> dict:
+    return {
+        "found": True,
+        "id": payment_link.id,
+        "link_id": payment_link.link_id,
+        "user_id": payment_link.user_id,
+        "amount": payment_link.amount,
+        "description": payment_link.description,
+        "is_active": bool(payment_link.is_active),
+        "expires_at": payment_link.expires_at,
+        "created_at": payment_link.created_at,
+        "paid_at": payment_link.paid_at,
+    }
+
+
+def _link_cache_ttl(expires_at: Optional[datetime], now: datetime) -> float:
+    """
+    How long link details may be cached.
+
+    Never past the link's expiry: an active link must flip to
+    "expired" on time, not up to a TTL later.
+    """
+    ttl = settings.LINK_CACHE_TTL_SECONDS
+    if expires_at and expires_at > now:
+        ttl = min(ttl, (expires_at - now).total_seconds())
+    return ttl
+
+
+def get_payment_link_details(db: Session, link_id: str) -> dict:
+    """
+    Get payment link details for the public endpoints, read-through cached.
     
-    return payment_link
+    WHAT IT DOES:
+    1. Returns cached details if present (no database query)
+    2. Otherwise loads the link; unknown ids are cached as "not found"
+       for LINK_CACHE_NEGATIVE_TTL_SECONDS
+    3. Applies the same checks as get_payment_link (404 / used / expired)
+    
+    Paying a link invalidates its entry in this worker; other workers
+    may show a paid link as active for up to LINK_CACHE_TTL_SECONDS
+    (paying always re-checks the database, so it can't be paid twice).
+    """
+    now = datetime.utcnow()
+    details = _link_cache.get(link_id)
+    if details is None:
+        payment_link = db.query(PaymentLink).filter(PaymentLink.link_id == link_id).first()
+        if payment_link is None:
+            details = {"found": False}
+            _link_cache.set(link_id, details, ttl=settings.LINK_CACHE_NEGATIVE_TTL_SECONDS)
+        else:
+            details = _link_details(payment_link)
+            _link_cache.set(link_id, details, ttl=_link_cache_ttl(details["expires_at"], now))
+    
+    if not details["found"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment link not found"
+        )
+    
+    _check_link_usable(details["is_active"], details["paid_at"], details["expires_at"], now)
+    
+    return details
 
 
 def pay_via_link(
@@ -94,6 +270,7 @@ def pay_via_link(
     3. Transfer money to link creator
     4. Mark link as used
     5. Create transaction
+    6. Queue a webhook if the link creator is a merchant (same commit)
     """
     payment_link = get_payment_link(db, link_id)
     
@@ -155,7 +332,13 @@ def pay_via_link(
     payment_link.transaction_id = transaction.id
     
     db.add(transaction)
+    db.flush()  # assigns the transaction id for the merchant webhook
+    from services.merchant_webhook_service import queue_payment_webhooks
+    queue_payment_webhooks(db, "payment_link", [(transaction, recipient_wallet)])
+    record_wallet_change(db, transaction, payer_wallet, recipient_wallet)
     db.commit()
     db.refresh(transaction)
     
+    invalidate_link_cache(link_id)
+    
     return transaction
@@ -1,11 +1,25 @@
 """
 Payment request service - request money from other users.
+
+The number of pending requests per user (the inbox badge) is kept in
+pending_request_counts. Every status change of a pending request must
+call adjust_pending_counts in the same transaction.
 """
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
+
+from config import settings
+from models import (
+    PaymentRequest, PendingRequestCount, Transaction, TransactionType, TransactionStatus, Wallet
+)
+from services.wallet_events import record_wallet_change
 
-from models import PaymentRequest, Transaction, TransactionType, TransactionStatus, Wallet
+# Page size limits for request lists
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 def create_payment_request(
@@ -48,6 +62,7 @@ def create_payment_request(
     )
     
     db.add(payment_request)
+    adjust_pending_counts(db, {recipient.id: 1})
     db.commit()
     db.refresh(payment_request)
     
@@ -57,22 +72,84 @@ def create_payment_request(
 def get_payment_requests(
     db: Session,
     user_id: int,
-    request_type: str = "received"  # "received" or "sent"
+    request_type: str = "received",  # "received" or "sent"
+    limit: int = DEFAULT_PAGE_SIZE,
+    before_id: Optional[int] = None
 ) -> list[PaymentRequest]:
     """
-    Get payment requests.
-    - received: Requests where user should pay
+    Get one page of payment requests, newest first.
+    - received: Pending requests where user should pay
     - sent: Requests user sent to others
+    
+    PAGINATION (keyset):
+    Pass the id of the last request you got as `before_id` to get the
+    next page. Unlike OFFSET, the database jumps straight to that id in
+    the (recipient_id, status, id) / (requester_id, id) index, so page
+    1000 is as fast as page 1.
     """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    
     if request_type == "received":
-        return db.query(PaymentRequest).filter(
+        query = db.query(PaymentRequest).filter(
             PaymentRequest.recipient_id == user_id,
-            PaymentRequest.status == TransactionStatus.PENDING
-        ).all()
+            PaymentRequest.status == TransactionStatus.PENDING,
+            PaymentRequest.created_at >= request_expiry_cutoff()
+        )
     else:
-        return db.query(PaymentRequest).filter(
+        query = db.query(PaymentRequest).filter(
             PaymentRequest.requester_id == user_id
-        ).all()
+        )
+    
+    if before_id is not None:
+        query = query.filter(PaymentRequest.id < before_id)
+    
+    return query.order_by(PaymentRequest.id.desc()).limit(limit).all()
+
+
+def get_pending_count(db: Session, user_id: int) -> int:
+    """Number of pending requests for the inbox badge (one primary key lookup)."""
+    pending = db.execute(
+        select(PendingRequestCount.pending).where(PendingRequestCount.user_id == user_id)
+    ).scalar()
+    return pending or 0
+
+
+def adjust_pending_counts(db: Session, deltas: dict[int, int]) -> None:
+    """
+    Add `delta` to each user's pending count (negative to subtract).
+    
+    Does NOT commit: call it inside the transaction that changes the
+    requests, so the count and the requests always agree. Uses an
+    atomic upsert, so concurrent requests can't lose an update.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    
+    table = PendingRequestCount.__table__
+    for user_id, delta in deltas.items():
+        statement = insert(table).values(user_id=user_id, pending=max(delta, 0))
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"pending": table.c.pending + delta}
+        )
+        db.execute(statement)
+
+
+def request_expiry_cutoff() -> datetime:
+    """
+    Pending requests created before this are stale.
+    
+    The stale request sweeper cancels them in the background; until it
+    runs, reads treat them as expired too.
+    """
+    return datetime.utcnow() - timedelta(days=settings.PAYMENT_REQUEST_TTL_DAYS)
 
 
 def accept_payment_request(
@@ -90,6 +167,7 @@ def accept_payment_request(
     3. Check balance
     4. Transfer money
     5. Mark request as completed
+    6. Queue a webhook if the requester is a merchant (same commit)
     """
     payment_request = db.query(PaymentRequest).filter(
         PaymentRequest.id == request_id
@@ -113,6 +191,12 @@ def accept_payment_request(
             detail="Payment request already processed"
         )
     
+    if payment_request.created_at and payment_request.created_at < request_expiry_cutoff():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Payment request has expired"
+        )
+    
     # Get payer wallet
     payer_wallet = db.query(Wallet).filter(
         Wallet.id == payer_wallet_id,
@@ -162,9 +246,196 @@ def accept_payment_request(
     payment_request.status = TransactionStatus.COMPLETED
     payment_request.paid_at = datetime.utcnow()
     payment_request.transaction_id = transaction.id
+    adjust_pending_counts(db, {payment_request.recipient_id: -1})
     
     db.add(transaction)
+    db.flush()  # assigns the transaction id for the merchant webhook
+    from services.merchant_webhook_service import queue_payment_webhooks
+    queue_payment_webhooks(db, "payment_request", [(transaction, requester_wallet)])
+    record_wallet_change(db, transaction, payer_wallet, requester_wallet)
     db.commit()
     db.refresh(transaction)
     
     return transaction
+
+
+def accept_payment_requests_batch(
+    db: Session,
+    request_ids: list[int],
+    payer_wallet_id: int,
+    payer_user_id: int
+) -> dict:
+    """
+    Accept and pay many payment requests from one wallet.
+    
+    WHAT IT DOES:
+    1. Locks the payer wallet once (SELECT ... FOR UPDATE on PostgreSQL)
+    2. Loads all requests, then all requester wallets, in one query each
+    3. Skips requests that can't be paid (reported per item, e.g. not
+       yours or already processed)
+    4. Checks the total of the rest against the balance once - if it
+       doesn't cover everything, nothing is paid (400)
+    5. Moves the money and writes every transaction (and any merchant
+       webhooks) in one commit
+    
+    Returns per-item results in the order the ids were given.
+    """
+    request_ids = list(dict.fromkeys(request_ids))  # drop duplicates, keep order
+    if not request_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide at least one request id"
+        )
+    if len(request_ids) > settings.REQUEST_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.REQUEST_BATCH_MAX_ITEMS} requests per batch"
+        )
+    
+    payer_wallet = db.query(Wallet).filter(
+        Wallet.id == payer_wallet_id,
+        Wallet.user_id == payer_user_id
+    ).with_for_update().first()
+    
+    if not payer_wallet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Wallet not found"
+        )
+    
+    requests = {
+        req.id: req for req in db.query(PaymentRequest).filter(
+            PaymentRequest.id.in_(request_ids)
+        ).with_for_update()
+    }
+    
+    # First wallet of each requester (same choice as accept_payment_request)
+    requester_ids = {req.requester_id for req in requests.values() if req.recipient_id == payer_user_id}
+    requester_wallets = {}
+    if requester_ids:
+        for wallet in db.query(Wallet).filter(Wallet.user_id.in_(requester_ids)).order_by(Wallet.id):
+            requester_wallets.setdefault(wallet.user_id, wallet)
+    
+    cutoff = request_expiry_cutoff()
+    results = {}
+    payable = []
+    for request_id in request_ids:
+        detail = _batch_skip_reason(requests.get(request_id), payer_user_id, cutoff, requester_wallets)
+        if detail:
+            results[request_id] = {"request_id": request_id, "accepted": False, "detail": detail}
+        else:
+            payable.append(requests[request_id])
+    
+    total = round(sum(req.amount for req in payable), 2)
+    if payer_wallet.balance < total:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient balance: these requests total {total:.2f}"
+        )
+    
+    now = datetime.utcnow()
+    transactions = []
+    for payment_request in payable:
+        requester_wallet = requester_wallets[payment_request.requester_id]
+        payer_wallet.balance -= payment_request.amount
+        requester_wallet.balance += payment_request.amount
+        transactions.append(Transaction(
+            user_id=payer_user_id,
+            wallet_id=payer_wallet_id,
+            amount=payment_request.amount,
+            transaction_type=TransactionType.PAYMENT,
+            status=TransactionStatus.COMPLETED,
+            description=payment_request.description or "Payment request",
+            recipient_wallet_id=requester_wallet.id
+        ))
+        payment_request.status = TransactionStatus.COMPLETED
+        payment_request.paid_at = now
+    
+    db.add_all(transactions)
+    db.flush()  # assigns transaction ids
+    for payment_request, transaction in zip(payable, transactions):
+        payment_request.transaction_id = transaction.id
+        results[payment_request.id] = {
+            "request_id": payment_request.id,
+            "accepted": True,
+            "transaction_id": transaction.id
+        }
+    adjust_pending_counts(db, {payer_user_id: -len(payable)})
+    from services.merchant_webhook_service import queue_payment_webhooks
+    queue_payment_webhooks(db, "payment_request", [
+        (transaction, requester_wallets[payment_request.requester_id])
+        for payment_request, transaction in zip(payable, transactions)
+    ])
+    for payment_request, transaction in zip(payable, transactions):
+        record_wallet_change(db, transaction, payer_wallet, requester_wallets[payment_request.requester_id])
+    db.commit()
+    
+    return {
+        "accepted": len(payable),
+        "failed": len(request_ids) - len(payable),
+        "total_paid": total,
+        "balance": payer_wallet.balance,
+        "results": [results[request_id] for request_id in request_ids]
+    }
+
+
+def _batch_skip_reason(
+    payment_request: Optional[PaymentRequest],
+    payer_user_id: int,
+    cutoff: datetime,
+    requester_wallets: dict
+) -> Optional[str]:
+    """Why a request can't be paid in a batch (None = it can)."""
+    if not payment_request:
+        return "Payment request not found"
+    if payment_request.recipient_id != payer_user_id:
+        return "You are not authorized to pay this request"
+    if payment_request.status != TransactionStatus.PENDING:
+        return "Payment request already processed"
+    if payment_request.created_at and payment_request.created_at < cutoff:
+        return "Payment request has expired"
+    if payment_request.requester_id not in requester_wallets:
+        return "Requester wallet not found"
+    return None
+
+
+def decline_payment_request(
+    db: Session,
+    request_id: int,
+    user_id: int
+) -> PaymentRequest:
+    """
+    Decline a payment request you received.
+    
+    WHAT IT DOES:
+    1. Checks the request is yours and still pending
+    2. Marks it cancelled and lowers your pending count (one commit)
+    """
+    payment_request = db.query(PaymentRequest).filter(
+        PaymentRequest.id == request_id
+    ).first()
+    
+    if not payment_request:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment request not found"
+        )
+    
+    if payment_request.recipient_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to decline this request"
+        )
+    
+    if payment_request.status != TransactionStatus.PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Payment request already processed"
+        )
+    
+    payment_request.status = TransactionStatus.CANCELLED
+    adjust_pending_counts(db, {user_id: -1})
+    db.commit()
+    db.refresh(payment_request)
+    
+    return payment_request
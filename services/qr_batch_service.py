@@ -0,0 +1,319 @@
+"""
+Bulk QR service - render QR codes for many wallets/payment links at once.
+
+WHAT THIS FILE DOES:
+- Renders QR codes in a pool of worker processes (one per CPU core)
+- Streams the result as a ZIP (one file per QR) or a printable SVG sheet
+- Keeps memory bounded: only a few rendered images are held at a time,
+  no matter how many QR codes are requested
+- Tracks render throughput (QR codes per second, per core)
+
+LEARN:
+- QR rendering is pure CPU work, so threads don't help (the GIL lets
+  only one thread run Python at a time) - separate processes do
+- Results are yielded in request order as soon as they are ready, so the
+  client starts downloading while the rest is still rendering
+"""
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from config import settings
+from core import metrics
+from models import PaymentLink, Wallet
+from services.qr_service import (
+    QR_MEDIA_TYPES, normalize_png_size, payment_link_url, render_qr_timed, wallet_url
+)
+
+# Formats allowed for files inside the ZIP
+ZIP_IMAGE_FORMATS = ("png", "svg")
+
+# Printable sheet layout (SVG user units = millimetres, A4 page = 210 x 297)
+SHEET_PAGE_WIDTH = 210
+SHEET_PAGE_HEIGHT = 297
+SHEET_COLUMNS = 3
+SHEET_ROWS = 4
+SHEET_CELL_WIDTH = SHEET_PAGE_WIDTH / SHEET_COLUMNS
+SHEET_CELL_HEIGHT = SHEET_PAGE_HEIGHT / SHEET_ROWS
+SHEET_QR_SIZE = 55
+SHEET_PER_PAGE = SHEET_COLUMNS * SHEET_ROWS
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"batches": 0, "items": 0, "wall_seconds": 0.0, "render_seconds": 0.0}
+
+
+def batch_stats() -> dict:
+    """Render throughput totals since startup."""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["workers"] = worker_count()
+    stats["items_per_second"] = _rate(stats["items"], stats["wall_seconds"])
+    stats["items_per_second_per_core"] = _rate(stats["items"], stats["render_seconds"])
+    return stats
+
+
+metrics.register("qr_batch", batch_stats)
+
+
+def _rate(items: int, seconds: float) -> float:
+    return round(items / seconds, 1) if seconds else 0.0
+
+
+def worker_count() -> int:
+    """Number of render processes (QR_BATCH_WORKERS, 0 = one per CPU core)."""
+    return settings.QR_BATCH_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> Executor:
+    """
+    Create the process pool on first use.
+
+    "spawn" starts clean interpreters instead of forking the web server
+    (forking a process that runs threads can copy held locks).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=worker_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes (they are recreated on next use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def render_many(
+    items: Iterable[tuple[str, str]],
+    output_format: str = "png",
+    size: Optional[int] = None,
+) -> Iterator[tuple[str, bytes]]:
+    """
+    Render QR codes in worker processes, yielding (name, content) in order.
+
+    WHAT IT DOES:
+    1. Submits renders to the pool, but never more than a small window
+       (QR_BATCH_WINDOW_PER_WORKER per worker) at a time
+    2. Yields each result in the original order as soon as it's ready
+    3. Records throughput for /metrics
+
+    The window is what bounds memory: 10,000 QR codes never means
+    10,000 rendered images held at once.
+    """
+    workers = worker_count()
+    window = workers * settings.QR_BATCH_WINDOW_PER_WORKER
+    pending: deque[tuple[str, Future]] = deque()
+    rendered = 0
+    render_seconds = 0.0
+    started = time.perf_counter()
+
+    def submit(data: str) -> Future:
+        if workers == 1:
+            # No pool needed for a single worker: render inline
+            future = Future()
+            future.set_result(render_qr_timed(data, output_format, size))
+            return future
+        return _get_pool().submit(render_qr_timed, data, output_format, size)
+
+    try:
+        for name, data in items:
+            pending.append((name, submit(data)))
+            if len(pending) < window:
+                continue
+            name, future = pending.popleft()
+            content, seconds = future.result()
+            rendered += 1
+            render_seconds += seconds
+            yield name, content
+
+        while pending:
+            name, future = pending.popleft()
+            content, seconds = future.result()
+            rendered += 1
+            render_seconds += seconds
+            yield name, content
+    finally:
+        for _name, future in pending:
+            future.cancel()
+        with _stats_lock:
+            _stats["batches"] += 1
+            _stats["items"] += rendered
+            _stats["wall_seconds"] += time.perf_counter() - started
+            _stats["render_seconds"] += render_seconds
+
+
+def resolve_batch_items(
+    db: Session,
+    user_id: int,
+    link_ids: list[str],
+    wallet_ids: list[int],
+) -> list[tuple[str, str]]:
+    """
+    Check ownership and build (name, QR data) for every requested id.
+
+    WHAT IT DOES:
+    1. Loads all requested links/wallets in one query each
+    2. Rejects the whole batch if any id is unknown or not the user's
+       (before streaming starts, so the client gets a clean 404)
+    3. Keeps the order the ids were given in
+    """
+    total = len(link_ids) + len(wallet_ids)
+    if total == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide at least one link_id or wallet_id"
+        )
+    if total > settings.QR_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.QR_BATCH_MAX_ITEMS} QR codes per batch"
+        )
+
+    owned_links = set()
+    if link_ids:
+        owned_links = {
+            row.link_id for row in db.query(PaymentLink.link_id).filter(
+                PaymentLink.link_id.in_(link_ids),
+                PaymentLink.user_id == user_id
+            )
+        }
+    owned_wallets = set()
+    if wallet_ids:
+        owned_wallets = {
+            row.id for row in db.query(Wallet.id).filter(
+                Wallet.id.in_(wallet_ids),
+                Wallet.user_id == user_id
+            )
+        }
+
+    missing = [i for i in link_ids if i not in owned_links]
+    missing += [str(i) for i in wallet_ids if i not in owned_wallets]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Not found: {', '.join(missing[:20])}"
+        )
+
+    items = [(f"link-{link_id}", payment_link_url(link_id)) for link_id in link_ids]
+    items += [(f"wallet-{wallet_id}", wallet_url(wallet_id)) for wallet_id in wallet_ids]
+    return items
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only stream that hands out what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(
+    items: list[tuple[str, str]],
+    image_format: str = "png",
+    size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Stream a ZIP with one QR file per item, plus manifest.json.
+
+    PNGs are already compressed, so they are stored as-is (deflating
+    them again costs CPU and saves nothing). The ZIP is written to a
+    non-seekable buffer, so each file is sent as soon as it's rendered.
+    """
+    if image_format not in ZIP_IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    size = normalize_png_size(size) if image_format == "png" else None
+    compression = zipfile.ZIP_STORED if image_format == "png" else zipfile.ZIP_DEFLATED
+
+    buffer = _ChunkBuffer()
+    files = {}
+    started = time.perf_counter()
+    with zipfile.ZipFile(buffer, mode="w", compression=compression) as archive:
+        for name, content in render_many(items, image_format, size):
+            filename = f"{name}.{image_format}"
+            archive.writestr(filename, content)
+            files[name] = filename
+            yield buffer.drain()
+
+        manifest = {
+            "count": len(files),
+            "format": image_format,
+            "media_type": QR_MEDIA_TYPES[image_format],
+            "size": size,
+            "files": files,
+            "render_seconds": round(time.perf_counter() - started, 3),
+            "workers": worker_count(),
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2), zipfile.ZIP_DEFLATED)
+    yield buffer.drain()
+
+
+_SVG_SIZE_ATTRS = re.compile(r'^<svg width="[^"]*" height="[^"]*"')
+
+
+def stream_svg_sheet(items: list[tuple[str, str]]) -> Iterator[bytes]:
+    """
+    Stream a printable SVG sheet: A4 pages stacked top to bottom,
+    SHEET_COLUMNS x SHEET_ROWS QR codes per page, each labelled.
+    """
+    pages = -(-len(items) // SHEET_PER_PAGE)  # ceiling division
+    height = pages * SHEET_PAGE_HEIGHT
+    yield (
+        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+        f'width="{SHEET_PAGE_WIDTH}mm" height="{height}mm" '
+        f'viewBox="0 0 {SHEET_PAGE_WIDTH} {height}">'
+        f'<rect width="100%" height="100%" fill="white"/>'
+    ).encode("utf-8")
+
+    for index, (name, content) in enumerate(render_many(items, "svg")):
+        page, slot = divmod(index, SHEET_PER_PAGE)
+        row, column = divmod(slot, SHEET_COLUMNS)
+        x = column * SHEET_CELL_WIDTH + (SHEET_CELL_WIDTH - SHEET_QR_SIZE) / 2
+        y = page * SHEET_PAGE_HEIGHT + row * SHEET_CELL_HEIGHT + 8
+        # Nest the QR's own <svg> at its place on the sheet
+        qr_svg = _SVG_SIZE_ATTRS.sub(
+            f'<svg x="{x:g}" y="{y:g}" width="{SHEET_QR_SIZE}" height="{SHEET_QR_SIZE}"',
+            content.decode("utf-8"),
+            count=1,
+        )
+        label_x = column * SHEET_CELL_WIDTH + SHEET_CELL_WIDTH / 2
+        label_y = y + SHEET_QR_SIZE + 6
+        yield (
+            f'{qr_svg}<text x="{label_x:g}" y="{label_y:g}" font-size="4" '
+            f'font-family="sans-serif" text-anchor="middle">{escape(name)}</text>'
+        ).encode("utf-8")
+
+    yield b"</svg>"
@@ -1,53 +1,307 @@
 """
 QR code service - generate QR codes for payments.
+
+WHAT THIS FILE DOES:
+- Renders QR codes as PNG (any size), SVG or a raw JSON module matrix
+- Picks error correction based on payload length
+- Caches rendered images, because the same URL always gives the same image
+- Gives each image a content hash used as file name and HTTP ETag
+
+LEARN:
+- Content-addressed cache = the key is a hash of the input, so the same
+  input always maps to the same cached file (no invalidation needed)
+- Memory cache (LRU) is per worker; the optional disk cache (QR_CACHE_DIR)
+  is shared by all workers on the machine and survives restarts
+
+NOTE: qrcode (and PIL behind it) is imported inside the functions, so
+workers that never render a QR code don't pay for loading it at startup.
 """
-import qrcode
+import hashlib
 import io
 import base64
+import json
+import os
+import tempfile
+import time
+from functools import lru_cache
 from typing import Optional
 
+from config import settings
+from core import metrics
+from core.cache import LRUCache
 
-def generate_qr_code(data: str) -> str:
+# Bump this when rendering settings change, so old cached images
+# (and browser ETags) are not reused
+QR_RENDER_VERSION = "2"
+
+# Supported output formats and their HTTP content types
+# - png: raster image (optionally at a requested pixel size)
+# - svg: vector image, ideal for printing (scales to any size)
+# - json: raw module matrix, for drawing the code on the client
+QR_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+}
+
+# Error correction levels, strongest first.
+# H recovers ~30% damage, Q ~25%, M ~15%, L ~7%.
+ERROR_CORRECTION_LEVELS = ("H", "Q", "M", "L")
+
+# Limits for the requested PNG size (pixels)
+MIN_PNG_SIZE = 64
+MAX_PNG_SIZE = 2048
+
+_render_cache = LRUCache(maxsize=settings.QR_CACHE_MAX_ITEMS)
+metrics.register("qr_render_cache", _render_cache.stats)
+
+
+def qr_content_hash(data: str, output_format: str = "png", size: Optional[int] = None) -> str:
     """
-    Generate QR code as base64 string.
-    
+    Fingerprint of a QR output.
+
+    Depends only on the data, format, size and render version, so it can
+    be computed WITHOUT rendering (used for ETags and cache keys).
+    """
+    key = f"{QR_RENDER_VERSION}|{output_format}|{size or ''}|{data}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+@lru_cache(maxsize=1024)
+def choose_qr_settings(data: str) -> tuple[int, str]:
+    """
+    Pick QR version and error correction for a payload.
+
     WHAT IT DOES:
-    1. Creates QR code from data
-    2. Converts to base64 image
-    3. Returns image string that can be displayed
+    1. Tries error correction levels from strongest (H) to weakest (L)
+    2. Keeps the strongest one whose QR version (grid size) stays at or
+       below QR_MAX_TUNED_VERSION
+    3. Long payloads fall back to L so the code stays small enough to scan
+
+    EXAMPLE:
+    A 50-character payment URL gets Q (version 5, 37x37 modules):
+    survives scratches on a printed standee, still easy to scan.
+
+    Returns (version, error correction letter).
     """
+    import qrcode
+
+    version = None
+    for level in ERROR_CORRECTION_LEVELS:
+        qr = qrcode.QRCode(error_correction=_error_correction_constant(level))
+        qr.add_data(data)
+        version = qr.best_fit()
+        if version <= settings.QR_MAX_TUNED_VERSION:
+            return version, level
+    return version, "L"
+
+
+def _error_correction_constant(level: str) -> int:
+    from qrcode import constants
+    return getattr(constants, f"ERROR_CORRECT_{level}")
+
+
+def _make_qr(data: str, box_size: int = 10, border: int = 4):
+    import qrcode
+
+    version, level = choose_qr_settings(data)
     qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
+        version=version,
+        error_correction=_error_correction_constant(level),
+        box_size=box_size,
+        border=border,
     )
     qr.add_data(data)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64
+    qr.make(fit=False)
+    return qr
+
+
+def _render_png(data: str, size: Optional[int] = None) -> bytes:
+    """
+    Render a 1-bit PNG.
+
+    Without `size` each module is 10px. With `size` the largest whole
+    number of pixels per module that fits is used, then the image is
+    centered on a white square of exactly size x size (never smaller
+    than one pixel per module).
+    """
+    from PIL import Image
+
+    matrix = _make_qr(data).get_matrix()  # includes the quiet-zone border
+    modules = len(matrix)
+    box = max(size // modules, 1) if size else 10
+
+    # 1-bit image: 0 = black module, 1 = white
+    img = Image.new("1", (modules, modules), 1)
+    img.putdata([0 if cell else 1 for row in matrix for cell in row])
+    img = img.resize((modules * box, modules * box), Image.NEAREST)
+
+    if size and size > img.width:
+        canvas = Image.new("1", (size, size), 1)
+        offset = (size - img.width) // 2
+        canvas.paste(img, (offset, offset))
+        img = canvas
+
     buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    
+    img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _render_svg(data: str, size: Optional[int] = None) -> bytes:
+    from qrcode.image.svg import SvgPathImage
+
+    img = _make_qr(data).make_image(image_factory=SvgPathImage)
+    return img.to_string(encoding="utf-8")
+
+
+def _render_matrix(data: str, size: Optional[int] = None) -> bytes:
+    """
+    Raw module matrix as JSON, for client-side rendering.
+
+    Each row is a string of "1" (dark) and "0" (light) - much smaller
+    than an image, and the client draws it at whatever size it needs.
+    """
+    qr = _make_qr(data, border=0)
+    _version, level = choose_qr_settings(data)
+    rows = ["".join("1" if cell else "0" for cell in row) for row in qr.get_matrix()]
+    document = {
+        "version": qr.version,
+        "error_correction": level,
+        "size": len(rows),
+        "quiet_zone": 4,
+        "modules": rows,
+    }
+    return json.dumps(document, separators=(",", ":")).encode("utf-8")
+
+
+_RENDERERS = {
+    "png": _render_png,
+    "svg": _render_svg,
+    "json": _render_matrix,
+}
+
+
+def _disk_path(content_hash: str, output_format: str) -> Optional[str]:
+    if not settings.QR_CACHE_DIR:
+        return None
+    # Two-level directories keep folder sizes small: ab/abcdef....png
+    return os.path.join(settings.QR_CACHE_DIR, content_hash[:2], f"{content_hash}.{output_format}")
+
+
+def _read_disk(path: Optional[str]) -> Optional[bytes]:
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_disk(path: Optional[str], content: bytes) -> None:
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first, then rename: other workers never
+        # see a half-written image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ QR disk cache write failed: {e}")
+
+
+def normalize_png_size(size: Optional[int]) -> Optional[int]:
+    """Clamp a requested PNG size to MIN_PNG_SIZE..MAX_PNG_SIZE."""
+    if size is None:
+        return None
+    return min(max(size, MIN_PNG_SIZE), MAX_PNG_SIZE)
+
+
+def render_qr(data: str, output_format: str = "png", size: Optional[int] = None) -> bytes:
+    """
+    Get QR output bytes, rendering only on a cache miss.
+
+    WHAT IT DOES:
+    1. Looks in the memory cache (fastest)
+    2. Looks in the disk cache (if QR_CACHE_DIR is set)
+    3. Renders and stores the result in both caches
+
+    `size` (pixels) only applies to PNG; vector and matrix output
+    don't depend on it.
+    """
+    if output_format not in _RENDERERS:
+        raise ValueError(f"Unsupported QR format: {output_format}")
+    size = normalize_png_size(size) if output_format == "png" else None
+
+    content_hash = qr_content_hash(data, output_format, size)
+    content = _render_cache.get(content_hash)
+    if content is not None:
+        return content
+
+    path = _disk_path(content_hash, output_format)
+    content = _read_disk(path)
+    if content is None:
+        content = _RENDERERS[output_format](data, size)
+        _write_disk(path, content)
+
+    _render_cache.set(content_hash, content)
+    return content
+
+
+def render_qr_timed(data: str, output_format: str = "png", size: Optional[int] = None) -> tuple[bytes, float]:
+    """
+    render_qr plus how long it took (seconds).
+
+    Lives here (not in the bulk QR service) because it runs inside worker
+    processes, which then only need to import this small module.
+    """
+    started = time.perf_counter()
+    content = render_qr(data, output_format, size)
+    return content, time.perf_counter() - started
+
+
+def clear_qr_cache() -> None:
+    """Empty the in-memory render cache (disk files are left alone)."""
+    _render_cache.clear()
+
+
+def generate_qr_code(data: str) -> str:
+    """
+    Generate QR code as base64 string.
+
+    WHAT IT DOES:
+    1. Creates QR code from data (cached)
+    2. Converts to base64 image
+    3. Returns image string that can be displayed
+    """
+    img_str = base64.b64encode(render_qr(data, "png")).decode()
     return f"data:image/png;base64,{img_str}"
 
 
+def payment_link_url(link_id: str, base_url: str = "http://127.0.0.1:8000") -> str:
+    """URL encoded in a payment link QR code."""
+    return f"{base_url}/api/v1/payments/link/{link_id}"
+
+
+def wallet_url(wallet_id: int, base_url: str = "http://127.0.0.1:8000") -> str:
+    """URL encoded in a wallet QR code."""
+    return f"{base_url}/api/v1/wallets/{wallet_id}/receive"
+
+
 def generate_payment_qr(link_id: str, base_url: str = "http://127.0.0.1:8000") -> str:
     """
     Generate QR code for payment link.
-    
+
     The QR code contains the payment link URL.
     """
-    payment_url = f"{base_url}/api/v1/payments/link/{link_id}"
-    return generate_qr_code(payment_url)
+    return generate_qr_code(payment_link_url(link_id, base_url))
 
 
 def generate_wallet_qr(wallet_id: int, base_url: str = "http://127.0.0.1:8000") -> str:
     """
     Generate QR code for wallet (for receiving money).
     """
-    wallet_url = f"{base_url}/api/v1/wallets/{wallet_id}/receive"
-    return generate_qr_code(wallet_url)
+    return generate_qr_code(wallet_url(wallet_id, base_url))
@@ -12,12 +12,15 @@ LEARN:
 - Cron jobs would process these in production
 """
 
+from sqlalchemy import Boolean, select, type_coerce
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
 
+from core.responses import response_columns
 from models import RecurringPayment, Wallet, Transaction, TransactionType, TransactionStatus
-from schemas import RecurringPaymentCreate
+from schemas import RecurringPaymentCreate, RecurringPaymentResponse
 
 
 def calculate_next_payment_date(frequency: str, current_date: datetime = None) -> datetime:
@@ -101,14 +104,18 @@ def get_user_recurring_payments(
     db: Session,
     user_id: int,
     active_only: bool = True
-) -> list[RecurringPayment]:
-    """Get all recurring payments for a user."""
-    query = db.query(RecurringPayment).filter(RecurringPayment.user_id == user_id)
+) -> list[RowMapping]:
+    """Get all recurring payments for a user (rows with the fields of RecurringPaymentResponse)."""
+    columns = response_columns(
+        RecurringPayment, RecurringPaymentResponse,
+        is_active=type_coerce(RecurringPayment.is_active, Boolean),  # stored as 0/1
+    )
+    query = select(*columns).where(RecurringPayment.user_id == user_id)
     
     if active_only:
-        query = query.filter(RecurringPayment.is_active == 1)
+        query = query.where(RecurringPayment.is_active == 1)
     
-    return query.all()
+    return db.execute(query).mappings().all()
 
 
 def process_recurring_payment(
@@ -1,10 +1,14 @@
 """
 Transaction service - handles transaction history.
 """
+from sqlalchemy import select
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.orm import Session
 from typing import List
 
+from core.responses import response_columns
 from models import Transaction, Wallet
+from schemas import TransactionResponse
 
 
 def get_user_transactions(
@@ -12,16 +16,17 @@ def get_user_transactions(
     user_id: int,
     wallet_id: int = None,
     limit: int = 50
-) -> List[Transaction]:
+) -> List[RowMapping]:
     """
     Get transaction history for a user.
     
     WHAT IT DOES:
     1. Get all transactions for a user
     2. Optionally filter by wallet
-    3. Return recent transactions
+    3. Return recent transactions, as rows with the fields of
+       TransactionResponse (no ORM objects: see core/responses.py)
     """
-    query = db.query(Transaction).filter(Transaction.user_id == user_id)
+    query = select(*response_columns(Transaction, TransactionResponse)).where(Transaction.user_id == user_id)
     
     # Filter by wallet if provided
     if wallet_id:
@@ -34,12 +39,10 @@ def get_user_transactions(
         if not wallet:
             return []
         
-        query = query.filter(Transaction.wallet_id == wallet_id)
+        query = query.where(Transaction.wallet_id == wallet_id)
     
     # Get recent transactions, ordered by newest first
-    transactions = query.order_by(Transaction.created_at.desc()).limit(limit).all()
-    
-    return transactions
+    return db.execute(query.order_by(Transaction.created_at.desc()).limit(limit)).mappings().all()
 
 
 def get_transaction_by_id(
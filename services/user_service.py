@@ -1,64 +1,92 @@
 """
 User service - handles user registration and authentication.
+
+Registration and login are async: the database work runs in the thread
+pool, the bcrypt work in the hashing processes (core/hashing.py), and
+no database connection is held while a hash runs.
 """
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 
 from models import User
 from schemas import UserCreate
-from core.security import get_password_hash, verify_password, create_access_token
+from core.hashing import hash_secret, rehash_if_needed, verify_secret
+
+
+def _email_taken(db: Session, email: str) -> bool:
+    try:
+        return db.query(User.id).filter(User.email == email).first() is not None
+    finally:
+        db.close()
+
+
+def _insert_user(db: Session, user: UserCreate, hashed_password: str) -> User:
+    db_user = User(
+        email=user.email,
+        hashed_password=hashed_password,
+        full_name=user.full_name
+    )
+    
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    
+    return db_user
+
 
+def _find_user(db: Session, email: str):
+    try:
+        return db.query(User).filter(User.email == email).first()
+    finally:
+        db.close()  # the user stays readable; the connection goes back to the pool
 
-def create_user(db: Session, user: UserCreate) -> User:
+
+def _save_password_hash(db: Session, user_id: int, hashed_password: str) -> None:
+    db.query(User).filter(User.id == user_id).update({User.hashed_password: hashed_password})
+    db.commit()
+
+
+async def create_user(db: Session, user: UserCreate) -> User:
     """
     Create a new user account.
     
     WHAT IT DOES:
     1. Check if email already exists
-    2. Hash the password (never store plain passwords!)
+    2. Hash the password (never store plain passwords!) in a hashing process
     3. Create user in database
     4. Return the new user
     """
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    if await run_in_threadpool(_email_taken, db, user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Hash the password before storing
-    hashed_password = get_password_hash(user.password)
-    
-    # Create new user
-    db_user = User(
-        email=user.email,
-        hashed_password=hashed_password,
-        full_name=user.full_name
-    )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_password = await hash_secret(user.password)
     
-    return db_user
+    return await run_in_threadpool(_insert_user, db, user, hashed_password)
 
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: Session, email: str, password: str):
     """
     Authenticate user (login).
     
     WHAT IT DOES:
     1. Find user by email
-    2. Verify password
-    3. Return user if correct, None if wrong
+    2. Verify password (in a hashing process)
+    3. If the hash was made with another BCRYPT_ROUNDS, store a new one
+       (only when the hashing processes aren't busy)
+    4. Return user if correct, None if wrong
     """
-    user = db.query(User).filter(User.email == email).first()
+    user = await run_in_threadpool(_find_user, db, email)
     
     if not user:
         return None
     
-    if not verify_password(password, user.hashed_password):
+    if not await verify_secret(password, user.hashed_password):
         return None
     
     if not user.is_active:
@@ -67,6 +95,10 @@ def authenticate_user(db: Session, email: str, password: str):
             detail="Inactive user"
         )
     
+    new_hash = await rehash_if_needed(password, user.hashed_password)
+    if new_hash is not None:
+        await run_in_threadpool(_save_password_hash, db, user.id, new_hash)
+    
     return user
 
 
@@ -0,0 +1,246 @@
+"""
+Wallet balance cache - the wallet reads without a database query.
+
+WHAT THIS FILE DOES:
+- Keeps each user's wallets (id, balance, currency, ...) in memory for
+  GET /wallets/, /wallets/{id} and /wallets/{id}/balance
+- Write-through: every balance change bumps wallets.version (the
+  mapper's version column) and, once its session commits, the new balances
+  are written into the cache - a read after a write in this worker
+  never sees the old balance
+- A read that went to the database while a write for the same user
+  committed doesn't store what it read (it may be older than the write)
+- Optional: other workers drop their copy through PostgreSQL
+  LISTEN/NOTIFY (BALANCE_CACHE_NOTIFY_CHANNEL); without it they may
+  serve a balance up to BALANCE_CACHE_TTL_SECONDS old
+
+LEARN:
+- Write-through = update the cache together with the database, instead
+  of deleting the entry and making the next read a miss
+- The version orders writes: when two commits race, the cache keeps the
+  balance with the higher version, not whichever arrived last
+- Balance checks before moving money still read the database
+  (get_wallet); only what is shown to the user comes from here
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from config import settings
+from core import metrics
+from core.cache import LRUCache
+from models import Wallet
+
+# Tells this process's notifications apart from other workers'
+_PROCESS = os.urandom(6).hex()
+
+
+# The columns of wallet_data(), to load a user's wallets as plain rows
+WALLET_COLUMNS = (Wallet.id, Wallet.user_id, Wallet.balance, Wallet.currency, Wallet.created_at, Wallet.version)
+
+
+def wallet_data(wallet: Wallet) -> dict:
+    """What the cache keeps for a wallet (the fields of WalletResponse, plus version)."""
+    return {
+        "id": wallet.id,
+        "user_id": wallet.user_id,
+        "balance": wallet.balance,
+        "currency": wallet.currency,
+        "created_at": wallet.created_at,
+        "version": wallet.version,
+    }
+
+
+def _merge(cached: list[dict], changed: dict[int, dict]) -> Optional[list[dict]]:
+    """Cached wallets with the newer of each changed one (None = unknown wallet, reload)."""
+    known = {wallet["id"] for wallet in cached}
+    if any(wallet_id not in known for wallet_id in changed):
+        return None
+    merged = []
+    for wallet in cached:
+        new = changed.get(wallet["id"])
+        merged.append(new if new is not None and new["version"] > wallet["version"] else wallet)
+    return merged
+
+
+class BalanceCache:
+    """Each user's wallets by user id, written through on commit."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = LRUCache(maxsize=maxsize, default_ttl=ttl)
+        self._lock = threading.Lock()
+        self._seq = 0  # counts writes
+        self._written: OrderedDict = OrderedDict()  # user id -> _seq of its last write, oldest first
+        self._forgotten = 0  # newest _seq dropped from _written
+        self._stats = {"write_throughs": 0, "invalidations": 0, "stale_fills_skipped": 0}
+
+    def read(self, user_id: int, load: Callable[[], list[dict]]) -> list[dict]:
+        """The user's wallets from the cache, or load() them and cache them."""
+        key = str(user_id)
+        wallets = self.entries.get(key)
+        if wallets is not None:
+            return wallets
+        with self._lock:
+            seen = self._seq
+        wallets = load()
+        with self._lock:
+            if self._written.get(user_id, self._forgotten) > seen:
+                self._stats["stale_fills_skipped"] += 1
+            else:
+                self.entries.set(key, wallets)
+        return wallets
+
+    def write(self, wallets: Iterable[dict]) -> None:
+        """Write committed balances through (wallet_data() dicts)."""
+        by_user: dict[int, dict[int, dict]] = {}
+        count = 0
+        for wallet in wallets:
+            changed = by_user.setdefault(wallet["user_id"], {})
+            previous = changed.get(wallet["id"])
+            if previous is None or wallet["version"] > previous["version"]:
+                changed[wallet["id"]] = wallet
+            count += 1
+        with self._lock:
+            self._mark(by_user)
+            for user_id, changed in by_user.items():
+                self.entries.update(str(user_id), lambda cached: _merge(cached, changed))
+            self._stats["write_throughs"] += count
+
+    def invalidate(self, user_id: int) -> None:
+        """Forget a user's wallets (a wallet was added, or another worker wrote)."""
+        with self._lock:
+            self._mark([user_id])
+            self.entries.delete(str(user_id))
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Forget everything (and refuse fills that were loaded before)."""
+        with self._lock:
+            self._seq += 1
+            self._forgotten = self._seq
+            self._written.clear()
+            self.entries.clear()
+
+    def _mark(self, user_ids: Iterable[int]) -> None:
+        """Record a write for these users (call with the lock held)."""
+        self._seq += 1
+        for user_id in user_ids:
+            self._written[user_id] = self._seq
+            self._written.move_to_end(user_id)
+        while len(self._written) > self.entries.maxsize:
+            self._forgotten = self._written.popitem(last=False)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.entries.stats(), **self._stats}
+
+
+balance_cache = BalanceCache(settings.BALANCE_CACHE_MAX_ITEMS, settings.BALANCE_CACHE_TTL_SECONDS)
+metrics.register("balance_cache", balance_cache.stats)
+
+
+def notify_other_workers(db: Session, user_ids: Iterable[int]) -> None:
+    """
+    Tell the other workers to drop these users' wallets.
+
+    Runs pg_notify inside db's transaction: PostgreSQL delivers it when
+    (and only if) the transaction commits. Does nothing unless
+    BALANCE_CACHE_NOTIFY_CHANNEL is set and the database is PostgreSQL.
+    """
+    channel = settings.BALANCE_CACHE_NOTIFY_CHANNEL
+    if not channel or db.get_bind().dialect.name != "postgresql":
+        return
+    payload = f"{_PROCESS}:{','.join(str(user_id) for user_id in sorted(set(user_ids)))}"
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+def handle_notification(payload: str) -> None:
+    """Apply a notification from notify_other_workers (our own are skipped)."""
+    process, _, user_ids = payload.partition(":")
+    if process == _PROCESS:
+        return
+    for user_id in user_ids.split(","):
+        if user_id:
+            balance_cache.invalidate(int(user_id))
+
+
+class InvalidationListener:
+    """
+    Background thread that LISTENs on BALANCE_CACHE_NOTIFY_CHANNEL.
+
+    Uses its own connection (not one of the pool's). Notifications sent
+    while it is disconnected are lost, so it clears the cache every time
+    it (re)connects.
+    """
+
+    def __init__(self, engine: Engine, channel: str):
+        self.engine = engine
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="balance-cache-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _connect(self):
+        import psycopg2
+
+        url = self.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conn = psycopg2.connect(url)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _run(self) -> None:
+        import select
+
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                balance_cache.clear()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            handle_notification(conn.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"⚠️ Balance cache listener: {e}")
+                self._stop.wait(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_listener: Optional[InvalidationListener] = None
+
+
+def start_invalidation_listener(engine: Engine) -> bool:
+    """Start listening for other workers' writes (if configured). True if started."""
+    global _listener
+    if not settings.BALANCE_CACHE_NOTIFY_CHANNEL or engine.dialect.name != "postgresql":
+        return False
+    if _listener is None:
+        _listener = InvalidationListener(engine, settings.BALANCE_CACHE_NOTIFY_CHANNEL)
+        _listener.start()
+    return True
+
+
+def stop_invalidation_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
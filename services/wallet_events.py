@@ -0,0 +1,96 @@
+"""
+Wallet events - live balance and transaction updates for the event stream.
+
+WHAT THIS FILE DOES:
+- record_wallet_change(): called by the services that move money, next
+  to the balance change and before they commit
+- When the session commits, writes the new balances through the balance
+  cache (services/wallet_cache.py) and publishes a "balance" event per
+  changed wallet and a "transaction" event to the owners of the wallets,
+  through the event hub (core/event_hub.py) to GET /api/v1/events/stream
+- When the session rolls back, the recorded changes are dropped
+- format_event(): one server-sent event, ready to write to the stream
+
+LEARN:
+- Publishing from SQLAlchemy's after_commit hook means a client never
+  sees a balance that was rolled back, and every service that moves
+  money only has to record the change - not know about streams
+- The dashboard used to poll GET /wallets/{id}/balance and
+  /transactions/; now it gets each change pushed once
+- The balances are read in before_commit (the objects are expired after
+  the commit) but only used in after_commit
+- wallets.version is the mapper's version column: the flush bumps it
+  with "WHERE version = <the version we read>", so of two writes that
+  read the same wallet only the first commits - the cache never has to
+  choose between two balances with the same version
+"""
+import json
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.event_hub import hub
+from models import Transaction, Wallet
+from services.wallet_cache import balance_cache, notify_other_workers, wallet_data
+
+_RECORDED = "wallet_events.recorded"  # session.info key: [(transaction, wallets), ...]
+_READY = "wallet_events.ready"  # session.info key: [(user_id, message), ...]
+_BALANCES = "wallet_events.balances"  # session.info key: [wallet_data(), ...]
+
+
+def format_event(name: str, data: dict) -> str:
+    """One server-sent event: "event: <name>" and "data: <json>"."""
+    return f"event: {name}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+def balance_data(wallet: Wallet) -> dict:
+    return {"wallet_id": wallet.id, "balance": wallet.balance, "currency": wallet.currency}
+
+
+def record_wallet_change(db: Session, transaction: Transaction, *wallets: Wallet) -> None:
+    """Publish and cache the wallets' new balances (and versions) once `db` commits."""
+    db.info.setdefault(_RECORDED, []).append((transaction, wallets))
+
+
+@event.listens_for(Session, "before_commit")
+def _prepare(session: Session) -> None:
+    """Turn recorded changes into messages while the objects can still be read."""
+    recorded = session.info.pop(_RECORDED, None)
+    if not recorded:
+        return
+    session.flush()  # transaction ids and created_at, wallet versions
+    ready = session.info.setdefault(_READY, [])
+    balances = session.info.setdefault(_BALANCES, [])
+    for transaction, wallets in recorded:
+        owners = []
+        for wallet in wallets:
+            balances.append(wallet_data(wallet))
+            ready.append((wallet.user_id, format_event("balance", balance_data(wallet))))
+            if wallet.user_id not in owners:
+                owners.append(wallet.user_id)
+        message = format_event("transaction", {
+            "id": transaction.id,
+            "wallet_id": transaction.wallet_id,
+            "recipient_wallet_id": transaction.recipient_wallet_id,
+            "amount": transaction.amount,
+            "transaction_type": transaction.transaction_type,
+            "status": transaction.status,
+            "description": transaction.description,
+            "created_at": transaction.created_at,
+        })
+        ready.extend((user_id, message) for user_id in owners)
+    notify_other_workers(session, {wallet["user_id"] for wallet in balances})
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session) -> None:
+    balance_cache.write(session.info.pop(_BALANCES, ()))
+    for user_id, message in session.info.pop(_READY, ()):
+        hub.publish(user_id, message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_RECORDED, None)
+    session.info.pop(_READY, None)
+    session.info.pop(_BALANCES, None)
@@ -9,16 +9,132 @@ WHAT THIS FILE DOES:
 LEARN:
 - PIN adds extra security layer
 - Like ATM PIN - required for transactions
-- PIN is hashed (encrypted) before storing
+- PIN is hashed (encrypted) before storing, with bcrypt in the hashing
+  processes (core/hashing.py) - so these functions are async
+- A 4-digit PIN has only 10,000 values: guesses are limited per wallet
+  and client (PIN_ATTEMPTS_PER_WINDOW), and wrong PINs in a row lock the
+  PIN for longer and longer (PIN_LOCKOUT_*). Both are checked before
+  bcrypt runs, so guessing can't burn our CPU either
+- A PIN verified from a client is accepted again from that client for
+  PIN_SUCCESS_TTL_SECONDS without bcrypt (a few PIN-protected actions in
+  a row cost one hash)
 """
+import hashlib
+import hmac
+import threading
+import time
+
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
-import bcrypt
+from fastapi.concurrency import run_in_threadpool
 
+from config import settings
+from core import metrics
+from core.cache import CacheBackend, LRUCache
+from core.hashing import hash_secret, rehash_if_needed, verify_secret
+from core.rate_limit import RateLimiter, get_rate_limit_backend
 from models import Wallet
 
+# PIN checks per (wallet, client) - taken before bcrypt runs
+_attempts = RateLimiter("wallet_pin", settings.PIN_ATTEMPTS_PER_WINDOW, settings.PIN_ATTEMPT_WINDOW_SECONDS)
+
+# wallet id -> {"failures": wrong PINs in a row, "lockouts": count, "locked_until": time.time()}
+_failures: CacheBackend = LRUCache(maxsize=settings.PIN_TRACKING_MAX_ITEMS,
+                                   default_ttl=settings.PIN_LOCKOUT_MAX_SECONDS)
+
+# "wallet id:client" -> digest of the PIN last verified from there
+_verified: CacheBackend = LRUCache(maxsize=settings.PIN_TRACKING_MAX_ITEMS,
+                                   default_ttl=settings.PIN_SUCCESS_TTL_SECONDS)
+
+_stats_lock = threading.Lock()
+_stats = {"checked": 0, "wrong": 0, "session_hits": 0, "throttled": 0, "locked_out": 0, "lockouts": 0}
+
+
+def set_pin_state_backends(failures: CacheBackend, verified: CacheBackend) -> None:
+    """Keep lockouts and verified PINs in other caches (e.g. shared ones)."""
+    global _failures, _verified
+    _failures, _verified = failures, verified
+
+
+def clear_pin_state() -> None:
+    """Forget all lockouts, verified PINs and attempt counts (tests)."""
+    _failures.clear()
+    _verified.clear()
+    get_rate_limit_backend().clear()
+
+
+def pin_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+metrics.register("wallet_pin", pin_stats)
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _too_many(wait: float, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, int(wait + 0.999)))},
+    )
 
-def set_wallet_pin(
+
+def _pin_digest(wallet_id: int, pin: str, pin_hash: str) -> str:
+    """Keyed digest of a verified PIN; a new PIN (new hash) never matches an old one."""
+    message = f"{wallet_id}:{pin}:{pin_hash}".encode("utf-8")
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def _check_lockout(wallet_id: int) -> None:
+    state = _failures.get(str(wallet_id))
+    if state is None:
+        return
+    wait = state["locked_until"] - time.time()
+    if wait > 0:
+        _count("locked_out")
+        raise _too_many(wait, "Wallet PIN locked after too many wrong attempts, try again later")
+
+
+def _record_failure(wallet_id: int) -> None:
+    """Count a wrong PIN; enough in a row start a lockout, twice as long as the last."""
+    key = str(wallet_id)
+    state = dict(_failures.get(key) or {"failures": 0, "lockouts": 0, "locked_until": 0.0})
+    state["failures"] += 1
+    if state["failures"] >= settings.PIN_LOCKOUT_AFTER_FAILURES:
+        seconds = min(settings.PIN_LOCKOUT_SECONDS * 2 ** min(state["lockouts"], 30), settings.PIN_LOCKOUT_MAX_SECONDS)
+        state.update(failures=0, lockouts=state["lockouts"] + 1, locked_until=time.time() + seconds)
+        _count("lockouts")
+    _failures.set(key, state)
+
+
+def _pin_hash(db: Session, wallet_id: int, user_id: int):
+    """The wallet's PIN hash (404 if not the user's); frees the connection."""
+    from services.wallet_service import get_wallet
+    
+    try:
+        return get_wallet(db, wallet_id, user_id).wallet_pin
+    finally:
+        db.close()
+
+
+def _save_pin_hash(db: Session, wallet_id: int, user_id: int, pin_hash: str) -> Wallet:
+    from services.wallet_service import get_wallet
+    
+    wallet = get_wallet(db, wallet_id, user_id)
+    wallet.wallet_pin = pin_hash
+    
+    db.commit()
+    db.refresh(wallet)
+    
+    return wallet
+
+
+async def set_wallet_pin(
     db: Session,
     wallet_id: int,
     user_id: int,
@@ -29,7 +145,7 @@ def set_wallet_pin(
     
     WHAT IT DOES:
     1. Validates PIN (must be 4-6 digits)
-    2. Hashes PIN (encrypts it)
+    2. Hashes PIN (encrypts it) in a hashing process
     3. Saves to database
     4. Returns wallet
     
@@ -38,9 +154,7 @@ def set_wallet_pin(
     - Never store plain PIN!
     - Like password hashing
     """
-    from services.wallet_service import get_wallet
-    
-    wallet = get_wallet(db, wallet_id, user_id)
+    await run_in_threadpool(_pin_hash, db, wallet_id, user_id)  # 404 if not the user's wallet
     
     # Validate PIN
     if not pin.isdigit():
@@ -56,55 +170,82 @@ def set_wallet_pin(
         )
     
     # Hash PIN (encrypt it)
-    pin_hash = bcrypt.hashpw(pin.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    pin_hash = await hash_secret(pin)
     
     # Save to wallet
-    wallet.wallet_pin = pin_hash
-    
-    db.commit()
-    db.refresh(wallet)
-    
-    return wallet
+    return await run_in_threadpool(_save_pin_hash, db, wallet_id, user_id, pin_hash)
 
 
-def verify_wallet_pin(
+async def verify_wallet_pin(
     db: Session,
     wallet_id: int,
     user_id: int,
-    pin: str
+    pin: str,
+    client: str = ""
 ) -> bool:
     """
     Verify wallet PIN.
     
     WHAT IT DOES:
     1. Gets wallet
-    2. Compares provided PIN with stored hash
-    3. Returns True if correct, False if wrong
+    2. Refuses (429 + Retry-After) while the PIN is locked out
+    3. Accepts the PIN this client verified moments ago without bcrypt
+    4. Refuses (429) if this client used up its attempts on this wallet
+    5. Compares provided PIN with stored hash; a wrong one counts
+       towards a lockout
+    6. Upgrades the hash if BCRYPT_ROUNDS changed (when not busy)
+    7. Returns True if correct, False if wrong
+    
+    `client` identifies the caller (its address); attempts are counted
+    per wallet and client, wrong PINs per wallet.
     
     USAGE:
     Call this before allowing transfers/withdrawals
     """
-    from services.wallet_service import get_wallet
-    
-    wallet = get_wallet(db, wallet_id, user_id)
+    pin_hash = await run_in_threadpool(_pin_hash, db, wallet_id, user_id)
     
     # Check if PIN is set
-    if not wallet.wallet_pin:
+    if not pin_hash:
         # No PIN set, allow transaction (for convenience)
         return True
     
+    _check_lockout(wallet_id)
+    
+    session = f"{wallet_id}:{client}"
+    digest = _pin_digest(wallet_id, pin, pin_hash)
+    verified = _verified.get(session)
+    if verified is not None and hmac.compare_digest(verified, digest):
+        _count("session_hits")
+        return True
+    
+    wait = _attempts.hit(session)
+    if wait:
+        _count("throttled")
+        raise _too_many(wait, "Too many PIN attempts, try again later")
+    
     # Verify PIN
-    try:
-        return bcrypt.checkpw(pin.encode('utf-8'), wallet.wallet_pin.encode('utf-8'))
-    except Exception:
+    _count("checked")
+    if not await verify_secret(pin, pin_hash):
+        _count("wrong")
+        _record_failure(wallet_id)
         return False
+    
+    _failures.delete(str(wallet_id))
+    _attempts.reset(session)
+    _verified.set(session, digest)
+    
+    new_hash = await rehash_if_needed(pin, pin_hash)
+    if new_hash is not None:
+        await run_in_threadpool(_save_pin_hash, db, wallet_id, user_id, new_hash)
+    return True
 
 
-def require_wallet_pin(
+async def require_wallet_pin(
     db: Session,
     wallet_id: int,
     user_id: int,
-    pin: str
+    pin: str,
+    client: str = ""
 ) -> None:
     """
     Require wallet PIN for transaction.
@@ -116,7 +257,7 @@ def require_wallet_pin(
     USAGE:
     Call this in transfer/withdrawal functions
     """
-    if not verify_wallet_pin(db, wallet_id, user_id, pin):
+    if not await verify_wallet_pin(db, wallet_id, user_id, pin, client):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid wallet PIN"
@@ -1,11 +1,17 @@
 """
 Wallet service - handles wallet operations.
+
+Wallet reads for display (list, details, balance) come from the balance
+cache (services/wallet_cache.py); get_wallet() always reads the database.
 """
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from models import Wallet, Transaction, TransactionType, TransactionStatus
 from schemas import AddMoneyRequest, TransferRequest
+from services.wallet_cache import WALLET_COLUMNS, balance_cache
+from services.wallet_events import record_wallet_change
 
 
 def create_wallet(db: Session, user_id: int, currency: str = "USD") -> Wallet:
@@ -15,7 +21,8 @@ def create_wallet(db: Session, user_id: int, currency: str = "USD") -> Wallet:
     WHAT IT DOES:
     1. Create a wallet with balance 0
     2. Link it to the user
-    3. Return the wallet
+    3. Drop the user's cached wallet list
+    4. Return the wallet
     """
     wallet = Wallet(
         user_id=user_id,
@@ -25,6 +32,7 @@ def create_wallet(db: Session, user_id: int, currency: str = "USD") -> Wallet:
     
     db.add(wallet)
     db.commit()
+    balance_cache.invalidate(user_id)
     db.refresh(wallet)
     
     return wallet
@@ -55,6 +63,31 @@ def get_user_wallets(db: Session, user_id: int) -> list[Wallet]:
     return db.query(Wallet).filter(Wallet.user_id == user_id).all()
 
 
+def get_cached_wallets(db: Session, user_id: int) -> list[dict]:
+    """
+    Get all wallets for a user, as dicts, from the balance cache.
+    
+    WHAT IT DOES:
+    1. Returns the cached wallets if present (no database query)
+    2. Otherwise loads them (plain rows, no ORM objects) and caches
+       them (unless a write for this user committed meanwhile)
+    """
+    query = select(*WALLET_COLUMNS).where(Wallet.user_id == user_id)
+    return balance_cache.read(user_id, lambda: [dict(row) for row in db.execute(query).mappings()])
+
+
+def get_cached_wallet(db: Session, wallet_id: int, user_id: int) -> dict:
+    """Get a wallet (only if user owns it) from the balance cache."""
+    for wallet in get_cached_wallets(db, user_id):
+        if wallet["id"] == wallet_id:
+            return wallet
+    
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Wallet not found"
+    )
+
+
 def add_money_to_wallet(
     db: Session,
     wallet_id: int,
@@ -69,7 +102,7 @@ def add_money_to_wallet(
     2. Get the wallet
     3. Increase balance
     4. Create transaction record
-    5. Send email notification
+    5. Queue notification (email / in-app / webhook, per user preferences)
     6. Return transaction
     """
     # Validate transaction (NEW FEATURE!)
@@ -92,25 +125,22 @@ def add_money_to_wallet(
     )
     
     db.add(transaction)
+    record_wallet_change(db, transaction, wallet)
     db.commit()
     db.refresh(transaction)
     
-    # Send email notification (NEW FEATURE!)
+    # Queue notification (sent by the notification dispatcher)
     try:
-        from services.email_service import send_transaction_notification
-        from models import User
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            send_transaction_notification(
-                user_email=user.email,
-                transaction_type="deposit",
-                amount=request.amount,
-                description=request.description or "Deposit",
-                balance=wallet.balance
-            )
+        from services.notification_service import notify
+        notify(db, user_id, "deposit", {
+            "amount": request.amount,
+            "description": request.description or "Deposit",
+            "balance": wallet.balance
+        })
     except Exception as e:
-        # Don't fail transaction if email fails
-        print(f"⚠️ Email notification failed: {str(e)}")
+        # Don't fail transaction if notification fails
+        db.rollback()
+        print(f"⚠️ Notification failed: {str(e)}")
     
     return transaction
 
@@ -130,6 +160,7 @@ def transfer_money(
     3. Check if sender has enough balance
     4. Deduct from sender, add to recipient
     5. Create transaction records
+    6. Queue a webhook if the recipient is a merchant (same commit)
     """
     # Get sender wallet
     sender_wallet = get_wallet(db, sender_wallet_id, user_id)
@@ -172,40 +203,35 @@ def transfer_money(
     )
     
     db.add(transaction)
+    db.flush()  # assigns the transaction id for the merchant webhook
+    from services.merchant_webhook_service import queue_payment_webhooks
+    queue_payment_webhooks(db, "transfer", [(transaction, recipient_wallet)])
+    record_wallet_change(db, transaction, sender_wallet, recipient_wallet)
     db.commit()
     db.refresh(transaction)
     
-    # Send email notifications (NEW FEATURE!)
+    # Queue notifications (sent by the notification dispatcher)
     try:
-        from services.email_service import send_transaction_notification
-        from models import User
+        from services.notification_service import notify
         # Notify sender
-        sender = db.query(User).filter(User.id == user_id).first()
-        if sender:
-            send_transaction_notification(
-                user_email=sender.email,
-                transaction_type="transfer",
-                amount=request.amount,
-                description=request.description or "Transfer",
-                balance=sender_wallet.balance
-            )
+        notify(db, user_id, "transfer", {
+            "amount": request.amount,
+            "description": request.description or "Transfer",
+            "balance": sender_wallet.balance
+        })
         # Notify recipient
-        recipient = db.query(User).filter(User.id == recipient_wallet.user_id).first()
-        if recipient:
-            send_transaction_notification(
-                user_email=recipient.email,
-                transaction_type="deposit",
-                amount=request.amount,
-                description=f"Received: {request.description or 'Transfer'}",
-                balance=recipient_wallet.balance
-            )
+        notify(db, recipient_wallet.user_id, "deposit", {
+            "amount": request.amount,
+            "description": f"Received: {request.description or 'Transfer'}",
+            "balance": recipient_wallet.balance
+        })
     except Exception as e:
-        print(f"⚠️ Email notification failed: {str(e)}")
+        db.rollback()
+        print(f"⚠️ Notification failed: {str(e)}")
     
     return transaction
 
 
 def get_wallet_balance(db: Session, wallet_id: int, user_id: int) -> float:
-    """Get wallet balance."""
-    wallet = get_wallet(db, wallet_id, user_id)
-    return wallet.balance
+    """Get wallet balance (from the balance cache)."""
+    return get_cached_wallet(db, wallet_id, user_id)["balance"]
@@ -16,6 +16,10 @@ if ! python3 -c "import fastapi" 2>/dev/null; then
     echo ""
 fi
 
+echo "🗄️  Preparing database..."
+python3 manage.py migrate
+echo ""
+
 echo "✅ Starting FastAPI server..."
 echo "   Backend will be available at: http://127.0.0.1:8000"
 echo "   API docs at: http://127.0.0.1:8000/docs"
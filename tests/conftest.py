@@ -4,6 +4,19 @@ Pytest configuration and fixtures for RosePay tests.
 import pytest
 import tempfile
 import os
+
+# Background jobs would run against the real database; tests run them directly
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+# Cheap hashes, in a thread: tests check behaviour, not bcrypt's cost
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("HASH_WORKERS", "1")
+# Tests send many requests as one user; TestRateLimits turns limits back on
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# Webhooks are refused while the secret is the placeholder
+os.environ.setdefault("RAZORPAY_WEBHOOK_SECRET", "test-webhook-secret")
+# Webhook receivers in tests run on 127.0.0.1; TestOutboundURLs turns the check back on
+os.environ.setdefault("OUTBOUND_URL_CHECK_ADDRESSES", "false")
+
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -35,6 +48,16 @@ def test_db():
     # Clean up - drop all tables
     Base.metadata.drop_all(bind=engine)
     
+    # Forget cached rows (and PIN attempts) from the dropped database
+    from services.payment_link_service import clear_link_cache
+    from services.analytics_service import clear_sales_cache
+    from services.wallet_cache import balance_cache
+    from services.wallet_pin_service import clear_pin_state
+    clear_link_cache()
+    clear_sales_cache()
+    balance_cache.clear()
+    clear_pin_state()
+    
     # Remove test database file
     if os.path.exists("test_wallet_app.db"):
         os.remove("test_wallet_app.db")
@@ -66,6 +89,19 @@ def client(test_db):
     # Clean up
     app.dependency_overrides.clear()
 
+@pytest.fixture
+def fake_razorpay(monkeypatch):
+    """Local fake Razorpay API that the app's gateway client talks to."""
+    from tests.fake_razorpay import FakeRazorpay
+    from services import payment_gateway_service
+    
+    with FakeRazorpay(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET) as fake:
+        monkeypatch.setattr(settings, "RAZORPAY_BASE_URL", fake.url)
+        monkeypatch.setattr(settings, "GATEWAY_RETRY_BACKOFF_SECONDS", 0.0)
+        payment_gateway_service.set_gateway_client(None)
+        yield fake
+        payment_gateway_service.set_gateway_client(None)
+
 @pytest.fixture
 def test_user_data():
     """Sample user data for testing."""
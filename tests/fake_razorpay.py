@@ -0,0 +1,220 @@
+"""
+Local fake of the Razorpay API for tests and benchmarks.
+
+WHAT THIS FILE DOES:
+- Runs a small HTTP server on 127.0.0.1 (random port) in a thread
+- Answers the calls the app makes: create order, fetch payment, list
+  payments, capture payment - in Razorpay's JSON format, including errors
+- Can be told to fail (5xx) or be slow, to test timeouts, retries and
+  the circuit breaker
+- Builds signed webhook bodies (webhook_event, sign_webhook), like the
+  ones Razorpay POSTs to /gateway/webhook
+
+USAGE:
+    with FakeRazorpay(key_id, key_secret) as fake:
+        fake.add_payment("pay_1", amount_in_paise=50000)
+        settings.RAZORPAY_BASE_URL = fake.url
+"""
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+def sign_payment(order_id: str, payment_id: str, key_secret: str) -> str:
+    """The checkout signature Razorpay gives the browser after a payment."""
+    message = f"{order_id}|{payment_id}".encode("utf-8")
+    return hmac.new(key_secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def sign_webhook(body: bytes, webhook_secret: str) -> str:
+    """The X-Razorpay-Signature header of a webhook delivery."""
+    return hmac.new(webhook_secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def webhook_event(event_type: str, payment: dict, order: dict = None) -> bytes:
+    """A webhook body, e.g. webhook_event("payment.captured", fake.payments["pay_1"])."""
+    payload = {"payment": {"entity": payment}}
+    if order is not None:
+        payload["order"] = {"entity": order}
+    event = {
+        "entity": "event",
+        "event": event_type,
+        "contains": list(payload),
+        "payload": payload,
+        "created_at": int(time.time()),
+    }
+    return json.dumps(event).encode("utf-8")
+
+
+class FakeRazorpay:
+    """In-memory Razorpay API. Thread-safe; use as a context manager."""
+
+    def __init__(self, key_id: str, key_secret: str):
+        self.key_id = key_id
+        self.key_secret = key_secret
+        self.orders: dict[str, dict] = {}
+        self.payments: dict[str, dict] = {}
+        self.requests: list[tuple[str, str]] = []  # (method, path) of every call
+        self.delay = 0.0  # seconds to wait before answering
+        self._failures_left = 0
+        self._failure_status = 500
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeRazorpay":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ============ TEST CONTROLS ============
+
+    def add_payment(self, payment_id: str, amount_in_paise: int, status: str = "captured",
+                    order_id: str = None, currency: str = "INR", notes: dict = None,
+                    created_at: int = None) -> dict:
+        """Add a payment; its notes default to the order's, as at checkout."""
+        if notes is None:
+            notes = self.orders.get(order_id, {}).get("notes", {})
+        payment = {
+            "id": payment_id,
+            "entity": "payment",
+            "amount": amount_in_paise,
+            "currency": currency,
+            "status": status,
+            "order_id": order_id,
+            "method": "upi",
+            "notes": notes,
+            "created_at": created_at or int(time.time()),
+        }
+        with self._lock:
+            self.payments[payment_id] = payment
+        return payment
+
+    def fail_next(self, count: int, status: int = 500) -> None:
+        """Answer the next `count` requests with an error status."""
+        with self._lock:
+            self._failures_left = count
+            self._failure_status = status
+
+    # ============ API ============
+
+    def _handle(self, method: str, path: str, body: dict, query: dict = None) -> tuple[int, dict]:
+        with self._lock:
+            self.requests.append((method, path))
+            if self._failures_left > 0:
+                self._failures_left -= 1
+                return self._failure_status, _error("SERVER_ERROR", "Fake outage")
+
+        parts = path.strip("/").split("/")
+        if parts[:1] != ["v1"]:
+            return 404, _error("BAD_REQUEST_ERROR", "Unknown URL")
+        parts = parts[1:]
+
+        with self._lock:
+            if method == "POST" and parts == ["orders"]:
+                order_id = f"order_{next(self._ids):014d}"
+                order = {
+                    "id": order_id,
+                    "entity": "order",
+                    "amount": body.get("amount"),
+                    "currency": body.get("currency", "INR"),
+                    "receipt": body.get("receipt"),
+                    "notes": body.get("notes", {}),
+                    "status": "created",
+                    "created_at": int(time.time()),
+                }
+                self.orders[order_id] = order
+                return 200, order
+
+            if method == "GET" and parts == ["payments"]:
+                return 200, self._list_payments(query or {})
+
+            if len(parts) >= 2 and parts[0] == "payments":
+                payment = self.payments.get(parts[1])
+                if payment is None:
+                    return 400, _error("BAD_REQUEST_ERROR", "The id provided does not exist")
+                if method == "GET" and len(parts) == 2:
+                    return 200, payment
+                if method == "POST" and parts[2:] == ["capture"]:
+                    if payment["status"] != "authorized":
+                        return 400, _error("BAD_REQUEST_ERROR", "This payment has already been captured")
+                    payment["status"] = "captured"
+                    return 200, payment
+
+        return 404, _error("BAD_REQUEST_ERROR", "Unknown URL")
+
+    def _list_payments(self, query: dict) -> dict:
+        """GET /v1/payments: newest first, filtered by from/to, paged by count/skip."""
+        start = int(query.get("from", 0))
+        end = int(query.get("to", 2 ** 31))
+        count = min(int(query.get("count", 10)), 100)
+        skip = int(query.get("skip", 0))
+        payments = sorted(
+            (p for p in self.payments.values() if start <= p["created_at"] <= end),
+            key=lambda p: (p["created_at"], p["id"]),
+            reverse=True
+        )
+        items = payments[skip:skip + count]
+        return {"entity": "collection", "count": len(items), "items": items}
+
+    def _authorized(self, header: str) -> bool:
+        expected = base64.b64encode(f"{self.key_id}:{self.key_secret}".encode("utf-8")).decode("ascii")
+        return header == f"Basic {expected}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def _respond(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if fake.delay:
+                    time.sleep(fake.delay)
+                if not fake._authorized(self.headers.get("Authorization", "")):
+                    code, payload = 401, _error("BAD_REQUEST_ERROR", "Authentication failed")
+                else:
+                    body = json.loads(raw) if raw else {}
+                    path, _, query = self.path.partition("?")
+                    code, payload = fake._handle(method, path, body, dict(parse_qsl(query)))
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout) before we answered
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _error(code: str, description: str) -> dict:
+    return {"error": {"code": code, "description": description}}
@@ -166,6 +166,169 @@ class TestTokenValidation:
         response = client.get("/api/v1/wallets", headers=headers)
         assert response.status_code == 401
 
+@pytest.mark.auth
+@pytest.mark.unit
+class TestPasswordHashing:
+    """Test bcrypt offloading, rehash on login and backpressure."""
+    
+    def test_login_rehashes_old_cost(self, client: TestClient, test_user_data, db_session):
+        """Test a password hashed with another cost is upgraded at login."""
+        from core.hashing import bcrypt_hash, hash_stats
+        from models import User
+        client.post("/api/v1/users/register", json=test_user_data)
+        assert db_session.query(User).one().hashed_password.startswith("$2b$04$")
+        db_session.query(User).update({User.hashed_password: bcrypt_hash(test_user_data["password"], 5)})
+        db_session.commit()
+        rehashed = hash_stats()["rehashed"]
+        
+        response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"], "password": test_user_data["password"]
+        })
+        
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.query(User).one().hashed_password.startswith("$2b$04$")
+        assert hash_stats()["rehashed"] == rehashed + 1
+    
+    def test_busy_hashing_returns_503(self, client: TestClient, test_user_data, monkeypatch):
+        """Test logins are refused with Retry-After when too many hashes are pending."""
+        from core import hashing
+        client.post("/api/v1/users/register", json=test_user_data)
+        monkeypatch.setattr(hashing.settings, "HASH_MAX_PENDING", 0)
+        
+        response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"], "password": test_user_data["password"]
+        })
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+    
+    def test_hash_in_process_pool(self, monkeypatch):
+        """Test hashing and verifying in worker processes."""
+        import asyncio
+        from core import hashing
+        monkeypatch.setattr(hashing.settings, "HASH_WORKERS", 2)
+        
+        async def scenario():
+            hashed = await hashing.hash_secret("s3cret-pass")
+            return hashed, await hashing.verify_secret("s3cret-pass", hashed), await hashing.verify_secret("wrong", hashed)
+        
+        try:
+            hashed, right, wrong = asyncio.run(scenario())
+        finally:
+            hashing.shutdown_pool()
+        
+        assert hashed.startswith("$2b$04$")
+        assert (right, wrong) == (True, False)
+        assert hashing.hash_stats()["pending"] == 0
+    
+    def test_wallet_pin(self, authenticated_client: TestClient):
+        """Test setting and verifying a wallet PIN."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        
+        assert authenticated_client.post(f"/api/v1/wallets/{wallet_id}/set-pin", json={"pin": "12ab"}).status_code == 400
+        assert authenticated_client.post(f"/api/v1/wallets/{wallet_id}/set-pin", json={"pin": "1234"}).status_code == 200
+        assert authenticated_client.post(f"/api/v1/wallets/{wallet_id}/verify-pin", json={"pin": "1234"}).json() == {"valid": True}
+        assert authenticated_client.post(f"/api/v1/wallets/{wallet_id}/verify-pin", json={"pin": "4321"}).json() == {"valid": False}
+        assert authenticated_client.post("/api/v1/wallets/999/verify-pin", json={"pin": "1234"}).status_code == 404
+
+
+@pytest.mark.auth
+@pytest.mark.unit
+class TestPinAttempts:
+    """Test PIN guessing limits, lockouts and the verified-PIN cache."""
+    
+    @pytest.fixture
+    def pin_wallet(self, authenticated_client: TestClient, monkeypatch):
+        """A wallet with PIN 1234; returns (wallet id, list of PINs bcrypt checked)."""
+        from services import wallet_pin_service
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/set-pin", json={"pin": "1234"})
+        checked = []
+        verify = wallet_pin_service.verify_secret
+        
+        async def counting_verify(pin, pin_hash):
+            checked.append(pin)
+            return await verify(pin, pin_hash)
+        
+        monkeypatch.setattr(wallet_pin_service, "verify_secret", counting_verify)
+        return wallet_id, checked
+    
+    def test_token_bucket_refills(self, monkeypatch):
+        """Test a limiter allows a burst, then one attempt per window/attempts."""
+        from core import rate_limit
+        now = [1000.0]
+        monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+        limiter = rate_limit.RateLimiter("test_bucket", attempts=3, window_seconds=30)
+        
+        assert [limiter.hit("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.hit("a") == pytest.approx(10.0)
+        assert limiter.hit("b") == 0.0  # other keys have their own bucket
+        now[0] += 10
+        assert limiter.hit("a") == 0.0
+        assert limiter.hit("a") > 0
+        limiter.reset("a")
+        assert limiter.hit("a") == 0.0
+    
+    def test_attempts_limited_before_bcrypt(self, authenticated_client: TestClient, pin_wallet, monkeypatch):
+        """Test a client over its attempts gets 429 without a bcrypt check."""
+        from config import settings
+        monkeypatch.setattr(settings, "PIN_LOCKOUT_AFTER_FAILURES", 100)
+        wallet_id, checked = pin_wallet
+        url = f"/api/v1/wallets/{wallet_id}/verify-pin"
+        
+        for _ in range(settings.PIN_ATTEMPTS_PER_WINDOW):
+            assert authenticated_client.post(url, json={"pin": "0000"}).json() == {"valid": False}
+        response = authenticated_client.post(url, json={"pin": "1234"})
+        
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) == 60
+        assert len(checked) == settings.PIN_ATTEMPTS_PER_WINDOW
+    
+    def test_progressive_lockout(self, authenticated_client: TestClient, pin_wallet, monkeypatch):
+        """Test wrong PINs in a row lock the PIN, each lockout twice as long."""
+        from config import settings
+        from services import wallet_pin_service
+        monkeypatch.setattr(settings, "PIN_LOCKOUT_AFTER_FAILURES", 2)
+        monkeypatch.setattr(wallet_pin_service._attempts, "attempts", 100)
+        now = [1000.0]
+        monkeypatch.setattr(wallet_pin_service.time, "time", lambda: now[0])
+        wallet_id, checked = pin_wallet
+        url = f"/api/v1/wallets/{wallet_id}/verify-pin"
+        
+        def guess(pin="0000"):
+            return authenticated_client.post(url, json={"pin": pin})
+        
+        guess(), guess()
+        locked = guess("1234")  # even the right PIN
+        assert locked.status_code == 429
+        assert locked.headers["retry-after"] == "60"
+        
+        now[0] += 61
+        guess(), guess()
+        assert guess().headers["retry-after"] == "120"
+        assert len(checked) == 4
+        
+        now[0] += 121
+        assert guess("1234").json() == {"valid": True}
+        guess(), guess()
+        assert guess().headers["retry-after"] == "60"  # success starts over
+    
+    def test_verified_pin_skips_bcrypt(self, authenticated_client: TestClient, pin_wallet):
+        """Test a PIN verified moments ago is accepted without another bcrypt check."""
+        wallet_id, checked = pin_wallet
+        url = f"/api/v1/wallets/{wallet_id}/verify-pin"
+        
+        assert authenticated_client.post(url, json={"pin": "1234"}).json() == {"valid": True}
+        assert authenticated_client.post(url, json={"pin": "1234"}).json() == {"valid": True}
+        assert checked == ["1234"]
+        
+        assert authenticated_client.post(url, json={"pin": "9999"}).json() == {"valid": False}
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/set-pin", json={"pin": "5678"})
+        assert authenticated_client.post(url, json={"pin": "1234"}).json() == {"valid": False}
+        assert checked == ["1234", "9999", "1234"]
+
+
 @pytest.mark.auth
 @pytest.mark.integration
 class TestAuthIntegration:
@@ -0,0 +1,187 @@
+"""
+Live update (server-sent events) tests for RosePay application.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from core.event_hub import HEARTBEAT, RESYNC, EventHub, hub
+from services import wallet_events
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    """(event name, data) of every event in an SSE body."""
+    events = []
+    for block in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if line.startswith(("event", "data")))
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Messages published to the hub, as (user_id, event name, data)."""
+    messages = []
+    monkeypatch.setattr(hub, "publish", lambda key, message: messages.append((key, *parse_events(message)[0])))
+    return messages
+
+
+@pytest.fixture
+def short_streams(monkeypatch):
+    """Streams that end after 0.3 s (the test client reads a response to its end)."""
+    monkeypatch.setattr(settings, "SSE_MAX_STREAM_SECONDS", 0.3)
+    monkeypatch.setattr(hub, "heartbeat_seconds", 0.05)
+
+
+@pytest.mark.unit
+class TestEventHub:
+    """Test the in-process pub/sub hub."""
+
+    def test_publish_from_another_thread(self):
+        """Test a message published from a worker thread reaches the stream's loop."""
+        event_hub = EventHub(heartbeat_seconds=60)
+
+        async def scenario():
+            subscription = event_hub.subscribe(7)
+            threading.Thread(target=event_hub.publish, args=(7, "hello")).start()
+            message = await asyncio.wait_for(subscription.next(), 1)
+            event_hub.unsubscribe(subscription)
+            return message
+
+        assert asyncio.run(scenario()) == "hello"
+        assert event_hub.stats()["streams"] == 0
+
+    def test_slow_reader_gets_resync(self):
+        """Test a full queue is dropped and replaced by one resync marker."""
+        event_hub = EventHub(heartbeat_seconds=60, max_queue=3)
+
+        async def scenario():
+            subscription = event_hub.subscribe(7)
+            for n in range(5):
+                event_hub.publish(7, f"message {n}")
+            await asyncio.sleep(0.01)
+            items = [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+            return items, subscription.dropped
+
+        items, dropped = asyncio.run(scenario())
+        assert items == [RESYNC, "message 4"]
+        assert dropped == 3
+        assert event_hub.stats()["resyncs"] == 1
+
+    def test_idle_streams_get_heartbeats_and_limit(self):
+        """Test idle streams get heartbeats, and a key can't have more than `limit` streams."""
+        event_hub = EventHub(heartbeat_seconds=0.01)
+
+        async def scenario():
+            first = event_hub.subscribe(7, limit=1)
+            second = event_hub.subscribe(7, limit=1)
+            return await asyncio.wait_for(first.next(), 1), second
+
+        beat, second = asyncio.run(scenario())
+        assert beat is HEARTBEAT
+        assert second is None
+
+
+@pytest.mark.unit
+class TestWalletEvents:
+    """Test that money movements are published after commit only."""
+
+    def test_transfer_publishes_to_both_owners(self, authenticated_client: TestClient, client: TestClient,
+                                               test_user_data_2, published):
+        """Test a transfer publishes both balances and the transaction to both users."""
+        wallet_id = authenticated_client.post("/api/v1/wallets/", json={"currency": "USD"}).json()["id"]
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 100.0})
+        client.post("/api/v1/users/register", json=test_user_data_2)
+        token = client.post("/api/v1/users/login", json=test_user_data_2).json()["access_token"]
+        other_wallet = client.post("/api/v1/wallets/", json={"currency": "USD"},
+                                   headers={"Authorization": f"Bearer {token}"}).json()
+        published.clear()
+
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/transfer", json={
+            "recipient_wallet_id": other_wallet["id"], "amount": 40.0
+        })
+
+        balances = {data["wallet_id"]: data["balance"] for _, name, data in published if name == "balance"}
+        transactions = [(user_id, data["amount"]) for user_id, name, data in published if name == "transaction"]
+        assert balances == {wallet_id: 60.0, other_wallet["id"]: 40.0}
+        assert sorted(transactions) == [(1, 40.0), (other_wallet["user_id"], 40.0)]
+
+    def test_rollback_publishes_nothing(self, db_session, published):
+        """Test recorded changes are dropped when the session rolls back."""
+        from models import Transaction, User, Wallet
+        user = User(email="x@example.com", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+        wallet = Wallet(user_id=user.id, balance=5.0)
+        db_session.add(wallet)
+        db_session.commit()
+
+        transaction = Transaction(user_id=user.id, wallet_id=wallet.id, amount=5.0, transaction_type="deposit")
+        db_session.add(transaction)
+        wallet_events.record_wallet_change(db_session, transaction, wallet)
+        db_session.rollback()
+        db_session.commit()
+
+        assert published == []
+
+
+@pytest.mark.unit
+class TestEventStream:
+    """Test the SSE endpoint."""
+
+    def test_stream_sends_balances_live_events_and_heartbeats(self, authenticated_client: TestClient, short_streams):
+        """Test the stream starts with current balances, then pushes what is published."""
+        wallet = authenticated_client.post("/api/v1/wallets/", json={"currency": "USD"}).json()
+        message = wallet_events.format_event("balance", {"wallet_id": wallet["id"], "balance": 9.0, "currency": "USD"})
+
+        def publish_once_subscribed():
+            while not hub.stats()["streams"]:
+                time.sleep(0.01)
+            hub.publish(wallet["user_id"], message)
+
+        threading.Thread(target=publish_once_subscribed, daemon=True).start()
+
+        response = authenticated_client.get("/api/v1/events/stream")
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text.startswith(f"retry: {settings.SSE_RETRY_MS}")
+        assert [data["balance"] for _, data in parse_events(response.text)] == [0.0, 9.0]
+        assert ": heartbeat" in response.text
+        assert hub.stats()["streams"] == 0
+
+    def test_token_in_query(self, client: TestClient, authenticated_client: TestClient, short_streams):
+        """Test EventSource-style auth with ?access_token=."""
+        token = authenticated_client.headers["Authorization"].split()[1]
+
+        assert client.get(f"/api/v1/events/stream?access_token={token}").status_code == 200
+        assert client.get("/api/v1/events/stream").status_code == 401
+        assert client.get("/api/v1/events/stream?access_token=bad").status_code == 401
+
+    def test_disconnect_before_first_chunk_unsubscribes(self, authenticated_client: TestClient):
+        """Test a client gone before the body starts doesn't leave its subscription behind."""
+        from main import app
+        token = authenticated_client.headers["Authorization"].split()[1]
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/v1/events/stream", "raw_path": b"/api/v1/events/stream",
+            "query_string": f"access_token={token}".encode(), "root_path": "",
+            "headers": [(b"host", b"testserver")], "client": ("203.0.113.7", 50000), "server": ("testserver", 80),
+        }
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                await asyncio.sleep(0.2)  # still sending headers when the disconnect is noticed
+
+        asyncio.run(app(scope, receive, send))
+
+        assert hub.stats()["streams"] == 0
+
@@ -0,0 +1,337 @@
+"""
+Payment gateway tests for RosePay application (against a local fake Razorpay).
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from core.gateway_client import CircuitBreaker, GatewayClient, GatewayUnavailable
+from services import payment_gateway_service
+from models import GatewayEvent, GatewayOrder, Transaction
+from tests.fake_razorpay import sign_payment, sign_webhook, webhook_event
+
+
+def make_client(fake, **options) -> GatewayClient:
+    return GatewayClient(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET, fake.url, **options)
+
+
+def verify_body(order_id: str, payment_id: str) -> dict:
+    return {
+        "razorpay_order_id": order_id,
+        "razorpay_payment_id": payment_id,
+        "razorpay_signature": sign_payment(order_id, payment_id, settings.RAZORPAY_KEY_SECRET),
+    }
+
+
+def deliver(client: TestClient, body: bytes, event_id: str, signature: str = None):
+    """POST a webhook the way Razorpay does."""
+    return client.post("/api/v1/gateway/webhook", content=body, headers={
+        "Content-Type": "application/json",
+        "X-Razorpay-Event-Id": event_id,
+        "X-Razorpay-Signature": signature or sign_webhook(body, settings.RAZORPAY_WEBHOOK_SECRET),
+    })
+
+
+@pytest.mark.unit
+class TestGatewayRoutes:
+    """Test gateway endpoints end to end."""
+
+    def test_create_order(self, authenticated_client: TestClient, fake_razorpay, db_session):
+        """Test an order is created at the gateway and saved with the wallet it tops up."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "INR"}).json()["id"]
+        
+        response = authenticated_client.post("/api/v1/gateway/order/create", json={"amount": 499.0})
+
+        assert response.status_code == 200
+        order_id = response.json()["order_id"]
+        assert fake_razorpay.orders[order_id]["amount"] == 49900
+        saved = db_session.query(GatewayOrder).filter(GatewayOrder.order_id == order_id).one()
+        assert (saved.wallet_id, saved.amount, saved.status) == (wallet_id, 499.0, "created")
+
+    def test_create_order_needs_own_wallet(self, authenticated_client: TestClient, fake_razorpay):
+        """Test an order can't top up a missing wallet or someone else's."""
+        no_wallet = authenticated_client.post("/api/v1/gateway/order/create", json={"amount": 10.0})
+        not_mine = authenticated_client.post("/api/v1/gateway/order/create", json={"amount": 10.0, "wallet_id": 999})
+
+        assert no_wallet.status_code == 400
+        assert not_mine.status_code == 404
+        assert fake_razorpay.orders == {}
+
+    def test_verify_reads_result_without_calling_gateway(self, authenticated_client: TestClient, fake_razorpay):
+        """Test /verify answers pending, then completed once the webhook credited the wallet."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "INR"}).json()["id"]
+        order_id = authenticated_client.post(
+            "/api/v1/gateway/order/create", json={"amount": 250.0, "wallet_id": wallet_id}
+        ).json()["order_id"]
+        payment = fake_razorpay.add_payment("pay_ok", amount_in_paise=25000, order_id=order_id)
+        calls_before = len(fake_razorpay.requests)
+        
+        pending = authenticated_client.post("/api/v1/gateway/verify", json=verify_body(order_id, "pay_ok"))
+        deliver(authenticated_client, webhook_event("payment.captured", payment), "evt_1")
+        completed = authenticated_client.post("/api/v1/gateway/verify", json=verify_body(order_id, "pay_ok"))
+        
+        assert pending.status_code == 202
+        assert pending.json()["status"] == "pending"
+        assert completed.status_code == 200
+        assert completed.json()["status"] == "completed"
+        assert completed.json()["transaction"]["amount"] == 250.0
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}").json()["balance"] == 250.0
+        # verify never went to the gateway; the processor confirmed the payment once
+        assert fake_razorpay.requests[calls_before:] == [("GET", "/v1/payments/pay_ok")]
+
+    def test_failed_payment_is_reported(self, authenticated_client: TestClient, fake_razorpay):
+        """Test a payment.failed webhook makes /verify answer failed."""
+        authenticated_client.post("/api/v1/wallets", json={"currency": "INR"})
+        payment = fake_razorpay.add_payment("pay_failed", amount_in_paise=25000, status="failed")
+        
+        deliver(authenticated_client, webhook_event("payment.failed", payment), "evt_1")
+        response = authenticated_client.post("/api/v1/gateway/verify", json=verify_body("order_1", "pay_failed"))
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "failed"
+
+    def test_verify_rejects_bad_signature(self, authenticated_client: TestClient, fake_razorpay):
+        """Test a forged checkout signature gives 400."""
+        body = verify_body("order_1", "pay_ok")
+        body["razorpay_signature"] = "0" * 64
+        
+        response = authenticated_client.post("/api/v1/gateway/verify", json=body)
+        
+        assert response.status_code == 400
+
+    def test_gateway_outage_returns_503(self, authenticated_client: TestClient, fake_razorpay):
+        """Test a gateway that keeps failing gives 503, not 400."""
+        fake_razorpay.fail_next(100)
+
+        response = authenticated_client.get("/api/v1/gateway/status/pay_x")
+
+        assert response.status_code == 503
+
+
+@pytest.mark.unit
+class TestGatewayWebhooks:
+    """Test webhook intake and the event processor."""
+
+    def test_payment_is_credited_once(self, authenticated_client: TestClient, fake_razorpay, db_session):
+        """Test redelivery and order.paid for the same payment don't credit twice."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "INR"}).json()["id"]
+        order_id = authenticated_client.post(
+            "/api/v1/gateway/order/create", json={"amount": 100.0, "wallet_id": wallet_id}
+        ).json()["order_id"]
+        payment = fake_razorpay.add_payment("pay_1", amount_in_paise=10000, order_id=order_id)
+        captured = webhook_event("payment.captured", payment)
+        
+        first = deliver(authenticated_client, captured, "evt_1")
+        again = deliver(authenticated_client, captured, "evt_1")
+        deliver(authenticated_client, webhook_event("order.paid", payment, fake_razorpay.orders[order_id]), "evt_2")
+        
+        assert first.json()["duplicate"] is False
+        assert again.json()["duplicate"] is True
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}").json()["balance"] == 100.0
+        assert db_session.query(Transaction).filter(Transaction.gateway_payment_id == "pay_1").count() == 1
+        assert db_session.query(GatewayEvent).count() == 2
+        assert {e.status for e in db_session.query(GatewayEvent)} == {"processed"}
+        assert db_session.query(GatewayOrder).one().status == "paid"
+
+    def test_bad_signature_is_rejected(self, client: TestClient, db_session):
+        """Test an unsigned or forged webhook is refused and not stored."""
+        body = webhook_event("payment.captured", {"id": "pay_1", "amount": 100, "notes": {"user_id": "1"}})
+        
+        response = deliver(client, body, "evt_1", signature="0" * 64)
+        
+        assert response.status_code == 400
+        assert db_session.query(GatewayEvent).count() == 0
+
+    def test_webhooks_refused_until_secret_is_set(self, client: TestClient, db_session, monkeypatch):
+        """Test webhooks signed with the placeholder (or no) secret are refused with 503."""
+        body = webhook_event("payment.captured", {"id": "pay_1", "amount": 100, "notes": {"user_id": "1"}})
+        
+        for secret in (payment_gateway_service.DEFAULT_WEBHOOK_SECRET, ""):
+            monkeypatch.setattr(settings, "RAZORPAY_WEBHOOK_SECRET", secret)
+            response = deliver(client, body, "evt_1", signature=sign_webhook(body, secret))
+            assert response.status_code == 503
+        
+        assert db_session.query(GatewayEvent).count() == 0
+
+    def test_payment_is_confirmed_with_gateway(self, authenticated_client: TestClient, fake_razorpay, db_session):
+        """Test a webhook claiming more than Razorpay captured, or an uncaptured payment, credits nothing."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "INR"}).json()["id"]
+        order_id = authenticated_client.post(
+            "/api/v1/gateway/order/create", json={"amount": 1.0, "wallet_id": wallet_id}
+        ).json()["order_id"]
+        payment = fake_razorpay.add_payment("pay_1", amount_in_paise=100, order_id=order_id)
+        pending = fake_razorpay.add_payment("pay_2", amount_in_paise=100, status="authorized", order_id=order_id)
+        
+        deliver(authenticated_client, webhook_event("payment.captured", {**payment, "amount": 10000000}), "evt_1")
+        deliver(authenticated_client, webhook_event("payment.captured", {**pending, "status": "captured"}), "evt_2")
+        
+        db_session.expire_all()
+        errors = sorted(event.last_error for event in db_session.query(GatewayEvent))
+        assert "Razorpay says 100" in errors[0]
+        assert "authorized at Razorpay" in errors[1]
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}").json()["balance"] == 0.0
+        assert db_session.query(Transaction).count() == 0
+
+    def test_unresolvable_event_is_retried_then_failed(self, client: TestClient, fake_razorpay, db_session,
+                                                       monkeypatch):
+        """Test an event that can't be applied stays pending, then fails after the attempt limit."""
+        monkeypatch.setattr(settings, "GATEWAY_EVENT_MAX_ATTEMPTS", 2)
+        payment = fake_razorpay.add_payment("pay_1", amount_in_paise=100, notes={"user_id": "999"})
+        body = webhook_event("payment.captured", payment)
+        
+        deliver(client, body, "evt_1")  # attempt 1, right after the webhook
+        db_session.expire_all()
+        pending = db_session.query(GatewayEvent).one()
+        assert (pending.status, pending.attempts) == ("pending", 1)
+        
+        result = payment_gateway_service.process_gateway_events(db_session)
+        
+        event = db_session.query(GatewayEvent).one()
+        assert result["failed"] == 1
+        assert event.status == "failed"
+        assert "no wallet" in event.last_error
+
+
+@pytest.mark.unit
+class TestGatewayReconciliation:
+    """Test the reconciler that catches payments a webhook missed."""
+
+    def create_order(self, client: TestClient, amount: float) -> tuple[int, str]:
+        wallet_id = client.post("/api/v1/wallets", json={"currency": "INR"}).json()["id"]
+        order_id = client.post(
+            "/api/v1/gateway/order/create", json={"amount": amount, "wallet_id": wallet_id}
+        ).json()["order_id"]
+        return wallet_id, order_id
+
+    def test_missed_payment_is_credited_once(self, authenticated_client: TestClient, fake_razorpay,
+                                             db_session, monkeypatch):
+        """Test a captured payment without a webhook is credited, over several pages."""
+        monkeypatch.setattr(settings, "GATEWAY_RECONCILE_PAGE_SIZE", 2)
+        monkeypatch.setattr(settings, "GATEWAY_RECONCILE_CONCURRENCY", 2)
+        wallet_id, order_id = self.create_order(authenticated_client, 75.0)
+        fake_razorpay.add_payment("pay_missed", amount_in_paise=7500, order_id=order_id)
+        for i in range(6):
+            fake_razorpay.add_payment(f"pay_other_{i}", amount_in_paise=100, order_id=f"order_other_{i}")
+        fake_razorpay.add_payment("pay_failed", amount_in_paise=100, status="failed", order_id=order_id)
+
+        first = payment_gateway_service.reconcile_gateway_payments(db_session)
+        second = payment_gateway_service.reconcile_gateway_payments(db_session)
+
+        assert (first["payments"], first["credited"], first["unknown_order"]) == (7, 1, 6)
+        assert (second["credited"], second["matched"]) == (0, 1)
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}").json()["balance"] == 75.0
+        assert db_session.query(GatewayOrder).one().payment_id == "pay_missed"
+
+    def test_no_pages_requested_past_the_end(self, fake_razorpay, db_session, monkeypatch):
+        """Test paging stops at the first short page instead of fetching a whole round of pages."""
+        monkeypatch.setattr(settings, "GATEWAY_RECONCILE_PAGE_SIZE", 2)
+        monkeypatch.setattr(settings, "GATEWAY_RECONCILE_CONCURRENCY", 4)
+        fake_razorpay.add_payment("pay_1", amount_in_paise=100, order_id="order_other_1")
+
+        def list_calls() -> int:
+            return fake_razorpay.requests.count(("GET", "/v1/payments"))
+
+        one_page = payment_gateway_service.reconcile_gateway_payments(db_session)
+        calls_one_page = list_calls()
+        for i in range(2, 4):
+            fake_razorpay.add_payment(f"pay_{i}", amount_in_paise=100, order_id=f"order_other_{i}")
+        two_pages = payment_gateway_service.reconcile_gateway_payments(db_session)
+
+        assert (one_page["payments"], two_pages["payments"]) == (1, 3)
+        assert calls_one_page == 1
+        # A full page, then two at once (the window grew): the short one and one past it
+        assert list_calls() - calls_one_page == 3
+
+    def test_amount_mismatch_is_flagged(self, authenticated_client: TestClient, fake_razorpay, db_session):
+        """Test a payment for a different amount than ordered is credited and its order flagged."""
+        wallet_id, order_id = self.create_order(authenticated_client, 100.0)
+        fake_razorpay.add_payment("pay_short", amount_in_paise=9000, order_id=order_id)
+
+        result = payment_gateway_service.reconcile_gateway_payments(db_session)
+
+        order = db_session.query(GatewayOrder).one()
+        assert result["flagged"] == 1
+        assert order.status == "flagged"
+        assert "mismatch" in order.note
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}").json()["balance"] == 90.0
+
+
+@pytest.mark.unit
+class TestGatewayClient:
+    """Test timeouts, retries and the circuit breaker."""
+
+    def test_reads_are_retried(self, fake_razorpay):
+        """Test a payment fetch survives two 5xx answers."""
+        fake_razorpay.add_payment("pay_1", amount_in_paise=100)
+        fake_razorpay.fail_next(2)
+        client = make_client(fake_razorpay, read_retries=2, retry_backoff=0)
+
+        payment = client.fetch_payment("pay_1")
+
+        assert payment["id"] == "pay_1"
+        assert len(fake_razorpay.requests) == 3
+        assert client.stats()["operations"]["fetch_payment"]["retries"] == 2
+
+    def test_writes_are_not_retried(self, fake_razorpay):
+        """Test order creation is tried once, so a retry can't create two orders."""
+        fake_razorpay.fail_next(1)
+        client = make_client(fake_razorpay, read_retries=2, retry_backoff=0)
+
+        with pytest.raises(GatewayUnavailable):
+            client.create_order({"amount": 100, "currency": "INR"})
+
+        assert len(fake_razorpay.requests) == 1
+
+    def test_read_timeout(self, fake_razorpay):
+        """Test a slow gateway fails after the read timeout instead of hanging."""
+        fake_razorpay.add_payment("pay_1", amount_in_paise=100)
+        fake_razorpay.delay = 0.5
+        client = make_client(fake_razorpay, read_timeout=0.1, read_retries=0)
+
+        with pytest.raises(GatewayUnavailable, match="Timeout"):
+            client.fetch_payment("pay_1")
+
+    def test_circuit_opens_and_recovers(self, fake_razorpay):
+        """Test the breaker stops calls after repeated failures and closes after a good trial call."""
+        fake_razorpay.add_payment("pay_1", amount_in_paise=100)
+        fake_razorpay.fail_next(3)
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.2)
+        client = make_client(fake_razorpay, read_retries=0, breaker=breaker)
+
+        for _ in range(3):
+            with pytest.raises(GatewayUnavailable):
+                client.fetch_payment("pay_1")
+        with pytest.raises(GatewayUnavailable, match="circuit open"):
+            client.fetch_payment("pay_1")
+
+        assert len(fake_razorpay.requests) == 3  # the 4th call never left the app
+        assert breaker.state == CircuitBreaker.OPEN
+
+        time.sleep(0.25)
+        assert client.fetch_payment("pay_1")["id"] == "pay_1"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_client_errors_do_not_open_circuit(self, fake_razorpay):
+        """Test 4xx answers (bad ids) are raised as-is and count as a healthy gateway."""
+        from razorpay.errors import BadRequestError
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = make_client(fake_razorpay, breaker=breaker)
+
+        with pytest.raises(BadRequestError):
+            client.fetch_payment("pay_missing")
+
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert len(fake_razorpay.requests) == 1
+
+    def test_metrics(self, fake_razorpay):
+        """Test latency numbers appear in /metrics."""
+        fake_razorpay.add_payment("pay_1", amount_in_paise=100)
+        payment_gateway_service.get_gateway_client().fetch_payment("pay_1")
+
+        stats = payment_gateway_service.gateway_stats()
+
+        assert stats["circuit"]["state"] == "closed"
+        assert stats["operations"]["fetch_payment"]["calls"] == 1
+        assert stats["operations"]["fetch_payment"]["p50_ms"] is not None
@@ -0,0 +1,126 @@
+"""
+Health probe tests for RosePay application.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services import health_service
+
+
+@pytest.fixture(autouse=True)
+def fresh_readiness_cache():
+    """Every test starts without cached probe results."""
+    health_service.clear_readiness_cache()
+    yield
+    health_service.clear_readiness_cache()
+
+
+@pytest.mark.unit
+class TestHealthProbes:
+    """Test liveness and readiness probes."""
+
+    def test_liveness_ok(self, client: TestClient):
+        """Test liveness probe returns ok without dependency checks."""
+        response = client.get("/api/v1/health/live")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+        assert "uptime_seconds" in response.json()
+
+    def test_readiness_reports_each_check(self, client: TestClient):
+        """Test readiness probe returns per-check results and latencies."""
+        response = client.get("/api/v1/health/ready")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] in ("ok", "degraded")
+        assert data["checks"]["database"]["status"] == "ok"
+        for check in data["checks"].values():
+            assert "latency_ms" in check
+
+    def test_readiness_fails_when_database_down(self, client: TestClient, monkeypatch):
+        """Test readiness returns 503 when a critical check fails."""
+        def broken_database():
+            raise ConnectionError("database is gone")
+
+        monkeypatch.setattr(health_service, "READINESS_CHECKS", [
+            ("database", broken_database, True),
+        ])
+
+        response = client.get("/api/v1/health/ready")
+
+        assert response.status_code == 503
+        check = response.json()["checks"]["database"]
+        assert check["status"] == "fail"
+        assert "database is gone" in check["detail"]
+
+    def test_readiness_check_timeout(self, client: TestClient, monkeypatch):
+        """Test a hanging check is reported as failed after the timeout."""
+        def hanging_check():
+            time.sleep(1)
+            return {"status": "ok"}
+
+        monkeypatch.setattr(health_service.settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.1)
+        monkeypatch.setattr(health_service, "READINESS_CHECKS", [
+            ("slow", hanging_check, False),
+        ])
+
+        response = client.get("/api/v1/health/ready")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "degraded"
+        assert "Timed out" in response.json()["checks"]["slow"]["detail"]
+
+    def test_hung_check_not_queued_again(self, monkeypatch):
+        """Test a check still running from the last probe fails instead of queueing."""
+        import threading
+        release = threading.Event()
+        calls = []
+
+        def hanging_check():
+            calls.append(1)
+            release.wait(5)
+            return {"status": "ok"}
+
+        monkeypatch.setattr(health_service.settings, "HEALTH_CHECK_TIMEOUT_SECONDS", 0.05)
+        monkeypatch.setattr(health_service, "READINESS_CHECKS", [
+            ("hung", hanging_check, True),
+        ])
+
+        try:
+            first = health_service.get_readiness(use_cache=False)["checks"]["hung"]
+            second = health_service.get_readiness(use_cache=False)["checks"]["hung"]
+        finally:
+            release.set()
+
+        assert "Timed out" in first["detail"]
+        assert second["detail"] == "Previous run is still in progress"
+        assert len(calls) == 1
+
+    def test_database_checks_bounded(self):
+        """Test database checks use their own engine, without a pool to wait on."""
+        from sqlalchemy.pool import NullPool
+
+        assert isinstance(health_service.get_check_engine().pool, NullPool)
+        assert health_service.check_database() == {"status": "ok"}
+
+    def test_readiness_is_cached(self, client: TestClient, monkeypatch):
+        """Test frequent polling reuses cached results instead of re-running checks."""
+        calls = []
+
+        def counting_check():
+            calls.append(1)
+            return {"status": "ok"}
+
+        monkeypatch.setattr(health_service, "READINESS_CHECKS", [
+            ("database", counting_check, True),
+        ])
+
+        first = client.get("/api/v1/health/ready").json()
+        second = client.get("/api/v1/health/ready").json()
+
+        assert len(calls) == 1
+        assert first["cached"] is False
+        assert second["cached"] is True
@@ -0,0 +1,212 @@
+"""
+Background maintenance job tests for RosePay application.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from core import heartbeats, scheduler
+from models import (
+    PaymentLink, PaymentLinkArchive, PaymentRequest, PaymentRequestArchive, TransactionStatus, User
+)
+from services import maintenance_service
+from services.payment_request_service import adjust_pending_counts, get_pending_count
+
+
+@pytest.fixture
+def link_owner(db_session):
+    """A user that owns payment links."""
+    user = User(email="owner@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def add_link(db_session, user, link_id: str, expires_in: timedelta) -> PaymentLink:
+    link = PaymentLink(
+        user_id=user.id,
+        link_id=link_id,
+        amount=10.0,
+        expires_at=datetime.utcnow() + expires_in
+    )
+    db_session.add(link)
+    db_session.commit()
+    return link
+
+
+@pytest.mark.unit
+class TestExpiredLinkSweeper:
+    """Test the expired payment link sweeper."""
+
+    def test_deactivates_only_expired_links(self, db_session, link_owner):
+        """Test expired links are deactivated and live ones are left alone."""
+        expired = add_link(db_session, link_owner, "EXPIRED00001", timedelta(hours=-1))
+        live = add_link(db_session, link_owner, "LIVE00000001", timedelta(hours=1))
+
+        result = maintenance_service.deactivate_expired_links(db_session)
+
+        db_session.refresh(expired)
+        db_session.refresh(live)
+        assert result == {"links_deactivated": 1}
+        assert expired.is_active == 0
+        assert live.is_active == 1
+
+    def test_works_in_bounded_batches(self, db_session, link_owner):
+        """Test one run changes at most batch_size * max_batches rows."""
+        for i in range(5):
+            add_link(db_session, link_owner, f"EXPIRED{i:05d}", timedelta(minutes=-i - 1))
+
+        first = maintenance_service.deactivate_expired_links(db_session, batch_size=2, max_batches=1)
+        rest = maintenance_service.deactivate_expired_links(db_session, batch_size=2, max_batches=10)
+
+        assert first == {"links_deactivated": 2}
+        assert rest == {"links_deactivated": 3}
+
+    def test_swept_link_reports_expired(self, client: TestClient, db_session, link_owner):
+        """Test a swept link still says 'expired', not 'already used'."""
+        add_link(db_session, link_owner, "EXPIRED00001", timedelta(hours=-1))
+        maintenance_service.deactivate_expired_links(db_session)
+
+        response = client.get("/api/v1/payments/link/EXPIRED00001")
+
+        assert response.status_code == 400
+        assert "expired" in response.json()["detail"]
+
+
+def add_request(db_session, user, age: timedelta, request_status=TransactionStatus.PENDING) -> PaymentRequest:
+    request = PaymentRequest(
+        requester_id=user.id,
+        recipient_id=user.id,
+        amount=5.0,
+        status=request_status,
+        created_at=datetime.utcnow() - age
+    )
+    db_session.add(request)
+    db_session.commit()
+    return request
+
+
+@pytest.mark.unit
+class TestStaleRequestSweeper:
+    """Test stale payment requests are cancelled."""
+
+    def test_cancels_only_stale_pending_requests(self, db_session, link_owner):
+        """Test pending requests past the TTL are cancelled, newer ones stay pending."""
+        stale = add_request(db_session, link_owner, timedelta(days=31))
+        fresh = add_request(db_session, link_owner, timedelta(days=1))
+        adjust_pending_counts(db_session, {link_owner.id: 2})
+        db_session.commit()
+
+        result = maintenance_service.expire_stale_requests(db_session)
+
+        db_session.refresh(stale)
+        db_session.refresh(fresh)
+        assert result == {"requests_expired": 1}
+        assert get_pending_count(db_session, link_owner.id) == 1
+        assert stale.status == TransactionStatus.CANCELLED
+        assert fresh.status == TransactionStatus.PENDING
+
+
+    def test_recount_repairs_drifted_badges(self, db_session, link_owner):
+        """Test requests changed without the counter (e.g. by an old app instance) are recounted."""
+        add_request(db_session, link_owner, timedelta(days=1))
+        add_request(db_session, link_owner, timedelta(days=2))
+        add_request(db_session, link_owner, timedelta(days=2), TransactionStatus.COMPLETED)
+        adjust_pending_counts(db_session, {link_owner.id: 5, link_owner.id + 1: 3})
+        db_session.commit()
+
+        first = maintenance_service.recount_pending_requests(db_session)
+        second = maintenance_service.recount_pending_requests(db_session)
+
+        assert first == {"counts_corrected": 2, "count_drift": 6}
+        assert second == {"counts_corrected": 0, "count_drift": 0}
+        assert get_pending_count(db_session, link_owner.id) == 2
+        assert get_pending_count(db_session, link_owner.id + 1) == 0
+
+    def test_recount_job_is_registered(self):
+        """Test the recount runs with the other background jobs."""
+        from core import scheduler
+
+        maintenance_service.register_jobs()
+
+        assert "pending_request_recount" in scheduler.job_stats()["jobs"]
+
+
+@pytest.mark.unit
+class TestArchiver:
+    """Test old rows are moved to archive tables."""
+
+    def test_archives_old_finished_rows(self, db_session, link_owner):
+        """Test old inactive links and finished requests move; live rows stay."""
+        old_link = add_link(db_session, link_owner, "OLDLINK00001", timedelta(days=-100))
+        old_link.is_active = 0
+        old_link.created_at = datetime.utcnow() - timedelta(days=120)
+        add_link(db_session, link_owner, "LIVE00000001", timedelta(hours=1))
+        db_session.commit()
+        add_request(db_session, link_owner, timedelta(days=120), TransactionStatus.COMPLETED)
+        add_request(db_session, link_owner, timedelta(days=120), TransactionStatus.CANCELLED)
+        add_request(db_session, link_owner, timedelta(days=1), TransactionStatus.COMPLETED)
+
+        links = maintenance_service.archive_old_links(db_session)
+        requests = maintenance_service.archive_old_requests(db_session)
+
+        assert links == {"links_archived": 1}
+        assert requests == {"requests_archived": 2}
+        assert [link.link_id for link in db_session.query(PaymentLink)] == ["LIVE00000001"]
+        archived = db_session.query(PaymentLinkArchive).one()
+        assert archived.link_id == "OLDLINK00001"
+        assert archived.archived_at is not None
+        assert db_session.query(PaymentRequest).count() == 1
+        assert db_session.query(PaymentRequestArchive).count() == 2
+
+
+@pytest.mark.unit
+class TestMaintenanceMetrics:
+    """Test lag and throughput reporting."""
+
+    def test_lag_reports_oldest_unhandled_row(self, db_session, link_owner):
+        """Test lag is the age of the oldest expired-but-active link, 0 once swept."""
+        add_link(db_session, link_owner, "EXPIRED00001", timedelta(hours=-2))
+
+        lag = maintenance_service.maintenance_lag(db_session)
+        maintenance_service.deactivate_expired_links(db_session)
+
+        assert 7000 < lag["expired_links_lag_seconds"] < 7300
+        assert lag["stale_requests_lag_seconds"] == 0.0
+        assert maintenance_service.maintenance_lag(db_session)["expired_links_lag_seconds"] == 0.0
+
+
+@pytest.mark.unit
+class TestScheduler:
+    """Test the background job scheduler."""
+
+    def test_runs_due_jobs_and_beats(self, monkeypatch):
+        """Test due jobs run, results are recorded and the heartbeat is fresh."""
+        monkeypatch.setattr(scheduler, "_jobs", {})
+        calls = []
+        scheduler.register_job("test_job", 3600, lambda: calls.append(1) or {"done": len(calls)})
+
+        scheduler.run_pending()
+        scheduler.run_pending()  # not due again for an hour
+
+        stats = scheduler.job_stats()["jobs"]["test_job"]
+        assert calls == [1]
+        assert stats["runs"] == 1
+        assert stats["last_result"] == {"done": 1}
+        assert heartbeats.last_beat_age("scheduler") < 5
+        heartbeats.clear("scheduler")
+
+    def test_failing_job_is_recorded(self, monkeypatch):
+        """Test a failing job doesn't stop the scheduler and is counted."""
+        monkeypatch.setattr(scheduler, "_jobs", {})
+
+        def broken():
+            raise RuntimeError("boom")
+
+        scheduler.register_job("broken_job", 60, broken)
+        scheduler.run_job("broken_job")
+
+        stats = scheduler.job_stats()["jobs"]["broken_job"]
+        assert stats["failures"] == 1
+        assert "boom" in stats["last_error"]
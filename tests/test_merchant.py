@@ -0,0 +1,211 @@
+"""
+Merchant revenue tests for RosePay application.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import (
+    Merchant, MerchantRevenueShard, Transaction, TransactionStatus, TransactionType, User, Wallet
+)
+from services import merchant_service
+
+
+@pytest.fixture
+def merchant(db_session):
+    """A merchant account (its user has no wallets yet)."""
+    user = User(email="shop@example.com", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    return merchant_service.create_merchant(db_session, user.id, "Pizza Shop")
+
+
+def add_wallet(db_session, user_id: int) -> Wallet:
+    wallet = Wallet(user_id=user_id, balance=0.0)
+    db_session.add(wallet)
+    db_session.commit()
+    return wallet
+
+
+def add_payment(db_session, wallet: Wallet, amount: float) -> None:
+    db_session.add(Transaction(
+        user_id=wallet.user_id,
+        wallet_id=wallet.id,
+        amount=amount,
+        transaction_type=TransactionType.PAYMENT,
+        status=TransactionStatus.COMPLETED,
+        recipient_wallet_id=wallet.id
+    ))
+    db_session.commit()
+
+
+@pytest.mark.unit
+class TestMerchantRevenue:
+    """Test merchant revenue counters."""
+
+    def test_update_does_not_lose_concurrent_payment(self, test_db, merchant):
+        """Test a session holding an old copy of the merchant can't overwrite newer revenue."""
+        first, second = test_db(), test_db()
+        try:
+            merchant_service.get_merchant(first, merchant.merchant_id)  # loads total_revenue = 0
+            merchant_service.update_merchant_revenue(second, merchant.merchant_id, 25.0)
+            merchant_service.update_merchant_revenue(first, merchant.merchant_id, 10.0)
+
+            assert merchant_service.get_merchant_revenue(second, merchant.id) == 35.0
+        finally:
+            first.close()
+            second.close()
+
+    def test_sharded_revenue(self, db_session, merchant):
+        """Test revenue spread over shard rows adds up, and folds back when shards are removed."""
+        merchant_service.update_merchant_revenue(db_session, merchant.merchant_id, 5.0)
+        merchant_service.set_revenue_shards(db_session, merchant.merchant_id, 4)
+
+        for _ in range(20):
+            merchant_service.update_merchant_revenue(db_session, merchant.merchant_id, 1.5)
+
+        shard_rows = db_session.query(MerchantRevenueShard).filter_by(merchant_id=merchant.id).all()
+        assert len(shard_rows) == 4
+        assert sum(row.revenue for row in shard_rows) == 30.0
+        assert merchant_service.get_merchant_revenue(db_session, merchant.id) == 35.0
+
+        result = merchant_service.set_revenue_shards(db_session, merchant.merchant_id, 0)
+
+        assert result["revenue"] == 35.0
+        assert db_session.query(MerchantRevenueShard).count() == 0
+        db_session.refresh(merchant)
+        assert merchant.total_revenue == 35.0
+
+    def test_stats_count_payments_to_every_wallet(self, db_session, merchant):
+        """Test stats include payments to all of the merchant's wallets, not just the first."""
+        first_wallet = add_wallet(db_session, merchant.user_id)
+        second_wallet = add_wallet(db_session, merchant.user_id)
+        add_payment(db_session, first_wallet, 10.0)
+        add_payment(db_session, second_wallet, 15.0)
+
+        stats = merchant_service.get_merchant_stats(db_session, merchant.user_id)
+
+        assert stats["transaction_count"] == 2
+
+
+@pytest.mark.unit
+class TestRevenueReconciler:
+    """Test the merchant revenue reconciliation job."""
+
+    def test_fixes_drift_from_ledger(self, db_session, merchant):
+        """Test revenue is corrected to the ledger total, including shards."""
+        wallet = add_wallet(db_session, merchant.user_id)
+        add_payment(db_session, wallet, 40.0)
+        add_payment(db_session, wallet, 2.5)
+        merchant_service.set_revenue_shards(db_session, merchant.merchant_id, 2)
+        merchant_service.update_merchant_revenue(db_session, merchant.merchant_id, 40.0)  # 2.5 missed
+
+        first = merchant_service.reconcile_merchant_revenue(db_session)
+        second = merchant_service.reconcile_merchant_revenue(db_session)
+
+        assert first == {"merchants_checked": 1, "merchants_corrected": 1, "revenue_drift": 2.5}
+        assert second["merchants_corrected"] == 0
+        assert merchant_service.get_merchant_revenue(db_session, merchant.id) == 42.5
+
+    def test_job_is_registered(self):
+        """Test the reconciler runs with the other background jobs."""
+        from core import scheduler
+        from services.maintenance_service import register_jobs
+
+        register_jobs()
+
+        assert "merchant_revenue_reconciler" in scheduler.job_stats()["jobs"]
+
+
+@pytest.mark.unit
+class TestMerchantSales:
+    """Test the merchant sales chart."""
+
+    @pytest.fixture
+    def merchant_client(self, authenticated_client, db_session):
+        """Logged-in user with a merchant account and a wallet."""
+        authenticated_client.post("/api/v1/merchant/register", json={"business_name": "Pizza Shop"})
+        authenticated_client.post("/api/v1/wallets", json={"currency": "USD"})
+        merchant = db_session.query(Merchant).one()
+        merchant.created_at = datetime(2024, 1, 1)
+        db_session.commit()
+        return authenticated_client
+
+    def _pay(self, db_session, amount: float, created_at: datetime) -> None:
+        wallet = db_session.query(Wallet).one()
+        db_session.add(Transaction(
+            user_id=wallet.user_id,
+            wallet_id=wallet.id,
+            amount=amount,
+            transaction_type=TransactionType.PAYMENT,
+            status=TransactionStatus.COMPLETED,
+            recipient_wallet_id=wallet.id,
+            created_at=created_at
+        ))
+        db_session.commit()
+
+    def test_daily_buckets_fill_gaps(self, merchant_client, db_session):
+        """Test every day in the range is returned, with 0 for days without sales."""
+        self._pay(db_session, 10.0, datetime(2024, 3, 1, 9, 30))
+        self._pay(db_session, 5.0, datetime(2024, 3, 1, 18, 0))
+        self._pay(db_session, 7.5, datetime(2024, 3, 4, 0, 15))
+
+        response = merchant_client.get("/api/v1/merchant/sales", params={
+            "bucket": "day", "start": "2024-03-01T00:00:00", "end": "2024-03-05T00:00:00"
+        })
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["bucket_seconds"] == 86400
+        assert [point["revenue"] for point in data["points"]] == [15.0, 0.0, 0.0, 7.5]
+        assert [point["payments"] for point in data["points"]] == [2, 0, 0, 1]
+        assert data["points"][0]["start"] == "2024-03-01T00:00:00"
+        assert data["total_revenue"] == 22.5
+
+    def test_weeks_start_on_monday(self, merchant_client, db_session):
+        """Test week buckets are aligned to Monday 00:00 UTC."""
+        self._pay(db_session, 3.0, datetime(2024, 3, 6))  # a Wednesday
+
+        data = merchant_client.get("/api/v1/merchant/sales", params={
+            "bucket": "week", "start": "2024-03-06T00:00:00", "end": "2024-03-07T00:00:00"
+        }).json()
+
+        assert [point["start"] for point in data["points"]] == ["2024-03-04T00:00:00"]
+        assert data["points"][0]["revenue"] == 3.0
+
+    def test_long_hourly_range_is_downsampled(self, merchant_client, db_session):
+        """Test too many hourly buckets are merged into wider ones."""
+        self._pay(db_session, 1.0, datetime(2024, 2, 15, 13))
+
+        data = merchant_client.get("/api/v1/merchant/sales", params={
+            "bucket": "hour", "start": "2024-01-01T00:00:00", "end": "2024-03-01T00:00:00"
+        }).json()
+
+        assert data["bucket_seconds"] == 3 * 3600  # 1440 hours -> 480 points
+        assert len(data["points"]) <= 500
+        assert data["total_revenue"] == 1.0
+
+    def test_newest_bucket_is_refreshed_from_cache(self, merchant_client, db_session):
+        """Test settled buckets come from the cache and only the newest one is re-read."""
+        now = datetime.utcnow()
+        params = {"bucket": "day", "start": (now - timedelta(days=3)).isoformat()}
+        self._pay(db_session, 4.0, now - timedelta(days=2))
+        first = merchant_client.get("/api/v1/merchant/sales", params=params).json()
+
+        self._pay(db_session, 6.0, now)  # today: newest bucket
+        self._pay(db_session, 100.0, now - timedelta(days=2))  # backdated into a settled bucket
+        second = merchant_client.get("/api/v1/merchant/sales", params=params).json()
+
+        assert first["total_revenue"] == 4.0
+        assert second["points"][-1]["revenue"] == 6.0
+        assert second["total_revenue"] == 10.0
+
+    def test_rejects_bad_bucket_and_range(self, merchant_client):
+        """Test unknown buckets and too long ranges are refused."""
+        bad_bucket = merchant_client.get("/api/v1/merchant/sales", params={"bucket": "minute"})
+        too_long = merchant_client.get("/api/v1/merchant/sales", params={
+            "bucket": "week", "start": "2020-01-01T00:00:00", "end": "2024-01-01T00:00:00"
+        })
+
+        assert bad_bucket.status_code == 400
+        assert too_long.status_code == 400
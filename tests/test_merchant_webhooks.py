@@ -0,0 +1,252 @@
+"""
+Merchant webhook tests for RosePay application.
+"""
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from config import settings
+from core.webhook_sender import SIGNATURE_HEADER, verify_signature
+from models import User, Wallet, WebhookDelivery
+from schemas import TransferRequest
+from services import merchant_service, merchant_webhook_service
+from services.payment_link_service import create_payment_link, pay_via_link
+from services.payment_request_service import accept_payment_request, create_payment_request
+from services.wallet_service import transfer_money
+from tests.webhook_receiver import WebhookReceiver
+
+
+@pytest.fixture
+def receiver(monkeypatch):
+    """A local merchant server, and a fresh webhook sender for each test."""
+    monkeypatch.setattr(merchant_webhook_service, "_sender", None)
+    with WebhookReceiver() as receiver:
+        yield receiver
+        merchant_webhook_service.get_webhook_sender().close()
+
+
+def add_user(db_session, email: str, balance: float) -> tuple[User, Wallet]:
+    user = User(email=email, hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    wallet = Wallet(user_id=user.id, balance=balance)
+    db_session.add(wallet)
+    db_session.commit()
+    return user, wallet
+
+
+@pytest.fixture
+def shop(db_session):
+    """A merchant user with an empty wallet."""
+    user, wallet = add_user(db_session, "shop@example.com", 0.0)
+    merchant_service.create_merchant(db_session, user.id, "Pizza Shop")
+    return user, wallet
+
+
+@pytest.fixture
+def customer(db_session):
+    """A regular user with 1000 in their wallet."""
+    return add_user(db_session, "customer@example.com", 1000.0)
+
+
+def pay(db_session, customer, shop, amount: float = 10.0):
+    return transfer_money(db_session, customer[1].id, customer[0].id, TransferRequest(
+        recipient_wallet_id=shop[1].id, amount=amount, description="Pizza"
+    ))
+
+
+@pytest.mark.unit
+class TestMerchantWebhooks:
+    """Test queueing and delivering merchant webhooks."""
+
+    def test_transfer_to_merchant_is_delivered_signed(self, db_session, receiver, shop, customer):
+        """Test a payment is queued with the transfer and POSTed with a valid signature."""
+        endpoint = merchant_webhook_service.create_webhook_endpoint(
+            db_session, shop[0].id, receiver.url + "/hooks/shop"
+        )
+        transaction = pay(db_session, customer, shop, 12.5)
+
+        delivery = db_session.query(WebhookDelivery).one()
+        assert delivery.status == "pending"
+
+        result = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        [request] = receiver.received
+        assert result["delivered"] == 1
+        assert request["body"]["type"] == "payment.received"
+        assert request["body"]["data"]["transaction_id"] == transaction.id
+        assert (request["body"]["data"]["amount"], request["body"]["data"]["source"]) == (12.5, "transfer")
+        assert request["headers"]["X-RosePay-Event-Id"] == request["body"]["id"]
+        assert verify_signature(endpoint.secret, request["raw"], request["headers"][SIGNATURE_HEADER])
+        assert not verify_signature("whsec_wrong", request["raw"], request["headers"][SIGNATURE_HEADER])
+        db_session.refresh(delivery)
+        assert (delivery.status, delivery.attempts, delivery.response_status) == ("delivered", 1, 200)
+
+    def test_links_and_requests_queue_events(self, db_session, receiver, shop, customer):
+        """Test payment links and payment requests to a merchant queue webhooks too."""
+        merchant_webhook_service.create_webhook_endpoint(db_session, shop[0].id, receiver.url + "/hooks/shop")
+        link = create_payment_link(db_session, shop[0].id, 20.0, "Order 1")
+        pay_via_link(db_session, link.link_id, customer[1].id, customer[0].id)
+        payment_request = create_payment_request(db_session, shop[0].id, "customer@example.com", 30.0)
+        accept_payment_request(db_session, payment_request.id, customer[1].id, customer[0].id)
+
+        merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        assert sorted((b["data"]["source"], b["data"]["amount"]) for b in receiver.bodies()) == [
+            ("payment_link", 20.0), ("payment_request", 30.0)
+        ]
+
+    def test_only_merchants_with_endpoints_get_events(self, db_session, receiver, shop, customer):
+        """Test payments to other users, or merchants without endpoints, queue nothing."""
+        pay(db_session, customer, shop)
+        friend = add_user(db_session, "friend@example.com", 0.0)
+        pay(db_session, customer, friend)
+
+        assert db_session.query(WebhookDelivery).count() == 0
+
+    def test_failures_back_off_then_give_up(self, db_session, receiver, shop, customer, monkeypatch):
+        """Test a failed delivery waits before its retry, and fails after the attempt limit."""
+        monkeypatch.setattr(settings, "WEBHOOK_MAX_ATTEMPTS", 2)
+        merchant_webhook_service.create_webhook_endpoint(db_session, shop[0].id, receiver.url + "/hooks/shop")
+        pay(db_session, customer, shop)
+        receiver.fail_next(2, status=503)
+
+        first = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+        delivery = db_session.query(WebhookDelivery).one()
+        waited = (delivery.next_attempt_at - datetime.utcnow()).total_seconds()
+        not_due = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+        delivery.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        second = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        assert first["retried"] == 1
+        assert 0.75 * settings.WEBHOOK_BACKOFF_BASE_SECONDS - 1 < waited <= settings.WEBHOOK_BACKOFF_BASE_SECONDS
+        assert not_due == {"delivered": 0, "retried": 0, "skipped": 0, "failed": 0}
+        assert second["failed"] == 1
+        db_session.refresh(delivery)
+        assert (delivery.status, delivery.attempts, delivery.last_error) == ("failed", 2, "HTTP 503")
+
+    def test_endpoint_concurrency_cap_and_keep_alive(self, db_session, receiver, shop, customer):
+        """Test one endpoint never gets more than its cap in flight, over reused connections."""
+        merchant_webhook_service.create_webhook_endpoint(
+            db_session, shop[0].id, receiver.url + "/hooks/shop", max_concurrency=2
+        )
+        for _ in range(20):
+            pay(db_session, customer, shop, 1.0)
+        receiver.delay = 0.02
+
+        result = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        assert result["delivered"] == 20
+        assert receiver.max_in_flight["/hooks/shop"] == 2
+        assert len(receiver.connections["/hooks/shop"]) <= 2
+
+    def test_unreachable_endpoint_is_skipped_for_the_batch(self, db_session, receiver, shop, customer):
+        """Test a dead endpoint costs at most its concurrency cap in requests per run, and doesn't hold up others."""
+        with socket.socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            dead_url = "http://127.0.0.1:%d/hooks" % closed.getsockname()[1]
+        merchant_webhook_service.create_webhook_endpoint(db_session, shop[0].id, dead_url, max_concurrency=2)
+        merchant_webhook_service.create_webhook_endpoint(db_session, shop[0].id, receiver.url + "/hooks/shop")
+        for _ in range(10):
+            pay(db_session, customer, shop, 1.0)
+
+        result = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+        sender_stats = merchant_webhook_service.get_webhook_sender().stats()
+
+        assert result["delivered"] == 10
+        assert (result["retried"], result["skipped"]) == (sender_stats["errors"], sender_stats["skipped"])
+        assert 1 <= sender_stats["errors"] <= 2
+        assert sender_stats["errors"] + sender_stats["skipped"] == 10
+
+    def test_skipped_deliveries_keep_their_attempts(self, db_session, receiver, shop, customer, monkeypatch):
+        """Test deliveries skipped after a timeout aren't counted as attempts and come back soon."""
+        monkeypatch.setattr(settings, "WEBHOOK_TIMEOUT_SECONDS", 0.2)
+        merchant_webhook_service.create_webhook_endpoint(
+            db_session, shop[0].id, receiver.url + "/hooks/shop", max_concurrency=1
+        )
+        for _ in range(5):
+            pay(db_session, customer, shop, 1.0)
+        receiver.delay = 0.5
+
+        first = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+        deliveries = db_session.query(WebhookDelivery).order_by(WebhookDelivery.id).all()
+        [timed_out] = [d for d in deliveries if d.attempts]
+        skipped = [d for d in deliveries if not d.attempts]
+        waits = [(d.next_attempt_at - datetime.utcnow()).total_seconds() for d in skipped]
+        receiver.delay = 0.0
+        for delivery in skipped:
+            delivery.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+        second = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        assert (first["retried"], first["skipped"]) == (1, 4)
+        assert (timed_out.next_attempt_at - datetime.utcnow()).total_seconds() > settings.WEBHOOK_SKIPPED_RETRY_SECONDS
+        assert all(0 < wait <= settings.WEBHOOK_SKIPPED_RETRY_SECONDS for wait in waits)
+        assert second["delivered"] == 4
+        db_session.expire_all()
+        assert [(d.status, d.attempts) for d in skipped] == [("delivered", 1)] * 4
+
+    def test_internal_urls_are_refused(self, db_session, receiver, shop, customer, monkeypatch):
+        """Test an internal URL can't be registered, and isn't POSTed to if the host moved there."""
+        merchant_webhook_service.create_webhook_endpoint(db_session, shop[0].id, receiver.url + "/hooks/shop")
+        pay(db_session, customer, shop)
+        monkeypatch.setattr(settings, "OUTBOUND_URL_CHECK_ADDRESSES", True)
+
+        with pytest.raises(HTTPException) as refused:
+            merchant_webhook_service.create_webhook_endpoint(
+                db_session, shop[0].id, "http://169.254.169.254/latest/meta-data/"
+            )
+        result = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        assert refused.value.status_code == 400
+        assert result["retried"] == 1
+        assert receiver.received == []
+        assert "not a public address" in db_session.query(WebhookDelivery).one().last_error
+
+    def test_removed_endpoint_drops_queued_deliveries(self, db_session, receiver, shop, customer):
+        """Test deliveries still queued for a removed endpoint are failed, not sent."""
+        endpoint = merchant_webhook_service.create_webhook_endpoint(
+            db_session, shop[0].id, receiver.url + "/hooks/shop"
+        )
+        pay(db_session, customer, shop)
+        merchant_webhook_service.delete_webhook_endpoint(db_session, shop[0].id, endpoint.id)
+
+        result = merchant_webhook_service.deliver_merchant_webhooks(db_session)
+
+        assert result["failed"] == 1
+        assert receiver.received == []
+
+
+@pytest.mark.unit
+class TestMerchantWebhookRoutes:
+    """Test the webhook endpoint API."""
+
+    def test_manage_endpoints(self, authenticated_client: TestClient):
+        """Test adding, listing and removing endpoints; the secret is only shown once."""
+        authenticated_client.post("/api/v1/merchant/register", json={"business_name": "Pizza Shop"})
+
+        created = authenticated_client.post("/api/v1/merchant/webhooks", json={"url": "https://shop.example.com/hook"})
+        bad = authenticated_client.post("/api/v1/merchant/webhooks", json={"url": "ftp://shop.example.com"})
+        listed = authenticated_client.get("/api/v1/merchant/webhooks").json()
+        endpoint_id = created.json()["id"]
+        deliveries = authenticated_client.get(f"/api/v1/merchant/webhooks/{endpoint_id}/deliveries")
+        removed = authenticated_client.delete(f"/api/v1/merchant/webhooks/{endpoint_id}")
+
+        assert created.status_code == 200
+        assert created.json()["secret"].startswith("whsec_")
+        assert bad.status_code == 400
+        assert [e["url"] for e in listed] == ["https://shop.example.com/hook"]
+        assert "secret" not in listed[0]
+        assert deliveries.json() == []
+        assert removed.status_code == 200
+        assert authenticated_client.get("/api/v1/merchant/webhooks").json() == []
+
+    def test_requires_merchant_account(self, authenticated_client: TestClient):
+        """Test users without a merchant account can't add endpoints."""
+        response = authenticated_client.post("/api/v1/merchant/webhooks", json={"url": "https://x.example.com"})
+
+        assert response.status_code == 404
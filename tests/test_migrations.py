@@ -0,0 +1,79 @@
+"""
+Schema migration tests for RosePay application.
+"""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import models  # noqa: F401 - registers all tables on Base.metadata
+from database import Base
+from migrations.runner import check_schema_version, latest_version, migrate
+
+
+@pytest.fixture
+def empty_engine(tmp_path):
+    """A brand new, empty SQLite database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.unit
+class TestMigrations:
+    """Test the migration runner and shipped migrations."""
+
+    def test_migrate_fresh_database(self, empty_engine):
+        """Test migrating an empty database reaches the latest version."""
+        applied = migrate(empty_engine, log=lambda message: None)
+
+        assert applied == list(range(1, latest_version() + 1))
+        assert check_schema_version(empty_engine)["up_to_date"] is True
+
+    def test_migrate_is_idempotent(self, empty_engine):
+        """Test running migrate twice applies nothing the second time."""
+        migrate(empty_engine, log=lambda message: None)
+
+        assert migrate(empty_engine, log=lambda message: None) == []
+
+    def test_migrations_match_models(self, empty_engine):
+        """Test migrations create every table and index declared in models.py."""
+        migrate(empty_engine, log=lambda message: None)
+        inspector = inspect(empty_engine)
+
+        for table in Base.metadata.sorted_tables:
+            assert inspector.has_table(table.name), f"No migration creates {table.name}"
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                assert index.name in existing, f"No migration creates {index.name}"
+
+    def test_existing_database_gets_new_indexes(self, empty_engine):
+        """Test a database created before migrations gets the hot-path indexes."""
+        # Old databases were created with create_all() and had no extra indexes
+        Base.metadata.create_all(bind=empty_engine)
+        with empty_engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_wallets_user_id"))
+            conn.execute(text("DROP INDEX ix_transactions_user_id_created_at"))
+
+        assert check_schema_version(empty_engine)["current"] == 0
+        migrate(empty_engine, log=lambda message: None)
+
+        inspector = inspect(empty_engine)
+        assert "ix_wallets_user_id" in {i["name"] for i in inspector.get_indexes("wallets")}
+        assert "ix_transactions_user_id_created_at" in {
+            i["name"] for i in inspector.get_indexes("transactions")
+        }
+
+    def test_pending_request_counts_backfilled(self, empty_engine):
+        """Test the inbox counter starts from the requests already pending."""
+        migrate(empty_engine, target=4, log=lambda message: None)
+        with empty_engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a', 'x'), (2, 'b', 'x')"))
+            conn.execute(text(
+                "INSERT INTO payment_requests (requester_id, recipient_id, amount, status) VALUES "
+                "(1, 2, 5.0, 'PENDING'), (1, 2, 6.0, 'PENDING'), (1, 2, 7.0, 'COMPLETED')"
+            ))
+
+        migrate(empty_engine, target=5, log=lambda message: None)
+
+        with empty_engine.connect() as conn:
+            rows = conn.execute(text("SELECT user_id, pending FROM pending_request_counts")).all()
+        assert rows == [(2, 2)]
@@ -0,0 +1,244 @@
+"""
+Notification tests for RosePay application.
+"""
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from models import Notification
+from services import email_service, health_service, notification_service
+
+
+class RecordingSMTP:
+    """Stands in for smtplib.SMTP: records sessions and messages."""
+
+    sessions = []
+
+    def __init__(self, host, port):
+        self.messages = []
+        RecordingSMTP.sessions.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, message):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    """Configured SMTP that records instead of sending."""
+    RecordingSMTP.sessions = []
+    monkeypatch.setattr(settings, "SMTP_USER", "bot@example.com")
+    monkeypatch.setattr(settings, "SMTP_PASSWORD", "secret")
+    monkeypatch.setattr(email_service.smtplib, "SMTP", RecordingSMTP)
+    return RecordingSMTP
+
+
+def deposit(client: TestClient, wallet_id: int, amount: float, description: str = "Deposit"):
+    return client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": amount, "description": description})
+
+
+@pytest.mark.unit
+class TestNotifications:
+    """Test queueing, dispatching and digests."""
+
+    def test_deposit_is_queued_not_sent_inline(self, authenticated_client: TestClient, db_session, smtp):
+        """Test a deposit queues an email and an in-app notification without touching SMTP."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+
+        deposit(authenticated_client, wallet_id, 50.0)
+
+        rows = db_session.query(Notification).all()
+        assert {(r.channel, r.status) for r in rows} == {("email", "pending"), ("in_app", "sent")}
+        assert smtp.sessions == []
+
+    def test_dispatch_sends_all_emails_in_one_session(self, authenticated_client: TestClient, db_session, smtp):
+        """Test one dispatcher run sends every due email over one SMTP connection."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        deposit(authenticated_client, wallet_id, 50.0)
+        authenticated_client.post("/api/v1/users/register", json={"email": "friend@example.com", "password": "password123"})
+        friend = authenticated_client.post("/api/v1/users/login", json={"email": "friend@example.com", "password": "password123"}).json()
+        friend_wallet = authenticated_client.post(
+            "/api/v1/wallets", json={"currency": "USD"},
+            headers={"Authorization": f"Bearer {friend['access_token']}"}
+        ).json()["id"]
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/transfer", json={
+            "recipient_wallet_id": friend_wallet, "amount": 10.0
+        })
+
+        result = notification_service.dispatch_notifications(db_session)
+
+        assert len(smtp.sessions) == 1
+        assert sorted(m["To"] for m in smtp.sessions[0].messages) == [
+            "friend@example.com", "test@example.com", "test@example.com"
+        ]
+        assert (result["sent"], result["messages"], result["digests"]) == (3, 3, 0)
+        assert notification_service.dispatch_notifications(db_session)["sent"] == 0
+
+    def test_digest_merges_window_into_one_message(self, authenticated_client: TestClient, db_session, smtp):
+        """Test digest users get one email for every event in their window, once it is due."""
+        authenticated_client.put("/api/v1/notifications/preferences", json={"digest_minutes": 60, "in_app": False})
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        for i in range(5):
+            deposit(authenticated_client, wallet_id, 10.0, f"<b>Sale {i}</b>")
+
+        assert notification_service.dispatch_notifications(db_session)["sent"] == 0  # window still open
+
+        db_session.query(Notification).update({"due_at": datetime.utcnow() - timedelta(seconds=1)})
+        db_session.commit()
+        result = notification_service.dispatch_notifications(db_session)
+
+        assert (result["sent"], result["digests"]) == (5, 1)
+        [message] = smtp.sessions[-1].messages
+        assert "5 transactions" in message["Subject"]
+        text, html = (part.get_payload(decode=True).decode() for part in message.get_payload())
+        assert text.count("Sale") == 5
+        assert "&lt;b&gt;Sale 0&lt;/b&gt;" in html
+
+    def test_failed_sends_are_retried_then_given_up(self, authenticated_client: TestClient, db_session,
+                                                    smtp, monkeypatch):
+        """Test a failed email stays queued for a retry, and fails after the attempt limit."""
+        monkeypatch.setattr(settings, "NOTIFY_MAX_ATTEMPTS", 2)
+        monkeypatch.setattr(settings, "NOTIFY_RETRY_SECONDS", 0)
+        monkeypatch.setattr(RecordingSMTP, "login", lambda self, user, password: 1 / 0)
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        deposit(authenticated_client, wallet_id, 50.0)
+
+        first = notification_service.dispatch_notifications(db_session)
+        second = notification_service.dispatch_notifications(db_session)
+
+        email = db_session.query(Notification).filter(Notification.channel == "email").one()
+        assert first["failed"] == second["failed"] == 1
+        assert (email.status, email.attempts) == ("failed", 2)
+
+    def test_failed_row_waits_for_its_retry(self, authenticated_client: TestClient, db_session, smtp, monkeypatch):
+        """Test a new event for the same user doesn't pull a failed email forward past its due_at."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        deposit(authenticated_client, wallet_id, 50.0, "First")
+        with monkeypatch.context() as failing:
+            failing.setattr(RecordingSMTP, "login", lambda self, user, password: 1 / 0)
+            assert notification_service.dispatch_notifications(db_session)["failed"] == 1
+
+        deposit(authenticated_client, wallet_id, 20.0, "Second")
+        result = notification_service.dispatch_notifications(db_session)
+
+        failed = db_session.query(Notification).filter(Notification.channel == "email").order_by(Notification.id).first()
+        [message] = smtp.sessions[-1].messages
+        text = message.get_payload()[0].get_payload(decode=True).decode()
+        assert result["sent"] == 1
+        assert "Second" in text and "First" not in text
+        assert (failed.status, failed.attempts) == ("pending", 1)
+        assert failed.due_at > datetime.utcnow()
+
+    def test_rows_per_group_are_bounded(self, authenticated_client: TestClient, db_session, smtp, monkeypatch):
+        """Test one run sends at most NOTIFY_MAX_ROWS_PER_GROUP of a user's backlog, the rest next run."""
+        monkeypatch.setattr(settings, "NOTIFY_MAX_ROWS_PER_GROUP", 2)
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        for i in range(3):
+            deposit(authenticated_client, wallet_id, 1.0 + i)
+
+        first = notification_service.dispatch_notifications(db_session)
+        second = notification_service.dispatch_notifications(db_session)
+
+        assert (first["sent"], second["sent"]) == (2, 1)
+
+    def test_webhook_channel(self, authenticated_client: TestClient, db_session, monkeypatch):
+        """Test webhook users get the event POSTed as JSON."""
+        received = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            received.append((str(request.url), json.loads(request.content)))
+            return httpx.Response(200)
+
+        channel = notification_service.CHANNELS["webhook"]
+        monkeypatch.setattr(channel, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+        authenticated_client.put("/api/v1/notifications/preferences", json={
+            "email": False, "in_app": False, "webhook_url": "https://hooks.example.com/rosepay"
+        })
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        deposit(authenticated_client, wallet_id, 42.0)
+
+        notification_service.dispatch_notifications(db_session)
+
+        [(url, body)] = received
+        assert url == "https://hooks.example.com/rosepay"
+        assert body["events"][0]["amount"] == 42.0
+
+    def test_webhook_url_must_be_public(self, authenticated_client: TestClient, db_session, monkeypatch):
+        """Test internal webhook URLs are refused when saved, and not POSTed to if the host moved there."""
+        received = []
+        channel = notification_service.CHANNELS["webhook"]
+        monkeypatch.setattr(channel, "_client", httpx.Client(
+            transport=httpx.MockTransport(lambda request: received.append(request) or httpx.Response(200))
+        ))
+        authenticated_client.put("/api/v1/notifications/preferences", json={
+            "email": False, "in_app": False, "webhook_url": "http://127.0.0.1:9/hooks"
+        })
+        monkeypatch.setattr(settings, "OUTBOUND_URL_CHECK_ADDRESSES", True)
+
+        metadata = authenticated_client.put("/api/v1/notifications/preferences", json={
+            "webhook_url": "http://169.254.169.254/latest/meta-data/"
+        })
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        deposit(authenticated_client, wallet_id, 42.0)
+        result = notification_service.dispatch_notifications(db_session)
+
+        assert metadata.status_code == 400
+        assert "not a public address" in metadata.json()["detail"]
+        assert received == []
+        assert result["failed"] == 1
+
+    def test_in_app_inbox(self, authenticated_client: TestClient):
+        """Test the in-app inbox lists notifications newest first and marks them read."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        deposit(authenticated_client, wallet_id, 1.0)
+        deposit(authenticated_client, wallet_id, 2.0)
+
+        inbox = authenticated_client.get("/api/v1/notifications").json()
+        marked = authenticated_client.post("/api/v1/notifications/read").json()
+
+        assert [n["data"]["amount"] for n in inbox] == [2.0, 1.0]
+        assert marked["marked_read"] == 2
+
+    def test_preferences_are_validated(self, authenticated_client: TestClient):
+        """Test bad webhook URLs and digest windows are refused."""
+        bad_url = authenticated_client.put("/api/v1/notifications/preferences", json={"webhook_url": "ftp://x"})
+        bad_window = authenticated_client.put("/api/v1/notifications/preferences", json={"digest_minutes": -1})
+
+        assert bad_url.status_code == 400
+        assert bad_window.status_code == 400
+        assert authenticated_client.get("/api/v1/notifications/preferences").json()["digest_minutes"] == 0
+
+    def test_outbox_lag(self, db_session):
+        """Test outbox lag counts only emails that are due."""
+        now = datetime.utcnow()
+        for due_at in (now + timedelta(hours=1), now - timedelta(minutes=10)):
+            db_session.add(Notification(user_id=1, channel="email", event_type="deposit",
+                                        payload="{}", created_at=now, due_at=due_at))
+        db_session.commit()
+
+        assert 590 < notification_service.outbox_lag_seconds(db_session) < 610
+
+    def test_readiness_reports_outbox(self, client: TestClient, monkeypatch):
+        """Test the readiness probe fails the email outbox check when emails are stuck."""
+        monkeypatch.setattr(notification_service, "outbox_lag_seconds", lambda db: 1000.0)
+        health_service.clear_readiness_cache()
+
+        check = client.get("/api/v1/health/ready").json()["checks"]["email_outbox"]
+
+        assert check["status"] == "fail"
+        health_service.clear_readiness_cache()
@@ -0,0 +1,64 @@
+"""
+Outgoing webhook URL check tests (SSRF) for RosePay application.
+"""
+import socket
+
+import pytest
+
+from config import settings
+from core import outbound_url
+from core.outbound_url import UnsafeURLError, validate_outbound_url
+
+
+@pytest.fixture
+def checked(monkeypatch):
+    """Address check on (conftest turns it off for the local test receivers)."""
+    monkeypatch.setattr(settings, "OUTBOUND_URL_CHECK_ADDRESSES", True)
+
+
+def resolve_to(monkeypatch, *addresses):
+    """Make every host name resolve to `addresses`."""
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in addresses]
+
+    monkeypatch.setattr(outbound_url.socket, "getaddrinfo", getaddrinfo)
+
+
+@pytest.mark.unit
+class TestOutboundURLs:
+    """Test webhook URLs can't point into our own network."""
+
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1:8000/hooks",
+        "http://localhost/hooks",
+        "http://10.0.0.5/hooks",
+        "http://192.168.1.1/hooks",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/hooks",
+        "http://[::ffff:127.0.0.1]/hooks",
+        "http://0.0.0.0/hooks",
+        "http://100.64.0.1/hooks",
+    ])
+    def test_internal_addresses_refused(self, checked, url):
+        """Test loopback, private, link-local and other non-public addresses are refused."""
+        with pytest.raises(UnsafeURLError):
+            validate_outbound_url(url)
+
+    @pytest.mark.parametrize("url", ["ftp://example.com/x", "http:///hooks", "hooks.example.com", "http://x:99999/"])
+    def test_malformed_refused(self, url):
+        """Test only http(s) URLs with a host are accepted, check on or off."""
+        with pytest.raises(UnsafeURLError):
+            validate_outbound_url(url)
+
+    def test_name_resolving_inside_refused(self, checked, monkeypatch):
+        """Test a public-looking name is refused if any of its addresses is internal."""
+        resolve_to(monkeypatch, "93.184.216.34", "10.1.2.3")
+
+        with pytest.raises(UnsafeURLError, match="not a public address"):
+            validate_outbound_url("https://hooks.example.com/rosepay")
+
+    def test_public_address_allowed(self, checked, monkeypatch):
+        """Test a name resolving only to public addresses passes."""
+        resolve_to(monkeypatch, "93.184.216.34")
+
+        assert validate_outbound_url("https://hooks.example.com/rosepay") == "https://hooks.example.com/rosepay"
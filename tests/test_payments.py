@@ -118,6 +118,149 @@ class TestPaymentLinks:
         # Try to access first user's payment link
         response = client.get(f"/api/v1/payments/link/{link_id}", headers=headers)
         assert response.status_code == 404
+    
+    def test_bulk_create_payment_links(self, authenticated_client: TestClient):
+        """Test many links are created in one request, in order."""
+        links = [{"amount": 10.0 + i, "description": f"Invoice {i}"} for i in range(25)]
+        
+        response = authenticated_client.post("/api/v1/payments/link/bulk-create", json={"links": links})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 25
+        assert [link["amount"] for link in data["links"]] == [10.0 + i for i in range(25)]
+        assert len({link["link_id"] for link in data["links"]}) == 25
+        assert data["links"][0]["qr_code"] is None
+        
+        link_id = data["links"][7]["link_id"]
+        details = authenticated_client.get(f"/api/v1/payments/link/{link_id}")
+        assert details.status_code == 200
+        assert details.json()["description"] == "Invoice 7"
+    
+    def test_bulk_create_retry_starts_clean(self, authenticated_client: TestClient, db_session, monkeypatch):
+        """Test a duplicate in a later chunk retries every chunk without the rolled-back ids."""
+        from core.ids import new_id
+        from models import PaymentLink
+        from services import payment_link_service
+        
+        taken = authenticated_client.post("/api/v1/payments/link/create", json={"amount": 1.0}).json()["link_id"]
+        user_id = db_session.query(PaymentLink).filter(PaymentLink.link_id == taken).one().user_id
+        candidates = iter([new_id(), new_id(), taken] + [new_id() for _ in range(3)])
+        monkeypatch.setattr(payment_link_service, "generate_link_id", lambda: next(candidates))
+        inserted = []
+        execute = db_session.execute
+        
+        def recording_execute(statement, params=None, *args, **kwargs):
+            if isinstance(params, list):
+                inserted.append([dict(row) for row in params])
+            return execute(statement, params, *args, **kwargs)
+        
+        monkeypatch.setattr(db_session, "execute", recording_execute)
+        links = [{"amount": 1.0 + i} for i in range(3)]
+        
+        rows = payment_link_service.create_payment_links_bulk(db_session, user_id, links, chunk_size=2)
+        
+        assert len(inserted) == 4  # 2 chunks, duplicate in the second, then 2 chunks again
+        assert all("id" not in row for chunk in inserted for row in chunk)
+        assert [row["amount"] for row in rows] == [1.0, 2.0, 3.0]
+        assert all(row["id"] for row in rows)
+    
+    def test_bulk_create_with_qr_codes(self, authenticated_client: TestClient, monkeypatch):
+        """Test bulk create can return a pre-rendered QR code per link."""
+        from config import settings
+        
+        monkeypatch.setattr(settings, "QR_BATCH_WORKERS", 1)
+        
+        response = authenticated_client.post("/api/v1/payments/link/bulk-create", json={
+            "links": [{"amount": 5.0}, {"amount": 6.0}],
+            "include_qr": True
+        })
+        
+        assert response.status_code == 200
+        assert all(link["qr_code"].startswith("data:image/png;base64,") for link in response.json()["links"])
+    
+    def test_bulk_create_limit(self, authenticated_client: TestClient, monkeypatch):
+        """Test bulk create rejects too many links."""
+        from config import settings
+        
+        monkeypatch.setattr(settings, "LINK_BULK_MAX_ITEMS", 2)
+        
+        response = authenticated_client.post("/api/v1/payments/link/bulk-create", json={
+            "links": [{"amount": 1.0}] * 3
+        })
+        
+        assert response.status_code == 400
+    
+    def test_get_payment_link_is_cached(self, authenticated_client: TestClient, test_payment_link_data):
+        """Test repeated lookups of a link are served from the cache."""
+        from services import payment_link_service
+        
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+        payment_link_service.clear_link_cache()
+        
+        first = authenticated_client.get(f"/api/v1/payments/link/{link_id}")
+        second = authenticated_client.get(f"/api/v1/payments/link/{link_id}")
+        
+        assert first.json() == second.json()
+        stats = payment_link_service._link_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+    
+    def test_unknown_payment_link_is_negatively_cached(self, client: TestClient):
+        """Test unknown ids are remembered, so guessing doesn't hit the database."""
+        from services import payment_link_service
+        
+        payment_link_service.clear_link_cache()
+        
+        assert client.get("/api/v1/payments/link/NOPE00000000").status_code == 404
+        assert client.get("/api/v1/payments/link/NOPE00000000").status_code == 404
+        assert payment_link_service._link_cache.stats()["hits"] == 1
+    
+    def test_payment_link_cache_ttl_capped_at_expiry(self):
+        """Test a link is never cached past its expiry time."""
+        from datetime import datetime, timedelta
+        from services.payment_link_service import _link_cache_ttl
+        from config import settings
+        
+        now = datetime.utcnow()
+        
+        assert _link_cache_ttl(now + timedelta(seconds=5), now) == 5
+        assert _link_cache_ttl(now + timedelta(days=1), now) == settings.LINK_CACHE_TTL_SECONDS
+        assert _link_cache_ttl(None, now) == settings.LINK_CACHE_TTL_SECONDS
+
+@pytest.mark.payment
+@pytest.mark.unit
+class TestPaymentLinkIds:
+    """Test payment link ID generation."""
+    
+    def test_ids_are_time_ordered_and_unguessable(self):
+        """Test IDs sort by creation time and share no random part."""
+        import time
+        from core.ids import new_id
+        
+        first = new_id()
+        time.sleep(0.002)
+        second = new_id()
+        
+        assert len(first) == len(second) == 24
+        assert first < second
+        assert first[10:] != second[10:]
+        assert new_id("MRCH_").startswith("MRCH_")
+    
+    def test_duplicate_id_is_retried_without_probe(self, authenticated_client: TestClient, test_payment_link_data, monkeypatch):
+        """Test a duplicate link ID is caught by the unique index and replaced."""
+        from core.ids import new_id
+        from services import payment_link_service
+        
+        taken = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data).json()["link_id"]
+        fresh = new_id()
+        candidates = iter([taken, fresh])
+        monkeypatch.setattr(payment_link_service, "generate_link_id", lambda: next(candidates))
+        
+        response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        
+        assert response.json()["link_id"] == fresh
 
 @pytest.mark.payment
 @pytest.mark.unit
@@ -159,6 +302,27 @@ class TestPaymentLinkPayment:
         assert transaction["type"] == "payment"
         assert transaction["status"] == "completed"
     
+    def test_pay_via_link_invalidates_cached_link(self, authenticated_client: TestClient, client: TestClient, test_user_data_2, test_payment_link_data):
+        """Test a link cached as active shows as used right after it is paid."""
+        authenticated_client.post("/api/v1/wallets", json={"currency": "USD"})
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+        
+        client.post("/api/v1/users/register", json=test_user_data_2)
+        token = client.post("/api/v1/users/login", json={
+            "email": test_user_data_2["email"],
+            "password": test_user_data_2["password"]
+        }).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        wallet_id = client.post("/api/v1/wallets", json={"currency": "USD"}, headers=headers).json()["id"]
+        client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 100.0}, headers=headers)
+        
+        assert client.get(f"/api/v1/payments/link/{link_id}").status_code == 200
+        pay_response = client.post(f"/api/v1/payments/link/{link_id}/pay", json={"wallet_id": wallet_id}, headers=headers)
+        
+        assert pay_response.status_code == 200
+        assert client.get(f"/api/v1/payments/link/{link_id}").status_code == 400
+    
     def test_pay_via_link_insufficient_funds_fails(self, authenticated_client: TestClient, client: TestClient, test_user_data_2, test_payment_link_data):
         """Test paying via link with insufficient funds fails."""
         # Create payment link for user 1
@@ -240,6 +404,205 @@ class TestPaymentQR:
         response = authenticated_client.get("/api/v1/payments/link/nonexistent/qr")
         assert response.status_code == 404
 
+    def test_get_payment_qr_png_image(self, authenticated_client: TestClient, test_payment_link_data):
+        """Test getting QR code as raw PNG with caching headers."""
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+
+        response = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.png")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert response.content.startswith(b"\x89PNG")
+        assert response.headers["etag"].startswith('"')
+        assert "max-age" in response.headers["cache-control"]
+
+    def test_get_payment_qr_svg_image(self, authenticated_client: TestClient, test_payment_link_data):
+        """Test getting QR code as SVG."""
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+
+        response = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.svg")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("image/svg+xml")
+        assert b"<svg" in response.content
+
+    def test_get_payment_qr_not_modified(self, authenticated_client: TestClient, test_payment_link_data, monkeypatch):
+        """Test If-None-Match with the current ETag returns 304 without rendering."""
+        from services import qr_service
+
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+        etag = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.png").headers["etag"]
+
+        qr_service.clear_qr_cache()
+        monkeypatch.setattr(qr_service, "_RENDERERS", {})
+        response = authenticated_client.get(
+            f"/api/v1/payments/link/{link_id}/qr.png",
+            headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_get_payment_qr_unsupported_format_fails(self, authenticated_client: TestClient, test_payment_link_data):
+        """Test unsupported image format returns 404."""
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+
+        response = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.gif")
+        assert response.status_code == 404
+
+    def test_get_payment_qr_png_requested_size(self, authenticated_client: TestClient, test_payment_link_data):
+        """Test PNG output at a requested pixel size."""
+        from io import BytesIO
+        from PIL import Image
+
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+
+        small = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.png?size=200")
+        default = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.png")
+
+        assert small.status_code == 200
+        assert Image.open(BytesIO(small.content)).size == (200, 200)
+        assert len(small.content) < len(default.content)
+        assert small.headers["etag"] != default.headers["etag"]
+
+    def test_get_payment_qr_matrix(self, authenticated_client: TestClient, test_payment_link_data):
+        """Test raw matrix JSON output for client-side rendering."""
+        create_response = authenticated_client.post("/api/v1/payments/link/create", json=test_payment_link_data)
+        link_id = create_response.json()["link_id"]
+
+        response = authenticated_client.get(f"/api/v1/payments/link/{link_id}/qr.json")
+
+        assert response.status_code == 200
+        matrix = response.json()
+        assert matrix["size"] == 17 + 4 * matrix["version"]
+        assert len(matrix["modules"]) == matrix["size"]
+        assert set("".join(matrix["modules"])) == {"0", "1"}
+
+    def test_qr_error_correction_tuned_to_payload(self):
+        """Test short payloads get stronger error correction than long ones."""
+        from services.qr_service import choose_qr_settings, ERROR_CORRECTION_LEVELS
+
+        _short_version, short_level = choose_qr_settings("http://127.0.0.1:8000/api/v1/wallets/1/receive")
+        _long_version, long_level = choose_qr_settings("http://127.0.0.1:8000/" + "x" * 200)
+
+        assert ERROR_CORRECTION_LEVELS.index(short_level) < ERROR_CORRECTION_LEVELS.index(long_level)
+
+    def test_qr_render_is_cached(self, monkeypatch, tmp_path):
+        """Test the same payload is rendered once and then served from memory or disk."""
+        from services import qr_service
+
+        monkeypatch.setattr(qr_service.settings, "QR_CACHE_DIR", str(tmp_path))
+        qr_service.clear_qr_cache()
+        renders = []
+        real_render_png = qr_service._render_png
+        monkeypatch.setitem(
+            qr_service._RENDERERS, "png",
+            lambda data, size=None: renders.append(data) or real_render_png(data, size)
+        )
+
+        first = qr_service.render_qr("http://example.com/pay/1", "png")
+        second = qr_service.render_qr("http://example.com/pay/1", "png")
+        qr_service.clear_qr_cache()
+        third = qr_service.render_qr("http://example.com/pay/1", "png")
+
+        assert first == second == third
+        assert len(renders) == 1
+        assert len(list(tmp_path.rglob("*.png"))) == 1
+
+@pytest.mark.payment
+@pytest.mark.unit
+class TestPaymentQRBatch:
+    """Test bulk QR rendering for merchants."""
+    
+    def _create_links(self, client: TestClient, count: int) -> list:
+        return [
+            client.post("/api/v1/payments/link/create", json={"amount": 10.0 + i}).json()["link_id"]
+            for i in range(count)
+        ]
+    
+    def test_batch_zip_in_process_pool(self, authenticated_client: TestClient, monkeypatch):
+        """Test a ZIP with one QR per link and wallet, rendered by worker processes."""
+        import io
+        import json
+        import zipfile
+        from services import qr_batch_service
+        
+        monkeypatch.setattr(qr_batch_service.settings, "QR_BATCH_WORKERS", 2)
+        link_ids = self._create_links(authenticated_client, 3)
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        
+        try:
+            response = authenticated_client.post("/api/v1/payments/qr/batch", json={
+                "link_ids": link_ids,
+                "wallet_ids": [wallet_id],
+                "size": 128
+            })
+        finally:
+            qr_batch_service.shutdown_pool()
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        names = archive.namelist()
+        assert names == [f"link-{i}.png" for i in link_ids] + [f"wallet-{wallet_id}.png", "manifest.json"]
+        assert archive.read(names[0]).startswith(b"\x89PNG")
+        assert json.loads(archive.read("manifest.json"))["count"] == 4
+    
+    def test_batch_svg_sheet(self, authenticated_client: TestClient, monkeypatch):
+        """Test the printable sheet places every QR on A4 pages."""
+        from services import qr_batch_service
+        
+        monkeypatch.setattr(qr_batch_service.settings, "QR_BATCH_WORKERS", 1)
+        link_ids = self._create_links(authenticated_client, 13)
+        
+        response = authenticated_client.post("/api/v1/payments/qr/batch", json={
+            "link_ids": link_ids,
+            "output": "sheet"
+        })
+        
+        assert response.status_code == 200
+        sheet = response.text
+        assert sheet.count("<svg") == 14  # the sheet + one per QR
+        assert 'height="594mm"' in sheet  # 13 QRs = 2 pages
+        assert all(f"link-{i}" in sheet for i in link_ids)
+    
+    def test_batch_rejects_other_users_ids(self, authenticated_client: TestClient, client: TestClient, test_user_data_2):
+        """Test one foreign id fails the whole batch before anything renders."""
+        link_ids = self._create_links(authenticated_client, 1)
+        client.post("/api/v1/users/register", json=test_user_data_2)
+        token = client.post("/api/v1/users/login", json={
+            "email": test_user_data_2["email"],
+            "password": test_user_data_2["password"]
+        }).json()["access_token"]
+        
+        response = client.post(
+            "/api/v1/payments/qr/batch",
+            json={"link_ids": link_ids},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        
+        assert response.status_code == 404
+    
+    def test_batch_limits(self, authenticated_client: TestClient, monkeypatch):
+        """Test empty, oversized and unsupported batches are rejected."""
+        from services import qr_batch_service
+        
+        monkeypatch.setattr(qr_batch_service.settings, "QR_BATCH_MAX_ITEMS", 2)
+        
+        assert authenticated_client.post("/api/v1/payments/qr/batch", json={}).status_code == 400
+        assert authenticated_client.post(
+            "/api/v1/payments/qr/batch", json={"link_ids": ["A", "B", "C"]}
+        ).status_code == 400
+        assert authenticated_client.post(
+            "/api/v1/payments/qr/batch", json={"link_ids": ["A"], "output": "pdf"}
+        ).status_code == 400
+
 @pytest.mark.payment
 @pytest.mark.unit
 class TestPaymentRequests:
@@ -364,6 +727,149 @@ class TestPaymentRequests:
         assert response.status_code == 400
         assert "insufficient" in response.json()["detail"].lower()
 
+@pytest.mark.payment
+@pytest.mark.unit
+class TestPaymentRequestInbox:
+    """Test the paginated payment request inbox and pending count badge."""
+    
+    @pytest.fixture
+    def recipient_headers(self, client: TestClient, test_user_data_2):
+        """Register the second user (who receives the requests) and log in."""
+        client.post("/api/v1/users/register", json=test_user_data_2)
+        token = client.post("/api/v1/users/login", json={
+            "email": test_user_data_2["email"],
+            "password": test_user_data_2["password"]
+        }).json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+    
+    def _send_requests(self, authenticated_client: TestClient, email: str, count: int) -> list:
+        return [
+            authenticated_client.post("/api/v1/payments/request", json={
+                "recipient_email": email, "amount": 1.0 + i
+            }).json()["id"]
+            for i in range(count)
+        ]
+    
+    def test_inbox_keyset_pagination(self, authenticated_client: TestClient, client: TestClient, recipient_headers, test_user_data_2):
+        """Test pages are newest first and follow X-Next-Cursor to the end."""
+        request_ids = self._send_requests(authenticated_client, test_user_data_2["email"], 5)
+        
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["before_id"] = cursor
+            response = client.get("/api/v1/payments/request/received", params=params, headers=recipient_headers)
+            assert response.status_code == 200
+            seen += [req["id"] for req in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+        
+        assert seen == sorted(request_ids, reverse=True)
+        
+        sent = authenticated_client.get("/api/v1/payments/request/sent", params={"limit": 3})
+        assert [req["id"] for req in sent.json()] == sorted(request_ids, reverse=True)[:3]
+        assert sent.headers["x-next-cursor"] == str(sorted(request_ids, reverse=True)[2])
+    
+    def test_pending_count_follows_accept_and_decline(self, authenticated_client: TestClient, client: TestClient, recipient_headers, test_user_data_2):
+        """Test the badge counter changes with create, decline and accept."""
+        request_ids = self._send_requests(authenticated_client, test_user_data_2["email"], 3)
+        count_url = "/api/v1/payments/request/received/count"
+        
+        assert client.get(count_url, headers=recipient_headers).json() == {"pending": 3}
+        
+        declined = client.post(f"/api/v1/payments/request/{request_ids[0]}/decline", headers=recipient_headers)
+        assert declined.status_code == 200
+        assert declined.json()["status"] == "cancelled"
+        assert client.get(count_url, headers=recipient_headers).json() == {"pending": 2}
+        
+        authenticated_client.post("/api/v1/wallets", json={"currency": "USD"})
+        wallet_id = client.post("/api/v1/wallets", json={"currency": "USD"}, headers=recipient_headers).json()["id"]
+        client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 100.0}, headers=recipient_headers)
+        accepted = client.post(
+            f"/api/v1/payments/request/{request_ids[1]}/accept",
+            json={"wallet_id": wallet_id},
+            headers=recipient_headers
+        )
+        assert accepted.status_code == 200
+        assert client.get(count_url, headers=recipient_headers).json() == {"pending": 1}
+        
+        # Declining twice doesn't lower the count again
+        again = client.post(f"/api/v1/payments/request/{request_ids[0]}/decline", headers=recipient_headers)
+        assert again.status_code == 400
+        assert client.get(count_url, headers=recipient_headers).json() == {"pending": 1}
+    
+    def test_only_recipient_can_decline(self, authenticated_client: TestClient, recipient_headers, test_user_data_2):
+        """Test the requester can't decline their own request."""
+        request_id = self._send_requests(authenticated_client, test_user_data_2["email"], 1)[0]
+        
+        response = authenticated_client.post(f"/api/v1/payments/request/{request_id}/decline")
+        
+        assert response.status_code == 403
+    
+    def _funded_wallet(self, authenticated_client: TestClient, client: TestClient, recipient_headers, amount: float) -> int:
+        """Give the requester a wallet and the recipient a funded one."""
+        authenticated_client.post("/api/v1/wallets", json={"currency": "USD"})
+        wallet_id = client.post("/api/v1/wallets", json={"currency": "USD"}, headers=recipient_headers).json()["id"]
+        client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": amount}, headers=recipient_headers)
+        return wallet_id
+    
+    def test_accept_batch(self, authenticated_client: TestClient, client: TestClient, recipient_headers, test_user_data_2):
+        """Test a batch pays every payable request and reports the others."""
+        request_ids = self._send_requests(authenticated_client, test_user_data_2["email"], 3)  # 1 + 2 + 3
+        wallet_id = self._funded_wallet(authenticated_client, client, recipient_headers, 10.0)
+        client.post(f"/api/v1/payments/request/{request_ids[2]}/decline", headers=recipient_headers)
+        
+        response = client.post("/api/v1/payments/request/accept-batch", json={
+            "wallet_id": wallet_id,
+            "request_ids": [request_ids[0], request_ids[1], request_ids[2], 999999]
+        }, headers=recipient_headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["accepted"] == 2
+        assert data["failed"] == 2
+        assert data["total_paid"] == 3.0
+        assert data["balance"] == 7.0
+        assert [item["accepted"] for item in data["results"]] == [True, True, False, False]
+        assert data["results"][2]["detail"] == "Payment request already processed"
+        assert data["results"][3]["detail"] == "Payment request not found"
+        transaction_ids = {item["transaction_id"] for item in data["results"][:2]}
+        assert None not in transaction_ids and len(transaction_ids) == 2
+        
+        requester_wallet = authenticated_client.get("/api/v1/wallets").json()[0]
+        assert requester_wallet["balance"] == 3.0
+        count = client.get("/api/v1/payments/request/received/count", headers=recipient_headers)
+        assert count.json() == {"pending": 0}
+    
+    def test_accept_batch_insufficient_balance_pays_nothing(self, authenticated_client: TestClient, client: TestClient, recipient_headers, test_user_data_2):
+        """Test the total is checked once and a short wallet pays nothing."""
+        request_ids = self._send_requests(authenticated_client, test_user_data_2["email"], 3)  # total 6
+        wallet_id = self._funded_wallet(authenticated_client, client, recipient_headers, 5.0)
+        
+        response = client.post("/api/v1/payments/request/accept-batch", json={
+            "wallet_id": wallet_id, "request_ids": request_ids
+        }, headers=recipient_headers)
+        
+        assert response.status_code == 400
+        assert "insufficient" in response.json()["detail"].lower()
+        count = client.get("/api/v1/payments/request/received/count", headers=recipient_headers)
+        assert count.json() == {"pending": 3}
+    
+    def test_accept_batch_requires_own_wallet(self, authenticated_client: TestClient, recipient_headers, test_user_data_2):
+        """Test paying from someone else's wallet is rejected."""
+        request_ids = self._send_requests(authenticated_client, test_user_data_2["email"], 1)
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        
+        response = authenticated_client.post("/api/v1/payments/request/accept-batch", json={
+            "wallet_id": wallet_id, "request_ids": request_ids
+        })
+        
+        assert response.status_code == 200
+        assert response.json()["results"][0]["detail"] == "You are not authorized to pay this request"
+
 @pytest.mark.payment
 @pytest.mark.integration
 class TestPaymentIntegration:
@@ -0,0 +1,84 @@
+"""
+Request rate limit tests for RosePay application.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from core.rate_limit import get_rate_limit_backend
+from core.rate_limit_middleware import parse_quotas
+from core.security import create_access_token
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Rate limits on (conftest turns them off), with a small analytics quota."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMITS", "analytics=3/60,payments=2/30")
+    get_rate_limit_backend().clear()
+    yield
+    get_rate_limit_backend().clear()
+
+
+@pytest.mark.unit
+class TestRateLimits:
+    """Test the per-user, per-route-group request limits."""
+
+    def test_parse_quotas(self):
+        """Test reading RATE_LIMITS."""
+        assert parse_quotas("wallets=120/60, analytics = 30/10,gateway=,") == {
+            "wallets": (120, 60.0), "analytics": (30, 10.0)
+        }
+
+    def test_headers_and_429(self, authenticated_client: TestClient, limits):
+        """Test RateLimit-* headers count down, then 429 with Retry-After."""
+        remaining = []
+        for _ in range(3):
+            response = authenticated_client.get("/api/v1/analytics/stats")
+            assert response.status_code == 200
+            remaining.append(response.headers["ratelimit-remaining"])
+        response = authenticated_client.get("/api/v1/analytics/stats")
+
+        assert remaining == ["2", "1", "0"]
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "20"
+        assert response.headers["ratelimit-limit"] == "3"
+        assert response.headers["ratelimit-policy"] == "3;w=60"
+        assert response.headers["ratelimit-reset"] == "60"
+        assert response.json() == {"detail": "Too many requests, please slow down"}
+
+    def test_groups_have_own_quotas(self, authenticated_client: TestClient, limits):
+        """Test quotas are per route group, and unlisted groups aren't limited."""
+        for _ in range(3):
+            authenticated_client.get("/api/v1/analytics/stats")
+
+        assert authenticated_client.get("/api/v1/analytics/stats").status_code == 429
+        assert authenticated_client.get("/api/v1/payments/request/sent").headers["ratelimit-remaining"] == "1"
+        wallets = authenticated_client.get("/api/v1/wallets/")
+        assert wallets.status_code == 200
+        assert "ratelimit-limit" not in wallets.headers
+
+    def test_keyed_by_user_then_address(self, authenticated_client: TestClient, client: TestClient, limits):
+        """Test each user has a quota; no (or a forged) token falls back to the address."""
+        for _ in range(2):
+            authenticated_client.get("/api/v1/payments/request/sent")
+        assert authenticated_client.get("/api/v1/payments/request/sent").status_code == 429
+
+        other_user = {"Authorization": f"Bearer {create_access_token({'sub': '999'})}"}
+        assert client.get("/api/v1/payments/request/sent", headers=other_user).headers["ratelimit-remaining"] == "1"
+
+        forged = {"Authorization": "Bearer not-a-token"}
+        assert client.get("/api/v1/payments/link/unknown").headers["ratelimit-remaining"] == "1"
+        assert client.get("/api/v1/payments/link/unknown", headers=forged).headers["ratelimit-remaining"] == "0"
+        assert client.get("/api/v1/payments/link/unknown").status_code == 429
+
+    def test_exempt_paths_and_switch(self, client: TestClient, limits, monkeypatch):
+        """Test the webhook path and RATE_LIMIT_ENABLED=false skip the limits."""
+        monkeypatch.setattr(settings, "RATE_LIMITS", "gateway=1/60,payments=1/60")
+        webhook = client.post("/api/v1/gateway/webhook", json={})
+        assert "ratelimit-limit" not in webhook.headers
+
+        client.get("/api/v1/payments/link/unknown")
+        assert client.get("/api/v1/payments/link/unknown").status_code == 429
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+        assert client.get("/api/v1/payments/link/unknown").status_code == 404
@@ -0,0 +1,61 @@
+"""
+Startup performance tests for RosePay application.
+
+Cold starts matter on autoscaled containers, so importing the app must
+stay fast and must not load heavy optional libraries.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget for `import main` (cumulative, microseconds).
+# Override with IMPORT_TIME_BUDGET_US on slow CI machines.
+IMPORT_TIME_BUDGET_US = int(os.getenv("IMPORT_TIME_BUDGET_US", "1500000"))
+
+# Libraries that must only load when a request actually needs them
+LAZY_MODULES = ["razorpay", "qrcode", "PIL", "numpy"]
+
+
+def import_times() -> dict:
+    """Run `python -X importtime -c "import main"` and parse the report."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+@pytest.mark.slow
+class TestStartupImportTime:
+    """Test app import time stays within budget."""
+
+    def test_heavy_modules_not_imported(self):
+        """Test heavy clients (Razorpay, QR/PIL) are not imported at startup."""
+        times = import_times()
+
+        loaded = [name for name in LAZY_MODULES if name in times]
+        assert loaded == [], f"Imported at startup: {loaded}"
+
+    def test_import_time_within_budget(self):
+        """Test `import main` stays under the import-time budget."""
+        times = import_times()
+
+        assert times["main"] <= IMPORT_TIME_BUDGET_US, (
+            f"import main took {times['main'] / 1000:.0f}ms, "
+            f"budget is {IMPORT_TIME_BUDGET_US / 1000:.0f}ms"
+        )
@@ -272,6 +272,61 @@ class TestTransactionValidation:
         
         assert response.status_code == 422
 
+@pytest.mark.transaction
+@pytest.mark.unit
+class TestListResponses:
+    """Test list endpoints built from column rows match their response models."""
+    
+    def test_transactions_match_response_model(self, authenticated_client: TestClient, db_session):
+        """Test the rows render exactly as the model would render ORM objects."""
+        from pydantic import TypeAdapter
+        from models import Transaction
+        from schemas import TransactionResponse
+        
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        for amount in (10.0, 20.5):
+            authenticated_client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": amount})
+        
+        response = authenticated_client.get("/api/v1/transactions")
+        transactions = db_session.query(Transaction).order_by(Transaction.created_at.desc()).all()
+        adapter = TypeAdapter(list[TransactionResponse])
+        
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == adapter.dump_json(adapter.validate_python(transactions))
+    
+    def test_wallet_list_hides_cache_fields(self, authenticated_client: TestClient):
+        """Test cached wallet dicts are cut down to WalletResponse's fields."""
+        authenticated_client.post("/api/v1/wallets", json={"currency": "EUR"})
+        
+        wallets = authenticated_client.get("/api/v1/wallets").json()
+        
+        assert list(wallets[0]) == ["currency", "id", "user_id", "balance", "created_at"]
+    
+    def test_recurring_list_booleans(self, authenticated_client: TestClient):
+        """Test 0/1 columns come out as JSON booleans."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        created = authenticated_client.post("/api/v1/recurring/create", json={
+            "wallet_id": wallet_id, "recipient_wallet_id": wallet_id, "amount": 5.0, "frequency": "monthly"
+        }).json()
+        
+        assert authenticated_client.get("/api/v1/recurring/list").json() == [created]
+        assert created["is_active"] is True
+    
+    def test_bill_split_participants(self, authenticated_client: TestClient, client: TestClient, test_user_data_2):
+        """Test bill splits list (and create) return their participants."""
+        other_id = client.post("/api/v1/users/register", json=test_user_data_2).json()["id"]
+        created = authenticated_client.post("/api/v1/billsplit/create", json={
+            "title": "Dinner", "total_amount": 30.0, "participants": [{"user_id": other_id, "amount": 30.0}]
+        })
+        
+        assert created.status_code == 200
+        assert created.json()["participants"] == [{
+            "id": 1, "user_id": other_id, "amount_owed": 30.0, "amount_paid": 0.0,
+            "is_settled": False, "settled_at": None
+        }]
+        assert authenticated_client.get("/api/v1/billsplit/list").json() == [created.json()]
+
+
 @pytest.mark.transaction
 @pytest.mark.integration
 class TestTransactionIntegration:
@@ -288,3 +288,123 @@ class TestWalletIntegration:
         
         assert balance1_response.json()["balance"] == 100.0
         assert balance2_response.json()["balance"] == 0.0
+
+
+@pytest.mark.wallet
+@pytest.mark.unit
+class TestBalanceCache:
+    """Test the wallet balance cache (write-through, versions, invalidation)."""
+    
+    def test_reads_after_writes_are_hits_and_fresh(self, authenticated_client: TestClient):
+        """Test balances are written through: no stale read and no extra miss after a deposit."""
+        from services.wallet_cache import balance_cache
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}/balance").json()["balance"] == 0.0
+        misses = balance_cache.stats()["misses"]
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 25.0})
+        
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}/balance").json()["balance"] == 25.0
+        assert authenticated_client.get("/api/v1/wallets").json()[0]["balance"] == 25.0
+        assert balance_cache.stats()["misses"] == misses
+        assert balance_cache.stats()["write_throughs"] >= 1
+    
+    def test_transfer_updates_recipient_cache(self, authenticated_client: TestClient, client: TestClient, test_user_data_2):
+        """Test a transfer writes the recipient's cached balance too."""
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 100.0})
+        client.post("/api/v1/users/register", json=test_user_data_2)
+        token = client.post("/api/v1/users/login", json=test_user_data_2).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        other_id = client.post("/api/v1/wallets", json={"currency": "USD"}, headers=headers).json()["id"]
+        assert client.get(f"/api/v1/wallets/{other_id}/balance", headers=headers).json()["balance"] == 0.0
+        
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/transfer", json={
+            "recipient_wallet_id": other_id, "amount": 30.0
+        })
+        
+        assert client.get(f"/api/v1/wallets/{other_id}/balance", headers=headers).json()["balance"] == 30.0
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}/balance").json()["balance"] == 70.0
+    
+    def test_new_wallet_shows_up_in_cached_list(self, authenticated_client: TestClient):
+        """Test creating a wallet drops the cached list."""
+        authenticated_client.post("/api/v1/wallets", json={"currency": "USD"})
+        assert len(authenticated_client.get("/api/v1/wallets").json()) == 1
+        
+        authenticated_client.post("/api/v1/wallets", json={"currency": "EUR"})
+        
+        assert len(authenticated_client.get("/api/v1/wallets").json()) == 2
+    
+    def test_fill_racing_a_write_is_not_cached(self):
+        """Test a read that loaded before a write committed doesn't store its (old) result."""
+        from services.wallet_cache import BalanceCache
+        cache = BalanceCache(maxsize=10, ttl=60)
+        old = {"id": 1, "user_id": 7, "balance": 10.0, "version": 1}
+        
+        def load_while_a_write_commits():
+            cache.write([{**old, "balance": 5.0, "version": 2}])
+            return [old]
+        
+        assert cache.read(7, load_while_a_write_commits) == [old]
+        assert cache.read(7, lambda: [{**old, "balance": 5.0, "version": 2}])[0]["balance"] == 5.0
+        assert cache.read(7, lambda: [])[0]["balance"] == 5.0
+        assert cache.stats()["stale_fills_skipped"] == 1
+    
+    def test_older_write_does_not_overwrite_newer(self):
+        """Test racing write-throughs keep the higher version, whatever the order."""
+        from services.wallet_cache import BalanceCache
+        cache = BalanceCache(maxsize=10, ttl=60)
+        wallet = {"id": 1, "user_id": 7, "balance": 10.0, "version": 1}
+        cache.read(7, lambda: [wallet])
+        
+        cache.write([{**wallet, "balance": 4.0, "version": 3}])
+        cache.write([{**wallet, "balance": 6.0, "version": 2}])
+        
+        assert cache.read(7, lambda: [])[0]["balance"] == 4.0
+    
+    def test_notifications_from_other_workers_invalidate(self, monkeypatch):
+        """Test a NOTIFY from another worker drops the entry; our own is ignored."""
+        from services import wallet_cache
+        cache = wallet_cache.BalanceCache(maxsize=10, ttl=60)
+        monkeypatch.setattr(wallet_cache, "balance_cache", cache)
+        cache.read(7, lambda: [{"id": 1, "user_id": 7, "balance": 1.0, "version": 1}])
+        
+        wallet_cache.handle_notification(f"{wallet_cache._PROCESS}:7")
+        assert cache.stats()["size"] == 1
+        
+        wallet_cache.handle_notification("otherworker1:7,8")
+        assert cache.stats()["size"] == 0
+    
+    def test_racing_writes_cannot_both_commit(self, authenticated_client: TestClient, test_db):
+        """Test two sessions depositing into the same wallet they both read: the second one fails, the cache keeps the first."""
+        from sqlalchemy.orm.exc import StaleDataError
+        from models import Transaction, TransactionStatus, TransactionType, Wallet
+        from services.wallet_events import record_wallet_change
+        wallet_id = authenticated_client.post("/api/v1/wallets", json={"currency": "USD"}).json()["id"]
+        authenticated_client.post(f"/api/v1/wallets/{wallet_id}/add-money", json={"amount": 10.0})
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}/balance").json()["balance"] == 10.0
+        
+        def deposit(session, amount):
+            wallet = session.get(Wallet, wallet_id)
+            wallet.balance += amount
+            transaction = Transaction(user_id=wallet.user_id, wallet_id=wallet_id, amount=amount,
+                                      transaction_type=TransactionType.DEPOSIT, status=TransactionStatus.COMPLETED)
+            session.add(transaction)
+            record_wallet_change(session, transaction, wallet)
+            return wallet
+        
+        first, second = test_db(), test_db()
+        try:
+            version = deposit(first, 5.0).version
+            assert deposit(second, 7.0).version == version  # both read the same row
+            first.commit()
+            with pytest.raises(StaleDataError):
+                second.commit()
+            second.rollback()
+            
+            assert first.get(Wallet, wallet_id).version == version + 1
+            assert second.get(Wallet, wallet_id).balance == 15.0
+        finally:
+            first.close()
+            second.close()
+        assert authenticated_client.get(f"/api/v1/wallets/{wallet_id}/balance").json()["balance"] == 15.0
@@ -0,0 +1,112 @@
+"""
+Local webhook receiver for tests and benchmarks - stands in for a
+merchant's server.
+
+WHAT THIS FILE DOES:
+- Runs a small HTTP server on 127.0.0.1 (random port) in a thread
+- Records every POST (path, headers, JSON body) and answers 200
+- Can be told to fail (fail_next) or be slow (delay)
+- Counts requests in flight and TCP connections per path, to check
+  concurrency caps and keep-alive
+
+USAGE:
+    with WebhookReceiver() as receiver:
+        url = receiver.url + "/hooks/shop"
+        ...
+        receiver.received  # [{"path", "headers", "body", "raw"}, ...]
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default (5) drops bursts of new connections
+
+
+class WebhookReceiver:
+    """Records webhook POSTs. Thread-safe; use as a context manager."""
+
+    def __init__(self):
+        self.received: list[dict] = []
+        self.delay = 0.0  # seconds to wait before answering
+        self.in_flight: dict[str, int] = defaultdict(int)
+        self.max_in_flight: dict[str, int] = defaultdict(int)
+        self.connections: dict[str, set] = defaultdict(set)  # client (host, port) per path
+        self._failures_left = 0
+        self._failure_status = 500
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "WebhookReceiver":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail_next(self, count: int, status: int = 500) -> None:
+        """Answer the next `count` requests with an error status."""
+        with self._lock:
+            self._failures_left = count
+            self._failure_status = status
+
+    def bodies(self, path: str = None) -> list[dict]:
+        """JSON bodies received (on one path, if given)."""
+        with self._lock:
+            return [r["body"] for r in self.received if path is None or r["path"] == path]
+
+    def _handler_class(self):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                with receiver._lock:
+                    receiver.in_flight[self.path] += 1
+                    receiver.max_in_flight[self.path] = max(
+                        receiver.max_in_flight[self.path], receiver.in_flight[self.path]
+                    )
+                    receiver.connections[self.path].add(self.client_address)
+                try:
+                    if receiver.delay:
+                        time.sleep(receiver.delay)
+                    with receiver._lock:
+                        if receiver._failures_left > 0:
+                            receiver._failures_left -= 1
+                            code = receiver._failure_status
+                        else:
+                            code = 200
+                            receiver.received.append({
+                                "path": self.path,
+                                "headers": dict(self.headers),
+                                "body": json.loads(raw) if raw else None,
+                                "raw": raw,
+                            })
+                finally:
+                    with receiver._lock:
+                        receiver.in_flight[self.path] -= 1
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the sender gave up (timeout) before we answered
+
+            def log_message(self, *args):
+                pass
+
+        return Handler